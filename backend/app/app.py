@@ -1,13 +1,49 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
 from config import settings
+from lib.metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, registry as metrics_registry
+from lib.tracing import SPAN_KIND_SERVER, get_tracer, parse_traceparent, start_span
+from lib.nlp_registry import get_nlp_registry
+from services.kg_cache import get_kg_cache
+from services.kg_snapshot import KGSnapshotStore, warm_kg_cache
+from services.job_queue import get_job_queue
+from services.style_analysis import get_style_models
 from routes import project as project_routes
 from routes import editor as editor_routes
 from routes import ws_editor as ws_editor_routes
 from routes import plot_thread as plot_thread_routes
+from routes import jobs as jobs_routes
+from routes import admin as admin_routes
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    kg_cache = get_kg_cache()
+    if settings.kg_snapshot_dir:
+        warm_kg_cache(
+            kg_cache,
+            KGSnapshotStore(settings.kg_snapshot_dir),
+            limit=settings.kg_snapshot_warm_count,
+        )
+    if settings.nlp_preload_models:
+        await asyncio.to_thread(get_nlp_registry().preload, settings.nlp_preload_models)
+    if settings.style_models_warmup:
+        await asyncio.to_thread(get_style_models().warmup, settings.style_models_warmup)
+    job_queue = get_job_queue()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    kg_cache.save_snapshots()
+    get_tracer().flush()
 
-app = FastAPI(title="Engine")
+
+app = FastAPI(title="Engine", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,13 +53,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """
+    Per-route latency histogram, labelled by route template (not raw path).
+
+    Each request also runs in a server span that continues the caller's
+    W3C traceparent header, so its analysis stages, Supabase and OpenAI
+    calls and any jobs it enqueues share one trace.
+    """
+    start = time.perf_counter()
+    status = 500
+    with start_span(
+        f"{request.method} {request.url.path}",
+        parent=parse_traceparent(request.headers.get("traceparent")),
+        kind=SPAN_KIND_SERVER,
+        attributes={"http.method": request.method},
+    ) as span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            if span is not None:
+                response.headers["traceparent"] = span.context.traceparent
+            return response
+        finally:
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=route,
+                status=status,
+            )
+            if span is not None:
+                span.name = f"{request.method} {route}"
+                span.set_attribute("http.route", route)
+                span.set_attribute("http.status_code", status)
+
+
 app.include_router(project_routes.router)
 app.include_router(editor_routes.router)
 app.include_router(ws_editor_routes.router)
 app.include_router(plot_thread_routes.router)
+app.include_router(jobs_routes.router)
+app.include_router(admin_routes.router)
 
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "message": "Backend is running"}
 
+
+@app.get("/health/nlp")
+def nlp_models():
+    """Shared spaCy models loaded in this worker, with load time and size."""
+    return {"status": "success", "models": get_nlp_registry().stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint for this worker's latency histograms and counters."""
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE)
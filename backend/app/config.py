@@ -39,10 +39,87 @@ class Settings:
         # Cache settings
         self.kg_cache_ttl_seconds: int = int(os.getenv("KG_CACHE_TTL_SECONDS", "300"))
         self.kg_cache_max_size: int = int(os.getenv("KG_CACHE_MAX_SIZE", "100"))
+        # "memory" (single worker) or "file" (shared by all workers on one host)
+        self.kg_invalidation_backend: str = os.getenv("KG_INVALIDATION_BACKEND", "memory")
+        self.kg_invalidation_dir: str = os.getenv("KG_INVALIDATION_DIR", "")
+        # Local directory for graph snapshots (empty disables warm starts)
+        self.kg_snapshot_dir: str = os.getenv("KG_SNAPSHOT_DIR", "")
+        self.kg_snapshot_warm_count: int = int(os.getenv("KG_SNAPSHOT_WARM_COUNT", "20"))
         
         # RAG settings
         self.rag_similarity_threshold: float = float(os.getenv("RAG_SIMILARITY_THRESHOLD", "0.3"))
         self.rag_top_k: int = int(os.getenv("RAG_TOP_K", "3"))
+        # Search an in-process vector index instead of the match_narrative_chunks RPC
+        self.rag_local_index: bool = os.getenv("RAG_LOCAL_INDEX", "false").lower() in {"1", "true", "yes"}
+        self.rag_local_index_max_projects: int = int(os.getenv("RAG_LOCAL_INDEX_MAX_PROJECTS", "50"))
+        self.rag_local_index_refresh_seconds: float = float(
+            os.getenv("RAG_LOCAL_INDEX_REFRESH_SECONDS", "30")
+        )
+        # Content hashes kept in memory to reject duplicate saves without a query
+        self.content_hash_cache_max_projects: int = int(os.getenv("CONTENT_HASH_CACHE_MAX_PROJECTS", "200"))
+        self.content_hash_refresh_seconds: float = float(os.getenv("CONTENT_HASH_REFRESH_SECONDS", "30"))
+        # Last acknowledged editor draft per connection, for delta autosave
+        self.draft_sync_max_sessions: int = int(os.getenv("DRAFT_SYNC_MAX_SESSIONS", "1000"))
+        self.draft_sync_ttl_seconds: float = float(os.getenv("DRAFT_SYNC_TTL_SECONDS", "1800"))
+        # Fuse vector results with a local BM25 index (reciprocal-rank fusion)
+        self.rag_hybrid: bool = os.getenv("RAG_HYBRID", "false").lower() in {"1", "true", "yes"}
+        # Hybrid retrieval gives up on the query embedding after this long and uses BM25 alone
+        self.rag_hybrid_embedding_timeout_seconds: float = float(
+            os.getenv("RAG_HYBRID_EMBEDDING_TIMEOUT_SECONDS", "1.5")
+        )
+        # Scenes retrieved for /editor/suggest, reused while the context window is unchanged
+        self.suggest_scene_cache_ttl_seconds: int = int(os.getenv("SUGGEST_SCENE_CACHE_TTL_SECONDS", "120"))
+        self.suggest_scene_cache_size: int = int(os.getenv("SUGGEST_SCENE_CACHE_SIZE", "256"))
+        
+        # Background job queue (SQLite file shared by all workers on one host)
+        self.job_db_path: str = os.getenv("JOB_DB_PATH", "data/jobs.db")
+        self.job_summary_concurrency: int = int(os.getenv("JOB_SUMMARY_CONCURRENCY", "2"))
+        self.job_plot_concurrency: int = int(os.getenv("JOB_PLOT_CONCURRENCY", "1"))
+        self.job_poll_interval_seconds: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+        self.job_lease_seconds: float = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+        self.job_maintenance_concurrency: int = int(os.getenv("JOB_MAINTENANCE_CONCURRENCY", "1"))
+        # Project reindex/backfill (services/reindex.py)
+        self.reindex_page_size: int = int(os.getenv("REINDEX_PAGE_SIZE", "200"))
+        self.reindex_embed_batch_size: int = int(os.getenv("REINDEX_EMBED_BATCH_SIZE", "64"))
+        self.reindex_concurrency: int = int(os.getenv("REINDEX_CONCURRENCY", "4"))
+        self.reindex_nlp_batch_size: int = int(os.getenv("REINDEX_NLP_BATCH_SIZE", "8"))
+        self.reindex_nlp_processes: int = int(os.getenv("REINDEX_NLP_PROCESSES", "1"))
+        # Shared secret for /admin routes (empty disables them)
+        self.admin_token: str = os.getenv("ADMIN_TOKEN", "")
+        # Request tracing (lib/tracing.py): "file" or "otlp" to export spans, empty disables
+        self.tracing_exporter: str = os.getenv("TRACING_EXPORTER", "").lower()
+        self.tracing_file_path: str = os.getenv("TRACING_FILE_PATH", "data/traces.jsonl")
+        self.tracing_otlp_endpoint: str = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318")
+        self.tracing_service_name: str = os.getenv("TRACING_SERVICE_NAME", "engine")
+        
+        # Plot extraction: token-bounded windows extracted concurrently
+        self.plot_extraction_window_tokens: int = int(os.getenv("PLOT_EXTRACTION_WINDOW_TOKENS", "2000"))
+        self.plot_extraction_window_overlap_chunks: int = int(
+            os.getenv("PLOT_EXTRACTION_WINDOW_OVERLAP_CHUNKS", "1")
+        )
+        self.plot_extraction_concurrency: int = int(os.getenv("PLOT_EXTRACTION_CONCURRENCY", "4"))
+        # Already-extracted chunks shown before new ones for continuity
+        self.plot_extraction_context_chunks: int = int(os.getenv("PLOT_EXTRACTION_CONTEXT_CHUNKS", "1"))
+        # Plot board read model cache (validated against plot_data_versions)
+        self.plot_board_cache_ttl_seconds: int = int(os.getenv("PLOT_BOARD_CACHE_TTL_SECONDS", "300"))
+        self.plot_board_cache_max_size: int = int(os.getenv("PLOT_BOARD_CACHE_MAX_SIZE", "200"))
+        # spaCy models loaded into the shared registry at startup (e.g. "en_core_web_sm")
+        self.nlp_preload_models: List[str] = self._parse_list_env("NLP_PRELOAD_MODELS", [])
+        # Style analysis inference: "torch" (full precision), or opt in to "quantized" (dynamic int8) or "onnx"
+        self.style_inference_backend: str = os.getenv("STYLE_INFERENCE_BACKEND", "torch")
+        # Intra-op threads for style models (0 keeps the library default)
+        self.style_inference_threads: int = int(os.getenv("STYLE_INFERENCE_THREADS", "0"))
+        # Exported ONNX models are saved here and reused across restarts
+        self.style_onnx_cache_dir: str = os.getenv("STYLE_ONNX_CACHE_DIR", "data/onnx")
+        # Style models loaded at startup ("nlp", "emotion", "genre" or "all"; empty loads on first use)
+        self.style_models_warmup: List[str] = self._parse_list_env("STYLE_MODELS_WARMUP", [])
+        # Streaming style analysis: spaCy segments and sampled classifier windows
+        self.style_segment_chars: int = int(os.getenv("STYLE_SEGMENT_CHARS", "5000"))
+        self.style_nlp_batch_size: int = int(os.getenv("STYLE_NLP_BATCH_SIZE", "16"))
+        self.style_richness_window_tokens: int = int(os.getenv("STYLE_RICHNESS_WINDOW_TOKENS", "2500"))
+        self.style_classify_windows: int = int(os.getenv("STYLE_CLASSIFY_WINDOWS", "16"))
+        self.style_classify_window_chars: int = int(os.getenv("STYLE_CLASSIFY_WINDOW_CHARS", "2000"))
+        self.style_classify_batch_size: int = int(os.getenv("STYLE_CLASSIFY_BATCH_SIZE", "8"))
         
         # Character summary settings
         self.character_summary_throttle_seconds: int = int(
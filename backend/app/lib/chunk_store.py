@@ -0,0 +1,139 @@
+"""Shared registry for in-process per-project indexes over narrative_chunks."""
+
+from __future__ import annotations
+
+import abc
+import threading
+import time
+from typing import Any, Generic, Iterator, TypeVar
+
+from cachetools import LRUCache
+from supabase import Client
+
+# Page size used when loading a project's chunks from Supabase
+LOAD_PAGE_SIZE = 500
+
+IndexT = TypeVar("IndexT")
+
+
+def _later(current: str | None, candidate: str | None) -> str | None:
+    """The later of two ISO timestamps, ignoring missing ones."""
+    if candidate and (current is None or candidate > current):
+        return candidate
+    return current
+
+
+class ProjectChunkStore(abc.ABC, Generic[IndexT]):
+    """
+    Registry of per-project chunk indexes, loaded lazily from narrative_chunks.
+
+    Indexes are kept for the most recently used projects. Chunks inserted by
+    this worker are added directly; chunks written by other workers are
+    picked up by an incremental refresh once the index is older than
+    ``refresh_seconds``.
+
+    Subclasses choose the columns to load and how a row enters their index.
+    Index objects must expose ``max_chunk_index``, ``loaded_at`` and
+    ``_lock``, plus ``updated_hwm`` when ``track_updates`` is set.
+    """
+
+    # Columns selected for each chunk
+    columns = "id, content, chunk_index"
+    # Also re-read older chunks whose updated_at moved since the last refresh
+    track_updates = False
+
+    def __init__(self, max_projects: int = 50, refresh_seconds: float = 30.0) -> None:
+        self._indexes: LRUCache = LRUCache(maxsize=max_projects)
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+
+    @abc.abstractmethod
+    def _new_index(self) -> IndexT:
+        """Create an empty index for a project."""
+
+    @abc.abstractmethod
+    def _add_row(self, index: IndexT, row: dict[str, Any], replace: bool = False) -> None:
+        """Add a narrative_chunks row to an index (replacing it if ``replace``)."""
+
+    def _pages(
+        self,
+        supabase: Client,
+        project_id: str,
+        after: int,
+        updated_since: str | None = None,
+        up_to: int | None = None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yield pages of chunks with chunk_index > after, in chunk_index order."""
+        while True:
+            query = (
+                supabase.table("narrative_chunks")
+                .select(self.columns)
+                .eq("project_id", project_id)
+            )
+            if updated_since is not None:
+                query = query.gte("updated_at", updated_since).lte("chunk_index", up_to)
+            rows = (
+                query.gt("chunk_index", after)
+                .order("chunk_index", desc=False)
+                .limit(LOAD_PAGE_SIZE)
+                .execute()
+            ).data or []
+            if rows:
+                yield rows
+            if len(rows) < LOAD_PAGE_SIZE:
+                return
+            after = max(row.get("chunk_index", 0) for row in rows)
+
+    def _fetch_into(self, index: IndexT, project_id: str, supabase: Client) -> None:
+        """
+        Bring an index up to date with narrative_chunks.
+
+        Pages through chunks newer than the index's max chunk_index. With
+        ``track_updates``, it then re-reads older chunks updated since the
+        last refresh and replaces (or adds) them.
+        """
+        known_max = index.max_chunk_index
+        after = known_max
+        newest = index.updated_hwm if self.track_updates else None
+
+        for rows in self._pages(supabase, project_id, after):
+            for row in rows:
+                self._add_row(index, row)
+                after = max(after, row.get("chunk_index", 0))
+                newest = _later(newest, row.get("updated_at"))
+
+        if self.track_updates and index.updated_hwm is not None and known_max >= 0:
+            for rows in self._pages(
+                supabase, project_id, -1, updated_since=index.updated_hwm, up_to=known_max
+            ):
+                for row in rows:
+                    self._add_row(index, row, replace=True)
+                    newest = _later(newest, row.get("updated_at"))
+
+        # Rows the index rejects (e.g. no embedding) still advance the cursor
+        index.max_chunk_index = max(index.max_chunk_index, after)
+        if self.track_updates:
+            index.updated_hwm = newest
+        index.loaded_at = time.monotonic()
+
+    def get_index(self, project_id: str, supabase: Client) -> IndexT:
+        """Return the project's index, loading or refreshing it if needed."""
+        with self._lock:
+            index = self._indexes.get(project_id)
+            if index is None:
+                index = self._new_index()
+                self._indexes[project_id] = index
+
+        with index._lock:
+            if time.monotonic() - index.loaded_at > self._refresh_seconds:
+                self._fetch_into(index, project_id, supabase)
+        return index
+
+    def _loaded_index(self, project_id: str) -> IndexT | None:
+        """Return the project's index if it is already loaded."""
+        with self._lock:
+            return self._indexes.get(project_id)
+
+    def invalidate(self, project_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(project_id, None)
@@ -0,0 +1,168 @@
+"""Per-project sets of saved narrative chunk content hashes."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+
+from cachetools import LRUCache
+from supabase import Client
+
+# Page size used when loading a project's hashes from Supabase
+LOAD_PAGE_SIZE = 1000
+
+
+def compute_content_hash(content: str) -> str:
+    """
+    Hash chunk content for deduplication.
+
+    Args:
+        content: The text content to hash
+
+    Returns:
+        First 16 characters of the SHA-256 hash (narrative_chunks.content_hash)
+    """
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+class ProjectContentHashes:
+    """Content hashes of one project's narrative chunks."""
+
+    def __init__(self) -> None:
+        self.hashes: set[str] = set()
+        self.max_chunk_index = -1
+        self.loaded_at: float | None = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+
+class ContentHashStore:
+    """
+    Registry of per-project content hash sets, loaded lazily from narrative_chunks.
+
+    A miss answers a new save without querying the database, once the set is
+    loaded. A miss refreshes the set incrementally (chunks newer than the
+    loaded chunk_index) once it is older than ``refresh_seconds``, so chunks
+    saved by other workers are seen; anything still missed is caught by the
+    append_narrative_chunk function, which dedupes atomically.
+
+    A hash already in the set is confirmed with a single indexed lookup
+    before a save is rejected: the incremental refresh never sees deleted
+    chunks, and text re-entered after its chunk was deleted is not a
+    duplicate. A hash whose chunk is gone is dropped from the set.
+
+    Sets are exact rather than probabilistic: a false positive would
+    silently drop a new save.
+    """
+
+    def __init__(self, max_projects: int = 200, refresh_seconds: float = 30.0) -> None:
+        self._projects: LRUCache = LRUCache(maxsize=max_projects)
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+
+    def _fetch_into(
+        self,
+        entry: ProjectContentHashes,
+        project_id: str,
+        supabase: Client,
+    ) -> None:
+        """Page through hashes of chunks newer than the entry's max chunk_index."""
+        after = entry.max_chunk_index
+        while True:
+            rows = (
+                supabase.table("narrative_chunks")
+                .select("content_hash, chunk_index")
+                .eq("project_id", project_id)
+                .gt("chunk_index", after)
+                .order("chunk_index", desc=False)
+                .limit(LOAD_PAGE_SIZE)
+                .execute()
+            ).data or []
+            for row in rows:
+                if row.get("content_hash"):
+                    entry.hashes.add(row["content_hash"])
+                after = max(after, row.get("chunk_index", 0))
+            if len(rows) < LOAD_PAGE_SIZE:
+                break
+        entry.max_chunk_index = max(entry.max_chunk_index, after)
+        entry.loaded_at = time.monotonic()
+
+    @staticmethod
+    def _is_saved(project_id: str, content_hash: str, supabase: Client) -> bool:
+        """Look up one hash in narrative_chunks."""
+        rows = (
+            supabase.table("narrative_chunks")
+            .select("chunk_index")
+            .eq("project_id", project_id)
+            .eq("content_hash", content_hash)
+            .limit(1)
+            .execute()
+        ).data
+        return bool(rows)
+
+    def _entry(self, project_id: str) -> ProjectContentHashes:
+        with self._lock:
+            entry = self._projects.get(project_id)
+            if entry is None:
+                entry = ProjectContentHashes()
+                self._projects[project_id] = entry
+            return entry
+
+    def contains(self, project_id: str, content_hash: str, supabase: Client) -> bool:
+        """
+        Check whether the project already has a chunk with this content hash.
+
+        Args:
+            project_id: The project identifier
+            content_hash: Hash from compute_content_hash
+            supabase: Client used to load or refresh the project's hashes
+
+        Returns:
+            True if the content is already saved
+        """
+        entry = self._entry(project_id)
+        with entry._lock:
+            if content_hash in entry.hashes:
+                if self._is_saved(project_id, content_hash, supabase):
+                    return True
+                # The chunk was deleted since its hash was recorded
+                entry.hashes.discard(content_hash)
+                return False
+            if entry.loaded_at is None or time.monotonic() - entry.loaded_at > self._refresh_seconds:
+                self._fetch_into(entry, project_id, supabase)
+            return content_hash in entry.hashes
+
+    def add(self, project_id: str, content_hash: str, chunk_index: int | None = None) -> None:
+        """Record a saved chunk's hash, if the project is loaded."""
+        with self._lock:
+            entry = self._projects.get(project_id)
+        if entry is None:
+            return
+        with entry._lock:
+            entry.hashes.add(content_hash)
+            if chunk_index is not None and chunk_index == entry.max_chunk_index + 1:
+                entry.max_chunk_index = chunk_index
+
+    def invalidate(self, project_id: str) -> None:
+        with self._lock:
+            self._projects.pop(project_id, None)
+
+
+# Global store instance
+_content_hash_store: ContentHashStore | None = None
+
+
+def get_content_hash_store() -> ContentHashStore:
+    """Get or create the global content hash store."""
+    from config import settings
+
+    global _content_hash_store
+    if _content_hash_store is None:
+        _content_hash_store = ContentHashStore(
+            max_projects=settings.content_hash_cache_max_projects,
+            refresh_seconds=settings.content_hash_refresh_seconds,
+        )
+    return _content_hash_store
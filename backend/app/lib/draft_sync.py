@@ -0,0 +1,253 @@
+"""Delta sync for editor drafts: clients send edit ops instead of the full text."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from cachetools import TTLCache
+
+from lib.content_hashes import compute_content_hash
+
+# Reasons a delta is rejected; the client answers any of them by resending the full draft
+RESYNC_UNKNOWN_BASE = "unknown_base"
+RESYNC_VERSION_MISMATCH = "version_mismatch"
+RESYNC_INVALID_OP = "invalid_op"
+RESYNC_CHECKSUM_MISMATCH = "checksum_mismatch"
+
+
+class DraftSyncError(ValueError):
+    """A delta could not be applied to the server's copy of the draft."""
+
+    def __init__(self, reason: str, detail: str = "") -> None:
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+
+
+def apply_ops(text: str, ops: Iterable[dict[str, Any]]) -> tuple[str, int, int]:
+    """
+    Apply edit ops to a draft.
+
+    Ops run in order, each against the text left by the previous one.
+    Positions and lengths count Unicode code points:
+
+        {"op": "insert", "pos": 10, "text": "new words"}
+        {"op": "delete", "pos": 10, "len": 4}
+
+    Args:
+        text: The acknowledged draft
+        ops: Edit operations
+
+    Returns:
+        (new text, start, end) where [start, end) covers every inserted
+        character in the new text (start == end for pure deletions)
+
+    Raises:
+        DraftSyncError: If an op is malformed or out of range
+    """
+    start: int | None = None
+    end = 0
+    for op in ops:
+        kind = op.get("op")
+        pos = op.get("pos")
+        if not isinstance(pos, int) or isinstance(pos, bool) or not 0 <= pos <= len(text):
+            raise DraftSyncError(RESYNC_INVALID_OP, f"position {pos!r} outside 0..{len(text)}")
+
+        if kind == "insert":
+            inserted = op.get("text")
+            if not isinstance(inserted, str):
+                raise DraftSyncError(RESYNC_INVALID_OP, "insert needs text")
+            size = len(inserted)
+            text = text[:pos] + inserted + text[pos:]
+            if start is None:
+                start, end = pos, pos + size
+            else:
+                start = min(start if start < pos else start + size, pos)
+                end = max(end if end < pos else end + size, pos + size)
+        elif kind == "delete":
+            size = op.get("len")
+            if not isinstance(size, int) or isinstance(size, bool) or size < 0 or pos + size > len(text):
+                raise DraftSyncError(RESYNC_INVALID_OP, f"delete of {size!r} at {pos} past end")
+            text = text[:pos] + text[pos + size:]
+
+            def shift(x: int) -> int:
+                return x if x <= pos else max(pos, x - size)
+
+            if start is None:
+                start, end = pos, pos
+            else:
+                start, end = min(shift(start), pos), max(shift(end), pos)
+        else:
+            raise DraftSyncError(RESYNC_INVALID_OP, f"unknown op {kind!r}")
+
+    if start is None:
+        return text, 0, 0
+    return text, start, end
+
+
+def paragraph_bounds(text: str, start: int, end: int) -> tuple[int, int]:
+    """Widen [start, end) to whole lines, so analysis sees complete paragraphs."""
+    line_end = text.find("\n", end)
+    return text.rfind("\n", 0, start) + 1, len(text) if line_end == -1 else line_end
+
+
+@dataclass
+class DraftDelta:
+    """A draft after a sync, and the region analysis should look at."""
+
+    version: int
+    text: str
+    start: int
+    end: int
+    changed: bool = True
+
+    @property
+    def checksum(self) -> str:
+        return compute_content_hash(self.text)
+
+    @property
+    def changed_text(self) -> str:
+        """The changed paragraphs ("" when the ops changed nothing)."""
+        if not self.changed:
+            return ""
+        lo, hi = paragraph_bounds(self.text, self.start, self.end)
+        return self.text[lo:hi]
+
+
+@dataclass
+class DraftState:
+    version: int
+    text: str
+
+
+class DraftSyncStore:
+    """
+    Recently acknowledged drafts per (session, project).
+
+    A session is one editor connection: the WebSocket itself, or a client
+    generated id on the HTTP save route. The last few versions are kept, not
+    just the newest, because a client computes its next delta against the
+    last version it has seen acknowledged: while a save is still in flight,
+    that is one or more versions behind the server. State lives in this
+    process only; a delta that reaches a worker without the base (restart,
+    another worker, expired entry) is rejected with RESYNC_UNKNOWN_BASE and
+    the client sends the full draft once to re-establish it.
+    """
+
+    def __init__(
+        self, max_sessions: int = 1000, ttl_seconds: float = 1800, history: int = 4
+    ) -> None:
+        self._drafts: TTLCache = TTLCache(maxsize=max_sessions, ttl=ttl_seconds)
+        self._history = max(1, history)
+        self._lock = threading.Lock()
+
+    def _store(self, key: tuple[str, str], states: list[DraftState], text: str) -> DraftState:
+        """Append the next version after states (oldest first) and trim the history."""
+        state = DraftState(version=(states[-1].version + 1) if states else 1, text=text)
+        self._drafts[key] = (states + [state])[-self._history:]
+        return state
+
+    def reset(self, session_id: str, project_id: str, text: str) -> DraftDelta:
+        """Store a full draft as the new base; the whole text counts as changed."""
+        key = (session_id, project_id)
+        with self._lock:
+            state = self._store(key, self._drafts.get(key, []), text)
+        return DraftDelta(version=state.version, text=text, start=0, end=len(text))
+
+    def apply(
+        self,
+        session_id: str,
+        project_id: str,
+        base_version: int,
+        ops: Iterable[dict[str, Any]],
+        checksum: str,
+    ) -> DraftDelta:
+        """
+        Apply ops against an acknowledged draft and advance the version.
+
+        The base may be any version still in the history, not only the
+        newest; the result becomes the next version either way.
+
+        Args:
+            session_id: Editor connection identifier
+            project_id: The project identifier
+            base_version: Version the client computed the ops against
+            ops: Edit operations (see apply_ops)
+            checksum: compute_content_hash of the client's resulting text
+
+        Returns:
+            The new draft with the changed region
+
+        Raises:
+            DraftSyncError: If the base is unknown or no longer in the
+                history, an op is invalid, or the result does not match the
+                checksum; the stored drafts are left unchanged
+        """
+        key = (session_id, project_id)
+        with self._lock:
+            states = self._drafts.get(key)
+            if not states:
+                raise DraftSyncError(RESYNC_UNKNOWN_BASE)
+            base = next((s for s in states if s.version == base_version), None)
+            if base is None:
+                raise DraftSyncError(
+                    RESYNC_VERSION_MISMATCH,
+                    f"server has {states[0].version}..{states[-1].version}, got {base_version}",
+                )
+            text, start, end = apply_ops(base.text, ops)
+            if compute_content_hash(text) != checksum:
+                raise DraftSyncError(RESYNC_CHECKSUM_MISMATCH)
+            # Changed relative to the newest draft, which is what was last analyzed
+            changed = text != states[-1].text
+            state = self._store(key, states, text)
+        return DraftDelta(version=state.version, text=text, start=start, end=end, changed=changed)
+
+    def receive(
+        self,
+        session_id: str,
+        project_id: str,
+        *,
+        content: str | None = None,
+        base_version: int | None = None,
+        ops: list[dict[str, Any]] | None = None,
+        checksum: str | None = None,
+    ) -> DraftDelta:
+        """
+        Handle one save message: ops against a base version, or the full content.
+
+        Raises:
+            DraftSyncError: If the delta cannot be applied (the client should
+                resend the full content)
+            ValueError: If the message carries neither ops nor content
+        """
+        if ops is not None:
+            if base_version is None or not checksum:
+                raise DraftSyncError(RESYNC_INVALID_OP, "ops need base_version and checksum")
+            return self.apply(session_id, project_id, base_version, ops, checksum)
+        if content is None:
+            raise ValueError("content or ops is required")
+        return self.reset(session_id, project_id, content)
+
+    def drop_session(self, session_id: str) -> None:
+        """Forget every draft of a closed connection."""
+        with self._lock:
+            for key in [k for k in self._drafts.keys() if k[0] == session_id]:
+                self._drafts.pop(key, None)
+
+
+# Global store instance
+_draft_sync_store: DraftSyncStore | None = None
+
+
+def get_draft_sync_store() -> DraftSyncStore:
+    """Get or create the global draft sync store."""
+    from config import settings
+
+    global _draft_sync_store
+    if _draft_sync_store is None:
+        _draft_sync_store = DraftSyncStore(
+            max_sessions=settings.draft_sync_max_sessions,
+            ttl_seconds=settings.draft_sync_ttl_seconds,
+        )
+    return _draft_sync_store
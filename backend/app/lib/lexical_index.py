@@ -0,0 +1,193 @@
+"""In-process per-project BM25 index over narrative chunk text."""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any
+
+from lib.chunk_store import ProjectChunkStore
+
+logger = logging.getLogger(__name__)
+
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+(?:'\w+)?")
+
+_STOPWORDS = frozenset(
+    """a an and are as at be but by for from had has have he her his i in is it
+    its me my of on or our she so that the their them they this to was we were
+    what when where which who will with you your""".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens with possessives folded ("Marguerite's" -> "marguerite")."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group(0)
+        if token.endswith("'s"):
+            token = token[:-2]
+        if token and token not in _STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class ProjectLexicalIndex:
+    """
+    Inverted index with BM25 scoring for one project's narrative chunks.
+
+    Postings map each term to {document position: term frequency}, so a query
+    only touches the documents that contain at least one of its terms.
+    """
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[int, int]] = {}
+        self._doc_lengths: list[int] = []
+        self._total_length = 0
+        self._chunks: list[dict[str, Any]] = []
+        self._ids: set[str] = set()
+        self.max_chunk_index = -1
+        self.loaded_at = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def add(self, chunk_id: str | None, content: str, chunk_index: int) -> bool:
+        """
+        Add a chunk to the index.
+
+        Args:
+            chunk_id: The narrative_chunks row id (duplicates are ignored)
+            content: The chunk text
+            chunk_index: Sequential index of the chunk
+
+        Returns:
+            True if the chunk was added
+        """
+        if not content:
+            return False
+
+        terms = Counter(tokenize(content))
+        with self._lock:
+            if chunk_id is not None and chunk_id in self._ids:
+                return False
+            position = len(self._chunks)
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[position] = tf
+            length = sum(terms.values())
+            self._doc_lengths.append(length)
+            self._total_length += length
+            self._chunks.append(
+                {"id": chunk_id, "content": content, "chunk_index": chunk_index}
+            )
+            if chunk_id is not None:
+                self._ids.add(chunk_id)
+            self.max_chunk_index = max(self.max_chunk_index, chunk_index or 0)
+            return True
+
+    def search(self, query_text: str, top_k: int = 3) -> list[dict[str, Any]]:
+        """
+        Return the top-k chunks by BM25 score for the query text.
+
+        Only chunks sharing at least one term with the query are returned,
+        ordered by score descending.
+        """
+        query_terms = set(tokenize(query_text))
+        with self._lock:
+            n_docs = len(self._chunks)
+            if not query_terms or n_docs == 0 or top_k <= 0:
+                return []
+            avg_length = self._total_length / n_docs or 1.0
+
+            scores: dict[int, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                for position, tf in postings.items():
+                    norm = BM25_K1 * (
+                        1.0 - BM25_B + BM25_B * self._doc_lengths[position] / avg_length
+                    )
+                    scores[position] = scores.get(position, 0.0) + idf * tf * (BM25_K1 + 1.0) / (
+                        tf + norm
+                    )
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            return [{**self._chunks[pos], "score": score} for pos, score in ranked]
+
+
+class LexicalIndexStore(ProjectChunkStore[ProjectLexicalIndex]):
+    """
+    Registry of per-project lexical indexes, loaded lazily from narrative_chunks.
+
+    Shares loading and refresh with LocalVectorStore: chunks inserted by this
+    worker are added directly, and chunks from other workers are picked up by
+    an incremental refresh once the index is older than ``refresh_seconds``.
+    """
+
+    def _new_index(self) -> ProjectLexicalIndex:
+        return ProjectLexicalIndex()
+
+    def _add_row(
+        self, index: ProjectLexicalIndex, row: dict[str, Any], replace: bool = False
+    ) -> None:
+        index.add(row.get("id"), row.get("content", ""), row.get("chunk_index", 0))
+
+    def add_chunk(
+        self,
+        project_id: str,
+        chunk_id: str | None,
+        content: str,
+        chunk_index: int,
+    ) -> None:
+        """Add a freshly inserted chunk to the project's index, if it is loaded."""
+        index = self._loaded_index(project_id)
+        if index is not None:
+            index.add(chunk_id, content, chunk_index)
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[dict[str, Any]]], k: int = 60
+) -> list[dict[str, Any]]:
+    """
+    Merge ranked chunk lists with reciprocal-rank fusion.
+
+    Each chunk scores sum(1 / (k + rank)) over the lists it appears in
+    (rank starting at 1). Chunks are identified by chunk_index; the first
+    occurrence's fields are kept and the fused score is stored as "score".
+    """
+    fused: dict[Any, dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            key = chunk.get("chunk_index")
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**chunk, "score": 0.0}
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda c: c["score"], reverse=True)
+
+
+# Global store instance
+_lexical_store: LexicalIndexStore | None = None
+
+
+def get_lexical_store() -> LexicalIndexStore:
+    """Get or create the global lexical index store."""
+    from config import settings
+
+    global _lexical_store
+    if _lexical_store is None:
+        _lexical_store = LexicalIndexStore(
+            max_projects=settings.rag_local_index_max_projects,
+            refresh_seconds=settings.rag_local_index_refresh_seconds,
+        )
+    return _lexical_store
@@ -0,0 +1,304 @@
+"""In-process latency and counter metrics, exported in Prometheus text format."""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+from urllib.parse import urlsplit
+
+from lib.tracing import current_span, get_tracer, start_span
+
+# Latency buckets in seconds; the upper ones cover LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def count(self, **labels: Any) -> int:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics of this worker process.
+
+    Each uvicorn worker keeps its own registry; Prometheus scrapes them
+    separately (or aggregates across instances) as usual.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Counter | Histogram) -> Counter | Histogram:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "engine_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = registry.histogram(
+    "engine_stage_duration_seconds",
+    "Latency of one processing stage (analysis, nlp, supabase, openai, kg, websocket).",
+    ("stage", "operation"),
+)
+STAGE_ERRORS = registry.counter(
+    "engine_stage_errors_total",
+    "Stage calls that raised.",
+    ("stage", "operation"),
+)
+OPENAI_TOKENS = registry.counter(
+    "engine_openai_tokens_total",
+    "OpenAI tokens used, from the response usage.",
+    ("operation", "model", "kind"),
+)
+KG_CACHE_REQUESTS = registry.counter(
+    "engine_kg_cache_requests_total",
+    "Knowledge graph cache lookups by result (hit or miss).",
+    ("result",),
+)
+WEBSOCKET_MESSAGES = registry.counter(
+    "engine_websocket_messages_total",
+    "WebSocket messages received by type.",
+    ("type",),
+)
+
+
+@contextmanager
+def timed(stage: str, operation: str, **attributes: Any) -> Iterator[None]:
+    """
+    Record the block's latency under (stage, operation); count it as an error if it raises.
+
+    The block also runs in a "<stage>.<operation>" trace span carrying the
+    given attributes (see lib/tracing.py).
+    """
+    start = time.perf_counter()
+    try:
+        with start_span(f"{stage}.{operation}", attributes=attributes or None):
+            yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage, operation=operation)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, operation=operation)
+
+
+def timed_iter(items: Any, stage: str, operation: str) -> Iterator[Any]:
+    """Yield from items, recording the time spent producing each one (not the consumer's)."""
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        except Exception:
+            STAGE_ERRORS.inc(stage=stage, operation=operation)
+            STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, operation=operation)
+            raise
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage, operation=operation)
+        yield item
+
+
+def openai_request(operation: str, create: Callable[..., Any], **kwargs: Any) -> Any:
+    """
+    Call an OpenAI SDK method, recording latency, errors and token usage.
+
+    Args:
+        operation: What the call is for, e.g. "grammar" or "embedding"
+        create: The SDK method, e.g. client.chat.completions.create
+        **kwargs: Arguments for the call (model=... labels the token counts)
+
+    Returns:
+        The SDK response
+    """
+    model = str(kwargs.get("model", ""))
+    with timed("openai", operation, model=model):
+        response = create(**kwargs)
+        usage = getattr(response, "usage", None)
+        span = current_span()
+        for kind in ("prompt_tokens", "completion_tokens"):
+            tokens = getattr(usage, kind, None)
+            if isinstance(tokens, int):
+                OPENAI_TOKENS.inc(tokens, operation=operation, model=model, kind=kind.split("_")[0])
+                if span is not None:
+                    span.set_attribute(f"openai.{kind}", tokens)
+    return response
+
+
+def _supabase_operation(request: Any) -> str:
+    """"narrative_chunks.select" or "rpc.append_narrative_chunk" from a PostgREST request."""
+    path = urlsplit(str(request.url)).path
+    parts = [p for p in path.split("/") if p]
+    if "rpc" in parts[:-1]:
+        return f"rpc.{parts[-1]}"
+    verb = {"GET": "select", "HEAD": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+    return f"{parts[-1] if parts else ''}.{verb.get(request.method, request.method.lower())}"
+
+
+def instrument_supabase(client: Any) -> Any:
+    """
+    Time every PostgREST call made through a Supabase client.
+
+    Hooks the postgrest httpx session, so table and rpc calls are covered
+    without changing call sites. Latency is measured to the response headers.
+    """
+    session = client.postgrest.session
+
+    def on_request(request: Any) -> None:
+        request.extensions["engine_started"] = (time.perf_counter(), time.time_ns())
+
+    def on_response(response: Any) -> None:
+        request = response.request
+        started = request.extensions.get("engine_started")
+        if started is None:
+            return
+        operation = _supabase_operation(request)
+        STAGE_SECONDS.observe(time.perf_counter() - started[0], stage="supabase", operation=operation)
+        failed = response.status_code >= 400
+        if failed:
+            STAGE_ERRORS.inc(stage="supabase", operation=operation)
+        # Hooks run in the caller's context, so this is a child of the caller's span
+        get_tracer().record_span(
+            f"supabase.{operation}",
+            started[1],
+            time.time_ns(),
+            attributes={"http.method": request.method, "http.status_code": response.status_code},
+            error=f"HTTP {response.status_code}" if failed else None,
+        )
+
+    session.event_hooks["request"].append(on_request)
+    session.event_hooks["response"].append(on_response)
+    return client
@@ -0,0 +1,227 @@
+"""Process-wide registry of shared spaCy pipelines and component views."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from importlib import import_module
+from importlib.util import find_spec
+from typing import Any, Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "en_core_web_sm"
+
+
+def _spacy_load(model_name: str):
+    import spacy
+
+    return spacy.load(model_name)
+
+
+def estimate_pipeline_bytes(nlp: Any) -> int:
+    """
+    Approximate in-memory size of a pipeline's weights.
+
+    Sums every thinc parameter array reachable from the pipeline's
+    components (shared arrays counted once) plus the vocab's static vectors.
+    Components without a thinc model (e.g. torch-backed coref) are not counted.
+    """
+    seen: set[int] = set()
+    total = 0
+    for _, proc in nlp.pipeline:
+        model = getattr(proc, "model", None)
+        if model is None or not hasattr(model, "walk"):
+            continue
+        for node in model.walk():
+            for name in node.param_names:
+                if not node.has_param(name):
+                    continue
+                param = node.get_param(name)
+                if id(param) not in seen:
+                    seen.add(id(param))
+                    total += int(getattr(param, "nbytes", 0))
+    vectors = getattr(getattr(nlp, "vocab", None), "vectors", None)
+    data = getattr(vectors, "data", None)
+    if data is not None:
+        total += int(getattr(data, "nbytes", 0))
+    return total
+
+
+class PipelineView:
+    """
+    A shared pipeline restricted to some of its components.
+
+    Calls pass the other components as disable= for that call only, instead
+    of toggling them with select_pipes, so views of one model can be used
+    from several threads at once. Anything else is delegated to the
+    underlying Language.
+    """
+
+    def __init__(self, nlp: Any, components: Iterable[str]) -> None:
+        active = set(components)
+        self.nlp = nlp
+        self.pipeline = [(name, proc) for name, proc in nlp.pipeline if name in active]
+        self.pipe_names = [name for name, _ in self.pipeline]
+        self.disabled = [name for name in nlp.pipe_names if name not in active]
+
+    def __call__(self, text: str):
+        return self.nlp(text, disable=self.disabled)
+
+    def pipe(self, texts: Iterable[Any], **kwargs: Any) -> Iterator[Any]:
+        """Language.pipe over this view's components (batch_size, n_process, as_tuples, ...)."""
+        return self.nlp.pipe(texts, disable=self.disabled, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.nlp, name)
+
+
+@dataclass
+class LoadedModel:
+    """A loaded base pipeline and what it cost."""
+
+    nlp: Any
+    load_seconds: float
+    size_bytes: int | None
+    views: dict[tuple[str, ...], PipelineView] = field(default_factory=dict)
+
+
+class NLPModelRegistry:
+    """
+    Hands out one shared copy of each spaCy model per process.
+
+    Base pipelines are keyed by model name plus any extra components added
+    on top (e.g. fastcoref, which changes the pipeline and so gets its own
+    copy). Callers that need only some components get a PipelineView over
+    the shared base rather than a second load.
+    """
+
+    def __init__(self, loader: Callable[[str], Any] | None = None) -> None:
+        self._loader = loader or _spacy_load
+        self._models: dict[tuple[str, tuple[str, ...]], LoadedModel] = {}
+        self._locks: dict[tuple[str, tuple[str, ...]], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        *,
+        enable: Iterable[str] | None = None,
+        disable: Iterable[str] = (),
+        extra_pipes: Iterable[str] = (),
+    ):
+        """
+        Return a shared pipeline, or a view over it.
+
+        Args:
+            model_name: spaCy package name
+            enable: Components to run (default: all); tok2vec layers that an
+                enabled component listens to are kept automatically
+            disable: Components to skip
+            extra_pipes: Components added after loading, e.g. ("fastcoref",)
+
+        Returns:
+            The shared Language when every component is used, else a PipelineView
+        """
+        loaded = self._load(model_name, tuple(extra_pipes))
+        nlp = loaded.nlp
+        wanted = set(nlp.pipe_names if enable is None else enable) - set(disable)
+        components = self._with_listened_to(nlp, wanted)
+        if components == tuple(nlp.pipe_names):
+            return nlp
+
+        with self._lock:
+            view = loaded.views.get(components)
+            if view is None:
+                view = PipelineView(nlp, components)
+                loaded.views[components] = view
+        return view
+
+    def preload(self, model_names: Iterable[str]) -> list[str]:
+        """Load models ahead of first use; returns the ones that loaded."""
+        loaded = []
+        for model_name in model_names:
+            try:
+                self._load(model_name, ())
+                loaded.append(model_name)
+            except Exception as e:
+                logger.error(f"Failed to preload spaCy model {model_name}: {e}")
+        return loaded
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Loaded models with their components, load time, size and views."""
+        with self._lock:
+            items = list(self._models.items())
+        return [
+            {
+                "model": model_name,
+                "extra_pipes": list(extra_pipes),
+                "components": list(loaded.nlp.pipe_names),
+                "load_seconds": round(loaded.load_seconds, 3),
+                "size_bytes": loaded.size_bytes,
+                "views": [list(view) for view in loaded.views],
+            }
+            for (model_name, extra_pipes), loaded in items
+        ]
+
+    def _load(self, model_name: str, extra_pipes: tuple[str, ...]) -> LoadedModel:
+        key = (model_name, extra_pipes)
+        loaded = self._models.get(key)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            loaded = self._models.get(key)
+            if loaded is not None:
+                return loaded
+
+            start = time.perf_counter()
+            nlp = self._loader(model_name)
+            for pipe in extra_pipes:
+                if pipe in nlp.pipe_names:
+                    continue
+                if find_spec(pipe) is None:
+                    raise RuntimeError(f"{pipe} is not installed. Install with: pip install {pipe}")
+                import_module(pipe)
+                nlp.add_pipe(pipe, last=True)
+            load_seconds = time.perf_counter() - start
+
+            try:
+                size_bytes = estimate_pipeline_bytes(nlp)
+            except Exception as e:
+                logger.debug(f"Could not size spaCy model {model_name}: {e}")
+                size_bytes = None
+
+            loaded = LoadedModel(nlp=nlp, load_seconds=load_seconds, size_bytes=size_bytes)
+            with self._lock:
+                self._models[key] = loaded
+            logger.info(
+                f"Loaded spaCy model {model_name} {list(extra_pipes) or ''} in {load_seconds:.1f}s"
+                f" ({(size_bytes or 0) / 1e6:.1f} MB)"
+            )
+            return loaded
+
+    @staticmethod
+    def _with_listened_to(nlp: Any, wanted: set[str]) -> tuple[str, ...]:
+        """Components in pipeline order, plus shared tok2vec layers the wanted ones listen to."""
+        needed = set(wanted)
+        for name, proc in nlp.pipeline:
+            listeners = getattr(proc, "listening_components", None) or []
+            if needed & set(listeners):
+                needed.add(name)
+        return tuple(name for name in nlp.pipe_names if name in needed)
+
+
+# Global registry instance
+_nlp_registry: NLPModelRegistry | None = None
+
+
+def get_nlp_registry() -> NLPModelRegistry:
+    """Get or create the process-wide spaCy model registry."""
+    global _nlp_registry
+    if _nlp_registry is None:
+        _nlp_registry = NLPModelRegistry()
+    return _nlp_registry
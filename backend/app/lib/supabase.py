@@ -2,6 +2,10 @@ import os
 from supabase import create_client, Client
 
 from config import settings
+from lib.metrics import instrument_supabase
+
+# PostgREST error code for a function missing from the schema cache
+FUNCTION_NOT_FOUND = "PGRST202"
 
 
 def get_supabase_client() -> Client:
@@ -14,7 +18,12 @@ def get_supabase_client() -> Client:
             "Ensure SUPABASE_URL and SUPABASE_PUBLISHABLE_KEY are set."
         )
 
-    return create_client(settings.supabase_url, settings.supabase_anon_key)
+    return instrument_supabase(create_client(settings.supabase_url, settings.supabase_anon_key))
+
+
+def is_missing_function(error: Exception) -> bool:
+    """True if an RPC failed because the function is not installed (migration not applied)."""
+    return getattr(error, "code", None) == FUNCTION_NOT_FOUND
 
 
 # Backwards-compatible export and the name used throughout routes/services
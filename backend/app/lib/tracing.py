@@ -0,0 +1,373 @@
+"""Request-scoped tracing with spans exported as OTLP/JSON."""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, Protocol
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+SPAN_KIND_CONSUMER = 5
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identifies a span across process boundaries (W3C traceparent)."""
+
+    trace_id: str
+    span_id: str
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    context: SpanContext
+    parent_span_id: str | None = None
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict[str, Any]:
+        """The span as an OTLP/JSON Span object."""
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": (
+                {"code": STATUS_ERROR, "message": self.error}
+                if self.error is not None
+                else {"code": STATUS_OK}
+            ),
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def otlp_payload(spans: list[Span], service_name: str) -> dict[str, Any]:
+    """An OTLP/JSON ExportTraceServiceRequest for a batch of spans."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+                "scopeSpans": [
+                    {"scope": {"name": "engine.tracing"}, "spans": [s.to_otlp() for s in spans]}
+                ],
+            }
+        ]
+    }
+
+
+def parse_traceparent(value: str | None) -> SpanContext | None:
+    """Parse a W3C traceparent header ("00-<trace id>-<span id>-<flags>")."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if set(parts[1]) == {"0"} or set(parts[2]) == {"0"}:
+        return None
+    return SpanContext(trace_id=parts[1].lower(), span_id=parts[2].lower())
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+
+class FileSpanExporter:
+    """Appends one OTLP/JSON request per line (the collector's otlpjsonfile format)."""
+
+    def __init__(self, path: str | os.PathLike[str], service_name: str = "engine") -> None:
+        self.path = Path(path)
+        self.service_name = service_name
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        line = json.dumps(otlp_payload(spans, self.service_name), separators=(",", ":"))
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class OTLPHttpSpanExporter:
+    """Posts OTLP/JSON to a collector's /v1/traces endpoint."""
+
+    def __init__(self, endpoint: str, service_name: str = "engine", timeout: float = 5.0) -> None:
+        import httpx
+
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: list[Span]) -> None:
+        response = self._client.post(self.url, json=otlp_payload(spans, self.service_name))
+        response.raise_for_status()
+
+
+# The active span (or remote parent) in this context
+_current_span: contextvars.ContextVar[Span | SpanContext | None] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Tracer:
+    """
+    Creates spans and exports finished ones in batches from a background thread.
+
+    With no exporter, tracing is off and start_span costs one context
+    variable lookup. Finished spans are queued without blocking; when the
+    queue is full (exporter down or too slow) new spans are dropped.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter | None = None,
+        *,
+        max_queue_size: int = 4096,
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+    ) -> None:
+        self.exporter = exporter
+        self.dropped = 0
+        self._queue: queue.Queue[Span] = queue.Queue(maxsize=max_queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        *,
+        attributes: dict[str, Any] | None = None,
+        parent: SpanContext | None = None,
+        kind: int = SPAN_KIND_INTERNAL,
+    ) -> Iterator[Span | None]:
+        """
+        Run a block inside a new span, child of ``parent`` or of the current span.
+
+        Yields None when tracing is off. An exception escaping the block
+        marks the span as an error and is re-raised.
+        """
+        if not self.enabled:
+            yield None
+            return
+        span = self._new_span(name, attributes, parent, kind)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    def record_span(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        *,
+        attributes: dict[str, Any] | None = None,
+        error: str | None = None,
+        kind: int = SPAN_KIND_CLIENT,
+    ) -> None:
+        """Record an already finished operation as a child of the current span."""
+        if not self.enabled:
+            return
+        span = self._new_span(name, attributes, None, kind)
+        span.start_ns, span.end_ns, span.error = start_ns, end_ns, error
+        self._enqueue(span)
+
+    def flush(self) -> None:
+        """Export every queued span now, waiting for any export already under way."""
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._export(batch)
+        self._queue.join()
+
+    def _new_span(
+        self,
+        name: str,
+        attributes: dict[str, Any] | None,
+        parent: SpanContext | None,
+        kind: int,
+    ) -> Span:
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if isinstance(current, Span) else current
+        trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        return Span(
+            name=name,
+            context=SpanContext(trace_id=trace_id, span_id=secrets.token_hex(8)),
+            parent_span_id=parent.span_id if parent is not None else None,
+            kind=kind,
+            attributes=dict(attributes or {}),
+        )
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        self._enqueue(span)
+
+    def _enqueue(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_worker()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _drain(self) -> list[Span]:
+        batch = []
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: list[Span]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.error(f"Failed to export {len(batch)} spans: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                continue
+            self._export([first, *self._drain()])
+
+
+def current_span() -> Span | None:
+    """The span active in this context, if any."""
+    span = _current_span.get()
+    return span if isinstance(span, Span) else None
+
+
+def current_traceparent() -> str | None:
+    """W3C traceparent of the active span, to hand to work that runs elsewhere."""
+    span = _current_span.get()
+    if span is None:
+        return None
+    return (span.context if isinstance(span, Span) else span).traceparent
+
+
+def propagate(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Bind fn to the caller's context, for executors that do not copy it.
+
+    loop.run_in_executor and ThreadPoolExecutor.submit run functions in the
+    worker thread's own context, so spans started there would begin new
+    traces. Each call runs in a fresh copy of the captured context, so the
+    wrapper can be used from several threads at once.
+    """
+    captured = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        return captured.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+# Global tracer instance
+_tracer: Tracer | None = None
+
+
+def get_tracer() -> Tracer:
+    """Get or create the global tracer, configured from settings."""
+    from config import settings
+
+    global _tracer
+    if _tracer is None:
+        exporter: SpanExporter | None = None
+        if settings.tracing_exporter == "file":
+            exporter = FileSpanExporter(settings.tracing_file_path, settings.tracing_service_name)
+        elif settings.tracing_exporter == "otlp":
+            exporter = OTLPHttpSpanExporter(
+                settings.tracing_otlp_endpoint, settings.tracing_service_name
+            )
+        _tracer = Tracer(exporter)
+    return _tracer
+
+
+def start_span(
+    name: str,
+    *,
+    attributes: dict[str, Any] | None = None,
+    parent: SpanContext | None = None,
+    kind: int = SPAN_KIND_INTERNAL,
+):
+    """Start a span on the global tracer (see Tracer.start_span)."""
+    return get_tracer().start_span(name, attributes=attributes, parent=parent, kind=kind)
@@ -0,0 +1,213 @@
+"""In-process per-project vector index over narrative chunk embeddings."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Any
+
+import numpy as np
+
+from lib.chunk_store import ProjectChunkStore
+
+logger = logging.getLogger(__name__)
+
+
+def _as_vector(embedding: Any) -> np.ndarray | None:
+    """Convert an embedding (list or pgvector text like "[0.1,...]") to float32."""
+    if embedding is None:
+        return None
+    if isinstance(embedding, str):
+        embedding = json.loads(embedding)
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    if vec.ndim != 1 or norm == 0:
+        return None
+    return vec / norm
+
+
+class ProjectVectorIndex:
+    """
+    Brute-force cosine index for one project's narrative chunks.
+
+    Rows are L2-normalized float32 vectors, so a query is one matrix-vector
+    product. Projects hold at most a few thousand chunks, where this beats an
+    approximate (HNSW) index on both latency and exactness.
+    """
+
+    def __init__(self, dim: int | None = None) -> None:
+        self._dim = dim
+        self._matrix = np.zeros((0, dim or 0), dtype=np.float32)
+        self._size = 0
+        self._chunks: list[dict[str, Any]] = []
+        self._positions: dict[str, int] = {}
+        self.max_chunk_index = -1
+        # Newest narrative_chunks.updated_at seen, for picking up later edits
+        self.updated_hwm: str | None = None
+        self.loaded_at = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(
+        self,
+        chunk_id: str | None,
+        content: str,
+        chunk_index: int,
+        embedding: Any,
+        replace: bool = False,
+    ) -> bool:
+        """
+        Add a chunk to the index.
+
+        Args:
+            chunk_id: The narrative_chunks row id
+            content: The chunk text
+            chunk_index: Sequential index of the chunk
+            embedding: The chunk's embedding vector
+            replace: Overwrite the chunk if its id is already indexed
+                (otherwise duplicates are ignored)
+
+        Returns:
+            True if the chunk was added or replaced
+        """
+        vec = _as_vector(embedding)
+        if vec is None or not content:
+            return False
+
+        with self._lock:
+            position = self._positions.get(chunk_id) if chunk_id is not None else None
+            if position is not None and not replace:
+                return False
+            if self._dim is None:
+                self._dim = vec.shape[0]
+                self._matrix = np.zeros((0, self._dim), dtype=np.float32)
+            if vec.shape[0] != self._dim:
+                logger.warning(
+                    f"Skipping chunk {chunk_id}: embedding dim {vec.shape[0]} != {self._dim}"
+                )
+                return False
+
+            chunk = {"id": chunk_id, "content": content, "chunk_index": chunk_index}
+            if position is not None:
+                self._matrix[position] = vec
+                self._chunks[position] = chunk
+                return True
+
+            if self._size == self._matrix.shape[0]:
+                # Grow geometrically so incremental inserts stay amortized O(1)
+                grown = np.zeros((max(16, self._size * 2), self._dim), dtype=np.float32)
+                grown[: self._size] = self._matrix[: self._size]
+                self._matrix = grown
+
+            if chunk_id is not None:
+                self._positions[chunk_id] = self._size
+            self._matrix[self._size] = vec
+            self._size += 1
+            self._chunks.append(chunk)
+            self.max_chunk_index = max(self.max_chunk_index, chunk_index or 0)
+            return True
+
+    def search(
+        self, query_embedding: Any, top_k: int = 3, threshold: float = 0.3
+    ) -> list[dict[str, Any]]:
+        """
+        Return the top-k chunks by cosine similarity, like match_narrative_chunks.
+
+        Only chunks with similarity strictly above ``threshold`` are returned,
+        ordered by similarity descending.
+        """
+        return self.search_many([query_embedding], top_k=top_k, threshold=threshold)[0]
+
+    def search_many(
+        self, query_embeddings: list[Any], top_k: int = 3, threshold: float = 0.3
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Score several queries in one matrix multiply.
+
+        Returns one result list per query, each with ``search`` semantics.
+        """
+        results: list[list[dict[str, Any]]] = [[] for _ in query_embeddings]
+        queries = [_as_vector(q) for q in query_embeddings]
+        with self._lock:
+            valid = [
+                j for j, q in enumerate(queries)
+                if q is not None and q.shape[0] == self._dim
+            ]
+            k = min(top_k, self._size)
+            if not valid or k <= 0:
+                return results
+
+            # (n_chunks, dim) @ (dim, n_queries) -> one column of scores per query
+            sims = self._matrix[: self._size] @ np.stack([queries[j] for j in valid]).T
+            top = np.argpartition(-sims, k - 1, axis=0)[:k]
+            for col, j in enumerate(valid):
+                column = sims[:, col]
+                ranked = top[:, col][np.argsort(-column[top[:, col]])]
+                results[j] = [
+                    {**self._chunks[i], "similarity": float(column[i])}
+                    for i in ranked
+                    if column[i] > threshold
+                ]
+        return results
+
+
+class LocalVectorStore(ProjectChunkStore[ProjectVectorIndex]):
+    """
+    Registry of per-project vector indexes, loaded lazily from narrative_chunks.
+
+    Indexes are kept for the most recently used projects. Chunks inserted by
+    this worker are added directly; chunks written by other workers, and
+    embeddings filled in after a chunk was loaded (e.g. by a reindex job),
+    are picked up by an incremental refresh once the index is older than
+    ``refresh_seconds``.
+    """
+
+    columns = "id, content, chunk_index, embedding, updated_at"
+    track_updates = True
+
+    def _new_index(self) -> ProjectVectorIndex:
+        return ProjectVectorIndex()
+
+    def _add_row(
+        self, index: ProjectVectorIndex, row: dict[str, Any], replace: bool = False
+    ) -> None:
+        index.add(
+            row.get("id"),
+            row.get("content", ""),
+            row.get("chunk_index", 0),
+            row.get("embedding"),
+            replace=replace,
+        )
+
+    def add_chunk(
+        self,
+        project_id: str,
+        chunk_id: str | None,
+        content: str,
+        chunk_index: int,
+        embedding: Any,
+    ) -> None:
+        """Add a freshly inserted chunk to the project's index, if it is loaded."""
+        index = self._loaded_index(project_id)
+        if index is not None:
+            index.add(chunk_id, content, chunk_index, embedding)
+
+
+# Global store instance
+_vector_store: LocalVectorStore | None = None
+
+
+def get_vector_store() -> LocalVectorStore:
+    """Get or create the global local vector store."""
+    from config import settings
+
+    global _vector_store
+    if _vector_store is None:
+        _vector_store = LocalVectorStore(
+            max_projects=settings.rag_local_index_max_projects,
+            refresh_seconds=settings.rag_local_index_refresh_seconds,
+        )
+    return _vector_store
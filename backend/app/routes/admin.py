@@ -0,0 +1,60 @@
+import asyncio
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from config import settings
+from services.job_queue import get_job_queue
+from services.reindex import checkpoint_key
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+# --- REQUEST/RESPONSE MODELS ---
+
+
+class ReindexRequest(BaseModel):
+    embeddings: bool = True
+    entities: bool = True
+    graph: bool = True
+    restart: bool = False
+    concurrency: Optional[int] = Field(default=None, ge=1, le=32)
+
+
+def _require_admin(token: Optional[str]) -> None:
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled (ADMIN_TOKEN is not set)")
+    if token is None or not hmac.compare_digest(token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+# --- ROUTES ---
+
+
+@router.post("/projects/{project_id}/reindex")
+async def reindex_project(
+    project_id: str,
+    request: ReindexRequest = ReindexRequest(),
+    x_admin_token: Optional[str] = Header(default=None),
+):
+    """
+    Queue a rebuild of a project's embeddings, entities and relationships.
+
+    An interrupted reindex resumes from its checkpoint unless restart is set.
+    restart clears the checkpoint here, once, so retries of the job still
+    resume. Poll /jobs/{job_id} for progress.
+    """
+    _require_admin(x_admin_token)
+    try:
+        queue = get_job_queue()
+        if request.restart:
+            await asyncio.to_thread(queue.store.clear_checkpoint, checkpoint_key(project_id))
+        job = await queue.enqueue_async(
+            "reindex",
+            {"project_id": project_id, **request.model_dump(exclude={"restart"})},
+            dedup_key=f"reindex:{project_id}",
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue reindex: {str(e)}")
+    return {"status": "queued", "job_id": job["id"]}
@@ -2,8 +2,9 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
+from lib.draft_sync import DraftSyncError, get_draft_sync_store
+from lib.metrics import openai_request
 from lib.supabase import supabase_client
-from services.analysis import StoryKnowledgeGraph
 from services.analysis_orchestrator import AnalysisOrchestrator
 from services.kg_cache import get_kg_cache
 from services.correction import get_correction_suite
@@ -23,7 +24,14 @@ class WriteRequest(BaseModel):
 
 class SaveRequest(BaseModel):
     project_id: str = Field(..., example="uuid-123-project")
-    content: str = Field(..., example="Draft content...")
+    content: Optional[str] = Field(None, example="Draft content...")
+    # Delta autosave (lib/draft_sync.py): ops against the last acknowledged draft
+    session_id: Optional[str] = Field(None, example="5f0c2b6e-editor-tab")
+    base_version: Optional[int] = Field(None, example=3)
+    ops: Optional[List[Dict[str, Any]]] = Field(
+        None, example=[{"op": "delete", "pos": 120, "len": 4}, {"op": "insert", "pos": 120, "text": "said"}]
+    )
+    checksum: Optional[str] = Field(None, example="9f86d081884c7d65")
 
 
 class SuggestionRequest(BaseModel):
@@ -71,18 +79,51 @@ async def save_draft(request: SaveRequest):
     """
     Saves narrative chunk immediately for persistence with lightweight analysis.
     Uses the analysis orchestrator in auto_save mode.
+
+    With a session_id the draft is tracked for delta sync: later saves may
+    send ops against the returned version instead of the full content, and
+    only the changed paragraphs are analyzed. A 409 means the delta could
+    not be applied and the full content should be sent again.
     """
+    sync: Dict[str, Any] = {}
+    content = request.content
+    analyze_text: Optional[str] = None
+    if request.session_id:
+        try:
+            delta = get_draft_sync_store().receive(
+                request.session_id,
+                request.project_id,
+                content=request.content,
+                base_version=request.base_version,
+                ops=request.ops,
+                checksum=request.checksum,
+            )
+        except DraftSyncError as e:
+            raise HTTPException(status_code=409, detail={"reason": e.reason, "resync": True})
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        sync = {"version": delta.version, "checksum": delta.checksum}
+        if request.ops is not None:
+            # Save the whole draft; analyze only the changed paragraphs
+            content, analyze_text = delta.text, delta.changed_text
+            if not analyze_text.strip():
+                return {"status": "unchanged", "project_id": request.project_id, **sync}
+    elif content is None:
+        raise HTTPException(status_code=400, detail="content is required without session_id")
+
     try:
         orchestrator = AnalysisOrchestrator(supabase_client=supabase_client)
         result = await orchestrator.process_content(
             project_id=request.project_id,
-            content=request.content,
-            mode="auto_save"
+            content=content,
+            mode="auto_save",
+            analyze_text=analyze_text,
         )
         
         return {
             "status": result.get("status", "saved"),
-            "project_id": request.project_id
+            "project_id": request.project_id,
+            **sync,
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -216,13 +257,10 @@ async def get_editing_suggestion(request: SuggestionRequest):
         history = [row["content"] for row in reversed(history_resp.data or [])]
 
         # 3. Fetch Knowledge Graph Facts (relationships) using cache
-        kg = kg_cache.get(request.project_id)
-        if kg is None:
-            kg = StoryKnowledgeGraph.from_supabase(
-                project_id=request.project_id, supabase_client=supabase_client
-            )
-            kg_cache.set(request.project_id, kg)
-        
+        kg = kg_cache.get_or_load(
+            request.project_id, supabase_client=supabase_client
+        )
+
         graph_facts = []
         for u, v, data in kg.graph.edges(data=True):
             graph_facts.append(f"{u} {data.get('relation', 'is related to')} {v}")
@@ -323,7 +361,9 @@ async def get_grammar_suggestion(request: GrammarSuggestionRequest):
             f"Corrected text:"
         )
 
-        response = correction_suite.generator.client.chat.completions.create(
+        response = openai_request(
+            "grammar_suggestion",
+            correction_suite.generator.client.chat.completions.create,
             model=correction_suite.generator.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.1,
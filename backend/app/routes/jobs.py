@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException
+
+from services.job_queue import get_job_queue
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+# --- ROUTES ---
+
+
+@router.get("/stats")
+async def get_job_stats():
+    """
+    Job counts per queue and status.
+    """
+    return {"status": "success", "queues": get_job_queue().stats()}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    Fetch the status of a background job, with its result once finished.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "status": "success",
+        "job": {
+            "id": job["id"],
+            "type": job["job_type"],
+            "queue": job["queue"],
+            "state": job["status"],
+            "attempts": job["attempts"],
+            "max_attempts": job["max_attempts"],
+            "progress": job["progress"],
+            "result": job["result"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+        },
+    }
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
 from lib.supabase import supabase_client
-from services.plot_extraction import get_plot_extraction_service
+from services.job_queue import get_job_queue
+from services.plot_board import get_plot_board_service
 
 router = APIRouter(prefix="/plot-thread", tags=["Plot Thread"])
 
@@ -47,128 +49,44 @@ class ConnectionCreate(BaseModel):
 
 
 @router.get("/{project_id}")
-async def get_plot_thread(project_id: str):
+async def get_plot_thread(project_id: str, request: Request):
     """
     Fetch all plot threads, points, connections, and character involvement for a project.
+
+    Responses carry an ETag; a request whose If-None-Match matches the
+    current board gets 304 Not Modified.
     """
     try:
-        # Fetch plot threads
-        threads_resp = (
-            supabase_client.table("plot_threads")
-            .select("*")
-            .eq("project_id", project_id)
-            .order("created_at", desc=False)
-            .execute()
-        )
-        threads = threads_resp.data or []
-
-        # Fetch plot points
-        points_resp = (
-            supabase_client.table("plot_points")
-            .select("*")
-            .eq("project_id", project_id)
-            .order("timeline_position", desc=False)
-            .execute()
-        )
-        points = points_resp.data or []
-
-        # Fetch connections
-        if points:
-            point_ids = [p["id"] for p in points]
-            connections_resp = (
-                supabase_client.table("plot_point_connections")
-                .select("*")
-                .in_("from_point_id", point_ids)
-                .execute()
-            )
-            connections = connections_resp.data or []
-        else:
-            connections = []
-
-        # Fetch character involvement
-        if points:
-            point_ids = [p["id"] for p in points]
-            chars_resp = (
-                supabase_client.table("plot_point_characters")
-                .select("*, entities(name, id)")
-                .in_("plot_point_id", point_ids)
-                .execute()
-            )
-            characters = chars_resp.data or []
-        else:
-            characters = []
-
-        # Organize characters by plot point
-        characters_by_point = {}
-        for char in characters:
-            point_id = char["plot_point_id"]
-            if point_id not in characters_by_point:
-                characters_by_point[point_id] = []
-            characters_by_point[point_id].append(char)
-
-        # Attach characters to points
-        for point in points:
-            point["characters"] = characters_by_point.get(point["id"], [])
-
-        return {
-            "status": "success",
-            "plot_threads": threads,
-            "plot_points": points,
-            "connections": connections,
-        }
+        board, etag = get_plot_board_service().get_board(project_id)
     except Exception as e:
         print(f"Get plot thread error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch plot thread: {str(e)}")
 
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse({"status": "success", **board}, headers=headers)
+
 
 @router.post("/{project_id}/extract")
 async def extract_plot_points(project_id: str):
     """
-    Trigger AI extraction of plot points from narrative chunks.
+    Queue AI extraction of plot points from narrative chunks.
+
+    Returns the job id; poll /jobs/{job_id} for the extraction result.
+    Repeated requests while a job is pending share that job.
     """
     try:
-        # Fetch narrative chunks
-        chunks_resp = (
-            supabase_client.table("narrative_chunks")
-            .select("id, content, chunk_index")
-            .eq("project_id", project_id)
-            .order("chunk_index", desc=False)
-            .execute()
+        job = await get_job_queue().enqueue_async(
+            "plot_extraction",
+            {"project_id": project_id},
+            dedup_key=f"plot_extraction:{project_id}",
         )
-        chunks = chunks_resp.data or []
-
-        if not chunks:
-            return {
-                "status": "error",
-                "message": "No narrative chunks found. Write some content first.",
-            }
-
-        # Fetch entities (characters)
-        entities_resp = (
-            supabase_client.table("entities")
-            .select("id, name, entity_type")
-            .eq("project_id", project_id)
-            .eq("entity_type", "CHARACTER")
-            .execute()
-        )
-        entities = entities_resp.data or []
-
-        # Extract plot points
-        service = get_plot_extraction_service()
-        result = service.extract_plot_points_from_chunks(
-            project_id=project_id,
-            narrative_chunks=chunks,
-            entities=entities,
-            supabase_client=supabase_client,
-        )
-
-        return result
+        return {"status": "queued", "job_id": job["id"]}
     except Exception as e:
         print(f"Extract plot points error: {e}")
-        import traceback
-        traceback.print_exc()
         raise HTTPException(
-            status_code=500, detail=f"Failed to extract plot points: {str(e)}"
+            status_code=500, detail=f"Failed to queue plot extraction: {str(e)}"
         )
 
 
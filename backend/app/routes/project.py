@@ -1,10 +1,15 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from pydantic import BaseModel, Field
 
 from services.project_setup import project_setup
-from services.style_analysis import extract_text_from_pdf, analyze_writer_style
+from services.style_analysis import EmptyManuscriptError, iter_pdf_pages, analyze_writer_style
 from services.kg_cache import get_kg_cache
 from lib.supabase import supabase_client
+from lib.content_hashes import get_content_hash_store
+from lib.lexical_index import get_lexical_store
+from lib.vector_store import get_vector_store
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
@@ -50,24 +55,31 @@ async def analyze_behavior(project_id: str, file: UploadFile = File(...)):
     try:
         content = await file.read()
         if file.content_type == "application/pdf":
-            text = extract_text_from_pdf(content)
+            # Pages are read lazily while the analysis streams through them
+            source = iter_pdf_pages(content)
         else:
-            text = content.decode("utf-8")
-
-        if not text.strip():
+            source = content.decode("utf-8")
+            if not source.strip():
+                raise HTTPException(
+                    status_code=400, detail="The file is empty or unreadable."
+                )
+
+        # Run Heavy ML Analysis off the event loop
+        try:
+            blueprint = await asyncio.to_thread(analyze_writer_style, source)
+        except EmptyManuscriptError:
             raise HTTPException(
                 status_code=400, detail="The file is empty or unreadable."
             )
 
-        # Run Heavy ML Analysis
-        blueprint = analyze_writer_style(text)
-
         # Sync to DB
         supabase_client.table("projects").update({"style_blueprint": blueprint}).eq(
             "id", project_id
         ).execute()
 
         return {"status": "success", "blueprint": blueprint}
+    except HTTPException:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {exc}")
 
@@ -95,6 +107,9 @@ async def delete_project(project_id: str):
         # Invalidate KG cache for this project
         kg_cache = get_kg_cache()
         kg_cache.invalidate(project_id)
+        get_vector_store().invalidate(project_id)
+        get_lexical_store().invalidate(project_id)
+        get_content_hash_store().invalidate(project_id)
         
         # Tables with Foreign Keys to projects:
         # - narrative_chunks
@@ -1,60 +1,116 @@
 import json
+from uuid import uuid4
 
 from fastapi import APIRouter, WebSocket
 
-from routes.editor import run_analysis
+from lib.draft_sync import DraftSyncError, get_draft_sync_store
+from lib.metrics import WEBSOCKET_MESSAGES, timed
+from lib.tracing import SPAN_KIND_SERVER, parse_traceparent, start_span
+from lib.supabase import supabase_client
+from services.analysis_orchestrator import AnalysisOrchestrator
 
 router = APIRouter(tags=["WebSocket Editor"])
 
+# Metric label per message type; the type comes from the client, so anything
+# else is counted as "unknown" to keep the label set fixed
+MESSAGE_LABELS = {"ping": "ping", "analyze": "analyze"}
+
 
 @router.websocket("/ws/editor")
 async def websocket_editor(websocket: WebSocket):
     """
     WebSocket endpoint for real-time editor analysis.
     Client sends: { "type": "analyze", "project_id": "...", "content": "..." }
-    Server responds: { "type": "analysis", "payload": { ... } } or { "type": "error", "detail": "..." }
+        or, once a version is acknowledged, only the edits since then:
+        { "type": "analyze", "project_id": "...", "base_version": 3, "ops": [...], "checksum": "..." }
+        Either form may carry a W3C "traceparent" to continue the client's trace.
+    Server responds: { "type": "analysis", "payload": { ... }, "version": 4, "checksum": "..." },
+        { "type": "ack", "version": 4, "checksum": "..." } when the ops changed nothing,
+        { "type": "resync", "project_id": "...", "reason": "..." } when the full content must be resent,
+        or { "type": "error", "detail": "..." }
     """
     await websocket.accept()
+    session_id = uuid4().hex
+    drafts = get_draft_sync_store()
 
-    while True:
-        try:
-            data = await websocket.receive_text()
-        except Exception:
-            break
+    try:
+        while True:
+            try:
+                data = await websocket.receive_text()
+            except Exception:
+                break
 
-        try:
-            msg = json.loads(data)
-        except json.JSONDecodeError:
-            await websocket.send_json({"type": "error", "detail": "Invalid JSON"})
-            continue
+            try:
+                msg = json.loads(data)
+            except json.JSONDecodeError:
+                await websocket.send_json({"type": "error", "detail": "Invalid JSON"})
+                continue
 
-        msg_type = msg.get("type")
+            msg_type = msg.get("type")
+            label = MESSAGE_LABELS.get(msg_type, "unknown") if isinstance(msg_type, str) else "unknown"
+            WEBSOCKET_MESSAGES.inc(type=label)
 
-        if msg_type == "ping":
-            await websocket.send_json({"type": "pong"})
-            continue
+            if msg_type == "ping":
+                await websocket.send_json({"type": "pong"})
+                continue
 
-        if msg_type == "analyze":
-            project_id = msg.get("project_id")
-            content = msg.get("content")
+            if msg_type == "analyze":
+                project_id = msg.get("project_id")
+                ops = msg.get("ops")
 
-            if not project_id or not content:
-                await websocket.send_json(
-                    {"type": "error", "detail": "project_id and content are required"}
-                )
+                if not project_id or (not msg.get("content") and ops is None):
+                    await websocket.send_json(
+                        {"type": "error", "detail": "project_id and content (or ops) are required"}
+                    )
+                    continue
+
+                try:
+                    delta = drafts.receive(
+                        session_id,
+                        project_id,
+                        content=msg.get("content"),
+                        base_version=msg.get("base_version"),
+                        ops=ops,
+                        checksum=msg.get("checksum"),
+                    )
+                except DraftSyncError as e:
+                    await websocket.send_json(
+                        {"type": "resync", "project_id": project_id, "reason": e.reason}
+                    )
+                    continue
+
+                sync = {"version": delta.version, "checksum": delta.checksum}
+                changed_text = delta.changed_text
+                if not changed_text.strip():
+                    await websocket.send_json({"type": "ack", "project_id": project_id, **sync})
+                    continue
+
+                try:
+                    # One trace per message: the connection can outlive many edits
+                    with start_span(
+                        "ws analyze",
+                        parent=parse_traceparent(msg.get("traceparent")),
+                        kind=SPAN_KIND_SERVER,
+                        attributes={"project_id": project_id, "draft.version": delta.version},
+                    ), timed("websocket", label):
+                        orchestrator = AnalysisOrchestrator(supabase_client=supabase_client)
+                        payload = await orchestrator.process_content(
+                            project_id=project_id,
+                            content=delta.text,
+                            mode="manual_analyze",
+                            analyze_text=changed_text,
+                        )
+                        await websocket.send_json({"type": "analysis", "payload": payload, **sync})
+                except Exception as e:
+                    print(f"WebSocket analyze error: {e}")
+                    await websocket.send_json(
+                        {"type": "error", "detail": str(e)}
+                    )
                 continue
 
-            try:
-                payload = await run_analysis(project_id=project_id, text_content=content)
-                await websocket.send_json({"type": "analysis", "payload": payload})
-            except Exception as e:
-                print(f"WebSocket analyze error: {e}")
-                await websocket.send_json(
-                    {"type": "error", "detail": str(e)}
-                )
-            continue
-
-        # Unknown type: ignore or optionally send error
-        await websocket.send_json(
-            {"type": "error", "detail": f"Unknown message type: {msg_type}"}
-        )
+            # Unknown type: ignore or optionally send error
+            await websocket.send_json(
+                {"type": "error", "detail": f"Unknown message type: {msg_type}"}
+            )
+    finally:
+        drafts.drop_session(session_id)
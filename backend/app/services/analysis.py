@@ -42,6 +42,19 @@ class StoryKnowledgeGraph:
         self.graph = nx.MultiDiGraph()
         self.supabase = supabase_client or _default_supabase
         self.entity_ids_by_name: dict[str, str] = {}
+        # Version of the project's graph this instance reflects (see kg_invalidation)
+        self.version = 0
+        # Persisted facts not yet published to other workers
+        self._journal: list[tuple[str, str, str, str | None]] = []
+        # High-water marks and row ids seen, for incremental sync
+        self.entities_hwm: str | None = None
+        self.relationships_hwm: str | None = None
+        self._entity_row_ids: set[str] = set()
+        self._relationship_row_ids: set[str] = set()
+        # (subject, object, relation) of the edge each relationship row produced,
+        # so an edited row replaces its old edge instead of adding a second one
+        self._relationship_edges: dict[str, tuple[str, str, str]] = {}
+        self._loaded = False
 
     @classmethod
     def from_supabase(
@@ -56,41 +69,175 @@ class StoryKnowledgeGraph:
         """Hydrate graph state from entities and relationships tables."""
         entities_resp = (
             self.supabase.table("entities")
-            .select("id,name,entity_type")
+            .select("id,name,entity_type,updated_at")
             .eq("project_id", self.project_id)
             .execute()
         )
-        entities = entities_resp.data or []
+        self._apply_entity_rows(entities_resp.data or [])
 
-        self.entity_ids_by_name = {}
-        id_to_name: dict[str, str] = {}
+        rel_resp = (
+            self.supabase.table("relationships")
+            .select("id,entity_a_id,entity_b_id,relation_type,description,updated_at")
+            .eq("project_id", self.project_id)
+            .execute()
+        )
+        self._apply_relationship_rows(rel_resp.data or [])
+        self._loaded = True
+
+    def sync_from_supabase(self) -> bool:
+        """
+        Bring a previously loaded graph up to date.
+
+        Fetches only entities and relationships updated at or after the
+        high-water marks seen so far. If the project's row counts then disagree
+        with the rows this graph has seen, something was deleted (or slipped
+        under the watermark) and the graph is rebuilt with a full load.
+
+        Returns:
+            True if a full reload was needed, False if the delta was enough
+        """
+        if not self._loaded:
+            self.reload_from_supabase()
+            return True
+
+        entities_query = (
+            self.supabase.table("entities")
+            .select("id,name,entity_type,updated_at")
+            .eq("project_id", self.project_id)
+        )
+        if self.entities_hwm:
+            entities_query = entities_query.gte("updated_at", self.entities_hwm)
+        self._apply_entity_rows(entities_query.execute().data or [])
 
-        for row in entities:
-            name = row["name"]
-            entity_id = row["id"]
-            entity_type = row.get("entity_type")
-            self.graph.add_node(name, node_type=entity_type)
-            self.entity_ids_by_name[name] = entity_id
-            id_to_name[entity_id] = name
+        rel_query = (
+            self.supabase.table("relationships")
+            .select("id,entity_a_id,entity_b_id,relation_type,description,updated_at")
+            .eq("project_id", self.project_id)
+        )
+        if self.relationships_hwm:
+            rel_query = rel_query.gte("updated_at", self.relationships_hwm)
+        self._apply_relationship_rows(rel_query.execute().data or [])
 
-        rel_resp = (
+        entity_count = (
+            self.supabase.table("entities")
+            .select("id", count="exact", head=True)
+            .eq("project_id", self.project_id)
+            .execute()
+            .count
+        )
+        rel_count = (
             self.supabase.table("relationships")
-            .select("entity_a_id,entity_b_id,relation_type,description")
+            .select("id", count="exact", head=True)
             .eq("project_id", self.project_id)
             .execute()
+            .count
         )
-        relationships = rel_resp.data or []
+        if entity_count != len(self._entity_row_ids) or rel_count != len(
+            self._relationship_row_ids
+        ):
+            self.reload_from_supabase()
+            return True
+        return False
+
+    def reload_from_supabase(self) -> None:
+        """Discard all graph state and load the project from scratch."""
+        self.graph.clear()
+        self.entity_ids_by_name = {}
+        self.entities_hwm = None
+        self.relationships_hwm = None
+        self._entity_row_ids = set()
+        self._relationship_row_ids = set()
+        self._relationship_edges = {}
+        self.load_from_supabase()
+
+    def _apply_entity_rows(self, rows: list[dict]) -> None:
+        id_to_name = {
+            entity_id: name for name, entity_id in self.entity_ids_by_name.items()
+        }
+
+        for row in rows:
+            name = row["name"]
+            entity_id = row["id"]
+            old_name = id_to_name.get(entity_id)
+            if old_name is not None and old_name != name:
+                self._rename_entity(old_name, name)
+            self.graph.add_node(name, node_type=row.get("entity_type"))
+            self.entity_ids_by_name[name] = entity_id
+            id_to_name[entity_id] = name
+            self._entity_row_ids.add(entity_id)
+            updated_at = row.get("updated_at")
+            if updated_at and (not self.entities_hwm or updated_at > self.entities_hwm):
+                self.entities_hwm = updated_at
+
+    def _rename_entity(self, old_name: str, new_name: str) -> None:
+        """Carry a renamed entity's node and edges over to its new name."""
+        self.entity_ids_by_name.pop(old_name, None)
+        if old_name in self.graph and new_name not in self.graph:
+            nx.relabel_nodes(self.graph, {old_name: new_name}, copy=False)
+        elif old_name in self.graph:
+            # Both names exist; move the old node's edges onto the new one
+            for _, target, data in list(self.graph.out_edges(old_name, data=True)):
+                self.graph.add_edge(new_name, target, **data)
+            for source, _, data in list(self.graph.in_edges(old_name, data=True)):
+                self.graph.add_edge(source, new_name, **data)
+            self.graph.remove_node(old_name)
+        for rel_id, (subject, obj, relation) in self._relationship_edges.items():
+            if old_name in (subject, obj):
+                self._relationship_edges[rel_id] = (
+                    new_name if subject == old_name else subject,
+                    new_name if obj == old_name else obj,
+                    relation,
+                )
+
+    def _remove_relationship_edge(self, rel_id: str) -> None:
+        """Drop the edge a relationship row produced, unless another row shares it."""
+        edge = self._relationship_edges.pop(rel_id, None)
+        if edge is None or edge in self._relationship_edges.values():
+            return
+        subject, obj, relation = edge
+        for key, edge_data in list((self.graph.get_edge_data(subject, obj) or {}).items()):
+            if edge_data.get("relation") == relation:
+                self.graph.remove_edge(subject, obj, key)
+                break
+
+    def _apply_relationship_rows(self, rows: list[dict]) -> None:
+        id_to_name = {
+            entity_id: name for name, entity_id in self.entity_ids_by_name.items()
+        }
+
+        for row in rows:
+            updated_at = row.get("updated_at")
+            if updated_at and (
+                not self.relationships_hwm or updated_at > self.relationships_hwm
+            ):
+                self.relationships_hwm = updated_at
 
-        for row in relationships:
             subject = id_to_name.get(row.get("entity_a_id"))
             obj = id_to_name.get(row.get("entity_b_id"))
             relation = (row.get("relation_type") or "RELATED_TO").upper()
             description = row.get("description")
+            rel_id = row.get("id")
+            if rel_id:
+                self._relationship_row_ids.add(rel_id)
+                # An edited row replaces the edge it produced before
+                previous = self._relationship_edges.get(rel_id)
+                if previous is not None and previous != (subject, obj, relation):
+                    self._remove_relationship_edge(rel_id)
             if not subject or not obj:
                 continue
-            self.graph.add_edge(
-                subject, obj, relation=relation, description=description
-            )
+            if rel_id:
+                self._relationship_edges[rel_id] = (subject, obj, relation)
+
+            # Rows at the watermark are fetched again; update rather than duplicate
+            existing = self.graph.get_edge_data(subject, obj) or {}
+            for key, edge_data in existing.items():
+                if edge_data.get("relation") == relation:
+                    self.graph.edges[subject, obj, key]["description"] = description
+                    break
+            else:
+                self.graph.add_edge(
+                    subject, obj, relation=relation, description=description
+                )
 
     def add_node(self, name: str, node_type: str | None = None) -> None:
         attrs = {"node_type": node_type} if node_type else {}
@@ -113,6 +260,7 @@ class StoryKnowledgeGraph:
         if rows:
             entity_id = rows[0]["id"]
             self.entity_ids_by_name[name] = entity_id
+            self._entity_row_ids.add(entity_id)
             if name not in self.graph:
                 self.graph.add_node(name, node_type=node_type)
             return entity_id
@@ -133,6 +281,7 @@ class StoryKnowledgeGraph:
         )
         entity_id = insert.data[0]["id"]
         self.entity_ids_by_name[name] = entity_id
+        self._entity_row_ids.add(entity_id)
         if name not in self.graph:
             self.graph.add_node(name, node_type=node_type)
         return entity_id
@@ -156,6 +305,7 @@ class StoryKnowledgeGraph:
         if not persist:
             return
 
+        self._journal.append((subject, normalized_relation, obj, description))
         entity_a_id = self._ensure_entity_in_supabase(subject)
         entity_b_id = self._ensure_entity_in_supabase(obj)
 
@@ -170,17 +320,33 @@ class StoryKnowledgeGraph:
             .execute()
         )
         if existing_rel.data:
+            rel_id = existing_rel.data[0]["id"]
+            self._relationship_row_ids.add(rel_id)
+            self._relationship_edges[rel_id] = (subject, obj, normalized_relation)
             return
 
-        self.supabase.table("relationships").insert(
-            {
-                "project_id": self.project_id,
-                "entity_a_id": entity_a_id,
-                "entity_b_id": entity_b_id,
-                "relation_type": normalized_relation,
-                "description": description,
-            }
-        ).execute()
+        inserted = (
+            self.supabase.table("relationships")
+            .insert(
+                {
+                    "project_id": self.project_id,
+                    "entity_a_id": entity_a_id,
+                    "entity_b_id": entity_b_id,
+                    "relation_type": normalized_relation,
+                    "description": description,
+                }
+            )
+            .execute()
+        )
+        if inserted.data:
+            rel_id = inserted.data[0]["id"]
+            self._relationship_row_ids.add(rel_id)
+            self._relationship_edges[rel_id] = (subject, obj, normalized_relation)
+
+    def drain_journal(self) -> list[tuple[str, str, str, str | None]]:
+        """Return and clear facts persisted since the last drain."""
+        facts, self._journal = self._journal, []
+        return facts
 
     def get_objects_for_relation(self, subject: str, relation: str) -> list[str]:
         relation = relation.upper()
@@ -2,19 +2,19 @@
 
 from __future__ import annotations
 
-import asyncio
-import hashlib
 import logging
 from datetime import datetime, timezone
 from typing import Any, Literal
 
 from supabase import Client
 
+from lib.content_hashes import compute_content_hash, get_content_hash_store
+from lib.metrics import timed
 from lib.supabase import supabase_client as _default_supabase
 from services.analysis import StoryKnowledgeGraph
 from services.kg_cache import get_kg_cache
-from services.character_summary import batch_update_character_summaries
 from services.correction import get_correction_suite
+from services.job_queue import get_job_queue
 from services.extraction import (
     ENTITY_LABEL_MAP,
     ExtractionStore,
@@ -44,33 +44,39 @@ class AnalysisOrchestrator:
         """
         self.supabase = supabase_client or _default_supabase
         self.kg_cache = get_kg_cache()
+        self.content_hashes = get_content_hash_store()
     
     async def process_content(
         self,
         project_id: str,
         content: str,
-        mode: Literal["auto_save", "manual_analyze"] = "auto_save"
+        mode: Literal["auto_save", "manual_analyze"] = "auto_save",
+        analyze_text: str | None = None,
     ) -> dict[str, Any]:
         """
         Process content based on the specified mode.
         
         Args:
             project_id: The project identifier
-            content: The narrative content to process
+            content: The narrative content to process (the full draft; this is what gets saved)
             mode: Processing mode - "auto_save" for lightweight, "manual_analyze" for full
+            analyze_text: Part of content to extract from and analyze, e.g. the
+                paragraphs a delta save changed (default: all of content)
             
         Returns:
             Dictionary with processing results including status, entities, and alerts
         """
-        if mode == "auto_save":
-            return await self._run_lightweight_analysis(project_id, content)
-        else:
-            return await self._run_full_analysis(project_id, content)
+        with timed("analysis", mode, project_id=project_id):
+            if mode == "auto_save":
+                return await self._run_lightweight_analysis(project_id, content, analyze_text)
+            else:
+                return await self._run_full_analysis(project_id, content, analyze_text)
     
     async def _run_lightweight_analysis(
         self,
         project_id: str,
-        content: str
+        content: str,
+        analyze_text: str | None = None
     ) -> dict[str, Any]:
         """
         Run lightweight analysis for auto-save.
@@ -85,24 +91,16 @@ class AnalysisOrchestrator:
         Args:
             project_id: The project identifier
             content: The narrative content
+            analyze_text: Part of content to run NER on (default: all of it)
             
         Returns:
             Dictionary with status and basic entity information
         """
         try:
-            # Check content hash to avoid duplicates
-            content_hash = self._compute_content_hash(content)
-            
-            existing = (
-                self.supabase.table("narrative_chunks")
-                .select("id")
-                .eq("project_id", project_id)
-                .eq("content_hash", content_hash)
-                .limit(1)
-                .execute()
-            )
+            # Check content hash to avoid duplicates (in memory; only a hit is confirmed with a query)
+            content_hash = compute_content_hash(content)
             
-            if existing.data:
+            if self.content_hashes.contains(project_id, content_hash, self.supabase):
                 logger.info(f"Duplicate content detected for project {project_id}, skipping save")
                 return {
                     "status": "skipped",
@@ -111,21 +109,28 @@ class AnalysisOrchestrator:
                     "alerts": []
                 }
             
-            # Run NER extraction only (no SVO triples)
-            nlp = get_cached_nlp_pipeline(model_name="en_core_web_sm", enable_coref=False)
-            result = run_core_nlp_pipeline(content, nlp)
+            # Run NER extraction only (no parser, no SVO triples)
+            nlp = get_cached_nlp_pipeline(model_name="en_core_web_sm", enable_coref=False, profile="ner")
+            result = run_core_nlp_pipeline(
+                content if analyze_text is None else analyze_text, nlp, extract_triples=False
+            )
+            # Save the draft itself, which the content hash describes: a delta save
+            # only normalizes the changed paragraphs, so saving normalized text
+            # would store a different chunk for the same draft depending on the
+            # path. With coreference resolution off they are the same text anyway.
+            chunk_text = content
             
             # Generate embedding
             embedding = None
             try:
-                embedding = get_embedding(result.normalized_text)
+                embedding = get_embedding(chunk_text)
             except Exception as e:
                 logger.error(f"Failed to generate embedding: {e}")
             
             # Save narrative chunk with content hash
             store = ExtractionStore(project_id=project_id, supabase_client=self.supabase)
             store.insert_narrative_chunk(
-                content=result.normalized_text,
+                content=chunk_text,
                 embedding=embedding,
                 content_hash=content_hash
             )
@@ -157,7 +162,8 @@ class AnalysisOrchestrator:
     async def _run_full_analysis(
         self,
         project_id: str,
-        content: str
+        content: str,
+        analyze_text: str | None = None
     ) -> dict[str, Any]:
         """
         Run full analysis for manual analyze.
@@ -173,43 +179,39 @@ class AnalysisOrchestrator:
         Args:
             project_id: The project identifier
             content: The narrative content
+            analyze_text: Part of content to extract from and analyze (default: all of it)
             
         Returns:
             Dictionary with full analysis results
         """
         try:
+            region = content if analyze_text is None else analyze_text
+
             # Check content hash
-            content_hash = self._compute_content_hash(content)
-            
-            existing = (
-                self.supabase.table("narrative_chunks")
-                .select("id")
-                .eq("project_id", project_id)
-                .eq("content_hash", content_hash)
-                .limit(1)
-                .execute()
-            )
+            content_hash = compute_content_hash(content)
             
-            if existing.data:
+            if self.content_hashes.contains(project_id, content_hash, self.supabase):
                 logger.info(f"Duplicate content detected for project {project_id}, skipping analysis")
                 # Still run analysis on existing content, just don't re-save
                 pass
             else:
                 # Run full extraction (NER + SVO triples)
                 nlp = get_cached_nlp_pipeline(model_name="en_core_web_sm", enable_coref=False)
-                result = run_core_nlp_pipeline(content, nlp)
+                result = run_core_nlp_pipeline(region, nlp)
+                # The draft itself, as in _run_lightweight_analysis
+                chunk_text = content
                 
                 # Generate embedding
                 embedding = None
                 try:
-                    embedding = get_embedding(result.normalized_text)
+                    embedding = get_embedding(chunk_text)
                 except Exception as e:
                     logger.error(f"Failed to generate embedding: {e}")
                 
                 # Save narrative chunk
                 store = ExtractionStore(project_id=project_id, supabase_client=self.supabase)
                 store.insert_narrative_chunk(
-                    content=result.normalized_text,
+                    content=chunk_text,
                     embedding=embedding,
                     content_hash=content_hash
                 )
@@ -219,22 +221,25 @@ class AnalysisOrchestrator:
             
             # Always run extraction for analysis (even if chunk exists)
             nlp = get_cached_nlp_pipeline(model_name="en_core_web_sm", enable_coref=False)
-            result = run_core_nlp_pipeline(content, nlp)
+            result = run_core_nlp_pipeline(region, nlp)
             
             # Update knowledge graph using cache
             kg = self._get_or_load_kg(project_id)
-            kg.apply_svo_triples(result.triples, persist=True, original_text=content)
+            with timed("kg", "apply_triples"):
+                kg.apply_svo_triples(result.triples, persist=True, original_text=region)
             
             # Update cache after modifications
             self.kg_cache.set(project_id, kg)
             
             # Generate insights and alerts
-            insight_service = SupabaseInsightService(project_id=project_id)
-            alerts_data = insight_service.process_pending_logs()
+            with timed("analysis", "insights"):
+                insight_service = SupabaseInsightService(project_id=project_id)
+                alerts_data = insight_service.process_pending_logs()
             
             # Run correction suite for polish alerts
-            correction_suite = get_correction_suite()
-            polish_alerts = correction_suite.analyze_polish(content)
+            with timed("analysis", "polish"):
+                correction_suite = get_correction_suite()
+                polish_alerts = correction_suite.analyze_polish(region)
             
             # Collect character names for summary updates with mention counts
             character_mentions: dict[str, int] = {}
@@ -245,14 +250,12 @@ class AnalysisOrchestrator:
             
             unique_character_names = list(character_mentions.keys())
             
-            # Schedule character summary updates as background task
+            # Schedule character summary updates as a background job
             if unique_character_names:
-                asyncio.create_task(
-                    self._batch_character_summaries(
-                        project_id,
-                        unique_character_names,
-                        character_mentions
-                    )
+                await self._schedule_character_summaries(
+                    project_id,
+                    unique_character_names,
+                    character_mentions
                 )
             
             # Format response
@@ -300,17 +303,18 @@ class AnalysisOrchestrator:
                 "alerts": []
             }
     
-    async def _batch_character_summaries(
+    async def _schedule_character_summaries(
         self,
         project_id: str,
         character_names: list[str],
         mention_counts: dict[str, int] | None = None
     ) -> None:
         """
-        Update character summaries in batch as a background task.
+        Queue a character summary update job for the project.
         
-        Uses the optimized batch_update_character_summaries function with
-        throttling, mention-based prioritization, and parallel execution.
+        There is at most one pending summary job per project; scheduling
+        again merges the new characters and mention counts into it, so each
+        character has at most one pending update.
         
         Args:
             project_id: The project identifier
@@ -318,31 +322,17 @@ class AnalysisOrchestrator:
             mention_counts: Optional dict of character name to mention count
         """
         try:
-            from config import settings
-            
-            await batch_update_character_summaries(
-                project_id=project_id,
-                character_names=character_names,
-                mention_counts=mention_counts,
-                max_updates=settings.character_summary_max_per_analysis,
-                supabase_client=self.supabase
+            await get_job_queue().enqueue_async(
+                "character_summaries",
+                {
+                    "project_id": project_id,
+                    "character_names": character_names,
+                    "mention_counts": mention_counts or {},
+                },
+                dedup_key=f"character_summaries:{project_id}",
             )
-                    
         except Exception as e:
-            logger.error(f"Batch character summary update failed: {e}")
-    
-    @staticmethod
-    def _compute_content_hash(content: str) -> str:
-        """
-        Compute a hash of the content for deduplication.
-        
-        Args:
-            content: The content to hash
-            
-        Returns:
-            16-character hex hash of the content
-        """
-        return hashlib.sha256(content.encode()).hexdigest()[:16]
+            logger.error(f"Failed to schedule character summaries: {e}")
     
     def _get_or_load_kg(self, project_id: str) -> StoryKnowledgeGraph:
         """
@@ -354,16 +344,4 @@ class AnalysisOrchestrator:
         Returns:
             The StoryKnowledgeGraph instance
         """
-        # Try to get from cache
-        kg = self.kg_cache.get(project_id)
-        
-        if kg is None:
-            # Cache miss - load from database
-            kg = StoryKnowledgeGraph.from_supabase(
-                project_id=project_id,
-                supabase_client=self.supabase
-            )
-            # Store in cache
-            self.kg_cache.set(project_id, kg)
-        
-        return kg
+        return self.kg_cache.get_or_load(project_id, supabase_client=self.supabase)
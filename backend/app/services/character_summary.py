@@ -4,14 +4,19 @@ from __future__ import annotations
 
 import asyncio
 import os
+import threading
+import time
 from datetime import datetime, timezone
 from typing import Any
 
+from cachetools import LRUCache
 from openai import OpenAI
 from supabase import Client
 
+from lib.metrics import openai_request
+from lib.tracing import propagate
 from lib.supabase import supabase_client as _default_supabase
-from services.llm_gateway import get_embedding
+from services.rag import RAGService
 from config import settings
 
 
@@ -38,40 +43,136 @@ def should_update_summary(entity_metadata: dict) -> bool:
         return True
 
 
-def _gather_character_context(
+class SummarySchedule:
+    """
+    In-memory per-project schedule of when each character's summary is next due.
+
+    Next-eligible times are seeded lazily from entity metadata the first time
+    a throttled character is seen, and pushed forward on every summary write,
+    so characters still inside the throttle window are filtered out before
+    any database query. Mention counts accumulate across analyses and drive
+    the top-N selection.
+
+    Both the projects and each project's per-character entries are LRU
+    bounded; a forgotten character is simply eligible again, with its
+    mention count restarting from zero.
+    """
+
+    def __init__(
+        self,
+        throttle_seconds: float,
+        max_projects: int = 1000,
+        max_characters: int = 500,
+    ) -> None:
+        self._throttle = throttle_seconds
+        self._max_characters = max_characters
+        self._projects: LRUCache = LRUCache(maxsize=max_projects)
+        self._lock = threading.Lock()
+
+    def _project(self, project_id: str) -> dict[str, LRUCache]:
+        entry = self._projects.get(project_id)
+        if entry is None:
+            entry = self._projects[project_id] = {
+                "next_at": LRUCache(maxsize=self._max_characters),
+                "mentions": LRUCache(maxsize=self._max_characters),
+            }
+        return entry
+
+    def record_mentions(self, project_id: str, mention_counts: dict[str, int]) -> None:
+        """Add this analysis' mention counts to the project's running totals."""
+        with self._lock:
+            mentions = self._project(project_id)["mentions"]
+            for name, count in mention_counts.items():
+                mentions[name] = mentions.get(name, 0) + count
+
+    def mention_counts(self, project_id: str) -> dict[str, int]:
+        with self._lock:
+            return dict(self._project(project_id)["mentions"])
+
+    def eligible(
+        self, project_id: str, names: list[str], now: float | None = None
+    ) -> list[str]:
+        """Names whose summary may be due (unknown names are always eligible)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            next_at = self._project(project_id)["next_at"]
+            return [name for name in names if next_at.get(name, 0.0) <= now]
+
+    def seed(self, project_id: str, name: str, last_update: str | None) -> None:
+        """Record the next-eligible time implied by a stored last_summary_update."""
+        if not last_update:
+            return
+        try:
+            last = datetime.fromisoformat(last_update.replace('Z', '+00:00')).timestamp()
+        except (ValueError, AttributeError):
+            return
+        with self._lock:
+            self._project(project_id)["next_at"][name] = last + self._throttle
+
+    def mark_updated(self, project_id: str, name: str, now: float | None = None) -> None:
+        """Push the character's next-eligible time a full throttle window out."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._project(project_id)["next_at"][name] = now + self._throttle
+
+
+# Global schedule instance
+_summary_schedule: SummarySchedule | None = None
+
+
+def get_summary_schedule() -> SummarySchedule:
+    """Get or create the global character summary schedule."""
+    global _summary_schedule
+    if _summary_schedule is None:
+        _summary_schedule = SummarySchedule(settings.character_summary_throttle_seconds)
+    return _summary_schedule
+
+
+def _gather_character_contexts(
     project_id: str,
-    entity_id: str,
-    entity_name: str,
+    characters: list[tuple[str, str]],
     supabase: Client,
-) -> tuple[list[str], list[str]]:
+) -> dict[str, tuple[list[str], list[str]]]:
     """
-    Gather narrative snippets and relationship facts for a character.
-    Returns (narrative_snippets, relationship_facts).
+    Gather narrative snippets and relationship facts for several characters.
+
+    Uses one relationships query covering every character (both directions),
+    one entities query for the other endpoints' names, and one batched RAG
+    retrieval for all characters' snippets.
+
+    Args:
+        project_id: The project identifier
+        characters: (entity_id, entity_name) pairs
+        supabase: Supabase client
+
+    Returns:
+        Mapping of entity_id to (narrative_snippets, relationship_facts)
     """
-    # 1. Fetch relationships for this entity (both directions)
-    rel_as_a = (
-        supabase.table("relationships")
-        .select("entity_a_id, entity_b_id, relation_type, description")
-        .eq("project_id", project_id)
-        .eq("entity_a_id", entity_id)
-        .execute()
-    )
-    rel_as_b = (
+    if not characters:
+        return {}
+
+    names_by_id = dict(characters)
+    ids_csv = ",".join(names_by_id)
+
+    # 1. Fetch relationships touching any of the characters
+    rel_resp = (
         supabase.table("relationships")
         .select("entity_a_id, entity_b_id, relation_type, description")
         .eq("project_id", project_id)
-        .eq("entity_b_id", entity_id)
+        .or_(f"entity_a_id.in.({ids_csv}),entity_b_id.in.({ids_csv})")
         .execute()
     )
+    rel_rows = rel_resp.data or []
 
     # Build id->name map for other entities
+    id_to_name: dict[str, str] = dict(names_by_id)
     other_ids: set[str] = set()
-    for row in (rel_as_a.data or []) + (rel_as_b.data or []):
+    for row in rel_rows:
         other_ids.add(row.get("entity_a_id"))
         other_ids.add(row.get("entity_b_id"))
-    other_ids.discard(entity_id)
+    other_ids -= set(names_by_id)
+    other_ids.discard(None)
 
-    id_to_name: dict[str, str] = {}
     if other_ids:
         entities_resp = (
             supabase.table("entities")
@@ -82,53 +183,55 @@ def _gather_character_context(
         for row in entities_resp.data or []:
             id_to_name[row["id"]] = row["name"]
 
-    relationship_facts: list[str] = []
-    for row in rel_as_a.data or []:
-        other_id = row.get("entity_b_id")
-        other_name = id_to_name.get(other_id, "unknown")
-        rel = (row.get("relation_type") or "RELATED_TO").upper()
-        desc = row.get("description") or ""
-        fact = f"{entity_name} -- {rel} --> {other_name}"
-        if desc:
-            fact += f" ({desc})"
-        relationship_facts.append(fact)
-
-    for row in rel_as_b.data or []:
-        other_id = row.get("entity_a_id")
-        other_name = id_to_name.get(other_id, "unknown")
+    facts_by_id: dict[str, list[str]] = {entity_id: [] for entity_id in names_by_id}
+    for row in rel_rows:
+        a_id, b_id = row.get("entity_a_id"), row.get("entity_b_id")
         rel = (row.get("relation_type") or "RELATED_TO").upper()
         desc = row.get("description") or ""
-        fact = f"{other_name} -- {rel} --> {entity_name}"
+        fact = f"{id_to_name.get(a_id, 'unknown')} -- {rel} --> {id_to_name.get(b_id, 'unknown')}"
         if desc:
             fact += f" ({desc})"
-        relationship_facts.append(fact)
-
-    # 2. Vector search for narrative chunks about this character
-    query_text = (
-        f"Story events, actions, and descriptions involving the character {entity_name}."
+        if a_id in facts_by_id:
+            facts_by_id[a_id].append(fact)
+        if b_id in facts_by_id and b_id != a_id:
+            facts_by_id[b_id].append(fact)
+
+    # 2. One batched vector search for every character's narrative chunks
+    queries = [
+        f"Story events, actions, and descriptions involving the character {name}."
+        for _, name in characters
+    ]
+    matches = RAGService(supabase_client=supabase).retrieve_many(
+        project_id=project_id,
+        queries=queries,
+        top_k=10,
+        threshold=0.3,
+        fallback_to_recent=False,
     )
-    try:
-        query_embedding = get_embedding(query_text)
-    except Exception:
-        return ([], relationship_facts)
 
-    try:
-        rpc_result = supabase.rpc(
-            "match_narrative_chunks",
-            {
-                "query_embedding": query_embedding,
-                "match_threshold": 0.3,
-                "match_count": 10,
-                "p_project_id": project_id,
-            },
-        ).execute()
-    except Exception:
-        return ([], relationship_facts)
+    return {
+        entity_id: (
+            [chunk["content"] for chunk in chunks if chunk.get("content")],
+            facts_by_id[entity_id],
+        )
+        for (entity_id, _), chunks in zip(characters, matches)
+    }
 
-    narrative_snippets = [
-        row["content"] for row in (rpc_result.data or []) if row.get("content")
-    ]
-    return (narrative_snippets, relationship_facts)
+
+def _gather_character_context(
+    project_id: str,
+    entity_id: str,
+    entity_name: str,
+    supabase: Client,
+) -> tuple[list[str], list[str]]:
+    """
+    Gather narrative snippets and relationship facts for a character.
+    Returns (narrative_snippets, relationship_facts).
+    """
+    contexts = _gather_character_contexts(
+        project_id, [(entity_id, entity_name)], supabase
+    )
+    return contexts.get(entity_id, ([], []))
 
 
 def _generate_character_summary(
@@ -171,7 +274,9 @@ Write 2-4 sentences summarizing what this character has done or experienced in t
 Output only the two sections with headers. No other text."""
 
     client = OpenAI(api_key=key)
-    response = client.chat.completions.create(
+    response = openai_request(
+        "character_summary",
+        client.chat.completions.create,
         model=model,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.3,
@@ -197,6 +302,42 @@ Output only the two sections with headers. No other text."""
     return (persona_summary, story_summary)
 
 
+def _write_character_summary(
+    supabase: Client,
+    entity: dict[str, Any],
+    narrative_snippets: list[str],
+    relationship_facts: list[str],
+    api_key: str | None = None,
+) -> dict[str, Any]:
+    """
+    Generate summaries for a CHARACTER entity row and persist them in its metadata.
+    Returns the updated metadata dict.
+    """
+    name = entity.get("name") or "Unknown"
+    existing_metadata: dict[str, Any] = dict(entity.get("metadata") or {})
+
+    persona_summary, story_summary = _generate_character_summary(
+        name=name,
+        narrative_snippets=narrative_snippets,
+        relationship_facts=relationship_facts,
+        api_key=api_key,
+    )
+
+    updated_metadata = {
+        **existing_metadata,
+        "persona_summary": persona_summary,
+        "story_summary": story_summary,
+        "summary_updated_at": datetime.now(timezone.utc).isoformat(),
+        "last_summary_update": datetime.now(timezone.utc).isoformat(),  # For throttling
+    }
+
+    supabase.table("entities").update({"metadata": updated_metadata}).eq(
+        "id", entity["id"]
+    ).execute()
+
+    return updated_metadata
+
+
 def update_character_summary(
     project_id: str,
     entity_id: str,
@@ -226,35 +367,17 @@ def update_character_summary(
     if row.get("entity_type") != "CHARACTER":
         return None
 
-    name = row.get("name") or "Unknown"
-    existing_metadata: dict[str, Any] = dict(row.get("metadata") or {})
-
     narrative_snippets, relationship_facts = _gather_character_context(
         project_id=project_id,
         entity_id=entity_id,
-        entity_name=name,
+        entity_name=row.get("name") or "Unknown",
         supabase=supabase,
     )
 
-    persona_summary, story_summary = _generate_character_summary(
-        name=name,
-        narrative_snippets=narrative_snippets,
-        relationship_facts=relationship_facts,
-        api_key=api_key,
+    updated_metadata = _write_character_summary(
+        supabase, row, narrative_snippets, relationship_facts, api_key=api_key
     )
-
-    updated_metadata = {
-        **existing_metadata,
-        "persona_summary": persona_summary,
-        "story_summary": story_summary,
-        "summary_updated_at": datetime.now(timezone.utc).isoformat(),
-        "last_summary_update": datetime.now(timezone.utc).isoformat(),  # For throttling
-    }
-
-    supabase.table("entities").update({"metadata": updated_metadata}).eq(
-        "id", entity_id
-    ).execute()
-
+    get_summary_schedule().mark_updated(project_id, row.get("name") or "Unknown")
     return updated_metadata
 
 
@@ -269,13 +392,18 @@ async def batch_update_character_summaries(
     """
     Update character summaries in batch with throttling and prioritization.
     
-    Fetches character entities, filters by throttle time, sorts by mention count,
-    and updates summaries for the top N characters in parallel.
+    Characters still inside the throttle window are dropped using the
+    in-memory SummarySchedule before any query. The remaining character
+    entities are fetched, re-checked against their stored throttle time,
+    sorted by mention count accumulated across analyses, and the top N get
+    their context gathered in one batch (one relationships query, one
+    embedding request, one vector search) and summaries generated in parallel.
     
     Args:
         project_id: The project identifier
         character_names: List of character names to consider
         mention_counts: Optional dict mapping character names to mention counts
+            in this analysis (added to the project's running totals)
         max_updates: Maximum number of summaries to update (default: 3)
         supabase_client: Optional Supabase client
         api_key: Optional OpenAI API key
@@ -284,6 +412,15 @@ async def batch_update_character_summaries(
         List of updated metadata dictionaries
     """
     supabase = supabase_client or _default_supabase
+    schedule = get_summary_schedule()
+    
+    if mention_counts:
+        schedule.record_mentions(project_id, mention_counts)
+    
+    # Drop characters known to be throttled without touching the database
+    candidate_names = schedule.eligible(project_id, character_names)
+    if not candidate_names:
+        return []
     
     # Fetch character entities
     entities_resp = (
@@ -291,46 +428,65 @@ async def batch_update_character_summaries(
         .select("id, name, entity_type, metadata")
         .eq("project_id", project_id)
         .eq("entity_type", "CHARACTER")
-        .in_("name", character_names)
+        .in_("name", candidate_names)
         .execute()
     )
     
     entities = entities_resp.data or []
     
-    # Filter entities that need updates (check throttle)
+    # Filter entities that need updates (check throttle), seeding the schedule
     entities_to_update = []
     for entity in entities:
         metadata = entity.get("metadata") or {}
         if should_update_summary(metadata):
             entities_to_update.append(entity)
+        else:
+            schedule.seed(project_id, entity["name"], metadata.get("last_summary_update"))
     
     if not entities_to_update:
         return []
     
-    # Sort by mention count if provided
-    if mention_counts:
-        entities_to_update.sort(
-            key=lambda e: mention_counts.get(e["name"], 0),
-            reverse=True
-        )
+    # Sort by accumulated mention count
+    total_mentions = schedule.mention_counts(project_id)
+    entities_to_update.sort(
+        key=lambda e: total_mentions.get(e["name"], 0),
+        reverse=True
+    )
     
     # Limit to max_updates
     entities_to_update = entities_to_update[:max_updates]
     
-    # Update summaries in parallel using asyncio.gather
+    loop = asyncio.get_event_loop()
+    
+    # Gather context for all selected characters in one batch
+    # (propagate keeps executor work in the caller's trace)
+    try:
+        contexts = await loop.run_in_executor(
+            None,
+            propagate(_gather_character_contexts),
+            project_id,
+            [(e["id"], e.get("name") or "Unknown") for e in entities_to_update],
+            supabase,
+        )
+    except Exception:
+        return []
+    
+    # Generate and store summaries in parallel using asyncio.gather
     async def update_one(entity: dict) -> dict[str, Any] | None:
-        """Async wrapper for update_character_summary."""
+        """Async wrapper for _write_character_summary."""
         try:
+            narrative_snippets, relationship_facts = contexts.get(entity["id"], ([], []))
             # Run the sync function in a thread pool
-            loop = asyncio.get_event_loop()
             result = await loop.run_in_executor(
                 None,
-                update_character_summary,
-                project_id,
-                entity["id"],
-                supabase_client,
+                propagate(_write_character_summary),
+                supabase,
+                entity,
+                narrative_snippets,
+                relationship_facts,
                 api_key
             )
+            schedule.mark_updated(project_id, entity["name"])
             return result
         except Exception:
             return None
@@ -342,3 +498,26 @@ async def batch_update_character_summaries(
     
     # Filter out None and exceptions
     return [r for r in results if r is not None and not isinstance(r, Exception)]
+
+
+def merge_summary_payloads(
+    pending: dict[str, Any], new: dict[str, Any]
+) -> dict[str, Any]:
+    """Fold a new character_summaries job payload into the pending one for the project."""
+    names = list(pending.get("character_names") or [])
+    names.extend(n for n in new.get("character_names") or [] if n not in names)
+    counts = dict(pending.get("mention_counts") or {})
+    for name, count in (new.get("mention_counts") or {}).items():
+        counts[name] = counts.get(name, 0) + count
+    return {**pending, "character_names": names, "mention_counts": counts}
+
+
+async def run_character_summary_job(payload: dict[str, Any]) -> dict[str, Any]:
+    """Job handler for character_summaries jobs."""
+    results = await batch_update_character_summaries(
+        project_id=payload["project_id"],
+        character_names=payload.get("character_names") or [],
+        mention_counts=payload.get("mention_counts") or None,
+        max_updates=settings.character_summary_max_per_analysis,
+    )
+    return {"updated": len(results)}
@@ -1,3 +1,4 @@
+from lib.metrics import openai_request
 from services.llm_gateway import InsightGenerator
 
 
@@ -45,7 +46,9 @@ class CorrectionSuite:
                         f"Text to correct:\n{corrected}"
                     )
 
-                    response = self.generator.client.chat.completions.create(
+                    response = openai_request(
+                        "grammar_correction",
+                        self.generator.client.chat.completions.create,
                         model=self.generator.model,
                         messages=[{"role": "user", "content": prompt}],
                         temperature=0.1,
@@ -2,18 +2,29 @@
 
 from __future__ import annotations
 
-import hashlib
+import logging
 from dataclasses import dataclass
 from importlib import import_module
 from importlib.util import find_spec
+from typing import Any, Iterable, Iterator
 
 import spacy
 from spacy.language import Language
 from spacy.tokens import Doc, Span, Token
+from postgrest.exceptions import APIError
 from supabase import Client
 
-from lib.supabase import supabase_client as _default_supabase
-from functools import lru_cache
+from lib.supabase import FUNCTION_NOT_FOUND, supabase_client as _default_supabase
+from lib.content_hashes import compute_content_hash, get_content_hash_store
+from lib.lexical_index import get_lexical_store
+from lib.metrics import timed, timed_iter
+from lib.vector_store import get_vector_store
+from lib.nlp_registry import get_nlp_registry
+
+logger = logging.getLogger(__name__)
+
+# Set once append_narrative_chunk is found missing; later appends skip the RPC
+_append_rpc_missing = False
 
 SUBJECT_DEPS = {"nsubj", "nsubjpass", "csubj", "expl"}
 OBJECT_DEPS = {"dobj", "obj", "iobj", "attr", "oprd", "dative", "pobj"}
@@ -31,6 +42,13 @@ ENTITY_LABEL_MAP = {
     "DATE": "OBJECT",
     "TIME": "OBJECT",
 }
+# Components run per analysis profile (None keeps the whole pipeline).
+# "ner" serves auto-save, which only needs entities: en_core_web_sm's NER
+# has its own tok2vec, so tagger/parser/lemmatizer can be skipped.
+PIPELINE_PROFILES: dict[str, tuple[str, ...] | None] = {
+    "full": None,
+    "ner": ("ner",),
+}
 TRANSIENT_VERBS = {
     "SAY",
     "THINK",
@@ -85,18 +103,6 @@ class ExtractionStore:
         )
         return bool(row.data)
     
-    def _compute_content_hash(self, content: str) -> str:
-        """
-        Compute a SHA-256 hash of the content for deduplication.
-        
-        Args:
-            content: The text content to hash
-            
-        Returns:
-            First 16 characters of the SHA-256 hash
-        """
-        return hashlib.sha256(content.encode()).hexdigest()[:16]
-    
     def _chunk_exists(self, content_hash: str) -> bool:
         """
         Check if a chunk with the same content hash already exists.
@@ -136,15 +142,79 @@ class ExtractionStore:
 
     def insert_narrative_chunk(
         self, content: str, embedding: list[float] | None = None, content_hash: str | None = None
-    ) -> None:
+    ) -> dict[str, object] | None:
+        """
+        Append a chunk to the project's story unless identical content is already saved.
+
+        Uses the append_narrative_chunk function, which checks the content
+        hash, assigns the next chunk_index and inserts atomically in one round
+        trip. Falls back to separate queries only if PostgREST reports the
+        function missing (PGRST202), and remembers that for later calls;
+        any other error is raised.
+
+        Returns:
+            The new row (id, chunk_index), or None if the content was a duplicate
+        """
         # Compute content hash for deduplication if not provided
         if content_hash is None:
-            content_hash = self._compute_content_hash(content)
-        
+            content_hash = compute_content_hash(content)
+
+        global _append_rpc_missing
+        use_rpc = not _append_rpc_missing
+        if use_rpc:
+            try:
+                resp = self.supabase.rpc(
+                    "append_narrative_chunk",
+                    {
+                        "p_project_id": self.project_id,
+                        "p_content": content,
+                        "p_content_hash": content_hash,
+                        "p_embedding": embedding,
+                    },
+                ).execute()
+            except APIError as e:
+                if e.code != FUNCTION_NOT_FOUND:
+                    raise
+                logger.warning(
+                    "append_narrative_chunk is not installed (migration 006); "
+                    "appending chunks with separate queries"
+                )
+                _append_rpc_missing = True
+                use_rpc = False
+
+        if use_rpc:
+            rows = resp.data or []
+            row = rows[0] if rows else None
+            if row is not None:
+                get_content_hash_store().add(self.project_id, content_hash, row.get("chunk_index"))
+            if row is None or not row.get("inserted"):
+                return None
+        else:
+            row = self._insert_narrative_chunk_legacy(content, embedding, content_hash)
+            if row is None:
+                return None
+            get_content_hash_store().add(self.project_id, content_hash, row["chunk_index"])
+
+        chunk_id, chunk_index = row.get("id"), row["chunk_index"]
+        get_lexical_store().add_chunk(self.project_id, chunk_id, content, chunk_index)
+        if embedding is not None:
+            get_vector_store().add_chunk(
+                self.project_id,
+                chunk_id,
+                content,
+                chunk_index,
+                embedding,
+            )
+        return {"id": chunk_id, "chunk_index": chunk_index}
+
+    def _insert_narrative_chunk_legacy(
+        self, content: str, embedding: list[float] | None, content_hash: str
+    ) -> dict[str, object] | None:
+        """Check, read the last index, then insert (not atomic; pre-006 databases)."""
         # Check if this content already exists
         if self._chunk_exists(content_hash):
-            return  # Skip duplicate content
-        
+            return None  # Skip duplicate content
+
         max_index_query = (
             self.supabase.table("narrative_chunks")
             .select("chunk_index")
@@ -165,7 +235,10 @@ class ExtractionStore:
         if embedding is not None:
             payload["embedding"] = embedding
 
-        self.supabase.table("narrative_chunks").insert(payload).execute()
+        inserted = self.supabase.table("narrative_chunks").insert(payload).execute()
+        if not inserted.data:
+            return None
+        return {"id": inserted.data[0].get("id"), "chunk_index": next_idx}
 
 
 def build_nlp_pipeline(
@@ -187,12 +260,22 @@ def build_nlp_pipeline(
     return nlp
 
 
-@lru_cache(maxsize=2)
 def get_cached_nlp_pipeline(
-    model_name: str = "en_core_web_sm", enable_coref: bool = False
+    model_name: str = "en_core_web_sm",
+    enable_coref: bool = False,
+    profile: str = "full",
 ) -> Language:
-    """Return a cached spaCy pipeline to avoid rebuilding it on every request."""
-    return build_nlp_pipeline(model_name=model_name, enable_coref=enable_coref)
+    """
+    Return the process-wide shared pipeline (see lib.nlp_registry).
+
+    profile selects the components to run (see PIPELINE_PROFILES); anything
+    narrower than "full" is a view over the same loaded model.
+    """
+    extra_pipes = ("fastcoref",) if enable_coref else ()
+    enable = PIPELINE_PROFILES[profile]
+    if enable is not None:
+        enable = enable + extra_pipes
+    return get_nlp_registry().get(model_name, enable=enable, extra_pipes=extra_pipes)
 
 
 def extract_named_entities(doc: Doc) -> list[dict[str, str]]:
@@ -274,12 +357,67 @@ def extract_svo_triples(doc: Doc) -> list[SVOTriple]:
     return triples
 
 
-def run_core_nlp_pipeline(text: str, nlp: Language) -> ExtractionResult:
-    """Run NER -> coreference resolution -> SVO extraction for input text."""
-    original_doc = nlp(text)
-    entities = extract_named_entities(original_doc)
+def run_core_nlp_pipeline(
+    text: str, nlp: Language, extract_triples: bool = True
+) -> ExtractionResult:
+    """
+    Run NER -> coreference resolution -> SVO extraction for input text.
+
+    With extract_triples=False only entities (and coreference, if the
+    pipeline has it) are produced, so nlp can be an NER-only profile.
+    """
+    with timed("nlp", "core_pipeline"):
+        return _result_from_doc(nlp(text), nlp, extract_triples)
+
+
+def iter_core_nlp_pipeline(
+    texts: Iterable[Any],
+    nlp: Language,
+    *,
+    batch_size: int = 8,
+    n_process: int = 1,
+    extract_triples: bool = True,
+    as_tuples: bool = False,
+) -> Iterator[Any]:
+    """
+    Run the core pipeline over many documents with nlp.pipe.
+
+    Results are yielded in input order as each batch finishes, so memory is
+    bounded by batch_size rather than by the manuscript: pass a generator of
+    chapter texts and consume the results as they arrive.
+
+    Args:
+        texts: Document texts, or (text, context) pairs when as_tuples is set
+        nlp: Pipeline or profile view (see get_cached_nlp_pipeline)
+        batch_size: Documents per nlp.pipe batch (chapters are long; keep it small)
+        n_process: Worker processes for nlp.pipe
+        extract_triples: As in run_core_nlp_pipeline
+        as_tuples: Yield (ExtractionResult, context) pairs
+
+    Yields:
+        ExtractionResult per document, or (ExtractionResult, context)
+    """
+    docs = nlp.pipe(texts, batch_size=batch_size, n_process=n_process, as_tuples=as_tuples)
+    if as_tuples:
+        results = ((_result_from_doc(doc, nlp, extract_triples), context) for doc, context in docs)
+    else:
+        results = (_result_from_doc(doc, nlp, extract_triples) for doc in docs)
+    yield from timed_iter(results, "nlp", "core_pipeline")
 
+
+def _result_from_doc(
+    original_doc: Doc, nlp: Language, extract_triples: bool
+) -> ExtractionResult:
+    entities = extract_named_entities(original_doc)
     normalized_text = resolve_coreferences(original_doc)
+
+    if not extract_triples:
+        return ExtractionResult(
+            normalized_text=normalized_text,
+            entities=entities,
+            triples=[],
+        )
+
     if normalized_text != original_doc.text:
         parsed_doc = nlp.make_doc(normalized_text)
         for pipe_name, pipe in nlp.pipeline:
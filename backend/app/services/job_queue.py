@@ -0,0 +1,653 @@
+"""Durable local job queue for background analysis work, backed by SQLite."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from config import settings
+from lib.tracing import SPAN_KIND_CONSUMER, current_traceparent, parse_traceparent, start_span
+
+logger = logging.getLogger(__name__)
+
+# A handler receives the job payload; it may be sync (run in a thread) or async
+JobHandler = Callable[[dict[str, Any]], Any]
+# Combines a pending job's payload with a new payload for the same dedup key
+PayloadMerge = Callable[[dict[str, Any], dict[str, Any]], dict[str, Any]]
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+# Folded into a newer pending job with the same dedup key (see JobStore.fail)
+SUPERSEDED = "superseded"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    job_type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    dedup_key TEXT,
+    run_at REAL NOT NULL,
+    locked_until REAL,
+    result TEXT,
+    error TEXT,
+    progress TEXT,
+    traceparent TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim_idx ON jobs (queue, status, priority DESC, run_at);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending_dedup_idx ON jobs (dedup_key)
+    WHERE dedup_key IS NOT NULL AND status = 'pending';
+CREATE TABLE IF NOT EXISTS checkpoints (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# (store, job id, lease seconds) of the job whose handler is running in this context
+_current_job: contextvars.ContextVar[tuple["JobStore", str, float] | None] = contextvars.ContextVar(
+    "current_job", default=None
+)
+
+
+@dataclass
+class JobType:
+    """Registration of a job type: its handler, queue and scheduling policy."""
+
+    name: str
+    handler: JobHandler
+    queue: str
+    priority: int = 0
+    max_attempts: int = 3
+    merge: PayloadMerge | None = None
+
+
+class JobStore:
+    """
+    SQLite-backed job table.
+
+    Every state change runs in its own ``BEGIN IMMEDIATE`` transaction, so
+    several worker processes can share one database file: a job is claimed
+    by exactly one of them. A claimed job holds a lease; if its worker dies,
+    the job becomes claimable again once the lease expires, or is marked
+    failed if that was its last attempt.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._path = str(path)
+        if self._path != ":memory:":
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self._path, isolation_level=None, check_same_thread=False, timeout=30.0
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            if self._path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        self._transaction(self._add_missing_columns)
+
+    @staticmethod
+    def _add_missing_columns(conn: sqlite3.Connection) -> None:
+        """Upgrade job tables created before a column existed."""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "progress" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+        if "traceparent" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN traceparent TEXT")
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row | None) -> dict[str, Any] | None:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        job["progress"] = json.loads(job["progress"]) if job.get("progress") is not None else None
+        return job
+
+    def enqueue(
+        self,
+        job_type: str,
+        queue: str,
+        payload: dict[str, Any],
+        priority: int = 0,
+        max_attempts: int = 3,
+        dedup_key: str | None = None,
+        merge: PayloadMerge | None = None,
+        traceparent: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Insert a pending job, or fold it into the pending job with the same dedup key.
+
+        Args:
+            job_type: Registered job type name
+            queue: Queue the job runs on
+            payload: JSON-serializable handler input
+            priority: Higher runs first within a queue
+            max_attempts: Attempts before the job is marked failed
+            dedup_key: At most one pending job exists per key
+            merge: Combines the pending payload with ``payload`` on a dedup hit
+                (default: keep the pending payload)
+            traceparent: Trace context of the enqueuing request; a merged job
+                keeps the one it was first enqueued with
+
+        Returns:
+            The stored job
+        """
+        now = time.time()
+
+        def run(conn: sqlite3.Connection) -> dict[str, Any]:
+            if dedup_key is not None:
+                existing = conn.execute(
+                    "SELECT * FROM jobs WHERE dedup_key = ? AND status = ?",
+                    (dedup_key, PENDING),
+                ).fetchone()
+                if existing is not None:
+                    merged = json.loads(existing["payload"])
+                    if merge is not None:
+                        merged = merge(merged, payload)
+                    conn.execute(
+                        "UPDATE jobs SET payload = ?, priority = MAX(priority, ?), updated_at = ? "
+                        "WHERE id = ?",
+                        (json.dumps(merged), priority, now, existing["id"]),
+                    )
+                    return self._to_dict(
+                        conn.execute("SELECT * FROM jobs WHERE id = ?", (existing["id"],)).fetchone()
+                    )
+
+            job_id = str(uuid.uuid4())
+            conn.execute(
+                "INSERT INTO jobs (id, queue, job_type, payload, priority, status, "
+                "max_attempts, dedup_key, traceparent, run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, queue, job_type, json.dumps(payload), priority, PENDING,
+                 max_attempts, dedup_key, traceparent, now, now, now),
+            )
+            return self._to_dict(
+                conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            )
+
+        return self._transaction(run)
+
+    def claim(self, queue: str, lease_seconds: float) -> dict[str, Any] | None:
+        """
+        Take the next runnable job on a queue (highest priority, oldest first).
+
+        Jobs whose lease expired (their worker died) are runnable again while
+        they have attempts left; those without are marked failed here.
+        """
+        now = time.time()
+
+        def run(conn: sqlite3.Connection) -> dict[str, Any] | None:
+            conn.execute(
+                "UPDATE jobs SET status = ?, "
+                "error = 'Worker lost after ' || attempts || ' attempt(s) (lease expired)', "
+                "locked_until = NULL, updated_at = ? "
+                "WHERE queue = ? AND status = ? AND locked_until < ? AND attempts >= max_attempts",
+                (FAILED, now, queue, RUNNING, now),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE queue = ? AND ("
+                "  (status = ? AND run_at <= ?) OR (status = ? AND locked_until < ?)"
+                ") ORDER BY priority DESC, run_at ASC, rowid ASC LIMIT 1",
+                (queue, PENDING, now, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, locked_until = ?, "
+                "updated_at = ? WHERE id = ?",
+                (RUNNING, now + lease_seconds, now, row["id"]),
+            )
+            return self._to_dict(
+                conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            )
+
+        return self._transaction(run)
+
+    def complete(self, job_id: str, result: Any = None) -> None:
+        self._transaction(
+            lambda conn: conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, locked_until = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (SUCCEEDED, json.dumps(result, default=str), time.time(), job_id),
+            )
+        )
+
+    @staticmethod
+    def _fold_into_pending(
+        conn: sqlite3.Connection,
+        job_id: str,
+        merge: PayloadMerge | None,
+        now: float,
+        run_at: float | None = None,
+        error: str | None = None,
+    ) -> bool:
+        """
+        Fold a job going back to pending into the pending job with its dedup key.
+
+        A newer job with the same key may have been enqueued while this one
+        ran, and only one pending job may exist per key. The requeued job's
+        payload is merged into that job (as the older of the two) and the
+        requeued job is marked superseded, pointing at the job that carries
+        its work.
+
+        Returns:
+            True if the job was folded, False if it can simply be requeued
+        """
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None or job["dedup_key"] is None:
+            return False
+        pending = conn.execute(
+            "SELECT * FROM jobs WHERE dedup_key = ? AND status = ? AND id != ?",
+            (job["dedup_key"], PENDING, job_id),
+        ).fetchone()
+        if pending is None:
+            return False
+
+        merged = json.loads(pending["payload"])
+        if merge is not None:
+            merged = merge(json.loads(job["payload"]), merged)
+        conn.execute(
+            "UPDATE jobs SET payload = ?, priority = MAX(priority, ?), "
+            "run_at = MAX(run_at, COALESCE(?, run_at)), updated_at = ? WHERE id = ?",
+            (json.dumps(merged), job["priority"], run_at, now, pending["id"]),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = COALESCE(?, error), "
+            "locked_until = NULL, updated_at = ? WHERE id = ?",
+            (SUPERSEDED, json.dumps({"superseded_by": pending["id"]}), error, now, job_id),
+        )
+        return True
+
+    def fail(
+        self,
+        job_id: str,
+        error: str,
+        retry_in: float | None,
+        merge: PayloadMerge | None = None,
+    ) -> None:
+        """
+        Record a failed attempt; retry after ``retry_in`` seconds, or give up if None.
+
+        If a job with the same dedup key was enqueued meanwhile, the retry is
+        folded into it with ``merge`` instead (see ``_fold_into_pending``).
+        """
+        now = time.time()
+        if retry_in is None:
+            sql, params = (
+                "UPDATE jobs SET status = ?, error = ?, locked_until = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (FAILED, error, now, job_id),
+            )
+        else:
+            sql, params = (
+                "UPDATE jobs SET status = ?, error = ?, run_at = ?, locked_until = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (PENDING, error, now + retry_in, now, job_id),
+            )
+
+        def run(conn: sqlite3.Connection) -> None:
+            if retry_in is not None and self._fold_into_pending(
+                conn, job_id, merge, now, run_at=now + retry_in, error=error
+            ):
+                return
+            conn.execute(sql, params)
+
+        self._transaction(run)
+
+    def release(self, job_id: str, merge: PayloadMerge | None = None) -> None:
+        """
+        Hand an interrupted job back to the queue without counting the attempt.
+
+        Like ``fail``, a job whose dedup key already has a pending job is
+        folded into it with ``merge``.
+        """
+        now = time.time()
+
+        def run(conn: sqlite3.Connection) -> None:
+            running = conn.execute(
+                "SELECT 1 FROM jobs WHERE id = ? AND status = ?", (job_id, RUNNING)
+            ).fetchone()
+            if running is None or self._fold_into_pending(conn, job_id, merge, now):
+                return
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0), "
+                "locked_until = NULL, updated_at = ? WHERE id = ?",
+                (PENDING, now, job_id),
+            )
+
+        self._transaction(run)
+
+    def heartbeat(self, job_id: str, lease_seconds: float, progress: Any = None) -> None:
+        """Extend a running job's lease, optionally recording its progress."""
+        now = time.time()
+        if progress is None:
+            sql, params = (
+                "UPDATE jobs SET locked_until = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (now + lease_seconds, now, job_id, RUNNING),
+            )
+        else:
+            sql, params = (
+                "UPDATE jobs SET locked_until = ?, progress = ?, updated_at = ? "
+                "WHERE id = ? AND status = ?",
+                (now + lease_seconds, json.dumps(progress, default=str), now, job_id, RUNNING),
+            )
+        self._transaction(lambda conn: conn.execute(sql, params))
+
+    def save_checkpoint(self, key: str, data: dict[str, Any]) -> None:
+        """Store resumable state for long-running work (e.g. a project reindex)."""
+        self._transaction(
+            lambda conn: conn.execute(
+                "INSERT INTO checkpoints (key, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (key, json.dumps(data, default=str), time.time()),
+            )
+        )
+
+    def load_checkpoint(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM checkpoints WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["data"]) if row is not None else None
+
+    def clear_checkpoint(self, key: str) -> None:
+        self._transaction(lambda conn: conn.execute("DELETE FROM checkpoints WHERE key = ?", (key,)))
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Job counts per queue and status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT queue, status, COUNT(*) AS n FROM jobs GROUP BY queue, status"
+            ).fetchall()
+        stats: dict[str, dict[str, int]] = {}
+        for row in rows:
+            stats.setdefault(row["queue"], {})[row["status"]] = row["n"]
+        return stats
+
+
+class JobQueue:
+    """
+    Runs registered job types from a JobStore on named queues.
+
+    Each queue gets its own pool of worker coroutines, so its concurrency
+    limit is enforced per process. Sync handlers and all SQLite access run
+    in the default thread pool to keep the event loop free for requests;
+    failed jobs are retried with exponential backoff. While a handler runs,
+    its worker renews the job's lease, so only a dead worker's jobs are
+    reclaimed.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        concurrency: dict[str, int] | None = None,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 600.0,
+        backoff_base: float = 5.0,
+        backoff_max: float = 300.0,
+    ) -> None:
+        self.store = store
+        self._concurrency = dict(concurrency or {})
+        self._poll_interval = poll_interval
+        self._lease_seconds = lease_seconds
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._types: dict[str, JobType] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def register(
+        self,
+        name: str,
+        handler: JobHandler,
+        queue: str,
+        priority: int = 0,
+        max_attempts: int = 3,
+        merge: PayloadMerge | None = None,
+    ) -> None:
+        """Register a job type. Queues without a configured limit run one job at a time."""
+        self._types[name] = JobType(name, handler, queue, priority, max_attempts, merge)
+        self._concurrency.setdefault(queue, 1)
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: dict[str, Any],
+        dedup_key: str | None = None,
+        priority: int | None = None,
+    ) -> dict[str, Any]:
+        """Persist a job for a registered type and wake its queue."""
+        spec = self._types.get(job_type)
+        if spec is None:
+            raise KeyError(f"Unknown job type: {job_type}")
+        job = self.store.enqueue(
+            job_type,
+            spec.queue,
+            payload,
+            priority=spec.priority if priority is None else priority,
+            max_attempts=spec.max_attempts,
+            dedup_key=dedup_key,
+            merge=spec.merge,
+            traceparent=current_traceparent(),
+        )
+        wakeup = self._wakeups.get(spec.queue)
+        if wakeup is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(wakeup.set)
+        return job
+
+    async def enqueue_async(
+        self,
+        job_type: str,
+        payload: dict[str, Any],
+        dedup_key: str | None = None,
+        priority: int | None = None,
+    ) -> dict[str, Any]:
+        """``enqueue`` off the event loop, for async routes and services."""
+        return await asyncio.to_thread(self.enqueue, job_type, payload, dedup_key, priority)
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        return self.store.get(job_id)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return self.store.stats()
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before retrying a job that has failed ``attempts`` times."""
+        return min(self._backoff_base * 2 ** max(attempts - 1, 0), self._backoff_max)
+
+    async def start(self) -> None:
+        """Start worker coroutines for every queue on the running loop."""
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        for queue, limit in self._concurrency.items():
+            self._wakeups[queue] = asyncio.Event()
+            for _ in range(max(1, limit)):
+                self._tasks.append(asyncio.create_task(self._worker(queue)))
+
+    async def stop(self) -> None:
+        """Stop workers; jobs that were running are handed back to the queue."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeups = {}
+        self._loop = None
+
+    async def run_once(self, queue: str) -> bool:
+        """Claim and run one job from a queue. Returns False if none was runnable."""
+        job = await asyncio.to_thread(self.store.claim, queue, self._lease_seconds)
+        if job is None:
+            return False
+        await self._run(job)
+        return True
+
+    async def _worker(self, queue: str) -> None:
+        wakeup = self._wakeups[queue]
+        while True:
+            try:
+                if await self.run_once(queue):
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker on queue {queue} failed: {e}")
+            wakeup.clear()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _keep_leased(self, job_id: str) -> None:
+        """Renew a running job's lease until cancelled."""
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, job_id, self._lease_seconds)
+            except Exception as e:
+                logger.error(f"Failed to renew the lease of job {job_id}: {e}")
+
+    async def _run(self, job: dict[str, Any]) -> None:
+        spec = self._types.get(job["job_type"])
+        if spec is None:
+            await asyncio.to_thread(
+                self.store.fail, job["id"], f"Unknown job type: {job['job_type']}", None
+            )
+            return
+
+        token = _current_job.set((self.store, job["id"], self._lease_seconds))
+        lease = asyncio.create_task(self._keep_leased(job["id"]))
+        try:
+            # Continue the trace of the request that enqueued the job
+            with start_span(
+                f"job {job['job_type']}",
+                parent=parse_traceparent(job.get("traceparent")),
+                kind=SPAN_KIND_CONSUMER,
+                attributes={"job.id": job["id"], "job.attempt": job["attempts"]},
+            ):
+                if inspect.iscoroutinefunction(spec.handler):
+                    result = await spec.handler(job["payload"])
+                else:
+                    # to_thread carries the context, so report_progress and spans work in sync handlers
+                    result = await asyncio.to_thread(spec.handler, job["payload"])
+        except asyncio.CancelledError:
+            self.store.release(job["id"], merge=spec.merge)
+            raise
+        except Exception as e:
+            retry_in = self.backoff(job["attempts"]) if job["attempts"] < job["max_attempts"] else None
+            logger.error(
+                f"Job {job['id']} ({job['job_type']}) attempt {job['attempts']} failed: {e}"
+                + (f"; retrying in {retry_in:.0f}s" if retry_in is not None else "")
+            )
+            await asyncio.to_thread(self.store.fail, job["id"], str(e), retry_in, spec.merge)
+            return
+        finally:
+            lease.cancel()
+            _current_job.reset(token)
+
+        await asyncio.to_thread(self.store.complete, job["id"], result)
+
+
+def report_progress(progress: dict[str, Any]) -> None:
+    """
+    Record progress for the job running in this context and extend its lease.
+
+    The worker already renews the lease while the handler runs; handlers
+    call this to make their progress visible on /jobs. Outside a job it
+    does nothing.
+    """
+    current = _current_job.get()
+    if current is None:
+        return
+    store, job_id, lease_seconds = current
+    try:
+        store.heartbeat(job_id, lease_seconds, progress)
+    except Exception as e:
+        logger.error(f"Failed to record progress for job {job_id}: {e}")
+
+
+def _register_default_jobs(queue: JobQueue) -> None:
+    from services.character_summary import merge_summary_payloads, run_character_summary_job
+    from services.plot_extraction import run_plot_extraction_job
+    from services.reindex import run_reindex_job
+
+    queue.register(
+        "character_summaries",
+        run_character_summary_job,
+        queue="summaries",
+        priority=10,
+        merge=merge_summary_payloads,
+    )
+    queue.register(
+        "plot_extraction",
+        run_plot_extraction_job,
+        queue="plot",
+        priority=5,
+        max_attempts=2,
+    )
+    queue.register(
+        "reindex",
+        run_reindex_job,
+        queue="maintenance",
+        max_attempts=3,
+    )
+
+
+# Global queue instance
+_job_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create the global job queue with the default job types registered."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            JobStore(settings.job_db_path),
+            concurrency={
+                "summaries": settings.job_summary_concurrency,
+                "plot": settings.job_plot_concurrency,
+                "maintenance": settings.job_maintenance_concurrency,
+            },
+            poll_interval=settings.job_poll_interval_seconds,
+            lease_seconds=settings.job_lease_seconds,
+        )
+        _register_default_jobs(_job_queue)
+    return _job_queue
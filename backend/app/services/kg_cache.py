@@ -5,9 +5,19 @@ from __future__ import annotations
 import threading
 from typing import TYPE_CHECKING
 
-from cachetools import TTLCache
+from cachetools import LRUCache, TTLCache
+
+from lib.metrics import KG_CACHE_REQUESTS, timed
+from services.kg_invalidation import (
+    InProcessInvalidationBus,
+    InvalidationBus,
+    get_invalidation_bus,
+)
+from services.kg_snapshot import KGSnapshotStore
 
 if TYPE_CHECKING:
+    from supabase import Client
+
     from services.analysis import StoryKnowledgeGraph
 
 
@@ -22,18 +32,59 @@ class KGCache:
     - TTL: 300 seconds (5 minutes)
     - Max size: 100 projects
     - Eviction policy: LRU (Least Recently Used)
+    
+    Writes are published on an InvalidationBus with a per-project version,
+    so caches in other workers apply the delta or drop their stale copy.
+    
+    Graphs that expire from the TTL cache are retained (LRU, same max size)
+    so a later miss can catch up with an incremental sync instead of a full
+    reload. Only a plain invalidation discards the retained copy.
     """
     
-    def __init__(self, ttl_seconds: int = 300, max_size: int = 100):
+    def __init__(
+        self,
+        ttl_seconds: int = 300,
+        max_size: int = 100,
+        bus: InvalidationBus | None = None,
+        snapshots: KGSnapshotStore | None = None,
+    ):
         """
         Initialize the KG cache.
         
         Args:
             ttl_seconds: Time-to-live for cache entries in seconds (default: 300)
             max_size: Maximum number of projects to cache (default: 100)
+            bus: Invalidation channel shared with other workers (default: in-process)
+            snapshots: Optional on-disk snapshot store for warm restarts
         """
         self._cache: TTLCache = TTLCache(maxsize=max_size, ttl=ttl_seconds)
+        self._retained: LRUCache = LRUCache(maxsize=max_size)
         self._lock = threading.RLock()
+        self._bus = bus or InProcessInvalidationBus()
+        self._snapshots = snapshots
+    
+    def _sync(self) -> None:
+        """
+        Apply writes published by other workers. Caller must hold the lock.
+        
+        A cached graph exactly one version behind an event applies its facts.
+        On a version gap the entry is dropped but retained for incremental
+        sync; a plain invalidation discards it entirely.
+        """
+        for event in self._bus.poll():
+            if event.facts is None:
+                self._retained.pop(event.project_id, None)
+            kg = self._cache.get(event.project_id)
+            if kg is None or kg.version >= event.version > 0:
+                continue
+            if event.facts is not None and kg.version == event.version - 1:
+                for subject, relation, obj, description in event.facts:
+                    kg.add_fact(
+                        subject, relation, obj, persist=False, description=description
+                    )
+                kg.version = event.version
+            else:
+                self._cache.pop(event.project_id, None)
     
     def get(self, project_id: str) -> StoryKnowledgeGraph | None:
         """
@@ -47,7 +98,10 @@ class KGCache:
         """
         try:
             with self._lock:
-                return self._cache.get(project_id)
+                self._sync()
+                kg = self._cache.get(project_id)
+            KG_CACHE_REQUESTS.inc(result="miss" if kg is None else "hit")
+            return kg
         except Exception:
             # If cache read fails, return None to trigger fresh load
             return None
@@ -56,27 +110,122 @@ class KGCache:
         """
         Store a knowledge graph in the cache.
         
+        Facts the graph persisted since it was last stored are published to
+        other workers. A freshly loaded graph is stamped with the current
+        version, since it already reflects every write made before the load.
+        
         Args:
             project_id: The project identifier
             kg: The StoryKnowledgeGraph instance to cache
         """
         try:
             with self._lock:
+                self._sync()
+                facts = kg.drain_journal()
+                if facts:
+                    expected = kg.version + 1
+                    kg.version = self._bus.publish(project_id, facts)
+                    if kg.version != expected:
+                        # Another worker wrote in between; our copy may miss it
+                        self._cache.pop(project_id, None)
+                        return
+                elif kg.version == 0:
+                    kg.version = self._bus.version(project_id)
                 self._cache[project_id] = kg
+                self._retained[project_id] = kg
         except Exception:
             # If cache write fails, continue without caching (degraded mode)
             pass
     
-    def invalidate(self, project_id: str) -> None:
+    def get_or_load(
+        self, project_id: str, supabase_client: Client | None = None
+    ) -> StoryKnowledgeGraph:
+        """
+        Return the cached graph, loading it on a miss.
+        
+        A graph retained from an earlier load only fetches the rows added
+        since then (see StoryKnowledgeGraph.sync_from_supabase); otherwise the
+        whole project is loaded.
+        
+        Args:
+            project_id: The project identifier
+            supabase_client: Optional Supabase client for a fresh load
+            
+        Returns:
+            An up-to-date StoryKnowledgeGraph instance
+        """
+        from services.analysis import StoryKnowledgeGraph
+        
+        kg = self.get(project_id)
+        if kg is not None:
+            return kg
+        
+        with self._lock:
+            retained = self._retained.get(project_id)
+            # Stamp before loading: later writes will then be re-applied, not missed
+            version = self._bus.version(project_id)
+        
+        if retained is not None:
+            with timed("kg", "sync"):
+                full_reload = retained.sync_from_supabase()
+            kg = retained
+        else:
+            with timed("kg", "load"):
+                kg = StoryKnowledgeGraph.from_supabase(
+                    project_id=project_id, supabase_client=supabase_client
+                )
+            full_reload = True
+        kg.version = version
+        self.set(project_id, kg)
+        if full_reload and self._snapshots is not None:
+            self._snapshots.save(kg)
+        return kg
+    
+    def retain(self, project_id: str, kg: StoryKnowledgeGraph) -> None:
+        """
+        Keep a possibly stale graph for incremental sync without serving it.
+        
+        The next get_or_load for the project syncs it from Supabase first.
+        
+        Args:
+            project_id: The project identifier
+            kg: The StoryKnowledgeGraph instance to retain
+        """
+        with self._lock:
+            if project_id not in self._cache:
+                self._retained[project_id] = kg
+    
+    def save_snapshots(self) -> int:
+        """
+        Write snapshots of every retained graph (e.g. on shutdown).
+        
+        Returns:
+            The number of snapshots written
+        """
+        if self._snapshots is None:
+            return 0
+        with self._lock:
+            graphs = list(self._retained.values())
+        for kg in graphs:
+            self._snapshots.save(kg)
+        return len(graphs)
+    
+    def invalidate(self, project_id: str, broadcast: bool = True) -> None:
         """
         Remove a knowledge graph from the cache.
         
         Args:
             project_id: The project identifier to invalidate
+            broadcast: Also drop the graph in other workers (default: True)
         """
         try:
             with self._lock:
                 self._cache.pop(project_id, None)
+                self._retained.pop(project_id, None)
+                if broadcast:
+                    self._bus.publish(project_id, None)
+                    if self._snapshots is not None:
+                        self._snapshots.delete(project_id)
         except Exception:
             # If invalidation fails, the entry will expire naturally via TTL
             pass
@@ -93,7 +242,7 @@ class KGCache:
         
         This is a write-through operation: it updates the cached graph
         but does NOT persist to the database. The caller is responsible
-        for database persistence.
+        for database persistence. The fact is published to other workers.
         
         Args:
             project_id: The project identifier
@@ -103,11 +252,19 @@ class KGCache:
         """
         try:
             with self._lock:
+                self._sync()
+                version = self._bus.publish(
+                    project_id, [(subject, relation.upper(), obj, None)]
+                )
                 kg = self._cache.get(project_id)
                 if kg is not None:
+                    if kg.version != version - 1:
+                        self._cache.pop(project_id, None)
+                        return
                     # Update the in-memory graph
                     # Note: persist=False because the caller handles DB writes
                     kg.add_fact(subject, relation, obj, persist=False)
+                    kg.version = version
         except Exception:
             # If update fails, invalidate the cache entry
             # Next access will trigger a fresh load
@@ -131,5 +288,17 @@ def get_kg_cache(ttl_seconds: int = 300, max_size: int = 100) -> KGCache:
     """
     global _kg_cache_instance
     if _kg_cache_instance is None:
-        _kg_cache_instance = KGCache(ttl_seconds=ttl_seconds, max_size=max_size)
+        from config import settings
+
+        snapshots = (
+            KGSnapshotStore(settings.kg_snapshot_dir)
+            if settings.kg_snapshot_dir
+            else None
+        )
+        _kg_cache_instance = KGCache(
+            ttl_seconds=ttl_seconds,
+            max_size=max_size,
+            bus=get_invalidation_bus(),
+            snapshots=snapshots,
+        )
     return _kg_cache_instance
@@ -0,0 +1,280 @@
+"""Cross-worker invalidation and versioning channel for the KG cache."""
+
+from __future__ import annotations
+
+import abc
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# A fact travelling on the bus: (subject, relation, object, description)
+Fact = tuple[str, str, str, "str | None"]
+
+
+@dataclass
+class KGInvalidationEvent:
+    """
+    A single write to a project's knowledge graph, as seen by other workers.
+
+    ``facts`` carries the delta that produced ``version``. When it is None the
+    event is a plain invalidation and receivers must drop their cached graph.
+    """
+
+    project_id: str
+    version: int
+    origin: str
+    facts: list[Fact] | None = field(default=None)
+
+
+class InvalidationBus(abc.ABC):
+    """
+    Base class for KG invalidation channels.
+
+    Every write to a project's graph is published with ``publish``, which bumps
+    the per-project version. Other workers pick the event up with ``poll`` and
+    either apply the delta or invalidate their cached copy.
+    """
+
+    def __init__(self, origin: str | None = None) -> None:
+        self.origin = origin or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    @abc.abstractmethod
+    def publish(self, project_id: str, facts: list[Fact] | None = None) -> int:
+        """
+        Record a write for a project and broadcast it.
+
+        Args:
+            project_id: The project identifier
+            facts: The facts written, or None to broadcast a plain invalidation
+
+        Returns:
+            The new version of the project's graph
+        """
+
+    @abc.abstractmethod
+    def version(self, project_id: str) -> int:
+        """Return the latest known version of a project's graph (0 if never written)."""
+
+    @abc.abstractmethod
+    def poll(self) -> list[KGInvalidationEvent]:
+        """Return events published by other workers since the last poll."""
+
+
+class InProcessInvalidationBus(InvalidationBus):
+    """
+    Default single-process bus.
+
+    There are no other workers to notify, so it only keeps per-project
+    version counters and ``poll`` never returns anything.
+    """
+
+    def __init__(self, origin: str | None = None) -> None:
+        super().__init__(origin)
+        self._versions: dict[str, int] = {}
+
+    def publish(self, project_id: str, facts: list[Fact] | None = None) -> int:
+        version = self._versions.get(project_id, 0) + 1
+        self._versions[project_id] = version
+        return version
+
+    def version(self, project_id: str) -> int:
+        return self._versions.get(project_id, 0)
+
+    def poll(self) -> list[KGInvalidationEvent]:
+        return []
+
+
+class FileInvalidationBus(InvalidationBus):
+    """
+    Bus shared by all workers on one host through an append-only JSON-lines log.
+
+    Writers append under an exclusive ``flock``; readers tail the log from the
+    offset they last consumed, so a poll with no new writes costs one ``stat``.
+    Each log file starts with a header carrying a unique ``log_id`` and the
+    versions known when it was written. When the log grows past
+    ``max_log_bytes`` it is replaced by a fresh header; readers notice the new
+    ``log_id`` and invalidate every project named in it once.
+    """
+
+    LOG_FILENAME = "kg_events.log"
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        origin: str | None = None,
+        max_log_bytes: int = 1_000_000,
+    ) -> None:
+        super().__init__(origin)
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._log_path = self._dir / self.LOG_FILENAME
+        self._max_log_bytes = max_log_bytes
+        self._versions: dict[str, int] = {}
+        self._pending: list[KGInvalidationEvent] = []
+        self._log_id: str | None = None
+        self._offset = 0
+        self._mtime_ns = 0
+        # Start from the current end of the log: a fresh worker has nothing cached
+        with self._locked(fcntl.LOCK_EX) as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                fh.write(self._header())
+                fh.flush()
+            self._read_new(fh, collect=False)
+
+    def _header(self) -> bytes:
+        record = {"log_id": uuid.uuid4().hex, "versions": self._versions}
+        return (json.dumps(record) + "\n").encode()
+
+    @contextmanager
+    def _locked(self, mode: int):
+        """
+        Yield the live log file under ``flock``.
+
+        Compaction swaps the log file, so after acquiring the lock we make
+        sure the handle still points at the file on disk.
+        """
+        while True:
+            self._log_path.touch(exist_ok=True)
+            fh = open(self._log_path, "r+b")
+            fcntl.flock(fh, mode)
+            try:
+                if os.fstat(fh.fileno()).st_ino == os.stat(self._log_path).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            fcntl.flock(fh, fcntl.LOCK_UN)
+            fh.close()
+        try:
+            yield fh
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+            fh.close()
+
+    def _read_new(self, fh, collect: bool = True) -> None:
+        """Consume log lines after the current offset. Caller must hold a lock."""
+        fh.seek(0)
+        try:
+            log_id = json.loads(fh.readline()).get("log_id")
+        except ValueError:
+            log_id = None
+        compacted = log_id != self._log_id and self._log_id is not None
+        if log_id != self._log_id:
+            self._log_id = log_id
+            self._offset = 0
+
+        size = os.fstat(fh.fileno()).st_size
+        if size <= self._offset:
+            return
+
+        fh.seek(self._offset)
+        data = fh.read(size - self._offset)
+        # Only consume complete lines; a partial tail is re-read next time
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+
+        for raw in data[:end].splitlines():
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                logger.warning("Skipping malformed KG invalidation record")
+                continue
+
+            if "versions" in record:
+                for project_id, version in record["versions"].items():
+                    self._versions[project_id] = max(
+                        self._versions.get(project_id, 0), int(version)
+                    )
+                    if collect and compacted:
+                        # Events before the compaction are gone: drop every graph
+                        self._pending.append(
+                            KGInvalidationEvent(project_id, -1, origin="compaction")
+                        )
+                continue
+
+            event = KGInvalidationEvent(
+                project_id=record["project_id"],
+                version=int(record["version"]),
+                origin=record["origin"],
+                facts=[tuple(f) for f in record["facts"]]
+                if record.get("facts") is not None
+                else None,
+            )
+            self._versions[event.project_id] = max(
+                self._versions.get(event.project_id, 0), event.version
+            )
+            if collect and event.origin != self.origin:
+                self._pending.append(event)
+
+    def _compact(self) -> None:
+        """Replace the log with a fresh header. Caller must hold LOCK_EX."""
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir, prefix=".kg_events.")
+        header = self._header()
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(header)
+        os.replace(tmp_path, self._log_path)
+        self._log_id = json.loads(header)["log_id"]
+        self._offset = len(header)
+
+    def publish(self, project_id: str, facts: list[Fact] | None = None) -> int:
+        with self._locked(fcntl.LOCK_EX) as fh:
+            # Catch up first so the version we hand out is globally next
+            self._read_new(fh)
+            version = self._versions.get(project_id, 0) + 1
+            self._versions[project_id] = version
+            record = {
+                "project_id": project_id,
+                "version": version,
+                "origin": self.origin,
+                "facts": [list(f) for f in facts] if facts is not None else None,
+            }
+            fh.seek(0, os.SEEK_END)
+            fh.write((json.dumps(record) + "\n").encode())
+            fh.flush()
+            self._offset = fh.tell()
+
+            if self._offset > self._max_log_bytes:
+                self._compact()
+        return version
+
+    def version(self, project_id: str) -> int:
+        return self._versions.get(project_id, 0)
+
+    def poll(self) -> list[KGInvalidationEvent]:
+        try:
+            stat = os.stat(self._log_path)
+            if stat.st_size != self._offset or stat.st_mtime_ns != self._mtime_ns:
+                with self._locked(fcntl.LOCK_SH) as fh:
+                    self._read_new(fh)
+                    self._mtime_ns = os.fstat(fh.fileno()).st_mtime_ns
+        except OSError as e:
+            logger.error(f"KG invalidation poll failed: {e}")
+
+        events, self._pending = self._pending, []
+        return events
+
+
+def get_invalidation_bus() -> InvalidationBus:
+    """
+    Build the invalidation bus selected by settings.
+
+    ``KG_INVALIDATION_BACKEND=file`` shares invalidations between the workers
+    of one host through ``KG_INVALIDATION_DIR``; anything else stays in-process.
+    """
+    from config import settings
+
+    if settings.kg_invalidation_backend == "file":
+        directory = settings.kg_invalidation_dir or os.path.join(
+            tempfile.gettempdir(), "kg_invalidation"
+        )
+        return FileInvalidationBus(directory)
+    return InProcessInvalidationBus()
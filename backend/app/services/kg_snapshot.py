@@ -0,0 +1,305 @@
+"""Compact binary snapshots of StoryKnowledgeGraph for fast warm starts."""
+
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+    from services.analysis import StoryKnowledgeGraph
+    from services.kg_cache import KGCache
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KGSNAP02"
+SNAPSHOT_SUFFIX = ".kgsnap"
+
+# Layout (little endian, every section 4-byte aligned):
+#   MAGIC | u32 meta_len | meta JSON (padded)
+#   string offsets: u32[n_strings + 1] | string blob (padded)
+#   nodes:        i32[n_nodes, 2]     (name, node_type)
+#   edges:        i32[n_edges, 4]     (subject, object, relation, description)
+#   entities:     i32[n_entities, 2]  (name, entity id)
+#   entity rows:  i32[n_entity_rows]
+#   rel rows:     i32[n_rel_rows]
+#   rel edges:    i32[n_rel_edges, 4] (relationship id, subject, object, relation)
+# All strings (names, relations, ids) are interned in the string table;
+# -1 stands for None.
+
+
+def _pad(n: int) -> int:
+    return (4 - n % 4) % 4
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.index: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def intern(self, value: str | None) -> int:
+        if value is None:
+            return -1
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.index[value] = idx
+            self.values.append(value)
+        return idx
+
+
+def dump_snapshot(kg: StoryKnowledgeGraph) -> bytes:
+    """Serialize a graph into the snapshot format."""
+    strings = _StringTable()
+
+    nodes = np.array(
+        [
+            (strings.intern(name), strings.intern(data.get("node_type")))
+            for name, data in kg.graph.nodes(data=True)
+        ],
+        dtype="<i4",
+    ).reshape(-1, 2)
+    edges = np.array(
+        [
+            (
+                strings.intern(u),
+                strings.intern(v),
+                strings.intern(data.get("relation")),
+                strings.intern(data.get("description")),
+            )
+            for u, v, data in kg.graph.edges(data=True)
+        ],
+        dtype="<i4",
+    ).reshape(-1, 4)
+    entities = np.array(
+        [
+            (strings.intern(name), strings.intern(entity_id))
+            for name, entity_id in kg.entity_ids_by_name.items()
+        ],
+        dtype="<i4",
+    ).reshape(-1, 2)
+    entity_rows = np.array(
+        [strings.intern(i) for i in sorted(kg._entity_row_ids)], dtype="<i4"
+    )
+    rel_rows = np.array(
+        [strings.intern(i) for i in sorted(kg._relationship_row_ids)], dtype="<i4"
+    )
+    rel_edges = np.array(
+        [
+            (strings.intern(rel_id), strings.intern(u), strings.intern(v), strings.intern(rel))
+            for rel_id, (u, v, rel) in kg._relationship_edges.items()
+        ],
+        dtype="<i4",
+    ).reshape(-1, 4)
+
+    encoded = [value.encode("utf-8") for value in strings.values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    blob = b"".join(encoded)
+
+    meta = json.dumps(
+        {
+            "project_id": kg.project_id,
+            "version": kg.version,
+            "entities_hwm": kg.entities_hwm,
+            "relationships_hwm": kg.relationships_hwm,
+            "n_strings": len(encoded),
+            "blob_len": len(blob),
+            "n_nodes": len(nodes),
+            "n_edges": len(edges),
+            "n_entities": len(entities),
+            "n_entity_rows": len(entity_rows),
+            "n_rel_rows": len(rel_rows),
+            "n_rel_edges": len(rel_edges),
+        }
+    ).encode("utf-8")
+
+    parts = [
+        MAGIC,
+        struct.pack("<I", len(meta)),
+        meta,
+        b"\0" * _pad(len(meta)),
+        offsets.tobytes(),
+        blob,
+        b"\0" * _pad(len(blob)),
+        nodes.tobytes(),
+        edges.tobytes(),
+        entities.tobytes(),
+        entity_rows.tobytes(),
+        rel_rows.tobytes(),
+        rel_edges.tobytes(),
+    ]
+    return b"".join(parts)
+
+
+def load_snapshot(
+    buffer, supabase_client: Client | None = None
+) -> StoryKnowledgeGraph:
+    """
+    Rebuild a graph from snapshot bytes (or a memory map of them).
+
+    Args:
+        buffer: Any object supporting the buffer protocol
+        supabase_client: Client the restored graph will sync through
+
+    Returns:
+        The restored StoryKnowledgeGraph, ready for ``sync_from_supabase``
+    """
+    from services.analysis import StoryKnowledgeGraph
+
+    view = memoryview(buffer)
+    if bytes(view[: len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a knowledge graph snapshot")
+    pos = len(MAGIC)
+    (meta_len,) = struct.unpack_from("<I", view, pos)
+    pos += 4
+    meta = json.loads(bytes(view[pos : pos + meta_len]))
+    pos += meta_len + _pad(meta_len)
+
+    def take(dtype: str, count: int, width: int = 1) -> np.ndarray:
+        nonlocal pos
+        arr = np.frombuffer(view, dtype=dtype, count=count * width, offset=pos)
+        pos += arr.nbytes
+        return arr.reshape(-1, width) if width > 1 else arr
+
+    offsets = take("<u4", meta["n_strings"] + 1)
+    blob = bytes(view[pos : pos + meta["blob_len"]])
+    pos += meta["blob_len"] + _pad(meta["blob_len"])
+    strings = [
+        blob[offsets[i] : offsets[i + 1]].decode("utf-8")
+        for i in range(meta["n_strings"])
+    ]
+
+    def s(idx: int) -> str | None:
+        return strings[idx] if idx >= 0 else None
+
+    nodes = take("<i4", meta["n_nodes"], 2)
+    edges = take("<i4", meta["n_edges"], 4)
+    entities = take("<i4", meta["n_entities"], 2)
+    entity_rows = take("<i4", meta["n_entity_rows"])
+    rel_rows = take("<i4", meta["n_rel_rows"])
+    rel_edges = take("<i4", meta["n_rel_edges"], 4)
+
+    kg = StoryKnowledgeGraph(meta["project_id"], supabase_client=supabase_client)
+    for name_idx, type_idx in nodes.tolist():
+        node_type = s(type_idx)
+        attrs = {"node_type": node_type} if node_type is not None else {}
+        kg.graph.add_node(s(name_idx), **attrs)
+    for u, v, rel, desc in edges.tolist():
+        kg.graph.add_edge(s(u), s(v), relation=s(rel), description=s(desc))
+    kg.entity_ids_by_name = {s(n): s(i) for n, i in entities.tolist()}
+    kg._entity_row_ids = {s(i) for i in entity_rows.tolist()}
+    kg._relationship_row_ids = {s(i) for i in rel_rows.tolist()}
+    kg._relationship_edges = {
+        s(rel_id): (s(u), s(v), s(rel)) for rel_id, u, v, rel in rel_edges.tolist()
+    }
+    kg.entities_hwm = meta["entities_hwm"]
+    kg.relationships_hwm = meta["relationships_hwm"]
+    kg.version = meta["version"]
+    kg._loaded = True
+    return kg
+
+
+class KGSnapshotStore:
+    """
+    Directory of per-project graph snapshots on local disk.
+
+    Snapshots are written atomically (temp file + rename) and read back
+    through ``mmap`` so large graphs are not copied into memory twice.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, project_id: str) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", project_id)
+        return self._dir / f"{safe}{SNAPSHOT_SUFFIX}"
+
+    def save(self, kg: StoryKnowledgeGraph) -> None:
+        """Write a snapshot of the graph, replacing any previous one."""
+        try:
+            data = dump_snapshot(kg)
+            fd, tmp_path = tempfile.mkstemp(dir=self._dir, prefix=".kgsnap.")
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, self._path(kg.project_id))
+        except Exception as e:
+            logger.error(f"Failed to write KG snapshot for {kg.project_id}: {e}")
+
+    def load(
+        self, project_id: str, supabase_client: Client | None = None
+    ) -> StoryKnowledgeGraph | None:
+        """Restore a project's graph, or return None if there is no usable snapshot."""
+        path = self._path(project_id)
+        try:
+            with open(path, "rb") as fh:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return load_snapshot(mm, supabase_client=supabase_client)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Discarding unreadable KG snapshot {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def delete(self, project_id: str) -> None:
+        self._path(project_id).unlink(missing_ok=True)
+
+    def recent_project_ids(self, limit: int) -> list[str]:
+        """Return project ids of the most recently written snapshots."""
+        stamped: list[tuple[float, Path]] = []
+        for path in self._dir.glob(f"*{SNAPSHOT_SUFFIX}"):
+            try:
+                stamped.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                # Deleted (or replaced) between listing and stat
+                continue
+        stamped.sort(key=lambda item: item[0], reverse=True)
+        project_ids: list[str] = []
+        for _, path in stamped[:limit]:
+            try:
+                with open(path, "rb") as fh:
+                    header = fh.read(len(MAGIC) + 4)
+                    (meta_len,) = struct.unpack_from("<I", header, len(MAGIC))
+                    project_ids.append(json.loads(fh.read(meta_len))["project_id"])
+            except Exception:
+                continue
+        return project_ids
+
+
+def warm_kg_cache(
+    cache: KGCache,
+    store: KGSnapshotStore,
+    limit: int,
+    supabase_client: Client | None = None,
+) -> int:
+    """
+    Seed a cache with snapshots of the most recently active projects.
+
+    Restored graphs are only retained, not served: the first request for each
+    project catches up with an incremental sync instead of a full reload, so
+    a restart never hits Supabase for every project at once.
+
+    Returns:
+        The number of graphs restored
+    """
+    restored = 0
+    for project_id in store.recent_project_ids(limit):
+        kg = store.load(project_id, supabase_client=supabase_client)
+        if kg is not None:
+            cache.retain(project_id, kg)
+            restored += 1
+    logger.info(f"Warmed KG cache with {restored} snapshot(s)")
+    return restored
@@ -9,6 +9,7 @@ from dataclasses import dataclass
 from openai import OpenAI
 from supabase import Client
 
+from lib.metrics import openai_request
 from lib.supabase import supabase_client as _default_supabase
 
 
@@ -91,7 +92,9 @@ class InsightGenerator:
             f'Text: "{text}"'
         )
 
-        response = self.client.chat.completions.create(
+        response = openai_request(
+            "grammar_alerts",
+            self.client.chat.completions.create,
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.1,
@@ -303,13 +306,42 @@ def generate_and_store_alert_for_log(
     )
 
 
-def get_embedding(
-    text: str, api_key: str | None = None, model: str = "text-embedding-3-small"
-) -> list[float]:
-    """Return embedding vector for text. Used by project_setup and extraction persist flow."""
+def _embedding_client(api_key: str | None, timeout: float | None) -> OpenAI:
     key = api_key or os.environ.get("OPENAI_API_KEY")
     if not key:
         raise RuntimeError("OPENAI_API_KEY is required for embeddings.")
-    client = OpenAI(api_key=key)
-    resp = client.embeddings.create(model=model, input=[text])
+    if timeout is None:
+        return OpenAI(api_key=key)
+    # A caller with a latency budget would rather fail fast than wait out retries
+    return OpenAI(api_key=key, timeout=timeout, max_retries=0)
+
+
+def get_embedding(
+    text: str,
+    api_key: str | None = None,
+    model: str = "text-embedding-3-small",
+    timeout: float | None = None,
+) -> list[float]:
+    """
+    Return embedding vector for text. Used by project_setup and extraction persist flow.
+
+    With timeout set, the request is attempted once and raises if it takes
+    longer than timeout seconds.
+    """
+    client = _embedding_client(api_key, timeout)
+    resp = openai_request("embedding", client.embeddings.create, model=model, input=[text])
     return resp.data[0].embedding
+
+
+def get_embeddings(
+    texts: list[str],
+    api_key: str | None = None,
+    model: str = "text-embedding-3-small",
+    timeout: float | None = None,
+) -> list[list[float]]:
+    """Return embedding vectors for several texts in a single request, in input order."""
+    if not texts:
+        return []
+    client = _embedding_client(api_key, timeout)
+    resp = openai_request("embedding_batch", client.embeddings.create, model=model, input=texts)
+    return [item.embedding for item in sorted(resp.data, key=lambda d: d.index)]
@@ -0,0 +1,173 @@
+"""Cached read model for the plot board (threads, points, connections, characters)."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any
+
+from cachetools import TTLCache
+from supabase import Client
+
+from config import settings
+from lib.supabase import is_missing_function, supabase_client as _default_supabase
+
+logger = logging.getLogger(__name__)
+
+# Set once get_plot_board turns out not to be installed (migration 005 not applied)
+_board_rpc_missing = False
+
+
+class PlotBoardService:
+    """
+    Serves a project's plot board from one aggregated query, cached per project.
+
+    The board is built by the get_plot_board RPC together with the project's
+    plot-data version (bumped by database triggers on every plot table), and
+    cached under that version. Each request makes one RPC call passing the
+    cached version; while the board is unchanged the RPC answers with the
+    version alone. The version doubles as the HTTP ETag, and since it is
+    read in the same statement as the board it always describes the data
+    served. If the read model is not installed, the board is assembled from
+    the individual tables and tagged by a hash of its contents instead.
+    """
+
+    def __init__(
+        self,
+        supabase_client: Client | None = None,
+        ttl_seconds: int = 300,
+        max_size: int = 200,
+    ) -> None:
+        self.supabase = supabase_client or _default_supabase
+        # project_id -> (version, board, etag)
+        self._cache: TTLCache = TTLCache(maxsize=max_size, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+
+    def get_board(self, project_id: str) -> tuple[dict[str, Any], str]:
+        """
+        Return the project's plot board and its ETag.
+
+        Returns:
+            (board, etag) where board has plot_threads, plot_points (each with
+            its characters) and connections
+        """
+        with self._lock:
+            cached = self._cache.get(project_id)
+
+        data = self._fetch_board(project_id, cached[0] if cached is not None else None)
+        if data is None:
+            board = self._load_board_from_tables(project_id)
+            digest = hashlib.sha1(
+                json.dumps(board, sort_keys=True, default=str).encode()
+            ).hexdigest()[:16]
+            return board, f'W/"plot-{project_id}-{digest}"'
+
+        if data.get("unchanged") and cached is not None:
+            return cached[1], cached[2]
+
+        version = data.get("version", 0)
+
+        board = {
+            "plot_threads": data.get("plot_threads") or [],
+            "plot_points": data.get("plot_points") or [],
+            "connections": data.get("connections") or [],
+        }
+        etag = f'W/"plot-{project_id}-{version}"'
+        with self._lock:
+            self._cache[project_id] = (version, board, etag)
+        return board, etag
+
+    def invalidate(self, project_id: str) -> None:
+        with self._lock:
+            self._cache.pop(project_id, None)
+
+    def _fetch_board(self, project_id: str, known_version: int | None) -> dict[str, Any] | None:
+        """
+        Call get_plot_board; None if the read model is unavailable.
+
+        With ``known_version`` set to the current version the RPC returns
+        only ``{"version": n, "unchanged": true}``. A missing function is
+        remembered, so later requests go straight to the tables.
+        """
+        global _board_rpc_missing
+        if _board_rpc_missing:
+            return None
+        try:
+            data = self.supabase.rpc(
+                "get_plot_board",
+                {"p_project_id": project_id, "p_known_version": known_version},
+            ).execute().data
+        except Exception as e:
+            if is_missing_function(e):
+                logger.warning(
+                    "get_plot_board is not installed (migration 005); "
+                    "building plot boards from the plot tables"
+                )
+                _board_rpc_missing = True
+            else:
+                logger.error(f"get_plot_board RPC failed for project {project_id}: {e}")
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _load_board_from_tables(self, project_id: str) -> dict[str, Any]:
+        """Assemble the board with one query per table (pre-read-model path)."""
+        threads_resp = (
+            self.supabase.table("plot_threads")
+            .select("*")
+            .eq("project_id", project_id)
+            .order("created_at", desc=False)
+            .execute()
+        )
+        threads = threads_resp.data or []
+
+        points_resp = (
+            self.supabase.table("plot_points")
+            .select("*")
+            .eq("project_id", project_id)
+            .order("timeline_position", desc=False)
+            .execute()
+        )
+        points = points_resp.data or []
+
+        connections: list[dict[str, Any]] = []
+        characters: list[dict[str, Any]] = []
+        if points:
+            point_ids = [p["id"] for p in points]
+            connections = (
+                self.supabase.table("plot_point_connections")
+                .select("*")
+                .in_("from_point_id", point_ids)
+                .execute()
+            ).data or []
+            characters = (
+                self.supabase.table("plot_point_characters")
+                .select("*, entities(name, id)")
+                .in_("plot_point_id", point_ids)
+                .execute()
+            ).data or []
+
+        # Organize characters by plot point
+        characters_by_point: dict[str, list[dict[str, Any]]] = {}
+        for char in characters:
+            characters_by_point.setdefault(char["plot_point_id"], []).append(char)
+        for point in points:
+            point["characters"] = characters_by_point.get(point["id"], [])
+
+        return {"plot_threads": threads, "plot_points": points, "connections": connections}
+
+
+# Global service instance
+_plot_board_service: PlotBoardService | None = None
+
+
+def get_plot_board_service() -> PlotBoardService:
+    """Get or create the global plot board service."""
+    global _plot_board_service
+    if _plot_board_service is None:
+        _plot_board_service = PlotBoardService(
+            ttl_seconds=settings.plot_board_cache_ttl_seconds,
+            max_size=settings.plot_board_cache_max_size,
+        )
+    return _plot_board_service
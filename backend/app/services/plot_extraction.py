@@ -4,12 +4,319 @@ from __future__ import annotations
 
 import os
 import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 from openai import OpenAI
 from supabase import Client
 
-from lib.supabase import supabase_client as _default_supabase
+from config import settings
+from lib.content_hashes import compute_content_hash
+from lib.metrics import openai_request
+from lib.tracing import propagate
+from lib.supabase import is_missing_function, supabase_client as _default_supabase
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English prose with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+# Minimum title-word overlap for two points on the same chunk to be one event
+DUPLICATE_TITLE_SIMILARITY = 0.5
+
+# Set once shift_plot_points is found missing; later shifts update row by row
+_shift_rpc_missing = False
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of a text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def build_chunk_windows(
+    narrative_chunks: List[Dict[str, Any]],
+    max_tokens: int,
+    overlap_chunks: int = 1,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Group consecutive chunks into windows of at most ``max_tokens``.
+
+    Every chunk lands in at least one window. Each window repeats the last
+    ``overlap_chunks`` chunks of the previous one so events spanning a
+    boundary are seen whole; a chunk larger than the budget gets its own
+    window.
+    """
+    windows: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    tokens = 0
+
+    for chunk in narrative_chunks:
+        chunk_tokens = estimate_tokens(chunk.get("content", ""))
+        if current and tokens + chunk_tokens > max_tokens:
+            windows.append(current)
+            carry = current[-overlap_chunks:] if 0 < overlap_chunks < len(current) else []
+            carry_tokens = sum(estimate_tokens(c.get("content", "")) for c in carry)
+            if carry_tokens + chunk_tokens > max_tokens:
+                carry, carry_tokens = [], 0
+            current, tokens = list(carry), carry_tokens
+        current.append(chunk)
+        tokens += chunk_tokens
+
+    if current:
+        windows.append(current)
+    return windows
+
+
+def _title_words(point: Dict[str, Any]) -> set:
+    return set(re.findall(r"\w+", str(point.get("title", "")).lower()))
+
+
+def _same_event(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    words_a, words_b = _title_words(a), _title_words(b)
+    if not words_a or not words_b:
+        return False
+    return len(words_a & words_b) / len(words_a | words_b) >= DUPLICATE_TITLE_SIMILARITY
+
+
+def merge_window_plot_points(
+    window_points: List[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    Reduce per-window plot points into one chronological timeline.
+
+    Windows are taken in order. A point that repeats an event already
+    extracted from an earlier window (same chunk, similar title, as happens
+    in the overlap between windows) is merged into it, with characters
+    combined. Window-local ``causes``/``follows`` positions are remapped
+    onto the merged points, so links into an overlap chunk connect events
+    across windows. Returns points with sequential global timeline positions.
+    """
+    merged: List[Dict[str, Any]] = []
+    by_chunk: Dict[Any, List[int]] = {}
+
+    for window_no, points in enumerate(window_points):
+        local_to_merged: Dict[Any, int] = {}
+        placed: List[tuple] = []
+
+        for i, point in enumerate(points):
+            chunk_index = point.get("chunk_index")
+            target = next(
+                (
+                    idx
+                    for idx in by_chunk.get(chunk_index, [])
+                    if merged[idx]["_window"] < window_no and _same_event(merged[idx], point)
+                ),
+                None,
+            )
+            if target is None:
+                target = len(merged)
+                merged.append(
+                    {**point, "characters": [], "causes": [], "follows": [], "_window": window_no}
+                )
+                by_chunk.setdefault(chunk_index, []).append(target)
+
+            entry = merged[target]
+            for name in point.get("characters") or []:
+                if name not in entry["characters"]:
+                    entry["characters"].append(name)
+            local_to_merged[point.get("timeline_position", i + 1)] = target
+            placed.append((target, point))
+
+        for target, point in placed:
+            for field in ("causes", "follows"):
+                for ref in point.get(field) or []:
+                    linked = local_to_merged.get(ref)
+                    if linked is not None and linked != target and linked not in merged[target][field]:
+                        merged[target][field].append(linked)
+
+    result = []
+    for idx, entry in enumerate(merged):
+        point = {k: v for k, v in entry.items() if k != "_window"}
+        point["timeline_position"] = idx + 1
+        point["causes"] = [linked + 1 for linked in entry["causes"]]
+        point["follows"] = [linked + 1 for linked in entry["follows"]]
+        result.append(point)
+    return result
+
+
+def persist_plot_points(
+    supabase: Client,
+    project_id: str,
+    thread_id: str,
+    plot_points_data: List[Dict[str, Any]],
+    chunk_map: Dict[Any, Any],
+    entity_map: Dict[str, str],
+    position_offset: int = 0,
+    layout_offset: int = 0,
+    previous_point_id: Optional[str] = None,
+    next_point_id: Optional[str] = None,
+) -> List[str]:
+    """
+    Store extracted plot points, character links and connections in bulk.
+
+    Uses one insert per table: all points first, then (with the returned
+    ids) all character links and all connections. Connections are
+    deduplicated in memory per (from, to) pair, keeping the first edge, in
+    this order: the link from ``previous_point_id``, sequential FOLLOWS
+    edges, the link to ``next_point_id``, then explicit follows/causes from
+    the model.
+
+    Args:
+        supabase: Supabase client
+        project_id: Project ID
+        thread_id: Plot thread the points belong to
+        plot_points_data: Merged plot points with unique timeline positions
+        chunk_map: chunk_index -> narrative_chunk_id
+        entity_map: character name -> entity id
+        position_offset: Added to every timeline position
+        layout_offset: Number of existing points, to continue the layout grid
+        previous_point_id: Existing point the new points follow, if any
+        next_point_id: Existing point that follows the new points, if any
+
+    Returns:
+        Ids of the created plot points, in timeline order
+    """
+    if not plot_points_data:
+        return []
+
+    positions = [
+        point_data.get("timeline_position", i + 1)
+        for i, point_data in enumerate(plot_points_data)
+    ]
+    rows = [
+        {
+            "plot_thread_id": thread_id,
+            "project_id": project_id,
+            "title": point_data.get("title", f"Event {i+1}"),
+            "description": point_data.get("description", ""),
+            "event_type": point_data.get("event_type", "OTHER"),
+            "timeline_position": position_offset + positions[i],
+            "narrative_chunk_id": chunk_map.get(point_data.get("chunk_index", i)),
+            "position_x": ((layout_offset + i) % 5) * 250,  # Simple grid layout
+            "position_y": ((layout_offset + i) // 5) * 200,
+        }
+        for i, point_data in enumerate(plot_points_data)
+    ]
+    inserted = supabase.table("plot_points").insert(rows).execute().data or []
+
+    # Map local timeline positions to created ids (via the stored position)
+    id_by_stored_position = {row["timeline_position"]: row["id"] for row in inserted}
+    point_id_map = {
+        pos: id_by_stored_position[position_offset + pos]
+        for pos in positions
+        if position_offset + pos in id_by_stored_position
+    }
+
+    # Character links
+    character_rows = []
+    linked = set()
+    for i, point_data in enumerate(plot_points_data):
+        point_id = point_id_map.get(positions[i])
+        names = point_data.get("characters", [])
+        for char_name in names:
+            entity_id = entity_map.get(char_name)
+            if point_id and entity_id and (point_id, entity_id) not in linked:
+                linked.add((point_id, entity_id))
+                character_rows.append(
+                    {
+                        "plot_point_id": point_id,
+                        "entity_id": entity_id,
+                        "role": "PRIMARY" if char_name == names[0] else "SECONDARY",
+                        "importance": "PRIMARY" if len(names) == 1 else "SECONDARY",
+                    }
+                )
+    if character_rows:
+        supabase.table("plot_point_characters").insert(character_rows).execute()
+
+    # Connections, deduplicated per (from, to) pair
+    connections: Dict[tuple, str] = {}
+
+    def connect(from_id: Optional[str], to_id: Optional[str], connection_type: str) -> None:
+        if from_id and to_id and from_id != to_id:
+            connections.setdefault((from_id, to_id), connection_type)
+
+    sorted_positions = sorted(point_id_map)
+    if sorted_positions:
+        connect(previous_point_id, point_id_map[sorted_positions[0]], "FOLLOWS")
+    for current_pos, next_pos in zip(sorted_positions, sorted_positions[1:]):
+        connect(point_id_map[current_pos], point_id_map[next_pos], "FOLLOWS")
+    if sorted_positions:
+        connect(point_id_map[sorted_positions[-1]], next_point_id, "FOLLOWS")
+    for i, point_data in enumerate(plot_points_data):
+        current_point_id = point_id_map.get(positions[i])
+        for follow_pos in point_data.get("follows", []):
+            connect(point_id_map.get(follow_pos), current_point_id, "FOLLOWS")
+        for cause_pos in point_data.get("causes", []):
+            connect(current_point_id, point_id_map.get(cause_pos), "CAUSES")
+
+    if connections:
+        supabase.table("plot_point_connections").insert(
+            [
+                {"from_point_id": from_id, "to_point_id": to_id, "connection_type": connection_type}
+                for (from_id, to_id), connection_type in connections.items()
+            ]
+        ).execute()
+
+    return [point_id_map[pos] for pos in sorted_positions]
+
+
+def renumber_plot_points(points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Number a run of merged points 1..n, in order.
+
+    follows/causes are remapped to the new positions; references to points
+    outside the run are dropped.
+    """
+    mapping = {
+        point.get("timeline_position", i + 1): i + 1 for i, point in enumerate(points)
+    }
+    return [
+        {
+            **point,
+            "timeline_position": i + 1,
+            "follows": [mapping[pos] for pos in point.get("follows", []) if pos in mapping],
+            "causes": [mapping[pos] for pos in point.get("causes", []) if pos in mapping],
+        }
+        for i, point in enumerate(points)
+    ]
+
+
+def shift_timeline(supabase: Client, project_id: str, from_position: int, by: int) -> None:
+    """
+    Move every point at or after ``from_position`` ``by`` places later.
+
+    Uses the shift_plot_points function (one statement); without it, points
+    are updated one by one.
+    """
+    global _shift_rpc_missing
+    if not _shift_rpc_missing:
+        try:
+            supabase.rpc(
+                "shift_plot_points",
+                {"p_project_id": project_id, "p_from_position": from_position, "p_by": by},
+            ).execute()
+            return
+        except Exception as e:
+            if not is_missing_function(e):
+                raise
+            logger.warning(
+                "shift_plot_points is not installed (migration 010); shifting points row by row"
+            )
+            _shift_rpc_missing = True
+
+    rows = (
+        supabase.table("plot_points")
+        .select("id, timeline_position")
+        .eq("project_id", project_id)
+        .gte("timeline_position", from_position)
+        .execute()
+    ).data or []
+    for row in rows:
+        supabase.table("plot_points").update(
+            {"timeline_position": row["timeline_position"] + by}
+        ).eq("id", row["id"]).execute()
 
 
 class PlotExtractionService:
@@ -22,42 +329,21 @@ class PlotExtractionService:
         self.client = OpenAI(api_key=self.api_key)
         self.model = model
 
-    def extract_plot_points_from_chunks(
+    def _extract_window(
         self,
-        project_id: str,
-        narrative_chunks: List[Dict[str, Any]],
-        entities: List[Dict[str, Any]],
-        supabase_client: Client | None = None,
-    ) -> Dict[str, Any]:
-        """
-        Extract plot points from narrative chunks using AI.
-        
-        Args:
-            project_id: Project ID
-            narrative_chunks: List of narrative chunk dicts with id, content, chunk_index
-            entities: List of entity dicts with id, name, entity_type
-            supabase_client: Optional Supabase client
-            
-        Returns:
-            Dict with plot_threads and plot_points
+        window: List[Dict[str, Any]],
+        character_names: List[str],
+    ) -> List[Dict[str, Any]]:
         """
-        if not narrative_chunks:
-            return {"plot_threads": [], "plot_points": []}
-
-        supabase = supabase_client or _default_supabase
+        Extract plot points from one window of consecutive chunks.
 
-        # Get character names for context
-        character_names = [
-            e["name"]
-            for e in entities
-            if e.get("entity_type") == "CHARACTER"
-        ]
-
-        # Build context for LLM
+        Timeline positions, causes and follows in the result are local to
+        the window; merge_window_plot_points maps them onto the full timeline.
+        """
         chunks_text = "\n\n".join(
             [
                 f"[Chunk {chunk.get('chunk_index', i)}]: {chunk.get('content', '')}"
-                for i, chunk in enumerate(narrative_chunks)
+                for i, chunk in enumerate(window)
             ]
         )
 
@@ -69,7 +355,7 @@ CHARACTERS IN STORY:
 {characters_text}
 
 STORY CONTENT (in chronological order):
-{chunks_text[:8000]}  # Limit to avoid token limits
+{chunks_text}
 
 TASK:
 Extract key plot points from this story. For each significant event, identify:
@@ -102,201 +388,133 @@ Rules:
 - Maintain chronological order
 - Identify clear cause-effect relationships
 - Include character involvement accurately
+- Number timeline_position from 1 within this excerpt; causes and follows list timeline_position values of events in this excerpt
 - Return valid JSON only, no markdown or extra text"""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a story analysis expert. Extract plot points and return only valid JSON.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"},
-            )
+        response = openai_request(
+            "plot_extraction",
+            self.client.chat.completions.create,
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a story analysis expert. Extract plot points and return only valid JSON.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.3,
+            response_format={"type": "json_object"},
+        )
 
-            result_text = response.choices[0].message.content or "{}"
-            result = json.loads(result_text)
+        result_text = response.choices[0].message.content or "{}"
+        points = json.loads(result_text).get("plot_points", [])
+        return [p for p in points if isinstance(p, dict)]
 
-            plot_points_data = result.get("plot_points", [])
+    def extract_plot_points_from_chunks(
+        self,
+        project_id: str,
+        narrative_chunks: List[Dict[str, Any]],
+        entities: List[Dict[str, Any]],
+        supabase_client: Client | None = None,
+        context_chunks: Optional[List[Dict[str, Any]]] = None,
+        replace_chunk_ids: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Extract plot points from narrative chunks using AI.
+        
+        The full manuscript is covered: chunks are grouped into token-bounded
+        windows that are extracted concurrently, then merged into a single
+        deduplicated timeline before anything is persisted. New points are
+        appended after the project's existing timeline and linked to its
+        last point.
+
+        Points previously extracted from ``replace_chunk_ids`` are deleted in
+        the persist step, once the new points are ready, so a failed
+        extraction leaves the existing board untouched. Points from a
+        replaced chunk take the place of its old points in the timeline.
+        
+        Args:
+            project_id: Project ID
+            narrative_chunks: List of narrative chunk dicts with id, content, chunk_index
+            entities: List of entity dicts with id, name, entity_type
+            supabase_client: Optional Supabase client
+            context_chunks: Already-extracted chunks shown to the model for
+                continuity; no plot points are created for them
+            replace_chunk_ids: Chunks whose existing plot points the new ones replace
+            
+        Returns:
+            Dict with plot_threads and plot_points
+        """
+        if not narrative_chunks:
+            return {"plot_threads": [], "plot_points": []}
 
-            # Create default plot thread if none exists
-            thread_resp = (
-                supabase.table("plot_threads")
-                .select("id")
-                .eq("project_id", project_id)
-                .limit(1)
-                .execute()
-            )
+        supabase = supabase_client or _default_supabase
 
-            if not thread_resp.data:
-                thread_resp = (
-                    supabase.table("plot_threads")
-                    .insert(
-                        {
-                            "project_id": project_id,
-                            "title": "Main Plot",
-                            "description": "Primary storyline",
-                            "color": "#5a5fd8",
-                        }
+        # Get character names for context
+        character_names = [
+            e["name"]
+            for e in entities
+            if e.get("entity_type") == "CHARACTER"
+        ]
+
+        try:
+            # Map: extract plot points from token-bounded windows concurrently
+            target_indexes = {chunk.get("chunk_index") for chunk in narrative_chunks}
+            windows = build_chunk_windows(
+                sorted(
+                    list(context_chunks or []) + list(narrative_chunks),
+                    key=lambda chunk: chunk.get("chunk_index", 0),
+                ),
+                max_tokens=settings.plot_extraction_window_tokens,
+                overlap_chunks=settings.plot_extraction_window_overlap_chunks,
+            )
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(settings.plot_extraction_concurrency, len(windows)))
+            ) as pool:
+                window_points = list(
+                    pool.map(
+                        propagate(lambda window: self._extract_window(window, character_names)),
+                        windows,
                     )
-                    .execute()
                 )
-                thread_id = thread_resp.data[0]["id"]
-            else:
-                thread_id = thread_resp.data[0]["id"]
 
-            # Map chunk IDs by index
+            # Reduce: merge windows into one timeline, dropping context-only events
+            if context_chunks:
+                window_points = [
+                    [p for p in points if p.get("chunk_index") in target_indexes]
+                    for points in window_points
+                ]
+            plot_points_data = merge_window_plot_points(window_points)
+
+            # Persist: replace points from changed chunks, now that new ones exist
+            anchors = self._delete_replaced_points(supabase, replace_chunk_ids or [])
+
+            thread_id = self._get_or_create_thread(supabase, project_id)
             chunk_map = {
                 chunk.get("chunk_index", i): chunk.get("id")
                 for i, chunk in enumerate(narrative_chunks)
             }
-
-            # Map entity names to IDs
             entity_map = {e["name"]: e["id"] for e in entities}
 
-            # Store plot points
-            created_points = []
-            point_id_map = {}  # Map timeline_position to created point ID
-
-            for i, point_data in enumerate(plot_points_data):
-                chunk_index = point_data.get("chunk_index", i)
-                narrative_chunk_id = chunk_map.get(chunk_index)
-
-                # Create plot point
-                point_resp = (
-                    supabase.table("plot_points")
-                    .insert(
-                        {
-                            "plot_thread_id": thread_id,
-                            "project_id": project_id,
-                            "title": point_data.get("title", f"Event {i+1}"),
-                            "description": point_data.get("description", ""),
-                            "event_type": point_data.get("event_type", "OTHER"),
-                            "timeline_position": point_data.get("timeline_position", i + 1),
-                            "narrative_chunk_id": narrative_chunk_id,
-                            "position_x": (i % 5) * 250,  # Simple grid layout
-                            "position_y": (i // 5) * 200,
-                        }
-                    )
-                    .execute()
+            # Points from a replaced chunk go where its old points were; the
+            # rest are appended. Later anchors first, so shifting for one
+            # run never moves an earlier anchor.
+            runs: Dict[Optional[int], List[Dict[str, Any]]] = {}
+            for point in plot_points_data:
+                anchor = anchors.get(chunk_map.get(point.get("chunk_index")))
+                runs.setdefault(anchor, []).append(point)
+
+            created_points: List[str] = []
+            for anchor in sorted((a for a in runs if a is not None), reverse=True):
+                created_points += self._insert_run_at(
+                    supabase, project_id, thread_id, renumber_plot_points(runs[anchor]),
+                    anchor, chunk_map, entity_map,
+                )
+            if None in runs:
+                created_points += self._append_run(
+                    supabase, project_id, thread_id, renumber_plot_points(runs[None]),
+                    chunk_map, entity_map,
                 )
-
-                point_id = point_resp.data[0]["id"]
-                timeline_pos = point_data.get("timeline_position", i + 1)
-                point_id_map[timeline_pos] = point_id
-                created_points.append(point_id)
-
-                # Link characters
-                character_names_in_point = point_data.get("characters", [])
-                for char_name in character_names_in_point:
-                    entity_id = entity_map.get(char_name)
-                    if entity_id:
-                        supabase.table("plot_point_characters").insert(
-                            {
-                                "plot_point_id": point_id,
-                                "entity_id": entity_id,
-                                "role": "PRIMARY" if char_name == character_names_in_point[0] else "SECONDARY",
-                                "importance": "PRIMARY" if len(character_names_in_point) == 1 else "SECONDARY",
-                            }
-                        ).execute()
-
-            # Create connections - automatically connect nodes sequentially
-            # Sort points by timeline_position to ensure proper order
-            sorted_positions = sorted(point_id_map.keys())
-            
-            # Create automatic sequential connections (like n8n)
-            for i in range(len(sorted_positions) - 1):
-                current_pos = sorted_positions[i]
-                next_pos = sorted_positions[i + 1]
-                
-                from_point_id = point_id_map.get(current_pos)
-                to_point_id = point_id_map.get(next_pos)
-                
-                if from_point_id and to_point_id:
-                    try:
-                        # Check if connection already exists
-                        existing = (
-                            supabase.table("plot_point_connections")
-                            .select("id")
-                            .eq("from_point_id", from_point_id)
-                            .eq("to_point_id", to_point_id)
-                            .execute()
-                        )
-                        
-                        if not existing.data:
-                            supabase.table("plot_point_connections").insert(
-                                {
-                                    "from_point_id": from_point_id,
-                                    "to_point_id": to_point_id,
-                                    "connection_type": "FOLLOWS",
-                                }
-                            ).execute()
-                    except Exception:
-                        pass  # Connection might already exist
-
-            # Also handle explicit "follows" and "causes" relationships from AI
-            for i, point_data in enumerate(plot_points_data):
-                timeline_pos = point_data.get("timeline_position", i + 1)
-                current_point_id = point_id_map.get(timeline_pos)
-
-                if not current_point_id:
-                    continue
-
-                # Handle explicit "follows" relationships (if not already connected)
-                follows = point_data.get("follows", [])
-                for follow_pos in follows:
-                    from_point_id = point_id_map.get(follow_pos)
-                    if from_point_id and from_point_id != current_point_id:
-                        try:
-                            # Check if connection already exists
-                            existing = (
-                                supabase.table("plot_point_connections")
-                                .select("id")
-                                .eq("from_point_id", from_point_id)
-                                .eq("to_point_id", current_point_id)
-                                .execute()
-                            )
-                            
-                            if not existing.data:
-                                supabase.table("plot_point_connections").insert(
-                                    {
-                                        "from_point_id": from_point_id,
-                                        "to_point_id": current_point_id,
-                                        "connection_type": "FOLLOWS",
-                                    }
-                                ).execute()
-                        except Exception:
-                            pass  # Connection might already exist
-
-                # Handle "causes" relationships
-                causes = point_data.get("causes", [])
-                for cause_pos in causes:
-                    to_point_id = point_id_map.get(cause_pos)
-                    if to_point_id and to_point_id != current_point_id:
-                        try:
-                            # Check if connection already exists
-                            existing = (
-                                supabase.table("plot_point_connections")
-                                .select("id")
-                                .eq("from_point_id", current_point_id)
-                                .eq("to_point_id", to_point_id)
-                                .execute()
-                            )
-                            
-                            if not existing.data:
-                                supabase.table("plot_point_connections").insert(
-                                    {
-                                        "from_point_id": current_point_id,
-                                        "to_point_id": to_point_id,
-                                        "connection_type": "CAUSES",
-                                    }
-                                ).execute()
-                        except Exception:
-                            pass
 
             return {
                 "status": "success",
@@ -314,6 +532,261 @@ Rules:
                 "plot_points_created": 0,
             }
 
+    def _delete_replaced_points(self, supabase: Client, chunk_ids: List[str]) -> Dict[str, int]:
+        """
+        Delete the points extracted from chunk_ids.
+
+        Returns:
+            chunk id -> first timeline position its deleted points held
+        """
+        if not chunk_ids:
+            return {}
+        old_points = (
+            supabase.table("plot_points")
+            .select("narrative_chunk_id, timeline_position")
+            .in_("narrative_chunk_id", list(chunk_ids))
+            .execute()
+        ).data or []
+        anchors: Dict[str, int] = {}
+        for row in old_points:
+            chunk_id, position = row.get("narrative_chunk_id"), row.get("timeline_position")
+            if chunk_id is not None and position is not None:
+                anchors[chunk_id] = min(anchors.get(chunk_id, position), position)
+        supabase.table("plot_points").delete().in_("narrative_chunk_id", list(chunk_ids)).execute()
+        return anchors
+
+    def _get_or_create_thread(self, supabase: Client, project_id: str) -> str:
+        """Id of the project's first plot thread, creating a default one if none exists."""
+        thread_resp = (
+            supabase.table("plot_threads")
+            .select("id")
+            .eq("project_id", project_id)
+            .limit(1)
+            .execute()
+        )
+        if thread_resp.data:
+            return thread_resp.data[0]["id"]
+        thread_resp = (
+            supabase.table("plot_threads")
+            .insert(
+                {
+                    "project_id": project_id,
+                    "title": "Main Plot",
+                    "description": "Primary storyline",
+                    "color": "#5a5fd8",
+                }
+            )
+            .execute()
+        )
+        return thread_resp.data[0]["id"]
+
+    def _insert_run_at(
+        self,
+        supabase: Client,
+        project_id: str,
+        thread_id: str,
+        points: List[Dict[str, Any]],
+        anchor: int,
+        chunk_map: Dict[Any, Any],
+        entity_map: Dict[str, str],
+    ) -> List[str]:
+        """Open a gap at ``anchor`` and store points there, linked to their neighbours."""
+        shift_timeline(supabase, project_id, anchor, len(points))
+        before = (
+            supabase.table("plot_points")
+            .select("id")
+            .eq("project_id", project_id)
+            .lt("timeline_position", anchor)
+            .order("timeline_position", desc=True)
+            .limit(1)
+            .execute()
+        ).data or []
+        after = (
+            supabase.table("plot_points")
+            .select("id")
+            .eq("project_id", project_id)
+            .gte("timeline_position", anchor + len(points))
+            .order("timeline_position", desc=False)
+            .limit(1)
+            .execute()
+        ).data or []
+        return persist_plot_points(
+            supabase,
+            project_id=project_id,
+            thread_id=thread_id,
+            plot_points_data=points,
+            chunk_map=chunk_map,
+            entity_map=entity_map,
+            position_offset=anchor - 1,
+            layout_offset=anchor - 1,
+            previous_point_id=before[0]["id"] if before else None,
+            next_point_id=after[0]["id"] if after else None,
+        )
+
+    def _append_run(
+        self,
+        supabase: Client,
+        project_id: str,
+        thread_id: str,
+        points: List[Dict[str, Any]],
+        chunk_map: Dict[Any, Any],
+        entity_map: Dict[str, str],
+    ) -> List[str]:
+        """Store points after the existing timeline, linked to its last point."""
+        last_point_resp = (
+            supabase.table("plot_points")
+            .select("id, timeline_position", count="exact")
+            .eq("project_id", project_id)
+            .order("timeline_position", desc=True)
+            .limit(1)
+            .execute()
+        )
+        last_point = (last_point_resp.data or [None])[0]
+        return persist_plot_points(
+            supabase,
+            project_id=project_id,
+            thread_id=thread_id,
+            plot_points_data=points,
+            chunk_map=chunk_map,
+            entity_map=entity_map,
+            position_offset=(last_point or {}).get("timeline_position") or 0,
+            layout_offset=last_point_resp.count or 0,
+            previous_point_id=(last_point or {}).get("id"),
+        )
+
+
+def _chunk_hash(chunk: Dict[str, Any]) -> str:
+    """Stored content_hash of a chunk, or the same hash computed from its content."""
+    return chunk.get("content_hash") or compute_content_hash(chunk.get("content") or "")
+
+
+def select_chunks_to_extract(
+    chunks: List[Dict[str, Any]],
+    extracted_hashes: Dict[str, str],
+    context_size: int = 1,
+) -> tuple:
+    """
+    Split a project's chunks into those needing extraction and their context.
+
+    A chunk needs extraction when it has no watermark (it is newer than the
+    last extraction) or its content_hash changed since it was extracted.
+    Up to ``context_size`` chunks preceding each of them are returned as
+    context.
+
+    Args:
+        chunks: The project's chunks ordered by chunk_index
+        extracted_hashes: narrative_chunk_id -> content_hash at last extraction
+        context_size: Already-extracted chunks to include before each new run
+
+    Returns:
+        (pending_chunks, context_chunks)
+    """
+    pending_positions = [
+        pos for pos, chunk in enumerate(chunks)
+        if extracted_hashes.get(chunk.get("id")) != _chunk_hash(chunk)
+    ]
+    pending_set = set(pending_positions)
+    context_positions = sorted(
+        {
+            ctx
+            for pos in pending_positions
+            for ctx in range(max(0, pos - context_size), pos)
+            if ctx not in pending_set
+        }
+    )
+    return (
+        [chunks[pos] for pos in pending_positions],
+        [chunks[pos] for pos in context_positions],
+    )
+
+
+def run_plot_extraction_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Job handler for plot_extraction jobs.
+
+    Only chunks added or changed since the last extraction are sent to the
+    model, with a little preceding context. Points previously extracted from
+    changed chunks are replaced when the new points are stored, never before
+    extraction succeeds. Watermarks are recorded once the new points are
+    stored. Raises on extraction errors so the job is retried.
+    """
+    project_id = payload["project_id"]
+    supabase = _default_supabase
+
+    chunks_resp = (
+        supabase.table("narrative_chunks")
+        .select("id, content, chunk_index, content_hash")
+        .eq("project_id", project_id)
+        .order("chunk_index", desc=False)
+        .execute()
+    )
+    chunks = chunks_resp.data or []
+
+    if not chunks:
+        return {
+            "status": "error",
+            "message": "No narrative chunks found. Write some content first.",
+        }
+
+    watermarks_resp = (
+        supabase.table("plot_extraction_watermarks")
+        .select("narrative_chunk_id, content_hash")
+        .eq("project_id", project_id)
+        .execute()
+    )
+    extracted_hashes = {
+        row["narrative_chunk_id"]: row.get("content_hash")
+        for row in watermarks_resp.data or []
+    }
+
+    pending, context = select_chunks_to_extract(
+        chunks, extracted_hashes, context_size=settings.plot_extraction_context_chunks
+    )
+    if not pending:
+        return {
+            "status": "success",
+            "plot_points_created": 0,
+            "chunks_processed": 0,
+            "message": "No new content since the last extraction.",
+        }
+
+    changed_ids = [c["id"] for c in pending if c["id"] in extracted_hashes]
+
+    entities_resp = (
+        supabase.table("entities")
+        .select("id, name, entity_type")
+        .eq("project_id", project_id)
+        .eq("entity_type", "CHARACTER")
+        .execute()
+    )
+    entities = entities_resp.data or []
+
+    result = get_plot_extraction_service().extract_plot_points_from_chunks(
+        project_id=project_id,
+        narrative_chunks=pending,
+        entities=entities,
+        supabase_client=supabase,
+        context_chunks=context,
+        replace_chunk_ids=changed_ids,
+    )
+    if result.get("status") == "error":
+        raise RuntimeError(result.get("error") or "Plot extraction failed")
+
+    supabase.table("plot_extraction_watermarks").upsert(
+        [
+            {
+                "project_id": project_id,
+                "narrative_chunk_id": chunk["id"],
+                "chunk_index": chunk.get("chunk_index"),
+                "content_hash": _chunk_hash(chunk),
+            }
+            for chunk in pending
+        ],
+        on_conflict="project_id,narrative_chunk_id",
+    ).execute()
+
+    return {**result, "chunks_processed": len(pending)}
+
 
 def get_plot_extraction_service() -> PlotExtractionService:
     """Get singleton instance of PlotExtractionService."""
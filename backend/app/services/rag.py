@@ -7,28 +7,48 @@ from typing import Any
 
 from supabase import Client
 
+from config import settings
+from lib.lexical_index import get_lexical_store, reciprocal_rank_fusion
 from lib.supabase import supabase_client as _default_supabase
-from services.llm_gateway import get_embedding
+from lib.vector_store import get_vector_store
+from services.llm_gateway import get_embedding, get_embeddings
 
 logger = logging.getLogger(__name__)
 
+# Each retriever contributes this many times top_k candidates to hybrid fusion
+HYBRID_CANDIDATE_FACTOR = 4
+
 
 class RAGService:
     """
     Semantic retrieval service for narrative chunks using vector embeddings.
     
     Provides context-aware retrieval of story content for AI suggestions
-    and character summaries using pgvector similarity search.
+    and character summaries using pgvector similarity search, or an
+    in-process vector index when RAG_LOCAL_INDEX is enabled. With RAG_HYBRID
+    enabled, vector results are fused with a local BM25 index, which also
+    keeps retrieval working when the embedding API is unavailable.
     """
     
-    def __init__(self, supabase_client: Client | None = None):
+    def __init__(
+        self,
+        supabase_client: Client | None = None,
+        use_local_index: bool | None = None,
+        use_hybrid: bool | None = None,
+    ):
         """
         Initialize the RAG service.
         
         Args:
             supabase_client: Optional Supabase client (uses default if not provided)
+            use_local_index: Search the local vector index (default: settings.rag_local_index)
+            use_hybrid: Fuse vector and BM25 results (default: settings.rag_hybrid)
         """
         self.supabase = supabase_client or _default_supabase
+        self.use_local_index = (
+            settings.rag_local_index if use_local_index is None else use_local_index
+        )
+        self.use_hybrid = settings.rag_hybrid if use_hybrid is None else use_hybrid
     
     def retrieve_relevant_chunks(
         self,
@@ -55,7 +75,14 @@ class RAGService:
             - content: The chunk text
             - similarity: Similarity score (0.0-1.0)
             - chunk_index: Sequential index of the chunk
+            In hybrid mode results are ranked by fusion and also carry
+            - score: Reciprocal-rank fusion score (higher is more relevant)
+            and similarity is the vector similarity, 0.0 for chunks only BM25
+            found, so rank or filter hybrid results by score, not similarity.
         """
+        if self.use_hybrid:
+            return self._retrieve_hybrid(project_id, query_text, top_k, threshold)
+        
         try:
             # Generate embedding for the query
             query_embedding = get_embedding(query_text)
@@ -64,18 +91,7 @@ class RAGService:
             return self._get_recent_chunks(project_id, limit=top_k)
         
         try:
-            # Call the match_narrative_chunks RPC function
-            rpc_result = self.supabase.rpc(
-                "match_narrative_chunks",
-                {
-                    "query_embedding": query_embedding,
-                    "match_threshold": threshold,
-                    "match_count": top_k,
-                    "p_project_id": project_id,
-                },
-            ).execute()
-            
-            chunks = rpc_result.data or []
+            chunks = self._match_chunks(project_id, query_embedding, top_k, threshold)
             
             # Check if we have any results above threshold
             if not chunks or all(chunk.get("similarity", 0) < threshold for chunk in chunks):
@@ -86,20 +102,202 @@ class RAGService:
                 return self._get_recent_chunks(project_id, limit=top_k)
             
             # Format the results, filtering out chunks below threshold
-            return [
-                {
-                    "content": chunk.get("content", ""),
-                    "similarity": chunk.get("similarity", 0.0),
-                    "chunk_index": chunk.get("chunk_index", 0),
-                }
-                for chunk in chunks
-                if chunk.get("content") and chunk.get("similarity", 0) >= threshold
-            ]
+            return self._above_threshold(chunks, threshold)
             
         except Exception as e:
             logger.error(f"RAG retrieval failed for project {project_id}: {e}, falling back to sequential")
             return self._get_recent_chunks(project_id, limit=top_k)
     
+    def _retrieve_hybrid(
+        self,
+        project_id: str,
+        query_text: str,
+        top_k: int,
+        threshold: float,
+    ) -> list[dict[str, Any]]:
+        """
+        Fuse vector and BM25 results with reciprocal-rank fusion.
+        
+        The query is embedded with a short timeout
+        (settings.rag_hybrid_embedding_timeout_seconds). If the embedding call
+        fails or times out, or the vector search fails, lexical results are
+        used on their own; recent chunks are only returned when neither
+        retriever finds anything.
+        """
+        candidates = top_k * HYBRID_CANDIDATE_FACTOR
+        lexical = self._lexical_search(project_id, query_text, candidates)
+        
+        try:
+            query_embedding = get_embedding(
+                query_text, timeout=settings.rag_hybrid_embedding_timeout_seconds
+            )
+            vector = self._above_threshold(
+                self._match_chunks(project_id, query_embedding, candidates, threshold),
+                threshold,
+            )
+        except Exception as e:
+            logger.warning(f"Vector retrieval failed for project {project_id}, using lexical only: {e}")
+            vector = []
+        
+        fused = self._fuse(vector, lexical, top_k)
+        if not fused:
+            return self._get_recent_chunks(project_id, limit=top_k)
+        return fused
+    
+    def _lexical_search(
+        self, project_id: str, query_text: str, top_k: int
+    ) -> list[dict[str, Any]]:
+        """BM25 search over the project's local lexical index ([] on failure)."""
+        try:
+            index = get_lexical_store().get_index(project_id, self.supabase)
+            return index.search(query_text, top_k=top_k)
+        except Exception as e:
+            logger.error(f"Lexical index failed for project {project_id}: {e}")
+            return []
+    
+    @staticmethod
+    def _format_chunk(chunk: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "content": chunk.get("content", ""),
+            "similarity": chunk.get("similarity", 0.0),
+            "chunk_index": chunk.get("chunk_index", 0),
+        }
+    
+    @classmethod
+    def _fuse(
+        cls, vector: list[dict[str, Any]], lexical: list[dict[str, Any]], top_k: int
+    ) -> list[dict[str, Any]]:
+        """Top top_k chunks by reciprocal-rank fusion, each with its fused score."""
+        return [
+            {**cls._format_chunk(chunk), "score": chunk["score"]}
+            for chunk in reciprocal_rank_fusion([vector, lexical])[:top_k]
+        ]
+    
+    @classmethod
+    def _above_threshold(
+        cls, chunks: list[dict[str, Any]], threshold: float
+    ) -> list[dict[str, Any]]:
+        return [
+            cls._format_chunk(chunk)
+            for chunk in chunks
+            if chunk.get("content") and chunk.get("similarity", 0) >= threshold
+        ]
+    
+    def _match_chunks(
+        self,
+        project_id: str,
+        query_embedding: list[float],
+        top_k: int,
+        threshold: float,
+    ) -> list[dict[str, Any]]:
+        """
+        Run the similarity search, locally if enabled, else via the RPC.
+        
+        A local index failure falls through to the match_narrative_chunks RPC.
+        """
+        if self.use_local_index:
+            try:
+                index = get_vector_store().get_index(project_id, self.supabase)
+                return index.search(query_embedding, top_k=top_k, threshold=threshold)
+            except Exception as e:
+                logger.error(f"Local vector index failed for project {project_id}: {e}")
+        
+        rpc_result = self.supabase.rpc(
+            "match_narrative_chunks",
+            {
+                "query_embedding": query_embedding,
+                "match_threshold": threshold,
+                "match_count": top_k,
+                "p_project_id": project_id,
+            },
+        ).execute()
+        return rpc_result.data or []
+    
+    def retrieve_many(
+        self,
+        project_id: str,
+        queries: list[str],
+        top_k: int = 3,
+        threshold: float = 0.3,
+        fallback_to_recent: bool = True,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Retrieve relevant chunks for several queries at once.
+        
+        All queries are embedded in a single request and scored in one pass:
+        a single matrix multiply against the local index, or one
+        match_narrative_chunks_multi RPC call. In hybrid mode each query's
+        vector results are fused with its BM25 results.
+        
+        Args:
+            project_id: The project identifier
+            queries: The texts to search for
+            top_k: Maximum number of chunks per query (default: 3)
+            threshold: Minimum similarity score (0.0-1.0, default: 0.3)
+            fallback_to_recent: Return recent chunks for queries with no match,
+                as retrieve_relevant_chunks does (default: True)
+            
+        Returns:
+            One list of chunk dictionaries per query, in query order
+        """
+        if not queries:
+            return []
+        
+        candidates = top_k * HYBRID_CANDIDATE_FACTOR if self.use_hybrid else top_k
+        # Hybrid mode still has BM25 to fall back on, so don't wait long for embeddings
+        timeout = settings.rag_hybrid_embedding_timeout_seconds if self.use_hybrid else None
+        try:
+            embeddings = get_embeddings(queries, timeout=timeout)
+            matches = self._match_many(project_id, embeddings, candidates, threshold)
+        except Exception as e:
+            logger.error(f"Batched RAG retrieval failed for project {project_id}: {e}")
+            matches = [[] for _ in queries]
+        
+        recent: list[dict[str, Any]] | None = None
+        results: list[list[dict[str, Any]]] = []
+        for query_text, chunks in zip(queries, matches):
+            relevant = self._above_threshold(chunks, threshold)
+            if self.use_hybrid:
+                lexical = self._lexical_search(project_id, query_text, candidates)
+                relevant = self._fuse(relevant, lexical, top_k)
+            if not relevant and fallback_to_recent:
+                if recent is None:
+                    recent = self._get_recent_chunks(project_id, limit=top_k)
+                relevant = list(recent)
+            results.append(relevant)
+        return results
+    
+    def _match_many(
+        self,
+        project_id: str,
+        query_embeddings: list[list[float]],
+        top_k: int,
+        threshold: float,
+    ) -> list[list[dict[str, Any]]]:
+        """Multi-query counterpart of _match_chunks."""
+        if self.use_local_index:
+            try:
+                index = get_vector_store().get_index(project_id, self.supabase)
+                return index.search_many(query_embeddings, top_k=top_k, threshold=threshold)
+            except Exception as e:
+                logger.error(f"Local vector index failed for project {project_id}: {e}")
+        
+        rpc_result = self.supabase.rpc(
+            "match_narrative_chunks_multi",
+            {
+                "query_embeddings": query_embeddings,
+                "match_threshold": threshold,
+                "match_count": top_k,
+                "p_project_id": project_id,
+            },
+        ).execute()
+        grouped: list[list[dict[str, Any]]] = [[] for _ in query_embeddings]
+        for row in rpc_result.data or []:
+            idx = row.get("query_index")
+            if idx is not None and 0 <= idx < len(grouped):
+                grouped[idx].append(row)
+        return grouped
+    
     def retrieve_for_character(
         self,
         project_id: str,
@@ -0,0 +1,409 @@
+"""
+Rebuild derived data (embeddings, entities, relationships) for an existing project.
+
+Run from backend/app as a CLI:
+
+    python -m services.reindex <project_id> [--no-embeddings] [--no-entities]
+        [--no-graph] [--restart] [--concurrency N]
+
+or through POST /admin/projects/{project_id}/reindex, which queues it as a
+background job (progress at GET /jobs/{job_id}).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Iterable, Iterator
+
+from supabase import Client
+
+from config import settings
+from lib.supabase import supabase_client as _default_supabase
+from lib.tracing import propagate
+
+logger = logging.getLogger(__name__)
+
+STAGE_EMBEDDINGS = "embeddings"
+STAGE_EXTRACT = "extract"
+STAGE_DONE = "done"
+
+# Rows per relationships/entities insert
+INSERT_BATCH_SIZE = 500
+
+# Turns chunk texts into ExtractionResults, in order; each entity dict carries
+# "text" and "type" (our entity_type: CHARACTER, LOCATION or OBJECT)
+Extractor = Callable[[Iterable[str]], Iterator[Any]]
+
+
+def checkpoint_key(project_id: str) -> str:
+    return f"reindex:{project_id}"
+
+
+@dataclass
+class ReindexProgress:
+    """Where a reindex is and what it has done; also its resume checkpoint."""
+
+    project_id: str
+    stage: str = STAGE_EMBEDDINGS
+    # Last chunk_index finished in the current stage
+    after_index: int = -1
+    relationships_cleared: bool = False
+    chunks_embedded: int = 0
+    embedding_failures: int = 0
+    chunks_extracted: int = 0
+    entities_created: int = 0
+    relationships_created: int = 0
+    started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+
+def _default_extractor(texts: Iterable[str]) -> Iterator[Any]:
+    from services.extraction import (
+        ENTITY_LABEL_MAP,
+        get_cached_nlp_pipeline,
+        iter_core_nlp_pipeline,
+    )
+
+    nlp = get_cached_nlp_pipeline(model_name="en_core_web_sm", enable_coref=False)
+    for result in iter_core_nlp_pipeline(
+        texts,
+        nlp,
+        batch_size=settings.reindex_nlp_batch_size,
+        n_process=settings.reindex_nlp_processes,
+    ):
+        for entity in result.entities:
+            entity["type"] = ENTITY_LABEL_MAP.get(entity.get("label", ""), "OBJECT")
+        yield result
+
+
+def _default_embedder(texts: list[str]) -> list[list[float]]:
+    from services.llm_gateway import get_embeddings
+
+    return get_embeddings(texts)
+
+
+class ProjectReindexer:
+    """
+    Streams a project's narrative chunks in pages and rebuilds what is derived from them.
+
+    Stage 1 embeds chunks whose embedding is NULL, in batches, with up to
+    ``concurrency`` embedding requests in flight. Stage 2 re-extracts
+    entities and SVO triples with nlp.pipe, creates missing entities, and
+    (with ``graph``) rebuilds the project's relationships from scratch in
+    chunk order. Progress is checkpointed after every page, so a rerun
+    continues where an interrupted one stopped.
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        supabase_client: Client | None = None,
+        *,
+        checkpoints: Any | None = None,
+        page_size: int | None = None,
+        embed_batch_size: int | None = None,
+        concurrency: int | None = None,
+        extractor: Extractor | None = None,
+        embedder: Callable[[list[str]], list[list[float]]] | None = None,
+        on_progress: Callable[[dict[str, Any]], None] | None = None,
+    ) -> None:
+        self.project_id = project_id
+        self.supabase = supabase_client or _default_supabase
+        self.checkpoints = checkpoints
+        self.page_size = page_size or settings.reindex_page_size
+        self.embed_batch_size = embed_batch_size or settings.reindex_embed_batch_size
+        self.concurrency = max(1, concurrency or settings.reindex_concurrency)
+        self.extractor = extractor or _default_extractor
+        self.embedder = embedder or _default_embedder
+        self.on_progress = on_progress
+
+    def run(
+        self,
+        *,
+        embeddings: bool = True,
+        entities: bool = True,
+        graph: bool = True,
+        restart: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Reindex the project, resuming from the last checkpoint unless restart is set.
+
+        Args:
+            embeddings: Embed chunks that have no embedding
+            entities: Re-extract entities (and triples) from every chunk
+            graph: Rebuild relationships from the extracted triples
+            restart: Ignore any saved checkpoint
+
+        Returns:
+            Final progress
+        """
+        progress = None if restart else self._load_checkpoint()
+        if progress is None or progress.stage == STAGE_DONE:
+            progress = ReindexProgress(project_id=self.project_id)
+
+        if progress.stage == STAGE_EMBEDDINGS:
+            if embeddings:
+                self._embed_missing(progress)
+            progress.stage = STAGE_EXTRACT
+            progress.after_index = -1
+            self._checkpoint(progress)
+
+        if progress.stage == STAGE_EXTRACT:
+            if entities or graph:
+                self._reextract(progress, entities=entities, graph=graph)
+            progress.stage = STAGE_DONE
+            self._checkpoint(progress)
+
+        self._invalidate_caches(progress)
+        return asdict(progress)
+
+    # ------------------------------------------------------------------
+    # Stage 1: embeddings
+    # ------------------------------------------------------------------
+
+    def _embed_missing(self, progress: ReindexProgress) -> None:
+        for page in self._pages(progress, missing_embedding=True):
+            batches = [
+                page[i : i + self.embed_batch_size]
+                for i in range(0, len(page), self.embed_batch_size)
+            ]
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                for embedded, failed in pool.map(propagate(self._embed_batch), batches):
+                    progress.chunks_embedded += embedded
+                    progress.embedding_failures += failed
+            progress.after_index = page[-1]["chunk_index"]
+            self._checkpoint(progress)
+
+    def _embed_batch(self, chunks: list[dict[str, Any]]) -> tuple[int, int]:
+        """Embed one batch and store the vectors. Returns (embedded, failed)."""
+        try:
+            vectors = self.embedder([chunk["content"] for chunk in chunks])
+        except Exception as e:
+            logger.error(f"Reindex embedding batch failed for project {self.project_id}: {e}")
+            return 0, len(chunks)
+
+        embedded = 0
+        for chunk, vector in zip(chunks, vectors):
+            try:
+                self.supabase.table("narrative_chunks").update({"embedding": vector}).eq(
+                    "id", chunk["id"]
+                ).execute()
+                embedded += 1
+            except Exception as e:
+                logger.error(f"Failed to store embedding for chunk {chunk['id']}: {e}")
+        return embedded, len(chunks) - embedded
+
+    # ------------------------------------------------------------------
+    # Stage 2: entities and relationships
+    # ------------------------------------------------------------------
+
+    def _reextract(self, progress: ReindexProgress, entities: bool, graph: bool) -> None:
+        from services.analysis import StoryKnowledgeGraph
+
+        if graph and not progress.relationships_cleared:
+            self.supabase.table("relationships").delete().eq("project_id", self.project_id).execute()
+            progress.relationships_cleared = True
+            self._checkpoint(progress)
+
+        # Entities, plus relationships persisted by earlier pages of this run
+        kg = StoryKnowledgeGraph.from_supabase(self.project_id, supabase_client=self.supabase)
+
+        for page in self._pages(progress):
+            results = list(self.extractor(chunk["content"] for chunk in page))
+
+            new_entities: dict[str, str] = {}
+            for result in results:
+                for entity in result.entities if entities else []:
+                    name = entity["text"].strip()
+                    if name and name not in kg.entity_ids_by_name:
+                        new_entities.setdefault(name, entity.get("type", "OBJECT"))
+                if graph:
+                    for triple in result.triples:
+                        for name in (triple.subject, triple.object):
+                            if name not in kg.entity_ids_by_name:
+                                new_entities.setdefault(name, "OBJECT")
+            progress.entities_created += self._insert_entities(kg, new_entities)
+
+            if graph:
+                rows = self._new_relationship_rows(kg, results)
+                self._insert_rows("relationships", rows)
+                progress.relationships_created += len(rows)
+
+            progress.chunks_extracted += len(page)
+            progress.after_index = page[-1]["chunk_index"]
+            self._checkpoint(progress)
+
+    def _insert_entities(self, kg: Any, entities: dict[str, str]) -> int:
+        rows = [
+            {
+                "project_id": self.project_id,
+                "name": name,
+                "entity_type": entity_type,
+                "is_initial_setup": False,
+            }
+            for name, entity_type in entities.items()
+        ]
+        for inserted in self._insert_rows("entities", rows):
+            kg.entity_ids_by_name[inserted["name"]] = inserted["id"]
+            kg.add_node(inserted["name"], inserted.get("entity_type"))
+        return len(rows)
+
+    def _new_relationship_rows(self, kg: Any, results: list[Any]) -> list[dict[str, Any]]:
+        """
+        Apply triples to the in-memory graph in chunk order, as analysis would.
+
+        Contradicting stateful facts are skipped (not logged: a rebuild should
+        not re-raise alerts the writer has already seen). Returns rows for the
+        facts that are new to the graph.
+        """
+        rows: list[dict[str, Any]] = []
+        for result in results:
+            for triple in result.triples:
+                subject, relation, obj = triple.subject, triple.relation.upper(), triple.object
+                if obj in kg.get_objects_for_relation(subject, relation):
+                    continue
+                if kg.check_inconsistency(subject, relation, obj) is not None:
+                    continue
+                entity_a_id = kg.entity_ids_by_name.get(subject)
+                entity_b_id = kg.entity_ids_by_name.get(obj)
+                if not entity_a_id or not entity_b_id:
+                    continue
+                kg.add_fact(subject, relation, obj, persist=False, description=triple.sentence)
+                rows.append(
+                    {
+                        "project_id": self.project_id,
+                        "entity_a_id": entity_a_id,
+                        "entity_b_id": entity_b_id,
+                        "relation_type": relation,
+                        "description": triple.sentence,
+                    }
+                )
+        return rows
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _pages(
+        self, progress: ReindexProgress, missing_embedding: bool = False
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Keyset-paginate chunks after progress.after_index, in chunk order."""
+        while True:
+            query = (
+                self.supabase.table("narrative_chunks")
+                .select("id, chunk_index, content")
+                .eq("project_id", self.project_id)
+                .gt("chunk_index", progress.after_index)
+            )
+            if missing_embedding:
+                query = query.is_("embedding", "null")
+            page = query.order("chunk_index").limit(self.page_size).execute().data or []
+            if not page:
+                return
+            yield page
+            if len(page) < self.page_size:
+                return
+
+    def _insert_rows(self, table: str, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        inserted: list[dict[str, Any]] = []
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            resp = self.supabase.table(table).insert(rows[i : i + INSERT_BATCH_SIZE]).execute()
+            inserted.extend(resp.data or [])
+        return inserted
+
+    def _load_checkpoint(self) -> ReindexProgress | None:
+        if self.checkpoints is None:
+            return None
+        data = self.checkpoints.load_checkpoint(checkpoint_key(self.project_id))
+        if not data:
+            return None
+        known = set(ReindexProgress.__dataclass_fields__)
+        return ReindexProgress(**{k: v for k, v in data.items() if k in known})
+
+    def _checkpoint(self, progress: ReindexProgress) -> None:
+        progress.updated_at = time.time()
+        snapshot = asdict(progress)
+        if self.checkpoints is not None:
+            self.checkpoints.save_checkpoint(checkpoint_key(self.project_id), snapshot)
+        if self.on_progress is not None:
+            self.on_progress(snapshot)
+
+    def _invalidate_caches(self, progress: ReindexProgress) -> None:
+        from lib.vector_store import get_vector_store
+        from services.kg_cache import get_kg_cache
+
+        if progress.chunks_embedded:
+            get_vector_store().invalidate(self.project_id)
+        if progress.chunks_extracted:
+            get_kg_cache().invalidate(self.project_id)
+
+
+def run_reindex_job(payload: dict[str, Any]) -> dict[str, Any]:
+    """
+    Job queue handler: reindex payload["project_id"], reporting progress on the job.
+
+    Always resumes from the checkpoint, so a retried job continues where the
+    failed attempt stopped; the admin route clears the checkpoint for a restart.
+    """
+    from services.job_queue import get_job_queue, report_progress
+
+    reindexer = ProjectReindexer(
+        payload["project_id"],
+        checkpoints=get_job_queue().store,
+        concurrency=payload.get("concurrency"),
+        on_progress=report_progress,
+    )
+    return reindexer.run(
+        embeddings=payload.get("embeddings", True),
+        entities=payload.get("entities", True),
+        graph=payload.get("graph", True),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild embeddings, entities and relationships for a project.")
+    parser.add_argument("project_id")
+    parser.add_argument("--no-embeddings", action="store_true", help="skip embedding chunks with no vector")
+    parser.add_argument("--no-entities", action="store_true", help="skip entity re-extraction")
+    parser.add_argument("--no-graph", action="store_true", help="keep existing relationships")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    parser.add_argument("--concurrency", type=int, default=None, help="embedding requests in flight")
+    parser.add_argument("--page-size", type=int, default=None, help="chunks per page")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from services.job_queue import JobStore
+
+    def print_progress(progress: dict[str, Any]) -> None:
+        print(
+            f"[{progress['stage']}] after chunk {progress['after_index']}: "
+            f"embedded={progress['chunks_embedded']} failed={progress['embedding_failures']} "
+            f"extracted={progress['chunks_extracted']} entities+={progress['entities_created']} "
+            f"relationships+={progress['relationships_created']}",
+            flush=True,
+        )
+
+    reindexer = ProjectReindexer(
+        args.project_id,
+        checkpoints=JobStore(settings.job_db_path),
+        page_size=args.page_size,
+        concurrency=args.concurrency,
+        on_progress=print_progress,
+    )
+    result = reindexer.run(
+        embeddings=not args.no_embeddings,
+        entities=not args.no_entities,
+        graph=not args.no_graph,
+        restart=args.restart,
+    )
+    print(json.dumps(result, indent=2))
+    return 1 if result["embedding_failures"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
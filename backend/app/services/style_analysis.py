@@ -1,50 +1,251 @@
+import logging
+import threading
+import time
 import numpy as np
-import spacy
 from collections import Counter
-from transformers import pipeline
-import fitz  # PyMuPDF
+from pathlib import Path
 import re
-from typing import Dict, Any, List
+from typing import Any, Dict, Iterable, Iterator, List
+
+from config import settings
+from lib.nlp_registry import get_nlp_registry
+
+logger = logging.getLogger(__name__)
 
 # =========================================================
-# MODELS (Singleton Pattern for Hackathon Efficiency)
+# MODELS (lazy, per-classifier)
 # =========================================================
 
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+GENRE_MODEL = "facebook/bart-large-mnli"
+SPACY_MODEL = "en_core_web_sm"
+
+INFERENCE_BACKENDS = ("torch", "quantized", "onnx")
+MODEL_NAMES = ("nlp", "emotion", "genre")
+
+
+class EmptyManuscriptError(ValueError):
+    """The uploaded manuscript has no text to analyze."""
+
+_WARMUP_TEXT = "The rain had not stopped for three days, and the harbour was silent."
+
+
 class StyleModels:
+    """
+    Style analysis models, each loaded the first time it is used.
+
+    The transformer classifiers run on CPU in one of three modes:
+    "torch" (the stock full-precision pipeline, the default), "quantized"
+    (linear layers dynamically quantized to int8; faster, but scores can
+    shift slightly) or "onnx" (ONNX Runtime via optimum, exported once and
+    cached on disk). Quantization is only used when asked for: ONNX falls
+    back to "torch" if optimum is not installed.
+    """
+
     _instance = None
+    _instance_lock = threading.Lock()
 
-    def __init__(self):
-        print("🚀 Loading High-Fidelity Style Models...")
-        # For detecting the "Vibe"
-        self.emotion_classifier = pipeline(
-            "text-classification",
-            model="j-hartmann/emotion-english-distilroberta-base",
-            top_k=None
-        )
-        # For detecting the "Genre"
-        self.genre_classifier = pipeline(
-            "zero-shot-classification", 
-            model="facebook/bart-large-mnli"
-        )
-        # For linguistic structure
-        self.nlp = spacy.load("en_core_web_sm")
-        print("✅ Style Models Ready.")
+    def __init__(
+        self,
+        backend: str | None = None,
+        num_threads: int | None = None,
+        onnx_cache_dir: str | None = None,
+    ):
+        self.backend = (backend or settings.style_inference_backend).lower()
+        if self.backend not in INFERENCE_BACKENDS:
+            raise ValueError(
+                f"Unknown style inference backend {self.backend!r}; expected one of {INFERENCE_BACKENDS}"
+            )
+        self.num_threads = settings.style_inference_threads if num_threads is None else num_threads
+        self.onnx_cache_dir = Path(onnx_cache_dir or settings.style_onnx_cache_dir)
+        self._models: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in MODEL_NAMES}
+        self._threads_configured = False
 
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
 
+    # For linguistic structure
+    @property
+    def nlp(self):
+        return self._get("nlp")
+
+    # For detecting the "Vibe"
+    @property
+    def emotion_classifier(self):
+        return self._get("emotion")
+
+    # For detecting the "Genre"
+    @property
+    def genre_classifier(self):
+        return self._get("genre")
+
+    def loaded(self) -> List[str]:
+        """Names of the models currently in memory."""
+        return [name for name in MODEL_NAMES if name in self._models]
+
+    def warmup(self, names: List[str] | None = None) -> List[str]:
+        """
+        Load models ahead of the first request and run one inference each.
+
+        Args:
+            names: Models to warm ("nlp", "emotion", "genre", or "all");
+                defaults to all of them
+
+        Returns:
+            Names of the models that warmed successfully
+        """
+        if not names or "all" in names:
+            names = list(MODEL_NAMES)
+        warmed = []
+        for name in names:
+            if name not in MODEL_NAMES:
+                logger.warning(f"Unknown style model {name!r}; skipping warmup")
+                continue
+            try:
+                model = self._get(name)
+                if name == "genre":
+                    model(_WARMUP_TEXT, ["literary"])
+                else:
+                    model(_WARMUP_TEXT)
+                warmed.append(name)
+            except Exception as e:
+                logger.error(f"Style model {name} failed to warm up: {e}")
+        return warmed
+
+    def _get(self, name: str):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                start = time.perf_counter()
+                model = self._load(name)
+                self._models[name] = model
+                logger.info(
+                    f"Loaded style model {name} ({self.backend}) in {time.perf_counter() - start:.1f}s"
+                )
+        return model
+
+    def _load(self, name: str):
+        if name == "nlp":
+            # Shared with extraction; style analysis never needs entities
+            return get_nlp_registry().get(SPACY_MODEL, disable=("ner",))
+        if name == "emotion":
+            return self._build_pipeline("text-classification", EMOTION_MODEL, top_k=None)
+        return self._build_pipeline("zero-shot-classification", GENRE_MODEL)
+
+    def _build_pipeline(self, task: str, model_id: str, **kwargs):
+        from transformers import AutoTokenizer, pipeline
+
+        self._configure_threads()
+        backend = self.backend
+        if backend == "onnx":
+            try:
+                model = self._load_onnx_model(model_id)
+            except ImportError:
+                logger.warning("optimum[onnxruntime] is not installed; using full-precision torch models")
+                backend = "torch"
+            else:
+                return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_id), **kwargs)
+        if backend == "quantized":
+            model = self._load_quantized_model(model_id)
+            return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_id), **kwargs)
+        return pipeline(task, model=model_id, **kwargs)
+
+    def _configure_threads(self) -> None:
+        if self._threads_configured or self.num_threads <= 0:
+            return
+        try:
+            import torch
+
+            torch.set_num_threads(self.num_threads)
+        except ImportError:
+            pass
+        self._threads_configured = True
+
+    def _load_quantized_model(self, model_id: str):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        model = AutoModelForSequenceClassification.from_pretrained(model_id)
+        model.eval()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def _load_onnx_model(self, model_id: str):
+        import onnxruntime as ort
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+
+        options = ort.SessionOptions()
+        if self.num_threads > 0:
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+
+        export_dir = self.onnx_cache_dir / model_id.replace("/", "--")
+        if (export_dir / "model.onnx").exists():
+            return ORTModelForSequenceClassification.from_pretrained(export_dir, session_options=options)
+
+        model = ORTModelForSequenceClassification.from_pretrained(
+            model_id, export=True, session_options=options
+        )
+        try:
+            model.save_pretrained(export_dir)
+        except OSError as e:
+            logger.warning(f"Could not cache ONNX export of {model_id} in {export_dir}: {e}")
+        return model
+
+
+def get_style_models() -> StyleModels:
+    """Get the process-wide style models (nothing is loaded until used)."""
+    return StyleModels.get_instance()
+
 # =========================================================
 # HELPER UTILITIES
 # =========================================================
 
+def iter_pdf_pages(file_bytes: bytes) -> Iterator[str]:
+    """Yields the text of each page of an uploaded PDF, one page at a time."""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(stream=file_bytes, filetype="pdf")
+    try:
+        for page in doc:
+            yield page.get_text()
+    finally:
+        doc.close()
+
 def extract_text_from_pdf(file_bytes: bytes) -> str:
     """Converts uploaded manuscript PDFs into clean text."""
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
-    text = "".join([page.get_text() for page in doc])
-    return text
+    return "".join(iter_pdf_pages(file_bytes))
+
+_SEGMENT_BREAK_RE = re.compile(r"\n\s*\n|[.!?][\"')\]]*\s")
+
+def iter_text_segments(pages: Iterable[str], max_chars: int = 5000) -> Iterator[str]:
+    """
+    Re-cuts a stream of pages into segments of at most max_chars.
+
+    Cuts fall after the last paragraph break or sentence end inside the
+    limit (whitespace, then a hard cut, as fallbacks), so sentences that
+    run across a page boundary stay whole. Concatenating the segments
+    gives back the original text.
+    """
+    buffer = ""
+    for page in pages:
+        buffer += page
+        while len(buffer) > max_chars:
+            head = buffer[:max_chars]
+            ends = [m.end() for m in _SEGMENT_BREAK_RE.finditer(head)]
+            cut = ends[-1] if ends else head.rfind(" ") + 1 or max_chars
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+    if buffer.strip():
+        yield buffer
 
 def _generate_style_description(avg_len: float, richness: float) -> str:
     """Converts raw data into human-readable editorial feedback."""
@@ -58,56 +259,201 @@ def _generate_style_description(avg_len: float, richness: float) -> str:
     
     return " ".join(desc)
 
+# =========================================================
+# STREAMING ACCUMULATORS
+# =========================================================
+
+class StyleStats:
+    """
+    Running linguistic statistics over a stream of spaCy docs.
+
+    Memory is bounded by the book's vocabulary. Richness is the mean
+    type-token ratio over consecutive windows of richness_window tokens
+    (about the 15k-character sample the blueprint used to be built from),
+    so it does not shrink just because a manuscript is long.
+    """
+
+    def __init__(self, anchor_count: int = 5, richness_window: int = 2500):
+        self.anchor_count = anchor_count
+        self.richness_window = richness_window
+        self.sentence_count = 0
+        self.sentence_words = 0
+        self.anchors: List[str] = []
+        self.vocab: Counter = Counter()
+        self._window_tokens = 0
+        self._window_types: set = set()
+        self._window_ratios: List[float] = []
+
+    def add_doc(self, doc) -> None:
+        for sent in doc.sents:
+            words = len(sent.text.split())
+            self.sentence_count += 1
+            self.sentence_words += words
+            # Real sentences as 'Anchors' for Few-Shot prompting: medium-length, complete thoughts
+            if 10 < words < 25 and len(self.anchors) < self.anchor_count:
+                self.anchors.append(sent.text.strip())
+
+        for token in doc:
+            self._window_tokens += 1
+            if token.is_alpha:
+                self._window_types.add(token.lower_)
+                # Vocabulary Fingerprints (Favorite adjectives and verbs)
+                if token.pos_ in ("ADJ", "ADV", "VERB") and not token.is_stop:
+                    self.vocab[token.lemma_.lower()] += 1
+            if self._window_tokens >= self.richness_window:
+                self._window_ratios.append(len(self._window_types) / self._window_tokens)
+                self._window_tokens = 0
+                self._window_types = set()
+
+    @property
+    def avg_sentence_length(self) -> float:
+        return self.sentence_words / self.sentence_count if self.sentence_count else 0.0
+
+    @property
+    def richness(self) -> float:
+        if self._window_ratios:
+            return float(np.mean(self._window_ratios))
+        if self._window_tokens:
+            return len(self._window_types) / self._window_tokens
+        return 0.0
+
+    def top_vocabulary(self, n: int = 12) -> List[str]:
+        return [word for word, _ in self.vocab.most_common(n)]
+
+
+class WindowSampler:
+    """
+    Keeps an evenly spaced sample of fixed-size text windows from a stream.
+
+    Window i is kept while i is a multiple of the current stride; when more
+    than max_windows are held the stride doubles and every other kept window
+    is dropped. The result covers the whole book, one window per stratum,
+    without knowing its length in advance. The first window is only used
+    when nothing else is available, to avoid 'Chapter 1' title bias.
+    """
+
+    def __init__(self, max_windows: int = 16, window_chars: int = 2000):
+        self.max_windows = max(1, max_windows)
+        self.window_chars = window_chars
+        self.stride = 1
+        self._count = 0
+        self._first: str | None = None
+        self._selected: List[tuple[int, str]] = []
+        self._buffer = ""
+
+    def add(self, text: str) -> None:
+        self._buffer += text
+        while len(self._buffer) >= self.window_chars:
+            self._offer(self._buffer[: self.window_chars])
+            self._buffer = self._buffer[self.window_chars :]
+
+    def _offer(self, window: str) -> None:
+        index = self._count
+        self._count += 1
+        if index == 0:
+            self._first = window
+            return
+        if index % self.stride:
+            return
+        self._selected.append((index, window))
+        if len(self._selected) > self.max_windows:
+            self.stride *= 2
+            self._selected = [(i, w) for i, w in self._selected if i % self.stride == 0]
+
+    @property
+    def indices(self) -> List[int]:
+        return [i for i, _ in self._selected]
+
+    def windows(self) -> List[str]:
+        if self._selected:
+            return [w for _, w in self._selected]
+        tail = (self._first or "") + self._buffer
+        return [tail] if tail.strip() else []
+
+
+GENRE_LABELS = ["horror", "fantasy", "noir", "romance", "thriller", "literary"]
+
+def _dominant_genre(results: Any) -> str:
+    """Sums zero-shot label scores across windows."""
+    if isinstance(results, dict):
+        results = [results]
+    totals: Counter = Counter()
+    for res in results:
+        for label, score in zip(res["labels"], res["scores"]):
+            totals[label] += score
+    return totals.most_common(1)[0][0]
+
+def _dominant_emotion(results: Any) -> str:
+    """Sums emotion scores across windows."""
+    if results and isinstance(results[0], dict):
+        results = [results]
+    totals: Counter = Counter()
+    for res in results:
+        for item in res:
+            totals[item["label"]] += item["score"]
+    return totals.most_common(1)[0][0]
+
 # =========================================================
 # CORE STYLE ANALYSIS ENGINE
 # =========================================================
 
-def analyze_writer_style(text: str) -> Dict[str, Any]:
+def analyze_writer_style(source: str | Iterable[str]) -> Dict[str, Any]:
     """
-    Analyzes a writing sample to extract a 'Style Blueprint'.
+    Analyzes a manuscript to extract a 'Style Blueprint'.
     This DNA is then used to prevent the AI from giving generic 'footsteps' suggestions.
+
+    The whole manuscript is streamed: pages are re-cut into segments, run
+    through spaCy in batches, and folded into running statistics. Genre and
+    emotion are classified on an evenly spaced sample of windows in batched
+    calls, so cost is linear for spaCy and fixed for the classifiers.
+
+    Args:
+        source: Manuscript text, or an iterable of page texts (see iter_pdf_pages)
+
+    Returns:
+        The style blueprint
+
+    Raises:
+        EmptyManuscriptError: If the manuscript contains no text
     """
-    models = StyleModels.get_instance()
-    
-    # 1. Linguistic DNA Extraction (spaCy)
-    doc = models.nlp(text[:15000]) # Sample limit for performance
-    
-    # Extract real sentences as 'Anchors' for Few-Shot prompting
-    # We look for medium-length sentences that are complete thoughts
-    sentences = [s.text.strip() for s in doc.sents if 10 < len(s.text.split()) < 25]
-    style_anchors = sentences[:5] 
-
-    # Extract Vocabulary Fingerprints (Favorite adjectives and verbs)
-    vocab_favors = [token.lemma_.lower() for token in doc 
-                    if token.pos_ in ["ADJ", "ADV", "VERB"] and not token.is_stop and token.is_alpha]
-    top_vocab = [word for word, count in Counter(vocab_favors).most_common(12)]
-
-    # 2. Structure Math
-    sent_lens = [len(sent.text.split()) for sent in doc.sents]
-    avg_len = np.mean(sent_lens) if sent_lens else 0
-    richness = len(set(t.lower_ for t in doc if t.is_alpha)) / len(doc) if len(doc) > 0 else 0
-
-    # 3. Atmosphere & Genre (Hugging Face)
-    # Analyze middle chunk to avoid 'Chapter 1' title bias
-    sample_chunk = text[1000:3000] if len(text) > 3000 else text
-    
-    # Genre Detection
-    genre_labels = ["horror", "fantasy", "noir", "romance", "thriller", "literary"]
-    genre_res = models.genre_classifier(sample_chunk, genre_labels)
-    
-    # Emotion Detection
-    emotion_res = models.emotion_classifier(sample_chunk[:512])[0]
-    dominant_emotion = max(emotion_res, key=lambda x: x['score'])['label']
+    models = get_style_models()
+    pages = [source] if isinstance(source, str) else source
+
+    stats = StyleStats(richness_window=settings.style_richness_window_tokens)
+    sampler = WindowSampler(
+        max_windows=settings.style_classify_windows,
+        window_chars=settings.style_classify_window_chars,
+    )
+
+    def segments() -> Iterator[str]:
+        for segment in iter_text_segments(pages, settings.style_segment_chars):
+            sampler.add(segment)
+            yield segment
+
+    # 1. Linguistic DNA Extraction (spaCy, batched)
+    for doc in models.nlp.pipe(segments(), batch_size=settings.style_nlp_batch_size):
+        stats.add_doc(doc)
+
+    windows = sampler.windows()
+    if not windows:
+        raise EmptyManuscriptError("The manuscript contains no text.")
+
+    # 2. Atmosphere & Genre (Hugging Face), batched over the sampled windows
+    batch_size = settings.style_classify_batch_size
+    genre_res = models.genre_classifier(windows, GENRE_LABELS, batch_size=batch_size)
+    emotion_res = models.emotion_classifier([w[:512] for w in windows], batch_size=batch_size)
 
-    # 4. FINAL BLUEPRINT CONSTRUCTION
+    # 3. FINAL BLUEPRINT CONSTRUCTION
+    avg_len = stats.avg_sentence_length
+    richness = stats.richness
     style_blueprint = {
-        "dominant_genre": genre_res["labels"][0],
-        "dominant_emotion": dominant_emotion.capitalize(),
+        "dominant_genre": _dominant_genre(genre_res),
+        "dominant_emotion": _dominant_emotion(emotion_res).capitalize(),
         "avg_sentence_length": round(float(avg_len), 2),
         "vocab_richness": round(float(richness), 2),
         "description": _generate_style_description(avg_len, richness),
-        "style_anchors": style_anchors,  # These go directly into Suggestion Prompt
-        "top_vocabulary": top_vocab      # These guide word choice
+        "style_anchors": stats.anchors,  # These go directly into Suggestion Prompt
+        "top_vocabulary": stats.top_vocabulary()  # These guide word choice
     }
 
-    return style_blueprint
\ No newline at end of file
+    return style_blueprint
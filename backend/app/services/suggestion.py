@@ -3,9 +3,39 @@ import os
 import re
 from typing import Optional
 
+from cachetools import TTLCache
+
+from config import settings
+from lib.metrics import openai_request
 from lib.supabase import supabase_client as _default_supabase
 from services.rag import RAGService
 
+# End of a sentence: terminator, optional closing quote/bracket, then whitespace
+_SENTENCE_END_RE = re.compile(r"[.!?]+[\"'\u201d\u2019)\]]*\s")
+
+
+def retrieval_window(context_text: str, max_chars: int = 500) -> str:
+    """
+    Normalize the tail of the editor context into a stable RAG query.
+
+    Whitespace is collapsed, the sentence still being typed is dropped, and the
+    window starts at a sentence boundary, so every keystroke inside the same
+    sentence maps to the same query. Text without a finished sentence is
+    returned whole (collapsed and truncated).
+    """
+    collapsed = " ".join(context_text.split())
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(collapsed + " ")]
+    if ends:
+        collapsed = collapsed[: ends[-1]].rstrip()
+    if len(collapsed) <= max_chars:
+        return collapsed
+
+    tail = collapsed[-max_chars:]
+    boundary = _SENTENCE_END_RE.search(tail)
+    if boundary:
+        return tail[boundary.end():]
+    return tail
+
 
 class SuggestionService:
     def __init__(self, api_key: str = None, supabase_client=None):
@@ -13,6 +43,11 @@ class SuggestionService:
         self.client = OpenAI(api_key=self.api_key)
         self.supabase = supabase_client or _default_supabase
         self.rag_service = RAGService(supabase_client=self.supabase)
+        # (project_id, retrieval window) -> retrieved scenes, reused within a typing burst
+        self._scene_cache: TTLCache = TTLCache(
+            maxsize=settings.suggest_scene_cache_size,
+            ttl=settings.suggest_scene_cache_ttl_seconds,
+        )
 
     def get_ghost_suggestion(
         self,
@@ -48,16 +83,7 @@ class SuggestionService:
         
         # Retrieve relevant scenes using RAG if project_id is provided and relevant_scenes not passed
         if project_id and relevant_scenes is None:
-            try:
-                rag_chunks = self.rag_service.retrieve_relevant_chunks(
-                    project_id=project_id,
-                    query_text=context_text[-500:],  # Use recent context as query
-                    top_k=3,
-                    threshold=0.3
-                )
-                relevant_scenes = [chunk["content"] for chunk in rag_chunks if chunk.get("content")]
-            except Exception:
-                relevant_scenes = []
+            relevant_scenes = self._get_relevant_scenes(project_id, context_text)
 
         # Build a sophisticated voice reference using the new linguistic DNA
         anchors = "\n".join([f"- {a}" for a in blueprint.get("style_anchors", [])])
@@ -114,7 +140,9 @@ class SuggestionService:
         )
 
         try:
-            response = self.client.chat.completions.create(
+            response = openai_request(
+                "ghost_suggestion",
+                self.client.chat.completions.create,
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -143,6 +171,33 @@ class SuggestionService:
             print(f"Enhanced Suggestion Error: {e}")
             return ""
     
+    def _get_relevant_scenes(self, project_id: str, context_text: str) -> list[str]:
+        """
+        Retrieve scenes for the recent context, reusing results within a typing burst.
+
+        Keystrokes that leave the sentence-anchored retrieval window unchanged
+        hit the cache and skip both the embedding call and the vector search.
+        """
+        query_text = retrieval_window(context_text)
+        key = (project_id, query_text)
+        cached = self._scene_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        try:
+            rag_chunks = self.rag_service.retrieve_relevant_chunks(
+                project_id=project_id,
+                query_text=query_text,
+                top_k=3,
+                threshold=0.3
+            )
+        except Exception:
+            return []
+
+        scenes = [chunk["content"] for chunk in rag_chunks if chunk.get("content")]
+        self._scene_cache[key] = scenes
+        return list(scenes)
+
     def _get_pov_instructions(self, target_pov: str) -> str:
         """Generate specific POV instructions based on the target POV."""
         pov_lower = target_pov.lower()
@@ -0,0 +1,113 @@
+"""
+Property-based tests for throttle-aware character summary scheduling.
+
+Feature: summary-schedule, Property: Throttled Characters Never Reach the Database
+Validates: eligibility follows the throttle window and mention counts accumulate
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.character_summary import SummarySchedule, batch_update_character_summaries
+
+
+names = st.sampled_from(["Ann", "Bo", "Cy", "Di"])
+
+
+@given(
+    updated=st.lists(names, unique=True),
+    elapsed=st.floats(min_value=0, max_value=1200),
+)
+@settings(max_examples=100, deadline=None)
+def test_eligibility_follows_throttle_window(updated, elapsed):
+    schedule = SummarySchedule(throttle_seconds=600)
+    for name in updated:
+        schedule.mark_updated("p1", name, now=1000.0)
+
+    eligible = schedule.eligible("p1", ["Ann", "Bo", "Cy", "Di"], now=1000.0 + elapsed)
+
+    for name in ["Ann", "Bo", "Cy", "Di"]:
+        expected = name not in updated or elapsed >= 600
+        assert (name in eligible) == expected
+
+
+@given(analyses=st.lists(st.dictionaries(names, st.integers(min_value=1, max_value=9)), max_size=8))
+@settings(max_examples=100, deadline=None)
+def test_mention_counts_accumulate(analyses):
+    schedule = SummarySchedule(throttle_seconds=600)
+    for counts in analyses:
+        schedule.record_mentions("p1", counts)
+
+    totals = schedule.mention_counts("p1")
+    for name in ["Ann", "Bo", "Cy", "Di"]:
+        assert totals.get(name, 0) == sum(c.get(name, 0) for c in analyses)
+
+
+@given(mentioned=st.lists(st.text(min_size=1, max_size=8), min_size=1, max_size=60))
+@settings(max_examples=50, deadline=None)
+def test_per_project_entries_are_bounded(mentioned):
+    schedule = SummarySchedule(throttle_seconds=600, max_characters=10)
+    for name in mentioned:
+        schedule.record_mentions("p1", {name: 1})
+        schedule.mark_updated("p1", name, now=1000.0)
+
+    totals = schedule.mention_counts("p1")
+    assert len(totals) == min(10, len(set(mentioned)))
+    # The most recently mentioned character is never the one evicted
+    assert mentioned[-1] in totals
+    assert schedule.eligible("p1", [mentioned[-1]], now=1000.0) == []
+
+
+def test_seed_from_metadata_timestamp():
+    schedule = SummarySchedule(throttle_seconds=600)
+    last = datetime.now(timezone.utc) - timedelta(seconds=60)
+    schedule.seed("p1", "Ann", last.isoformat())
+    schedule.seed("p1", "Bo", "not a date")
+
+    assert schedule.eligible("p1", ["Ann", "Bo"]) == ["Bo"]
+    assert schedule.eligible("p1", ["Ann"], now=last.timestamp() + 601) == ["Ann"]
+
+
+def test_throttled_characters_skip_entity_query():
+    schedule = SummarySchedule(throttle_seconds=600)
+    schedule.mark_updated("p1", "Ann")
+    supabase = MagicMock()
+
+    with patch("services.character_summary.get_summary_schedule", return_value=schedule):
+        result = asyncio.run(
+            batch_update_character_summaries("p1", ["Ann"], {"Ann": 3}, supabase_client=supabase)
+        )
+
+    assert result == []
+    supabase.table.assert_not_called()
+    assert schedule.mention_counts("p1") == {"Ann": 3}
+
+
+def test_throttled_metadata_seeds_schedule():
+    schedule = SummarySchedule(throttle_seconds=600)
+    recent = datetime.now(timezone.utc).isoformat()
+    supabase = MagicMock()
+    query = supabase.table.return_value.select.return_value.eq.return_value.eq.return_value
+    query.in_.return_value.execute.return_value = SimpleNamespace(
+        data=[{"id": "e1", "name": "Ann", "metadata": {"last_summary_update": recent}}]
+    )
+
+    with patch("services.character_summary.get_summary_schedule", return_value=schedule):
+        asyncio.run(batch_update_character_summaries("p1", ["Ann"], supabase_client=supabase))
+        asyncio.run(batch_update_character_summaries("p1", ["Ann"], supabase_client=supabase))
+
+    assert supabase.table.call_count == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
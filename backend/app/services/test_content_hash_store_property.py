@@ -0,0 +1,154 @@
+"""
+Property-based tests for the in-memory content hash store.
+
+Feature: content-hash-store, Property: New Saves Are Accepted Without a Query
+Validates: exact membership, incremental refresh on miss, local inserts recorded,
+hits confirmed with one lookup so deleted chunks are not duplicates
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+from hypothesis import given, strategies as st, settings
+import pytest
+
+import lib.content_hashes as content_hashes
+from lib.content_hashes import ContentHashStore, compute_content_hash
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+        self.filters = []
+        self.row_limit = None
+
+    def select(self, *columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def execute(self):
+        self.db.queries += 1
+        rows = sorted(
+            (r for r in self.db.rows if all(f(r) for f in self.filters)),
+            key=lambda r: r["chunk_index"],
+        )
+        return SimpleNamespace(data=rows[: self.row_limit])
+
+
+class FakeSupabase:
+    def __init__(self, contents=(), project_id="p1"):
+        self.queries = 0
+        self.rows = []
+        for content in contents:
+            self.save(content, project_id)
+
+    def save(self, content, project_id="p1"):
+        self.rows.append(
+            {
+                "project_id": project_id,
+                "content_hash": compute_content_hash(content),
+                "chunk_index": len(self.rows) + 1,
+            }
+        )
+        return self.rows[-1]["chunk_index"]
+
+    def table(self, name):
+        assert name == "narrative_chunks"
+        return FakeQuery(self)
+
+
+texts = st.text(alphabet="abc .", max_size=8)
+
+
+@given(saved=st.lists(texts, max_size=30), probes=st.lists(texts, max_size=20))
+@settings(max_examples=100, deadline=None)
+def test_membership_matches_the_table(saved, probes):
+    db = FakeSupabase(saved)
+    store = ContentHashStore(refresh_seconds=3600)
+
+    for text in probes + saved:
+        assert store.contains("p1", compute_content_hash(text), db) == (text in saved)
+        assert not store.contains("p2", compute_content_hash(text), db)
+
+
+def test_new_content_needs_no_query_after_the_first_load():
+    db = FakeSupabase(["one", "two"])
+    store = ContentHashStore(refresh_seconds=3600)
+
+    assert not store.contains("p1", compute_content_hash("zero"), db)
+    loaded = db.queries
+    for text in ["three", "four", "five"]:
+        assert not store.contains("p1", compute_content_hash(text), db)
+    assert db.queries == loaded
+
+    # A duplicate costs one lookup, never a reload
+    for _ in range(5):
+        assert store.contains("p1", compute_content_hash("two"), db)
+    assert db.queries == loaded + 5
+
+
+@given(saved=st.lists(texts, min_size=1, max_size=20, unique=True), data=st.data())
+@settings(max_examples=100, deadline=None)
+def test_deleted_chunks_are_not_duplicates(saved, data):
+    db = FakeSupabase(saved)
+    store = ContentHashStore(refresh_seconds=3600)
+    for text in saved:
+        assert store.contains("p1", compute_content_hash(text), db)
+
+    deleted = data.draw(st.sets(st.sampled_from(saved)))
+    db.rows = [r for r in db.rows if r["content_hash"] not in {compute_content_hash(t) for t in deleted}]
+
+    for text in saved:
+        assert store.contains("p1", compute_content_hash(text), db) == (text not in deleted)
+    # Re-entered after the delete: saved again, then a duplicate as usual
+    for text in deleted:
+        store.add("p1", compute_content_hash(text), db.save(text))
+        assert store.contains("p1", compute_content_hash(text), db)
+
+
+def test_misses_refresh_incrementally_and_local_saves_are_recorded(monkeypatch):
+    monkeypatch.setattr(content_hashes, "LOAD_PAGE_SIZE", 2)
+    db = FakeSupabase(["a", "b", "c"])
+    store = ContentHashStore(refresh_seconds=0)
+
+    assert not store.contains("p1", compute_content_hash("d"), db)
+    index = db.save("d")
+    store.add("p1", compute_content_hash("d"), index)
+    before = db.queries
+    assert store.contains("p1", compute_content_hash("d"), db)
+    # Confirmed with one lookup, without refreshing the set
+    assert db.queries == before + 1
+
+    db.save("e")  # saved by another worker
+    assert store.contains("p1", compute_content_hash("e"), db)
+
+    store.invalidate("p1")
+    store.add("p1", compute_content_hash("f"))  # not loaded: ignored
+    assert not store.contains("p1", compute_content_hash("f"), db)
+
+
+def test_hash_format_matches_stored_hashes():
+    assert compute_content_hash("x") == "2d711642b726b044"
+    assert len(compute_content_hash("")) == 16
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
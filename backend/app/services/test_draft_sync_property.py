@@ -0,0 +1,173 @@
+"""
+Property-based tests for delta autosave.
+
+Feature: draft-sync, Property: Ops Reconstruct the Client's Draft Exactly
+Validates: op application, changed-region bounds, version and checksum checks
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from lib.content_hashes import compute_content_hash
+from lib.draft_sync import (
+    RESYNC_CHECKSUM_MISMATCH,
+    RESYNC_INVALID_OP,
+    RESYNC_UNKNOWN_BASE,
+    RESYNC_VERSION_MISMATCH,
+    DraftSyncError,
+    DraftSyncStore,
+    apply_ops,
+)
+
+
+def diff_ops(base, new):
+    """Same edit the frontend sends (frontend/lib/draftSync.js diffOps)."""
+    prefix = 0
+    while prefix < min(len(base), len(new)) and base[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < min(len(base), len(new)) - prefix
+        and base[len(base) - 1 - suffix] == new[len(new) - 1 - suffix]
+    ):
+        suffix += 1
+    ops = []
+    if len(base) - prefix - suffix:
+        ops.append({"op": "delete", "pos": prefix, "len": len(base) - prefix - suffix})
+    if new[prefix:len(new) - suffix]:
+        ops.append({"op": "insert", "pos": prefix, "text": new[prefix:len(new) - suffix]})
+    return ops
+
+
+drafts = st.text(alphabet="ab \n.é😀", max_size=40)
+
+
+@st.composite
+def edit_scripts(draw):
+    """A draft, arbitrary insert/delete ops against it, and the text they produce."""
+    base = text = draw(drafts)
+    ops = []
+    for _ in range(draw(st.integers(min_value=0, max_value=6))):
+        pos = draw(st.integers(min_value=0, max_value=len(text)))
+        if draw(st.booleans()):
+            inserted = draw(drafts)
+            ops.append({"op": "insert", "pos": pos, "text": inserted})
+            text = text[:pos] + inserted + text[pos:]
+        else:
+            size = draw(st.integers(min_value=0, max_value=len(text) - pos))
+            ops.append({"op": "delete", "pos": pos, "len": size})
+            text = text[:pos] + text[pos + size:]
+    return base, ops, text
+
+
+@given(script=edit_scripts())
+@settings(max_examples=200, deadline=None)
+def test_region_covers_everything_that_differs(script):
+    base, ops, expected = script
+
+    text, start, end = apply_ops(base, ops)
+
+    assert text == expected
+    assert 0 <= start <= end <= len(text)
+    # Outside the region, the new text is an unchanged prefix and suffix of the base
+    assert base.startswith(text[:start])
+    assert base.endswith(text[end:])
+    assert start + len(text) - end <= len(base)
+
+
+@given(versions=st.lists(drafts, min_size=2, max_size=8))
+@settings(max_examples=100, deadline=None)
+def test_diff_ops_reconstruct_every_version(versions):
+    store = DraftSyncStore()
+    delta = store.receive("s1", "p1", content=versions[0])
+    for previous, new in zip(versions, versions[1:]):
+        delta = store.receive(
+            "s1",
+            "p1",
+            base_version=delta.version,
+            ops=diff_ops(previous, new),
+            checksum=compute_content_hash(new),
+        )
+        assert delta.text == new
+        assert delta.changed == (new != previous)
+        assert delta.changed_text in new
+    assert delta.version == len(versions)
+
+
+def test_changed_text_is_the_edited_paragraph():
+    store = DraftSyncStore()
+    base = "Mara left.\nThe rain fell.\nBo stayed."
+    v1 = store.reset("s1", "p1", base)
+    new = "Mara left.\nThe cold rain fell.\nBo stayed."
+
+    delta = store.apply("s1", "p1", v1.version, diff_ops(base, new), compute_content_hash(new))
+
+    assert delta.version == 2
+    assert delta.changed_text == "The cold rain fell."
+
+    same = store.apply("s1", "p1", 2, [], compute_content_hash(new))
+    assert not same.changed and same.changed_text == ""
+
+
+@given(versions=st.lists(drafts, min_size=3, max_size=8))
+@settings(max_examples=100, deadline=None)
+def test_deltas_sent_before_the_previous_ack_still_apply(versions):
+    """Every save after the first is diffed against the first ack, as when all are in flight."""
+    store = DraftSyncStore(history=len(versions))
+    acked = store.receive("s1", "p1", content=versions[0])
+    for i, new in enumerate(versions[1:], start=2):
+        delta = store.apply(
+            "s1", "p1", acked.version, diff_ops(versions[0], new), compute_content_hash(new)
+        )
+        assert delta.version == i
+        assert delta.text == new
+        assert delta.changed == (new != versions[i - 2])
+
+
+def test_bases_older_than_the_history_need_a_resync():
+    store = DraftSyncStore(history=2)
+    for text in ["a", "ab", "abc"]:
+        store.reset("s1", "p1", text)
+
+    with pytest.raises(DraftSyncError) as exc:
+        store.apply("s1", "p1", 1, [], compute_content_hash("a"))
+    assert exc.value.reason == RESYNC_VERSION_MISMATCH
+
+    delta = store.apply("s1", "p1", 2, [{"op": "insert", "pos": 2, "text": "d"}], compute_content_hash("abd"))
+    assert (delta.version, delta.text) == (4, "abd")
+
+
+def test_rejected_deltas_leave_the_draft_unchanged():
+    store = DraftSyncStore()
+    store.reset("s1", "p1", "abc")
+    good = [{"op": "insert", "pos": 3, "text": "d"}]
+
+    cases = [
+        (("s2", "p1", 1, good, compute_content_hash("abcd")), RESYNC_UNKNOWN_BASE),
+        (("s1", "p1", 7, good, compute_content_hash("abcd")), RESYNC_VERSION_MISMATCH),
+        (("s1", "p1", 1, good, compute_content_hash("abcx")), RESYNC_CHECKSUM_MISMATCH),
+        (("s1", "p1", 1, [{"op": "delete", "pos": 2, "len": 5}], "x"), RESYNC_INVALID_OP),
+        (("s1", "p1", 1, [{"op": "move", "pos": 0}], "x"), RESYNC_INVALID_OP),
+    ]
+    for args, reason in cases:
+        with pytest.raises(DraftSyncError) as exc:
+            store.apply(*args)
+        assert exc.value.reason == reason
+
+    assert store.apply("s1", "p1", 1, good, compute_content_hash("abcd")).text == "abcd"
+
+    store.drop_session("s1")
+    with pytest.raises(DraftSyncError):
+        store.apply("s1", "p1", 2, [], compute_content_hash("abcd"))
+    with pytest.raises(ValueError):
+        store.receive("s1", "p1")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
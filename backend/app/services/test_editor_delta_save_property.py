@@ -0,0 +1,115 @@
+"""
+Property-based tests for delta autosaves through the editor route.
+
+Feature: draft-delta-save, Property: A Delta Save Stores the Same Chunk as a Full Save
+Validates: /editor/save with ops persists the whole draft (content, embedding,
+content hash) exactly as a full-content save would, while NER runs only on
+the changed paragraph
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+import itertools
+from unittest.mock import MagicMock, patch
+from hypothesis import given, strategies as st, settings
+import pytest
+
+# routes.editor imports services.extraction, which imports spaCy at module level
+pytest.importorskip("spacy")
+
+from lib.content_hashes import compute_content_hash
+from lib.draft_sync import DraftSyncStore
+from services.extraction import ExtractionResult, ExtractionStore
+from routes.editor import SaveRequest, save_draft
+
+session_ids = itertools.count()
+
+
+def normalize(text):
+    """Stands in for coreference resolution, which only sees the analyzed text."""
+    return text.replace("a", "A")
+
+
+class Recorder:
+    """Captures what the auto-save path analyzes and persists."""
+
+    def __init__(self):
+        self.analyzed = []
+        self.chunks = []
+
+    def run_pipeline(self, text, nlp, extract_triples=True):
+        self.analyzed.append(text)
+        return ExtractionResult(normalized_text=normalize(text), entities=[], triples=[])
+
+    def insert_chunk(self, store, content, embedding=None, content_hash=None):
+        self.chunks.append((content, embedding, content_hash))
+        return {"id": f"c{len(self.chunks)}", "chunk_index": len(self.chunks)}
+
+
+def run_saves(requests, drafts):
+    recorder = Recorder()
+    hashes = MagicMock()
+    hashes.contains.return_value = False
+    with patch("routes.editor.get_draft_sync_store", return_value=drafts), patch(
+        "services.analysis_orchestrator.get_content_hash_store", return_value=hashes
+    ), patch("services.analysis_orchestrator.get_kg_cache"), patch(
+        "services.analysis_orchestrator.get_cached_nlp_pipeline"
+    ), patch(
+        "services.analysis_orchestrator.run_core_nlp_pipeline", side_effect=recorder.run_pipeline
+    ), patch(
+        "services.analysis_orchestrator.get_embedding", side_effect=lambda text: [float(len(text))]
+    ), patch.object(
+        ExtractionStore, "insert_narrative_chunk", autospec=True, side_effect=recorder.insert_chunk
+    ), patch.object(ExtractionStore, "upsert_entities", autospec=True):
+        responses = [asyncio.run(save_draft(request)) for request in requests]
+    return recorder, responses
+
+
+paragraph = st.text(alphabet="abcdefgh ", min_size=1, max_size=20).map(lambda s: s.strip() + ".")
+
+
+@given(
+    paragraphs=st.lists(paragraph, min_size=1, max_size=6),
+    data=st.data(),
+)
+@settings(max_examples=60, deadline=None)
+def test_delta_save_stores_the_same_chunk_as_a_full_save(paragraphs, data):
+    edited = data.draw(st.integers(min_value=0, max_value=len(paragraphs) - 1))
+    replacement = data.draw(paragraph.filter(lambda p: p != paragraphs[edited]))
+    before = "\n".join(paragraphs)
+    after = "\n".join(paragraphs[:edited] + [replacement] + paragraphs[edited + 1:])
+    pos = sum(len(p) + 1 for p in paragraphs[:edited])
+
+    full, _ = run_saves([SaveRequest(project_id="p1", content=after)], DraftSyncStore())
+
+    session_id = f"tab-{next(session_ids)}"
+    delta, responses = run_saves(
+        [
+            SaveRequest(project_id="p1", content=before, session_id=session_id),
+            SaveRequest(
+                project_id="p1",
+                session_id=session_id,
+                base_version=1,
+                ops=[
+                    {"op": "delete", "pos": pos, "len": len(paragraphs[edited])},
+                    {"op": "insert", "pos": pos, "text": replacement},
+                ],
+                checksum=compute_content_hash(after),
+            ),
+        ],
+        DraftSyncStore(),
+    )
+
+    assert responses[-1]["version"] == 2
+    assert delta.chunks[-1] == full.chunks[-1] == (after, [float(len(after))], compute_content_hash(after))
+    # Only the changed paragraph is analyzed on the delta save
+    assert delta.analyzed[-1] == replacement
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,136 @@
+"""
+Property-based tests for the extraction pipeline profiles.
+
+Feature: extraction-profiles, Property: Auto-Save Runs NER Only, Full Profile Unchanged
+Validates: the "ner" profile with extract_triples=False skips the parser
+components and yields no triples; the "full" profile still parses and
+extracts triples
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+from unittest.mock import patch
+from hypothesis import given, strategies as st, settings
+import pytest
+
+# services.extraction imports spaCy at module level
+pytest.importorskip("spacy")
+
+from lib.nlp_registry import NLPModelRegistry
+from services import extraction
+
+COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+PARSER_COMPONENTS = {"tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"}
+
+
+class FakeDoc(list):
+    """A doc is the list of components run on it, plus its text and entities."""
+
+    def __init__(self, text, components=()):
+        super().__init__(components)
+        self.text = text
+        self.ents = []
+
+
+class FakeComponent:
+    def __init__(self, name, listeners=()):
+        self.name = name
+        if listeners:
+            self.listening_components = list(listeners)
+
+    def __call__(self, doc):
+        out = FakeDoc(doc.text, list(doc) + [self.name])
+        out.ents = list(doc.ents)
+        if self.name == "ner":
+            out.ents.append(SimpleNamespace(text=doc.text.split()[0], label_="PERSON"))
+        return out
+
+
+class FakeLanguage:
+    """Stands in for spacy.Language with the en_core_web_sm component layout."""
+
+    def __init__(self):
+        self.pipeline = [
+            (name, FakeComponent(name, ["tagger", "parser"] if name == "tok2vec" else ()))
+            for name in COMPONENTS
+        ]
+
+    @property
+    def pipe_names(self):
+        return [name for name, _ in self.pipeline]
+
+    def make_doc(self, text):
+        return FakeDoc(text)
+
+    def __call__(self, text, disable=()):
+        doc = self.make_doc(text)
+        for name, proc in self.pipeline:
+            if name not in disable:
+                doc = proc(doc)
+        return doc
+
+    def pipe(self, texts, batch_size=None, n_process=1, as_tuples=False, disable=()):
+        return (self(text, disable=disable) for text in texts)
+
+
+def fake_svo_triples(doc):
+    """One triple per parsed doc, naming the components that produced it."""
+    assert "parser" in doc, "triples need a parsed doc"
+    return [extraction.SVOTriple("|".join(doc), "ran", doc.text, doc.text)]
+
+
+def run_profile(texts, profile, extract_triples):
+    registry = NLPModelRegistry(loader=lambda name: FakeLanguage())
+    with patch.object(extraction, "get_nlp_registry", return_value=registry), patch.object(
+        extraction, "extract_svo_triples", side_effect=fake_svo_triples
+    ) as svo:
+        nlp = extraction.get_cached_nlp_pipeline(profile=profile)
+        single = extraction.run_core_nlp_pipeline(texts[0], nlp, extract_triples=extract_triples)
+        batched = list(
+            extraction.iter_core_nlp_pipeline(texts, nlp, extract_triples=extract_triples)
+        )
+    return nlp, single, batched, svo.call_count
+
+
+texts_strategy = st.lists(
+    st.from_regex(r"[A-Z][a-z]{1,8}( [a-z]{1,8}){0,6}\.", fullmatch=True),
+    min_size=1,
+    max_size=5,
+)
+
+
+@given(texts=texts_strategy)
+@settings(max_examples=50, deadline=None)
+def test_auto_save_profile_runs_ner_only_and_returns_no_triples(texts):
+    nlp, single, batched, svo_calls = run_profile(texts, "ner", extract_triples=False)
+
+    assert nlp.pipe_names == ["ner"]
+    assert PARSER_COMPONENTS <= set(nlp.disabled)
+    assert svo_calls == 0
+    for text, result in zip(texts[:1] + texts, [single] + batched):
+        assert result.triples == []
+        assert result.normalized_text == text
+        assert result.entities == [{"text": text.split()[0], "label": "PERSON"}]
+
+
+@given(texts=texts_strategy)
+@settings(max_examples=50, deadline=None)
+def test_full_profile_still_parses_and_extracts_triples(texts):
+    nlp, single, batched, svo_calls = run_profile(texts, "full", extract_triples=True)
+
+    assert isinstance(nlp, FakeLanguage)
+    assert svo_calls == len(texts) + 1
+    for text, result in zip(texts[:1] + texts, [single] + batched):
+        (triple,) = result.triples
+        assert triple.subject == "|".join(COMPONENTS)
+        assert triple.object == text
+        assert result.entities == [{"text": text.split()[0], "label": "PERSON"}]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,258 @@
+"""
+Property-based tests for the durable background job queue.
+
+Feature: job-queue, Property: Priority, Dedup, Retry and Concurrency Limits
+Validates: jobs run once in priority order, dedup keys merge (also on retry), failures retry with backoff,
+    leases are renewed while a handler runs and lost workers' jobs stop after max_attempts
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.character_summary import merge_summary_payloads
+from services.job_queue import JobQueue, JobStore
+
+
+def make_queue(**kwargs) -> JobQueue:
+    return JobQueue(JobStore(":memory:"), **kwargs)
+
+
+@given(priorities=st.lists(st.integers(min_value=-5, max_value=5), min_size=1, max_size=15))
+@settings(max_examples=50, deadline=None)
+def test_jobs_run_once_in_priority_order(priorities):
+    queue = make_queue()
+    ran = []
+    queue.register("work", lambda payload: ran.append(payload["n"]), queue="q")
+    for n, priority in enumerate(priorities):
+        queue.enqueue("work", {"n": n}, priority=priority)
+
+    async def drain():
+        while await queue.run_once("q"):
+            pass
+
+    asyncio.run(drain())
+
+    expected = sorted(range(len(priorities)), key=lambda n: (-priorities[n], n))
+    assert ran == expected
+    assert queue.stats() == {"q": {"succeeded": len(priorities)}}
+
+
+summary_payloads = st.fixed_dictionaries({
+    "project_id": st.just("p1"),
+    "character_names": st.lists(st.sampled_from(["Ann", "Bo", "Cy"]), unique=True),
+    "mention_counts": st.dictionaries(
+        st.sampled_from(["Ann", "Bo", "Cy"]), st.integers(min_value=1, max_value=5)
+    ),
+})
+
+
+@given(payloads=st.lists(summary_payloads, min_size=1, max_size=6))
+@settings(max_examples=50, deadline=None)
+def test_dedup_key_keeps_one_pending_job(payloads):
+    queue = make_queue()
+    queue.register(
+        "character_summaries", lambda payload: None, queue="summaries",
+        merge=merge_summary_payloads,
+    )
+    ids = {
+        queue.enqueue("character_summaries", p, dedup_key="character_summaries:p1")["id"]
+        for p in payloads
+    }
+
+    assert len(ids) == 1
+    job = queue.get(ids.pop())
+    names = job["payload"]["character_names"]
+    assert len(names) == len(set(names))
+    assert set(names) == {n for p in payloads for n in p["character_names"]}
+    for name in {n for p in payloads for n in p["mention_counts"]}:
+        assert job["payload"]["mention_counts"][name] == sum(
+            p["mention_counts"].get(name, 0) for p in payloads
+        )
+
+
+@given(first=summary_payloads, second=summary_payloads, released=st.booleans())
+@settings(max_examples=50, deadline=None)
+def test_requeue_folds_into_a_pending_duplicate(first, second, released):
+    """A job failing or interrupted while its dedup key has a newer pending job."""
+    store = JobStore(":memory:")
+    key = "character_summaries:p1"
+    running = store.enqueue("character_summaries", "summaries", first, dedup_key=key)
+    assert store.claim("summaries", lease_seconds=60)["id"] == running["id"]
+    pending = store.enqueue(
+        "character_summaries", "summaries", second, dedup_key=key, merge=merge_summary_payloads
+    )
+    assert pending["id"] != running["id"]
+
+    if released:
+        store.release(running["id"], merge=merge_summary_payloads)
+    else:
+        store.fail(running["id"], "boom", retry_in=5, merge=merge_summary_payloads)
+
+    old, new = store.get(running["id"]), store.get(pending["id"])
+    assert old["status"] == "superseded"
+    assert old["result"] == {"superseded_by": pending["id"]}
+    assert new["status"] == "pending"
+    assert new["payload"] == merge_summary_payloads(first, second)
+    if not released:
+        assert old["error"] == "boom"
+        assert new["run_at"] >= old["updated_at"] + 5
+    assert store.stats() == {"summaries": {"pending": 1, "superseded": 1}}
+
+
+def test_retry_without_a_pending_duplicate_is_requeued():
+    store = JobStore(":memory:")
+    job = store.enqueue("work", "q", {"n": 1}, dedup_key="work:1")
+    store.claim("q", lease_seconds=60)
+    store.fail(job["id"], "boom", retry_in=0)
+
+    assert store.get(job["id"])["status"] == "pending"
+    assert store.enqueue("work", "q", {"n": 2}, dedup_key="work:1")["id"] == job["id"]
+
+
+def test_failed_job_retries_with_backoff_then_fails():
+    queue = make_queue(backoff_base=0.0)
+    calls = []
+
+    def flaky(payload):
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    queue.register("flaky", flaky, queue="q", max_attempts=3)
+    job_id = queue.enqueue("flaky", {})["id"]
+
+    async def drain():
+        while await queue.run_once("q"):
+            pass
+
+    asyncio.run(drain())
+
+    job = queue.get(job_id)
+    assert len(calls) == 3
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+    assert [make_queue(backoff_base=5, backoff_max=30).backoff(n) for n in (1, 2, 3, 4, 5)] == [
+        5, 10, 20, 30, 30
+    ]
+
+
+def test_concurrency_limit_per_queue():
+    async def scenario():
+        queue = make_queue(concurrency={"q": 2}, poll_interval=0.01)
+        running = 0
+        peak = 0
+        done = asyncio.Event()
+        finished = 0
+
+        async def work(payload):
+            nonlocal running, peak, finished
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            finished += 1
+            if finished == 6:
+                done.set()
+
+        queue.register("work", work, queue="q")
+        await queue.start()
+        for n in range(6):
+            queue.enqueue("work", {"n": n})
+        await asyncio.wait_for(done.wait(), timeout=5)
+        await queue.stop()
+        return peak
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_jobs_survive_restart_and_interrupted_jobs_are_released():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "jobs.db"
+
+        async def interrupted():
+            queue = JobQueue(JobStore(path), poll_interval=0.01)
+            started = asyncio.Event()
+
+            async def slow(payload):
+                started.set()
+                await asyncio.sleep(10)
+
+            queue.register("slow", slow, queue="q")
+            await queue.start()
+            job_id = queue.enqueue("slow", {})["id"]
+            await asyncio.wait_for(started.wait(), timeout=5)
+            await queue.stop()
+            return job_id
+
+        job_id = asyncio.run(interrupted())
+
+        restarted = JobQueue(JobStore(path))
+        restarted.register("slow", lambda payload: "done", queue="q")
+        job = restarted.get(job_id)
+        assert job["status"] == "pending" and job["attempts"] == 0
+
+        asyncio.run(restarted.run_once("q"))
+        assert restarted.get(job_id)["result"] == "done"
+
+
+@given(max_attempts=st.integers(min_value=1, max_value=4))
+@settings(max_examples=20, deadline=None)
+def test_lost_workers_jobs_are_retried_until_attempts_run_out(max_attempts):
+    store = JobStore(":memory:")
+    job = store.enqueue("work", "q", {}, max_attempts=max_attempts)
+
+    claims = 0
+    while store.claim("q", lease_seconds=-1) is not None:  # the worker dies at once
+        claims += 1
+        assert claims <= max_attempts
+
+    stored = store.get(job["id"])
+    assert claims == max_attempts
+    assert stored["status"] == "failed"
+    assert "lease expired" in stored["error"]
+    assert stored["locked_until"] is None
+
+
+def test_running_handler_keeps_its_lease():
+    queue = make_queue(lease_seconds=0.3)
+    stolen = []
+
+    def slow(payload):
+        time.sleep(0.8)
+        stolen.append(queue.store.claim("q", lease_seconds=0.3))
+        return "done"
+
+    queue.register("slow", slow, queue="q")
+    job_id = queue.enqueue("slow", {})["id"]
+
+    assert asyncio.run(queue.run_once("q"))
+    job = queue.get(job_id)
+    assert stolen == [None]
+    assert job["status"] == "succeeded" and job["attempts"] == 1
+
+
+def test_enqueue_async_runs_off_the_event_loop():
+    queue = make_queue()
+    queue.register("work", lambda payload: payload["n"], queue="q")
+
+    async def scenario():
+        first = await queue.enqueue_async("work", {"n": 1}, dedup_key="work")
+        second = await queue.enqueue_async("work", {"n": 2}, dedup_key="work")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["id"] == second["id"]
+    assert asyncio.run(queue.run_once("q"))
+    assert queue.get(first["id"])["result"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
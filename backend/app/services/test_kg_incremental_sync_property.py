@@ -0,0 +1,171 @@
+"""
+Property-based tests for incremental knowledge graph sync.
+
+Feature: kg-incremental-sync, Property: Delta Sync Equals Full Load
+Validates: a synced graph matches a fresh load after appends and edits, and deletions force a full reload
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.analysis import StoryKnowledgeGraph
+
+
+class FakeQuery:
+    """Minimal stand-in for the PostgREST builder calls used by the graph."""
+
+    def __init__(self, db: "FakeSupabase", table: str) -> None:
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.head = False
+
+    def select(self, *columns, count=None, head=None):
+        self.head = bool(head)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row.get(column) >= value)
+        return self
+
+    def execute(self):
+        self.db.calls.append(self.table)
+        rows = [r for r in self.db.tables[self.table] if all(f(r) for f in self.filters)]
+        return SimpleNamespace(data=[] if self.head else [dict(r) for r in rows], count=len(rows))
+
+
+class FakeSupabase:
+    def __init__(self) -> None:
+        self.tables = {"entities": [], "relationships": []}
+        self.calls = []
+        self.clock = 0
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def _stamp(self) -> str:
+        self.clock += 1
+        return f"2026-01-01T00:00:{self.clock:02d}+00:00"
+
+    def add_entity(self, name):
+        entity_id = f"e-{name}"
+        if not any(r["id"] == entity_id for r in self.tables["entities"]):
+            self.tables["entities"].append(
+                {"id": entity_id, "project_id": "p1", "name": name,
+                 "entity_type": "CHARACTER", "updated_at": self._stamp()}
+            )
+        return entity_id
+
+    def add_relationship(self, subject, relation, obj):
+        a, b = self.add_entity(subject), self.add_entity(obj)
+        self.tables["relationships"].append(
+            {"id": f"r-{len(self.tables['relationships'])}", "project_id": "p1",
+             "entity_a_id": a, "entity_b_id": b, "relation_type": relation,
+             "description": None, "updated_at": self._stamp()}
+        )
+
+    def update_relationship(self, index, subject, relation, obj):
+        a, b = self.add_entity(subject), self.add_entity(obj)
+        self.tables["relationships"][index].update(
+            entity_a_id=a, entity_b_id=b, relation_type=relation, updated_at=self._stamp()
+        )
+
+    def rename_entity(self, old, new):
+        for row in self.tables["entities"]:
+            if row["name"] == old:
+                row.update(name=new, updated_at=self._stamp())
+
+
+names = st.sampled_from(["Ann", "Bo", "Cy", "Di", "Ed"])
+relations = st.sampled_from(["KNOWS", "HAS", "LOVES"])
+facts = st.tuples(names, relations, names)
+
+
+def edge_set(kg):
+    return sorted((u, v, d["relation"]) for u, v, d in kg.graph.edges(data=True))
+
+
+@given(
+    before=st.lists(facts, min_size=0, max_size=6),
+    after=st.lists(facts, min_size=0, max_size=6),
+)
+@settings(max_examples=100, deadline=None)
+def test_delta_sync_matches_full_load(before, after):
+    db = FakeSupabase()
+    for fact in before:
+        db.add_relationship(*fact)
+
+    kg = StoryKnowledgeGraph.from_supabase("p1", supabase_client=db)
+
+    for fact in after:
+        db.add_relationship(*fact)
+
+    full_reload = kg.sync_from_supabase()
+    fresh = StoryKnowledgeGraph.from_supabase("p1", supabase_client=db)
+
+    assert not full_reload, "Appends alone should never force a full reload"
+    assert set(kg.graph.nodes()) == set(fresh.graph.nodes())
+    assert set(edge_set(kg)) == set(edge_set(fresh))
+
+
+@given(
+    before=st.lists(facts, min_size=1, max_size=6),
+    edits=st.lists(st.tuples(st.integers(min_value=0, max_value=5), facts), max_size=4),
+)
+@settings(max_examples=100, deadline=None)
+def test_edited_relationships_replace_their_edges(before, edits):
+    db = FakeSupabase()
+    for fact in before:
+        db.add_relationship(*fact)
+
+    kg = StoryKnowledgeGraph.from_supabase("p1", supabase_client=db)
+
+    for index, fact in edits:
+        db.update_relationship(index % len(before), *fact)
+
+    assert kg.sync_from_supabase() is False
+    fresh = StoryKnowledgeGraph.from_supabase("p1", supabase_client=db)
+    assert set(edge_set(kg)) == set(edge_set(fresh))
+
+
+def test_renamed_entity_keeps_its_edges():
+    db = FakeSupabase()
+    db.add_relationship("Ann", "KNOWS", "Bo")
+    kg = StoryKnowledgeGraph.from_supabase("p1", supabase_client=db)
+
+    db.rename_entity("Bo", "Bob")
+
+    assert kg.sync_from_supabase() is False
+    assert "Bo" not in kg.graph
+    assert edge_set(kg) == [("Ann", "Bob", "KNOWS")]
+    assert kg.entity_ids_by_name == {"Ann": "e-Ann", "Bob": "e-Bo"}
+
+
+@given(before=st.lists(facts, min_size=1, max_size=6))
+@settings(max_examples=50, deadline=None)
+def test_deletion_forces_full_reload(before):
+    db = FakeSupabase()
+    for fact in before:
+        db.add_relationship(*fact)
+
+    kg = StoryKnowledgeGraph.from_supabase("p1", supabase_client=db)
+    db.tables["relationships"].pop()
+
+    assert kg.sync_from_supabase() is True
+    fresh = StoryKnowledgeGraph.from_supabase("p1", supabase_client=db)
+    assert edge_set(kg) == edge_set(fresh)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,127 @@
+"""
+Property-based tests for cross-worker KG cache coherence.
+
+Feature: kg-invalidation-bus, Property: Cross-Worker Cache Coherence
+Validates: writes in one worker are applied or invalidated in every other worker
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from unittest.mock import MagicMock
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.kg_cache import KGCache
+from services.kg_invalidation import FileInvalidationBus, InProcessInvalidationBus
+from services.analysis import StoryKnowledgeGraph
+
+
+entity_names = st.text(min_size=1, max_size=20, alphabet=st.characters(
+    whitelist_categories=('Lu', 'Ll'),
+    min_codepoint=65, max_codepoint=122
+))
+
+relation_types = st.sampled_from(["KNOWS", "LOCATED", "HAS", "OWNS", "LOVES"])
+
+facts = st.tuples(entity_names, relation_types, entity_names)
+
+
+def make_kg(project_id: str) -> StoryKnowledgeGraph:
+    return StoryKnowledgeGraph(project_id=project_id, supabase_client=MagicMock())
+
+
+def has_fact(kg: StoryKnowledgeGraph, subject: str, relation: str, obj: str) -> bool:
+    if not kg.graph.has_edge(subject, obj):
+        return False
+    return any(
+        data.get("relation") == relation.upper()
+        for data in kg.graph[subject][obj].values()
+    )
+
+
+@given(written=st.lists(facts, min_size=1, max_size=8))
+@settings(max_examples=30, deadline=None)
+def test_fact_written_in_one_worker_reaches_the_other(written):
+    """
+    A fact persisted through worker A's graph must be visible in worker B's
+    cached graph on its next read, without B reloading from the database.
+    """
+    with tempfile.TemporaryDirectory() as bus_dir:
+        cache_a = KGCache(bus=FileInvalidationBus(bus_dir, origin="worker-a"))
+        cache_b = KGCache(bus=FileInvalidationBus(bus_dir, origin="worker-b"))
+
+        cache_a.set("p1", make_kg("p1"))
+        cache_b.set("p1", make_kg("p1"))
+
+        kg_a = cache_a.get("p1")
+        for subject, relation, obj in written:
+            kg_a.add_fact(subject, relation, obj, persist=True)
+        cache_a.set("p1", kg_a)
+
+        kg_b = cache_b.get("p1")
+        assert kg_b is not None, "Delta should be applied, not invalidated"
+        assert kg_b.version == kg_a.version
+        for subject, relation, obj in written:
+            assert has_fact(kg_b, subject, relation, obj)
+
+
+@given(fact=facts)
+@settings(max_examples=20, deadline=None)
+def test_version_gap_invalidates(fact):
+    """
+    A worker that missed an intermediate version must drop its graph rather
+    than serve a copy that skips a write.
+    """
+    with tempfile.TemporaryDirectory() as bus_dir:
+        bus_a = FileInvalidationBus(bus_dir, origin="worker-a")
+        cache_b = KGCache(bus=FileInvalidationBus(bus_dir, origin="worker-b"))
+
+        kg_b = make_kg("p1")
+        cache_b.set("p1", kg_b)
+        assert kg_b.version == 0
+
+        bus_a.publish("p1", None)
+        bus_a.publish("p1", [(fact[0], fact[1], fact[2], None)])
+
+        assert cache_b.get("p1") is None
+
+
+def test_invalidate_broadcasts_to_other_workers():
+    with tempfile.TemporaryDirectory() as bus_dir:
+        cache_a = KGCache(bus=FileInvalidationBus(bus_dir, origin="worker-a"))
+        cache_b = KGCache(bus=FileInvalidationBus(bus_dir, origin="worker-b"))
+        cache_b.set("p1", make_kg("p1"))
+
+        cache_a.invalidate("p1")
+
+        assert cache_b.get("p1") is None
+
+
+def test_compaction_invalidates_readers():
+    with tempfile.TemporaryDirectory() as bus_dir:
+        bus_a = FileInvalidationBus(bus_dir, origin="worker-a", max_log_bytes=200)
+        bus_b = FileInvalidationBus(bus_dir, origin="worker-b")
+
+        for _ in range(10):
+            bus_a.publish("p1", [("A", "KNOWS", "B", None)])
+
+        events = bus_b.poll()
+        assert bus_b.version("p1") == 10
+        assert any(e.facts is None for e in events)
+
+
+def test_in_process_bus_versions():
+    bus = InProcessInvalidationBus()
+    assert bus.version("p1") == 0
+    assert bus.publish("p1") == 1
+    assert bus.publish("p1", [("A", "KNOWS", "B", None)]) == 2
+    assert bus.poll() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,119 @@
+"""
+Property-based tests for knowledge graph snapshots.
+
+Feature: kg-snapshots, Property: Snapshot Round Trip
+Validates: a graph restored from its snapshot is identical to the original
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from unittest.mock import Mock
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.analysis import StoryKnowledgeGraph
+from services.kg_cache import KGCache
+from services.kg_snapshot import KGSnapshotStore, dump_snapshot, load_snapshot, warm_kg_cache
+
+
+names = st.text(min_size=1, max_size=20)
+relations = st.sampled_from(["KNOWS", "LOCATED", "HAS", "OWNS", "LOVES"])
+descriptions = st.one_of(st.none(), st.text(max_size=40))
+facts = st.tuples(names, relations, names, descriptions)
+
+
+def build_kg(project_id, fact_list, version):
+    kg = StoryKnowledgeGraph(project_id=project_id, supabase_client=Mock())
+    for subject, relation, obj, description in fact_list:
+        kg.add_fact(subject, relation, obj, persist=False, description=description)
+        kg.entity_ids_by_name[subject] = f"id-{subject}"
+        kg._entity_row_ids.add(f"id-{subject}")
+    kg.add_node("Lonely", node_type="LOCATION")
+    kg.version = version
+    kg.entities_hwm = "2026-01-01T00:00:00+00:00"
+    kg._relationship_row_ids = {f"r{i}" for i in range(len(fact_list))}
+    kg._relationship_edges = {
+        f"r{i}": (subject, obj, relation) for i, (subject, relation, obj, _) in enumerate(fact_list)
+    }
+    return kg
+
+
+def snapshot_state(kg):
+    return (
+        kg.project_id,
+        kg.version,
+        kg.entities_hwm,
+        kg.relationships_hwm,
+        sorted(kg.graph.nodes(data="node_type"), key=repr),
+        sorted(
+            ((u, v, d["relation"], d["description"]) for u, v, d in kg.graph.edges(data=True)),
+            key=repr,
+        ),
+        kg.entity_ids_by_name,
+        kg._entity_row_ids,
+        kg._relationship_row_ids,
+        kg._relationship_edges,
+    )
+
+
+@given(
+    fact_list=st.lists(facts, max_size=15),
+    version=st.integers(min_value=0, max_value=2**40),
+)
+@settings(max_examples=100)
+def test_snapshot_round_trip(fact_list, version):
+    kg = build_kg("p1", fact_list, version)
+
+    restored = load_snapshot(dump_snapshot(kg))
+
+    assert snapshot_state(restored) == snapshot_state(kg)
+
+
+def test_store_warms_cache_without_serving_stale_graphs():
+    with tempfile.TemporaryDirectory() as snap_dir:
+        store = KGSnapshotStore(snap_dir)
+        store.save(build_kg("proj/1", [("Ann", "KNOWS", "Bo", None)], 3))
+        store.save(build_kg("proj-2", [], 0))
+
+        assert set(store.recent_project_ids(10)) == {"proj/1", "proj-2"}
+        restored = store.load("proj/1")
+        assert restored is not None and restored.graph.has_edge("Ann", "Bo")
+
+        cache = KGCache()
+        assert warm_kg_cache(cache, store, limit=10) == 2
+        # Retained for incremental sync, never served before syncing
+        assert cache.get("proj/1") is None
+
+
+def test_corrupt_snapshot_is_discarded():
+    with tempfile.TemporaryDirectory() as snap_dir:
+        store = KGSnapshotStore(snap_dir)
+        (Path(snap_dir) / "p1.kgsnap").write_bytes(b"garbage")
+        assert store.load("p1") is None
+        assert not (Path(snap_dir) / "p1.kgsnap").exists()
+
+
+def test_snapshot_deleted_while_listing_is_skipped(monkeypatch):
+    with tempfile.TemporaryDirectory() as snap_dir:
+        store = KGSnapshotStore(snap_dir)
+        store.save(build_kg("p1", [], 0))
+        store.save(build_kg("p2", [], 0))
+        real_stat = Path.stat
+
+        def stat(path, *args, **kwargs):
+            # p2 disappears after glob() listed it
+            if path.name == "p2.kgsnap":
+                raise FileNotFoundError(path)
+            return real_stat(path, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "stat", stat)
+        assert store.recent_project_ids(10) == ["p1"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,126 @@
+"""
+Property-based tests for latency instrumentation and the /metrics export.
+
+Feature: metrics, Property: Histogram Buckets Are Cumulative and Match the Count
+Validates: Prometheus text rendering, stage timers, OpenAI token counts, Supabase hooks
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import re
+from types import SimpleNamespace
+from hypothesis import given, strategies as st, settings
+import httpx
+import pytest
+
+from lib.metrics import (
+    OPENAI_TOKENS,
+    STAGE_ERRORS,
+    STAGE_SECONDS,
+    MetricsRegistry,
+    instrument_supabase,
+    openai_request,
+    timed,
+    timed_iter,
+)
+
+SAMPLE_RE = re.compile(r'^(\w+)(\{[^}]*\})? (\S+)$')
+
+
+@given(
+    observations=st.lists(
+        st.tuples(st.floats(min_value=0, max_value=120), st.sampled_from(["nlp", 'sup"a\\base'])),
+        max_size=50,
+    )
+)
+@settings(max_examples=100, deadline=None)
+def test_histogram_export_is_cumulative_and_consistent(observations):
+    registry = MetricsRegistry()
+    histogram = registry.histogram("t_seconds", "Test.", ("stage",), buckets=(0.1, 1.0, 10.0))
+    for value, stage in observations:
+        histogram.observe(value, stage=stage)
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP t_seconds Test.", "# TYPE t_seconds histogram"]
+    samples = [SAMPLE_RE.match(line) for line in lines[2:]]
+    assert all(samples)
+
+    for stage in {stage for _, stage in observations}:
+        values = [v for v, s in observations if s == stage]
+        label = '{stage="' + stage.replace("\\", "\\\\").replace('"', '\\"') + '"'
+        series = [m for m in samples if (m.group(2) or "").startswith(label)]
+        buckets = [int(m.group(3)) for m in series if m.group(1) == "t_seconds_bucket"]
+        assert buckets == [sum(v <= b for v in values) for b in (0.1, 1.0, 10.0)] + [len(values)]
+        (count,) = [int(m.group(3)) for m in series if m.group(1) == "t_seconds_count"]
+        (total,) = [float(m.group(3)) for m in series if m.group(1) == "t_seconds_sum"]
+        assert count == len(values) == histogram.count(stage=stage)
+        assert total == pytest.approx(sum(values))
+
+
+def test_timers_record_latency_and_errors():
+    before = STAGE_SECONDS.count(stage="test", operation="block")
+    errors = STAGE_ERRORS.value(stage="test", operation="block")
+
+    with timed("test", "block"):
+        pass
+    with pytest.raises(RuntimeError):
+        with timed("test", "block"):
+            raise RuntimeError("boom")
+
+    assert STAGE_SECONDS.count(stage="test", operation="block") == before + 2
+    assert STAGE_ERRORS.value(stage="test", operation="block") == errors + 1
+
+    items = STAGE_SECONDS.count(stage="test", operation="iter")
+    assert list(timed_iter(iter("abc"), "test", "iter")) == ["a", "b", "c"]
+    assert STAGE_SECONDS.count(stage="test", operation="iter") == items + 3
+
+
+def test_openai_request_counts_tokens():
+    usage = SimpleNamespace(prompt_tokens=12, completion_tokens=5)
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(usage=usage)
+
+    prompt = OPENAI_TOKENS.value(operation="test_chat", model="m", kind="prompt")
+    completion = OPENAI_TOKENS.value(operation="test_chat", model="m", kind="completion")
+
+    openai_request("test_chat", create, model="m", messages=[])
+    openai_request("test_chat", create, model="m", messages=[])
+
+    assert calls == [{"model": "m", "messages": []}] * 2
+    assert OPENAI_TOKENS.value(operation="test_chat", model="m", kind="prompt") == prompt + 24
+    assert OPENAI_TOKENS.value(operation="test_chat", model="m", kind="completion") == completion + 10
+
+
+def test_supabase_calls_are_timed_by_table_and_rpc():
+    def respond(request):
+        return httpx.Response(500 if "broken" in request.url.path else 200, json=[])
+
+    client = SimpleNamespace(
+        postgrest=SimpleNamespace(session=httpx.Client(transport=httpx.MockTransport(respond)))
+    )
+    instrument_supabase(client)
+    session = client.postgrest.session
+    counts = {
+        op: STAGE_SECONDS.count(stage="supabase", operation=op)
+        for op in ("narrative_chunks.select", "rpc.append_narrative_chunk", "broken.update")
+    }
+    errors = STAGE_ERRORS.value(stage="supabase", operation="broken.update")
+
+    session.get("http://db/rest/v1/narrative_chunks?select=id")
+    session.post("http://db/rest/v1/rpc/append_narrative_chunk", json={})
+    session.patch("http://db/rest/v1/broken", json={})
+
+    for op, before in counts.items():
+        assert STAGE_SECONDS.count(stage="supabase", operation=op) == before + 1
+    assert STAGE_ERRORS.value(stage="supabase", operation="broken.update") == errors + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,205 @@
+"""
+Property-based tests for appending narrative chunks.
+
+Feature: narrative-chunk-append, Property: One Append per New Content, Fallback Only When the Function Is Missing
+Validates: append_narrative_chunk inserted and duplicate rows, the PGRST202
+fallback to separate queries (cached), other RPC errors are raised
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import itertools
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from hypothesis import given, strategies as st, settings
+import pytest
+
+# services.extraction imports spaCy at module level
+pytest.importorskip("spacy")
+
+from postgrest.exceptions import APIError
+
+from lib.content_hashes import compute_content_hash
+from services import extraction
+from services.extraction import ExtractionStore
+
+
+class FakeQuery:
+    """Just the narrative_chunks builder calls made by the legacy append path."""
+
+    def __init__(self, db):
+        self.db = db
+        self.filters = []
+        self.desc = False
+        self.row_limit = None
+        self.rows_to_insert = None
+
+    def select(self, *columns, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def order(self, column, desc=False):
+        self.desc = desc
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def insert(self, row):
+        self.rows_to_insert = [row]
+        return self
+
+    def execute(self):
+        if self.rows_to_insert is not None:
+            self.db.table_calls.append("insert")
+            inserted = [{"id": f"c{next(self.db.ids)}", **row} for row in self.rows_to_insert]
+            self.db.chunks.extend(inserted)
+            return SimpleNamespace(data=inserted)
+        self.db.table_calls.append("select")
+        rows = [r for r in self.db.chunks if all(r.get(c) == v for c, v in self.filters)]
+        rows.sort(key=lambda r: r["chunk_index"], reverse=self.desc)
+        return SimpleNamespace(data=rows[: self.row_limit])
+
+
+class FakeSupabase:
+    """
+    narrative_chunks plus append_narrative_chunk as migration 006 defines it.
+
+    rpc_error, if set, is raised by every RPC call instead.
+    """
+
+    def __init__(self, rpc_error=None):
+        self.chunks = []
+        self.ids = itertools.count()
+        self.rpc_error = rpc_error
+        self.rpc_calls = 0
+        self.table_calls = []
+
+    def table(self, name):
+        assert name == "narrative_chunks"
+        return FakeQuery(self)
+
+    def rpc(self, name, params):
+        assert name == "append_narrative_chunk"
+        self.rpc_calls += 1
+        return SimpleNamespace(execute=lambda: self._append(params))
+
+    def _append(self, params):
+        if self.rpc_error is not None:
+            raise self.rpc_error
+        for row in self.chunks:
+            same_project = row["project_id"] == params["p_project_id"]
+            if same_project and row["content_hash"] == params["p_content_hash"]:
+                return SimpleNamespace(
+                    data=[{"id": row["id"], "chunk_index": row["chunk_index"], "inserted": False}]
+                )
+        next_idx = max((r["chunk_index"] for r in self.chunks), default=0) + 1
+        row = {
+            "id": f"c{next(self.ids)}",
+            "project_id": params["p_project_id"],
+            "content": params["p_content"],
+            "chunk_index": next_idx,
+            "content_hash": params["p_content_hash"],
+        }
+        self.chunks.append(row)
+        return SimpleNamespace(data=[{"id": row["id"], "chunk_index": next_idx, "inserted": True}])
+
+
+@pytest.fixture(autouse=True)
+def local_indexes():
+    """Fresh RPC flag and mocked in-process indexes for every test."""
+    with patch.object(extraction, "_append_rpc_missing", False), patch.object(
+        extraction, "get_content_hash_store"
+    ), patch.object(extraction, "get_lexical_store"), patch.object(extraction, "get_vector_store"):
+        yield
+
+
+def append_all(db, contents):
+    store = ExtractionStore("p1", supabase_client=db)
+    return [store.insert_narrative_chunk(content) for content in contents]
+
+
+contents_strategy = st.lists(
+    st.sampled_from(["Ann met Bo.", "Bo left.", "Cy waited.", "Di ran."]), min_size=1, max_size=10
+)
+
+
+def expected_results(contents):
+    """chunk_index for each new content, None for repeats."""
+    seen = {}
+    expected = []
+    for content in contents:
+        if content in seen:
+            expected.append(None)
+        else:
+            seen[content] = len(seen) + 1
+            expected.append(seen[content])
+    return expected
+
+
+@given(contents=contents_strategy)
+@settings(max_examples=60, deadline=None)
+def test_rpc_inserts_new_content_and_skips_duplicates(contents):
+    db = FakeSupabase()
+    indexes = MagicMock()
+    with patch.object(extraction, "get_lexical_store", return_value=indexes.lexical), patch.object(
+        extraction, "get_content_hash_store", return_value=indexes.hashes
+    ):
+        results = append_all(db, contents)
+
+    expected = expected_results(contents)
+    assert [r and r["chunk_index"] for r in results] == expected
+    assert all(r is None or r["id"].startswith("c") for r in results)
+    assert db.rpc_calls == len(contents)
+    assert db.table_calls == []
+    # Duplicates still record their hash; only inserted rows enter the lexical index
+    assert indexes.hashes.add.call_count == len(contents)
+    assert indexes.lexical.add_chunk.call_count == sum(1 for i in expected if i is not None)
+
+
+@given(contents=contents_strategy)
+@settings(max_examples=60, deadline=None)
+def test_missing_function_falls_back_once_and_is_remembered(contents):
+    db = FakeSupabase(rpc_error=APIError({"code": "PGRST202", "message": "Could not find the function"}))
+    with patch.object(extraction, "_append_rpc_missing", False):
+        results = append_all(db, contents)
+        assert extraction._append_rpc_missing is True
+
+    assert [r and r["chunk_index"] for r in results] == expected_results(contents)
+    assert db.rpc_calls == 1
+    assert [r["content_hash"] for r in db.chunks] == [
+        compute_content_hash(c) for c in dict.fromkeys(contents)
+    ]
+
+
+@pytest.mark.parametrize("code", ["57014", "PGRST301", None])
+def test_other_rpc_errors_are_raised_without_fallback(code):
+    db = FakeSupabase(rpc_error=APIError({"code": code, "message": "boom"}))
+
+    with pytest.raises(APIError):
+        append_all(db, ["Ann met Bo."])
+
+    assert extraction._append_rpc_missing is False
+    assert db.table_calls == []
+    assert db.chunks == []
+
+
+def test_transport_errors_are_raised_without_fallback():
+    db = FakeSupabase(rpc_error=ConnectionError("connection reset"))
+
+    with pytest.raises(ConnectionError):
+        append_all(db, ["Ann met Bo."])
+
+    assert db.table_calls == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
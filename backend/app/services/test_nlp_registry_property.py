@@ -0,0 +1,169 @@
+"""
+Property-based tests for the shared spaCy model registry.
+
+Feature: nlp-registry, Property: One Load per Model, Views Run Only Their Components
+Validates: shared loading, component views with tok2vec listeners, size reporting
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from hypothesis import given, strategies as st, settings
+import numpy as np
+import pytest
+
+from lib.nlp_registry import NLPModelRegistry, estimate_pipeline_bytes
+
+COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+
+
+class FakeComponent:
+    def __init__(self, name, listeners=()):
+        self.name = name
+        if listeners:
+            self.listening_components = list(listeners)
+
+    def __call__(self, doc):
+        return doc + [self.name]
+
+
+class FakeLanguage:
+    """Stands in for spacy.Language: a doc is the list of components run on it."""
+
+    def __init__(self):
+        self.pipeline = [
+            (name, FakeComponent(name, ["tagger", "parser"] if name == "tok2vec" else ()))
+            for name in COMPONENTS
+        ]
+
+    @property
+    def pipe_names(self):
+        return [name for name, _ in self.pipeline]
+
+    def make_doc(self, text):
+        return []
+
+    def __call__(self, text, disable=()):
+        doc = self.make_doc(text)
+        for name, proc in self.pipeline:
+            if name not in disable:
+                doc = proc(doc)
+        return doc
+
+    def pipe(self, texts, batch_size=None, disable=()):
+        return (self(text, disable=disable) for text in texts)
+
+
+def make_registry():
+    loads = []
+
+    def loader(name):
+        loads.append(name)
+        return FakeLanguage()
+
+    return NLPModelRegistry(loader=loader), loads
+
+
+@given(
+    requests=st.lists(
+        st.tuples(
+            st.one_of(st.none(), st.sets(st.sampled_from(COMPONENTS))),
+            st.sets(st.sampled_from(COMPONENTS)),
+        ),
+        min_size=1,
+        max_size=8,
+    )
+)
+@settings(max_examples=100, deadline=None)
+def test_views_share_one_model_and_run_only_their_components(requests):
+    registry, loads = make_registry()
+
+    for enable, disable in requests:
+        nlp = registry.get("en_core_web_sm", enable=enable, disable=disable)
+        wanted = set(COMPONENTS if enable is None else enable) - disable
+        if wanted & {"tagger", "parser"}:
+            wanted.add("tok2vec")
+        expected = [c for c in COMPONENTS if c in wanted]
+
+        assert nlp("text") == expected
+        assert list(nlp.pipe(["a", "b"], batch_size=2)) == [expected, expected]
+        assert nlp.pipe_names == expected
+
+    assert loads == ["en_core_web_sm"]
+
+
+def test_full_pipeline_is_the_shared_language_and_views_are_reused():
+    registry, _ = make_registry()
+
+    full = registry.get()
+    assert isinstance(full, FakeLanguage)
+    assert registry.get(disable=()) is full
+    assert registry.get(enable=["ner"]) is registry.get(enable=["ner"])
+    assert registry.get(enable=["ner"]).make_doc("x") == []
+
+
+def test_concurrent_first_use_loads_once():
+    registry, loads = make_registry()
+    barrier = threading.Barrier(6)
+
+    def use(i):
+        barrier.wait()
+        return registry.get(enable=["ner"] if i % 2 else None)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(use, range(6)))
+
+    assert loads == ["en_core_web_sm"]
+
+
+def test_preload_and_stats():
+    registry = NLPModelRegistry(
+        loader=lambda name: FakeLanguage() if name == "en_core_web_sm" else (_ for _ in ()).throw(OSError(name))
+    )
+
+    assert registry.preload(["en_core_web_sm", "missing_model"]) == ["en_core_web_sm"]
+    registry.get(disable=["ner"])
+    (entry,) = registry.stats()
+    assert entry["model"] == "en_core_web_sm"
+    assert entry["components"] == COMPONENTS
+    assert entry["views"] == [["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"]]
+    assert entry["size_bytes"] == 0
+
+
+def test_size_counts_shared_params_once():
+    shared = np.zeros(100, dtype=np.float32)
+
+    class Node:
+        def __init__(self, params):
+            self._params = params
+            self.param_names = list(params)
+
+        def has_param(self, name):
+            return self._params[name] is not None
+
+        def get_param(self, name):
+            return self._params[name]
+
+    def model(*nodes):
+        return SimpleNamespace(walk=lambda: list(nodes))
+
+    nlp = SimpleNamespace(
+        pipeline=[
+            ("tok2vec", SimpleNamespace(model=model(Node({"E": shared, "b": None})))),
+            ("tagger", SimpleNamespace(model=model(Node({"W": np.zeros(10)}), Node({"E": shared})))),
+            ("coref", SimpleNamespace(model=object())),
+        ],
+        vocab=SimpleNamespace(vectors=SimpleNamespace(data=np.zeros(5, dtype=np.float32))),
+    )
+
+    assert estimate_pipeline_bytes(nlp) == 400 + 80 + 20
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,123 @@
+"""
+Property-based tests for the cached plot board read model.
+
+Feature: plot-board-read-model, Property: Board Reloads Only When the Version Changes
+Validates: unchanged versions are served from cache with a stable ETag taken from the board query;
+a missing get_plot_board is detected once and later boards are built from the tables
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from postgrest.exceptions import APIError
+
+from services import plot_board
+from services.plot_board import PlotBoardService
+
+
+@pytest.fixture(autouse=True)
+def rpc_installed():
+    """Every test starts out assuming get_plot_board exists."""
+    with patch.object(plot_board, "_board_rpc_missing", False):
+        yield
+
+
+def make_supabase(versions):
+    """Supabase mock whose get_plot_board RPC sees successive plot-data versions."""
+    supabase = MagicMock()
+    current = iter(versions)
+
+    def get_plot_board(name, params):
+        version = next(current)
+        if params["p_known_version"] == version:
+            data = {"version": version, "unchanged": True}
+        else:
+            data = {"version": version, "plot_threads": [], "plot_points": [{"id": "pp1"}],
+                    "connections": []}
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=data))
+
+    supabase.rpc.side_effect = get_plot_board
+    return supabase
+
+
+@given(versions=st.lists(st.integers(min_value=0, max_value=3), min_size=1, max_size=12))
+@settings(max_examples=100, deadline=None)
+def test_board_reloads_only_on_version_change(versions):
+    supabase = make_supabase(versions)
+    service = PlotBoardService(supabase_client=supabase)
+
+    results = [service.get_board("p1") for _ in versions]
+
+    # One round trip per request, with no separate version lookup
+    assert supabase.rpc.call_count == len(versions)
+    supabase.table.assert_not_called()
+    known = [call.args[1]["p_known_version"] for call in supabase.rpc.call_args_list]
+    assert known == [None] + versions[:-1]
+    for version, (board, etag) in zip(versions, results):
+        assert etag == f'W/"plot-p1-{version}"'
+        assert board["plot_points"] == [{"id": "pp1"}]
+
+
+def test_board_shape_from_rpc():
+    service = PlotBoardService(supabase_client=make_supabase([4]))
+    board, _ = service.get_board("p1")
+
+    assert board == {"plot_threads": [], "plot_points": [{"id": "pp1"}], "connections": []}
+
+
+def tables_supabase(rpc_error, requests=2):
+    """Supabase mock whose RPC raises rpc_error, with plot tables for `requests` boards."""
+    supabase = MagicMock()
+    supabase.rpc.side_effect = rpc_error
+    ordered = supabase.table.return_value.select.return_value.eq.return_value.order.return_value
+    ordered.execute.side_effect = [
+        SimpleNamespace(data=[{"id": "t1"}]),
+        SimpleNamespace(data=[{"id": "pp1"}, {"id": "pp2"}]),
+    ] * requests
+    by_points = supabase.table.return_value.select.return_value.in_.return_value
+    by_points.execute.side_effect = [
+        SimpleNamespace(data=[{"from_point_id": "pp1", "to_point_id": "pp2"}]),
+        SimpleNamespace(data=[{"plot_point_id": "pp2", "entity_id": "e1"}]),
+    ] * requests
+    return supabase
+
+
+def test_rpc_failure_falls_back_to_table_queries():
+    supabase = tables_supabase(RuntimeError("connection reset"))
+    service = PlotBoardService(supabase_client=supabase)
+
+    board, etag = service.get_board("p1")
+    _, again = service.get_board("p1")
+
+    assert board["plot_threads"] == [{"id": "t1"}]
+    assert board["plot_points"][0]["characters"] == []
+    assert board["plot_points"][1]["characters"] == [{"plot_point_id": "pp2", "entity_id": "e1"}]
+    assert board["connections"] == [{"from_point_id": "pp1", "to_point_id": "pp2"}]
+    assert etag == again
+    # A transient failure is not remembered
+    assert supabase.rpc.call_count == 2
+
+
+def test_missing_function_is_detected_once():
+    supabase = tables_supabase(
+        APIError({"code": "PGRST202", "message": "Could not find the function"}), requests=3
+    )
+    service = PlotBoardService(supabase_client=supabase)
+
+    boards = [service.get_board(project_id) for project_id in ["p1", "p1", "p2"]]
+
+    assert supabase.rpc.call_count == 1
+    assert plot_board._board_rpc_missing is True
+    assert all(board["plot_points"][1]["characters"] for board, _ in boards)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,309 @@
+"""
+Property-based tests for incremental plot extraction.
+
+Feature: plot-extraction-incremental, Property: Only New or Changed Chunks Are Extracted
+Validates: watermarks skip extracted chunks, changed hashes re-extract, context precedes new chunks,
+    replaced points are only deleted once new ones are extracted and take the old points' place
+"""
+
+import itertools
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+from unittest.mock import patch
+from hypothesis import given, strategies as st, settings
+import pytest
+from postgrest.exceptions import APIError
+
+from services import plot_extraction
+from services.plot_extraction import PlotExtractionService, _chunk_hash, select_chunks_to_extract
+
+
+chunk_states = st.lists(st.sampled_from(["new", "extracted", "changed"]), max_size=30)
+
+
+def build(states):
+    chunks, extracted = [], {}
+    for i, state in enumerate(states):
+        chunk = {"id": f"c{i}", "chunk_index": i, "content": f"chunk {i} text"}
+        if i % 2:
+            chunk["content_hash"] = _chunk_hash({"content": chunk["content"]})
+        chunks.append(chunk)
+        if state == "extracted":
+            extracted[chunk["id"]] = _chunk_hash(chunk)
+        elif state == "changed":
+            extracted[chunk["id"]] = "stale-hash"
+    return chunks, extracted
+
+
+@given(states=chunk_states, context_size=st.integers(min_value=0, max_value=3))
+@settings(max_examples=200, deadline=None)
+def test_only_new_or_changed_chunks_are_pending(states, context_size):
+    chunks, extracted = build(states)
+
+    pending, context = select_chunks_to_extract(chunks, extracted, context_size)
+
+    assert [c["chunk_index"] for c in pending] == [
+        i for i, state in enumerate(states) if state != "extracted"
+    ]
+    pending_indexes = {c["chunk_index"] for c in pending}
+    for chunk in context:
+        i = chunk["chunk_index"]
+        assert states[i] == "extracted"
+        assert any(i < p <= i + context_size for p in pending_indexes)
+    assert len(context) <= context_size * len(pending)
+
+
+def test_fully_extracted_project_has_nothing_to_do():
+    chunks, extracted = build(["extracted"] * 5)
+    assert select_chunks_to_extract(chunks, extracted, 2) == ([], [])
+
+
+def test_new_chunks_get_preceding_context():
+    chunks, extracted = build(["extracted", "extracted", "extracted", "new", "new"])
+
+    pending, context = select_chunks_to_extract(chunks, extracted, 2)
+
+    assert [c["chunk_index"] for c in pending] == [3, 4]
+    assert [c["chunk_index"] for c in context] == [1, 2]
+
+
+class LoggedQuery:
+    """Builder that records (table, operation) when executed."""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.operation = "select"
+        self.rows = []
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, *args, **kwargs):
+        return self
+
+    in_ = order = limit = eq
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    def insert(self, rows):
+        self.operation = "insert"
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def execute(self):
+        self.db.log.append((self.table, self.operation))
+        data = [{**row, "id": f"{self.table}-{i}"} for i, row in enumerate(self.rows)]
+        return SimpleNamespace(data=data, count=0)
+
+
+class LoggedSupabase:
+    def __init__(self):
+        self.log = []
+
+    def table(self, name):
+        return LoggedQuery(self, name)
+
+
+CHUNKS = [{"id": "c1", "chunk_index": 1, "content": "Ann finds the letter."}]
+
+
+def extract(window_result):
+    db = LoggedSupabase()
+    with patch.object(PlotExtractionService, "_extract_window", side_effect=window_result):
+        result = PlotExtractionService(api_key="sk-test").extract_plot_points_from_chunks(
+            "p1", CHUNKS, [], supabase_client=db, replace_chunk_ids=["c1"]
+        )
+    return result, db.log
+
+
+def test_failed_extraction_keeps_existing_points():
+    result, log = extract(RuntimeError("model down"))
+
+    assert result["status"] == "error"
+    assert ("plot_points", "delete") not in log
+
+
+def test_replaced_points_are_deleted_just_before_the_new_ones_are_stored():
+    points = [{"title": "Letter found", "chunk_index": 1, "timeline_position": 1}]
+    result, log = extract(lambda window, names: points)
+
+    assert result["status"] == "success" and result["plot_points_created"] == 1
+    assert log.index(("plot_points", "delete")) < log.index(("plot_points", "insert"))
+
+
+class PlotQuery:
+    """PostgREST builder over PlotDB rows (filters, order, limit, writes)."""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.order_by = None
+        self.row_limit = None
+        self.action = ("select", None)
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def _filter(self, predicate):
+        self.filters.append(predicate)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda r: r.get(column) == value)
+
+    def in_(self, column, values):
+        return self._filter(lambda r: r.get(column) in values)
+
+    def lt(self, column, value):
+        return self._filter(lambda r: r.get(column) < value)
+
+    def gte(self, column, value):
+        return self._filter(lambda r: r.get(column) >= value)
+
+    def order(self, column, desc=False):
+        self.order_by = (column, desc)
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def insert(self, rows):
+        self.action = ("insert", rows if isinstance(rows, list) else [rows])
+        return self
+
+    def update(self, values):
+        self.action = ("update", values)
+        return self
+
+    def delete(self):
+        self.action = ("delete", None)
+        return self
+
+    def execute(self):
+        rows = self.db.tables.setdefault(self.table, [])
+        kind, values = self.action
+        if kind == "insert":
+            new = [{"id": f"{self.table}-{next(self.db.ids)}", **row} for row in values]
+            rows.extend(new)
+            return SimpleNamespace(data=[dict(r) for r in new], count=None)
+        matched = [r for r in rows if all(f(r) for f in self.filters)]
+        if kind == "delete":
+            self.db.tables[self.table] = [r for r in rows if r not in matched]
+        elif kind == "update":
+            for row in matched:
+                row.update(values)
+        if self.order_by:
+            column, desc = self.order_by
+            matched.sort(key=lambda r: r[column], reverse=desc)
+        count = len(matched)
+        if self.row_limit is not None:
+            matched = matched[: self.row_limit]
+        return SimpleNamespace(data=[dict(r) for r in matched], count=count)
+
+
+class PlotDB:
+    """Plot tables plus shift_plot_points as migration 010 defines it."""
+
+    def __init__(self, points, shift_rpc=True):
+        self.ids = itertools.count()
+        self.shift_rpc = shift_rpc
+        self.tables = {"plot_points": points, "plot_threads": [{"id": "t1", "project_id": "p1"}]}
+
+    def table(self, name):
+        return PlotQuery(self, name)
+
+    def rpc(self, name, params):
+        def execute():
+            if not self.shift_rpc:
+                raise APIError({"code": "PGRST202", "message": f"Could not find the function {name}"})
+            for row in self.tables["plot_points"]:
+                if row["timeline_position"] >= params["p_from_position"]:
+                    row["timeline_position"] += params["p_by"]
+
+        assert name == "shift_plot_points"
+        return SimpleNamespace(execute=execute)
+
+    def timeline(self):
+        """(title, chunk id) in timeline order."""
+        return [
+            (p["title"], p["narrative_chunk_id"])
+            for p in sorted(self.tables["plot_points"], key=lambda p: p["timeline_position"])
+        ]
+
+    def follows(self):
+        return {
+            (c["from_point_id"], c["to_point_id"])
+            for c in self.tables.get("plot_point_connections", [])
+            if c["connection_type"] == "FOLLOWS"
+        }
+
+
+@given(
+    old_counts=st.lists(st.integers(min_value=0, max_value=3), min_size=2, max_size=6),
+    data=st.data(),
+    shift_rpc=st.booleans(),
+)
+@settings(max_examples=100, deadline=None)
+def test_replacement_points_take_the_old_points_place(old_counts, data, shift_rpc):
+    chunks = [{"id": f"c{i}", "chunk_index": i, "content": f"chunk {i}"} for i in range(len(old_counts))]
+    old = [(f"old {i}.{k}", f"c{i}") for i, n in enumerate(old_counts) for k in range(n)]
+    with_points = [i for i, n in enumerate(old_counts) if n] or [0]
+    edited = sorted(data.draw(st.sets(st.sampled_from(with_points), min_size=1)))
+    new_counts = {i: data.draw(st.integers(min_value=1, max_value=3)) for i in edited}
+    db = PlotDB(
+        [
+            {"id": f"old-{pos}", "project_id": "p1", "title": title, "narrative_chunk_id": chunk_id,
+             "timeline_position": pos + 1}
+            for pos, (title, chunk_id) in enumerate(old)
+        ],
+        shift_rpc=shift_rpc,
+    )
+    extracted = [
+        {"title": f"new {i}.{k}", "chunk_index": i}
+        for i in edited
+        for k in range(new_counts[i])
+    ]
+    extracted = [{**p, "timeline_position": pos + 1} for pos, p in enumerate(extracted)]
+
+    with patch.object(plot_extraction, "_shift_rpc_missing", False), patch.object(
+        PlotExtractionService, "_extract_window", return_value=extracted
+    ):
+        result = PlotExtractionService(api_key="sk-test").extract_plot_points_from_chunks(
+            "p1", [chunks[i] for i in edited], [], supabase_client=db,
+            replace_chunk_ids=[f"c{i}" for i in edited],
+        )
+
+    assert result["status"] == "success"
+    expected = []
+    for i in range(len(old_counts)):
+        if i in new_counts and old_counts[i]:
+            expected += [(f"new {i}.{k}", f"c{i}") for k in range(new_counts[i])]
+        elif i in new_counts:
+            continue
+        else:
+            expected += [(f"old {i}.{k}", f"c{i}") for k in range(old_counts[i])]
+    expected += [
+        (f"new {i}.{k}", f"c{i}") for i in edited if not old_counts[i] for k in range(new_counts[i])
+    ]
+    assert db.timeline() == expected
+
+    # The FOLLOWS chain runs through the inserted points in timeline order
+    ordered = [p["id"] for p in sorted(db.tables["plot_points"], key=lambda p: p["timeline_position"])]
+    new_ids = {p["id"] for p in db.tables["plot_points"] if p["title"].startswith("new")}
+    for a, b in zip(ordered, ordered[1:]):
+        if a in new_ids or b in new_ids:
+            assert (a, b) in db.follows()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,106 @@
+"""
+Property-based tests for windowed (map-reduce) plot extraction.
+
+Feature: plot-extraction-windows, Property: Full Coverage and Consistent Merge
+Validates: every chunk is extracted within the token budget, overlap duplicates merge, links resolve
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.plot_extraction import (
+    build_chunk_windows,
+    estimate_tokens,
+    merge_window_plot_points,
+)
+
+
+chunk_lists = st.lists(st.integers(min_value=0, max_value=3000), max_size=40).map(
+    lambda sizes: [
+        {"id": f"c{i}", "chunk_index": i, "content": "x" * size}
+        for i, size in enumerate(sizes)
+    ]
+)
+
+
+@given(
+    chunks=chunk_lists,
+    max_tokens=st.integers(min_value=50, max_value=2000),
+    overlap=st.integers(min_value=0, max_value=2),
+)
+@settings(max_examples=200, deadline=None)
+def test_windows_cover_every_chunk_in_order(chunks, max_tokens, overlap):
+    windows = build_chunk_windows(chunks, max_tokens=max_tokens, overlap_chunks=overlap)
+
+    seen = []
+    for window in windows:
+        assert window, "Windows are never empty"
+        tokens = sum(estimate_tokens(c["content"]) for c in window)
+        assert tokens <= max_tokens or len(window) == 1
+        indexes = [c["chunk_index"] for c in window]
+        assert indexes == sorted(indexes)
+        seen.extend(i for i in indexes if i not in seen)
+
+    assert seen == [c["chunk_index"] for c in chunks]
+
+
+def test_overlap_duplicates_merge_and_links_cross_windows():
+    window_a = [
+        {"title": "Storm hits the harbor", "chunk_index": 1, "timeline_position": 1,
+         "characters": ["Ann"], "causes": [2], "follows": []},
+        {"title": "Ship breaks its moorings", "chunk_index": 2, "timeline_position": 2,
+         "characters": ["Bo"], "causes": [], "follows": [1]},
+    ]
+    window_b = [
+        {"title": "The ship breaks its moorings", "chunk_index": 2, "timeline_position": 1,
+         "characters": ["Bo", "Cy"], "causes": [2], "follows": []},
+        {"title": "Crew rows to shore", "chunk_index": 3, "timeline_position": 2,
+         "characters": ["Cy"], "causes": [], "follows": [1]},
+    ]
+
+    merged = merge_window_plot_points([window_a, window_b])
+
+    assert [p["title"] for p in merged] == [
+        "Storm hits the harbor", "Ship breaks its moorings", "Crew rows to shore",
+    ]
+    assert [p["timeline_position"] for p in merged] == [1, 2, 3]
+    assert merged[1]["characters"] == ["Bo", "Cy"]
+    assert merged[0]["causes"] == [2]
+    assert merged[1]["causes"] == [3] and merged[1]["follows"] == [1]
+    assert merged[2]["follows"] == [2]
+
+
+points = st.lists(
+    st.fixed_dictionaries({
+        "title": st.sampled_from(["Storm", "Duel at dawn", "Letter found", "Escape"]),
+        "chunk_index": st.integers(min_value=0, max_value=3),
+        "causes": st.lists(st.integers(min_value=0, max_value=8), max_size=3),
+        "follows": st.lists(st.integers(min_value=0, max_value=8), max_size=3),
+    }),
+    max_size=6,
+).map(lambda ps: [{**p, "timeline_position": i + 1} for i, p in enumerate(ps)])
+
+
+@given(window_points=st.lists(points, max_size=4))
+@settings(max_examples=200, deadline=None)
+def test_merged_links_point_at_other_merged_points(window_points):
+    merged = merge_window_plot_points(window_points)
+
+    positions = [p["timeline_position"] for p in merged]
+    assert positions == list(range(1, len(merged) + 1))
+    assert len(merged) <= sum(len(w) for w in window_points)
+    for point in merged:
+        for field in ("causes", "follows"):
+            assert len(point[field]) == len(set(point[field]))
+            for ref in point[field]:
+                assert ref in positions and ref != point["timeline_position"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,109 @@
+"""
+Property-based tests for bulk plot point persistence.
+
+Feature: plot-bulk-persistence, Property: Constant Round Trips Regardless of Size
+Validates: one insert per table, ids mapped by position, connections deduplicated in memory
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.plot_extraction import merge_window_plot_points, persist_plot_points
+
+
+class RecordingTable:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.rows = None
+
+    def insert(self, rows):
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def execute(self):
+        self.db.calls.append((self.name, len(self.rows)))
+        stored = []
+        for row in self.rows:
+            stored.append({**row, "id": f"{self.name}-{len(self.db.tables[self.name])}"})
+            self.db.tables[self.name].append(stored[-1])
+        # PostgREST does not promise any particular order
+        return SimpleNamespace(data=list(reversed(stored)))
+
+
+class RecordingSupabase:
+    def __init__(self):
+        self.calls = []
+        self.tables = {"plot_points": [], "plot_point_characters": [], "plot_point_connections": []}
+
+    def table(self, name):
+        return RecordingTable(self, name)
+
+
+raw_points = st.lists(
+    st.fixed_dictionaries({
+        "title": st.sampled_from(["Storm", "Duel", "Letter found", "Escape", "Reunion"]),
+        "chunk_index": st.integers(min_value=0, max_value=3),
+        "characters": st.lists(st.sampled_from(["Ann", "Bo", "Ghost"]), max_size=3),
+        "causes": st.lists(st.integers(min_value=1, max_value=8), max_size=3),
+        "follows": st.lists(st.integers(min_value=1, max_value=8), max_size=3),
+    }),
+    max_size=40,
+).map(lambda ps: [{**p, "timeline_position": i + 1} for i, p in enumerate(ps)])
+
+
+@given(points=raw_points, offset=st.integers(min_value=0, max_value=50), has_previous=st.booleans())
+@settings(max_examples=100, deadline=None)
+def test_bulk_writer_uses_one_request_per_table(points, offset, has_previous):
+    plot_points_data = merge_window_plot_points([points])
+    db = RecordingSupabase()
+
+    created = persist_plot_points(
+        db,
+        project_id="p1",
+        thread_id="t1",
+        plot_points_data=plot_points_data,
+        chunk_map={i: f"chunk-{i}" for i in range(4)},
+        entity_map={"Ann": "e-ann", "Bo": "e-bo"},
+        position_offset=offset,
+        layout_offset=offset,
+        previous_point_id="old-last" if has_previous else None,
+    )
+
+    tables_called = [name for name, _ in db.calls]
+    assert len(tables_called) == len(set(tables_called)) <= 3
+    assert len(created) == len(plot_points_data)
+
+    stored = {row["id"]: row for row in db.tables["plot_points"]}
+    assert [stored[i]["timeline_position"] for i in created] == sorted(
+        offset + p["timeline_position"] for p in plot_points_data
+    )
+
+    pairs = [(c["from_point_id"], c["to_point_id"]) for c in db.tables["plot_point_connections"]]
+    assert len(pairs) == len(set(pairs))
+    assert all(a != b for a, b in pairs)
+    for a, b in zip(created, created[1:]):
+        assert (a, b) in pairs or (b, a) in pairs
+    if has_previous and created:
+        assert ("old-last", created[0]) in pairs
+
+    links = [(c["plot_point_id"], c["entity_id"]) for c in db.tables["plot_point_characters"]]
+    assert len(links) == len(set(links))
+    assert all(entity in ("e-ann", "e-bo") for _, entity in links)
+
+
+def test_nothing_to_persist_makes_no_requests():
+    db = RecordingSupabase()
+    assert persist_plot_points(db, "p1", "t1", [], {}, {}) == []
+    assert db.calls == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
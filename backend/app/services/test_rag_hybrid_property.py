@@ -0,0 +1,156 @@
+"""
+Property-based tests for hybrid lexical + vector retrieval.
+
+Feature: rag-hybrid, Property: Lexical Retrieval Survives Embedding Outages
+Validates: BM25 finds exact-name matches, RRF merges rankings, no embedding call is required
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from lib.lexical_index import (
+    LexicalIndexStore,
+    ProjectLexicalIndex,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+from lib.vector_store import LocalVectorStore
+from services.rag import RAGService
+
+
+filler_words = st.sampled_from(
+    ["rain", "door", "letter", "garden", "night", "ship", "candle", "bridge"]
+)
+documents = st.lists(filler_words, min_size=1, max_size=15).map(" ".join)
+
+
+@given(
+    docs=st.lists(documents, min_size=1, max_size=20),
+    target=st.integers(min_value=0, max_value=19),
+)
+@settings(max_examples=100, deadline=None)
+def test_exact_name_ranks_first(docs, target):
+    target %= len(docs)
+    docs[target] += " Marguerite's fan"
+    index = ProjectLexicalIndex()
+    for i, doc in enumerate(docs):
+        index.add(f"c{i}", doc, i)
+
+    results = index.search("scenes with Marguerite", top_k=3)
+
+    assert [r["chunk_index"] for r in results] == [target]
+
+
+@given(docs=st.lists(documents, min_size=0, max_size=20), query=documents)
+@settings(max_examples=100, deadline=None)
+def test_bm25_only_returns_matching_chunks(docs, query):
+    index = ProjectLexicalIndex()
+    for i, doc in enumerate(docs):
+        index.add(f"c{i}", doc, i)
+
+    results = index.search(query, top_k=5)
+    query_terms = set(tokenize(query))
+
+    assert len(results) <= 5
+    scores = [r["score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+    for r in results:
+        assert query_terms & set(tokenize(r["content"]))
+
+
+ranking = st.lists(st.integers(min_value=0, max_value=30), unique=True, max_size=10).map(
+    lambda idxs: [{"chunk_index": i, "content": f"chunk {i}"} for i in idxs]
+)
+
+
+@given(rankings=st.lists(ranking, min_size=1, max_size=3))
+@settings(max_examples=100, deadline=None)
+def test_rrf_merges_without_duplicates(rankings):
+    fused = reciprocal_rank_fusion(rankings)
+
+    expected = {c["chunk_index"] for r in rankings for c in r}
+    indexes = [c["chunk_index"] for c in fused]
+    assert len(indexes) == len(set(indexes))
+    assert set(indexes) == expected
+    scores = [c["score"] for c in fused]
+    assert scores == sorted(scores, reverse=True)
+
+
+def fake_supabase(rows):
+    supabase = Mock()
+    chain = supabase.table.return_value.select.return_value.eq.return_value
+    chain.gt.return_value.order.return_value.limit.return_value.execute.return_value = (
+        SimpleNamespace(data=rows)
+    )
+    return supabase
+
+
+ROWS = [
+    {"id": "c1", "content": "Marguerite danced at the ball", "chunk_index": 1, "embedding": [1.0, 0.0]},
+    {"id": "c2", "content": "A storm broke over the sea", "chunk_index": 2, "embedding": [0.0, 1.0]},
+    {"id": "c3", "content": "The captain read a letter", "chunk_index": 3, "embedding": [0.6, 0.8]},
+]
+
+
+def test_hybrid_retrieval_without_embeddings():
+    supabase = fake_supabase(ROWS)
+    store = LexicalIndexStore(max_projects=5, refresh_seconds=60)
+
+    with patch("services.rag.get_embedding", side_effect=RuntimeError("down")), patch(
+        "services.rag.get_lexical_store", return_value=store
+    ):
+        service = RAGService(supabase_client=supabase, use_local_index=False, use_hybrid=True)
+        results = service.retrieve_relevant_chunks("p1", "scenes with Marguerite", top_k=2)
+
+    assert [r["chunk_index"] for r in results] == [1]
+    supabase.rpc.assert_not_called()
+
+
+def test_hybrid_fuses_vector_and_lexical_results():
+    supabase = fake_supabase(ROWS)
+    lexical = LexicalIndexStore(max_projects=5, refresh_seconds=60)
+    vectors = LocalVectorStore(max_projects=5, refresh_seconds=60)
+
+    with patch("services.rag.get_embedding", return_value=[0.0, 1.0]), patch(
+        "services.rag.get_lexical_store", return_value=lexical
+    ), patch("services.rag.get_vector_store", return_value=vectors):
+        service = RAGService(supabase_client=supabase, use_local_index=True, use_hybrid=True)
+        results = service.retrieve_relevant_chunks("p1", "the captain's letter", top_k=3)
+
+    indexes = [r["chunk_index"] for r in results]
+    # c3 is ranked by both retrievers, so it wins the fusion
+    assert indexes[0] == 3
+    assert set(indexes) == {2, 3}
+    assert all(r["score"] > 0 for r in results)
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+
+
+def test_hybrid_embedding_is_bounded_and_lexical_hits_are_scored():
+    supabase = fake_supabase(ROWS)
+    store = LexicalIndexStore(max_projects=5, refresh_seconds=60)
+    embed = Mock(side_effect=TimeoutError("embedding timed out"))
+
+    with patch("services.rag.get_embedding", embed), patch(
+        "services.rag.get_lexical_store", return_value=store
+    ), patch("services.rag.settings", SimpleNamespace(rag_hybrid_embedding_timeout_seconds=0.25)):
+        service = RAGService(supabase_client=supabase, use_local_index=False, use_hybrid=True)
+        results = service.retrieve_relevant_chunks("p1", "scenes with Marguerite", top_k=2)
+
+    assert embed.call_args.kwargs["timeout"] == 0.25
+    (hit,) = results
+    assert hit["chunk_index"] == 1
+    # Found by BM25 alone: no vector similarity, but a real fused score
+    assert hit["similarity"] == 0.0
+    assert hit["score"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
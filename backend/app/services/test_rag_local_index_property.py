@@ -0,0 +1,253 @@
+"""
+Property-based tests for the local vector index used by RAG retrieval.
+
+Feature: rag-local-index, Property: Local Search Matches match_narrative_chunks
+Validates: same ordering, threshold and top-k semantics as the pgvector RPC
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from hypothesis import given, strategies as st, settings
+import numpy as np
+import pytest
+
+from lib.vector_store import LocalVectorStore, ProjectVectorIndex
+from services.rag import RAGService
+
+
+DIM = 8
+
+vectors = st.lists(
+    st.floats(min_value=-1.0, max_value=1.0, allow_nan=False, width=32),
+    min_size=DIM,
+    max_size=DIM,
+).filter(lambda v: np.linalg.norm(v) > 1e-3)
+
+
+def reference_search(rows, query, top_k, threshold):
+    """What match_narrative_chunks computes: 1 - cosine distance, > threshold."""
+    q = np.asarray(query, dtype=np.float64)
+    scored = []
+    for chunk_index, vec in rows:
+        v = np.asarray(vec, dtype=np.float64)
+        sim = float(v @ q / (np.linalg.norm(v) * np.linalg.norm(q)))
+        if sim > threshold:
+            scored.append((sim, chunk_index))
+    scored.sort(reverse=True)
+    return scored[:top_k]
+
+
+@given(
+    rows=st.lists(vectors, min_size=0, max_size=30),
+    query=vectors,
+    top_k=st.integers(min_value=1, max_value=10),
+    threshold=st.floats(min_value=-0.5, max_value=0.9),
+)
+@settings(max_examples=100, deadline=None)
+def test_local_search_matches_rpc_semantics(rows, query, top_k, threshold):
+    index = ProjectVectorIndex()
+    for i, vec in enumerate(rows):
+        index.add(f"c{i}", f"chunk {i}", i, vec)
+
+    results = index.search(query, top_k=top_k, threshold=threshold)
+    # Float32 rounding may flip items sitting right on the threshold
+    strict = reference_search(list(enumerate(rows)), query, top_k, threshold + 1e-4)
+    loose = reference_search(list(enumerate(rows)), query, top_k, threshold - 1e-4)
+
+    assert len(strict) <= len(results) <= len(loose)
+    assert all(r["similarity"] > threshold for r in results)
+    sims = [r["similarity"] for r in results]
+    assert sims == sorted(sims, reverse=True)
+    for got, (want, _) in zip(sims, loose):
+        assert got == pytest.approx(want, abs=1e-4)
+
+
+@given(
+    rows=st.lists(vectors, min_size=0, max_size=20),
+    queries=st.lists(vectors, min_size=1, max_size=5),
+    top_k=st.integers(min_value=1, max_value=10),
+)
+@settings(max_examples=50, deadline=None)
+def test_search_many_matches_single_searches(rows, queries, top_k):
+    index = ProjectVectorIndex()
+    for i, vec in enumerate(rows):
+        index.add(f"c{i}", f"chunk {i}", i, vec)
+
+    batched = index.search_many(queries, top_k=top_k, threshold=0.0)
+    singles = [index.search(q, top_k=top_k, threshold=0.0) for q in queries]
+
+    assert len(batched) == len(queries)
+    for got, want in zip(batched, singles):
+        assert [r["similarity"] for r in got] == pytest.approx(
+            [r["similarity"] for r in want], abs=1e-5
+        )
+
+
+def test_index_ignores_duplicates_and_missing_embeddings():
+    index = ProjectVectorIndex()
+    assert index.add("a", "text", 1, [1.0, 0.0])
+    assert not index.add("a", "text", 1, [1.0, 0.0])
+    assert not index.add("b", "text", 2, None)
+    assert not index.add("c", "text", 3, [0.0, 0.0])
+    assert index.add("d", "text", 4, "[0.0, 1.0]")
+    assert len(index) == 2
+
+
+def test_replace_overwrites_an_indexed_chunk():
+    index = ProjectVectorIndex()
+    assert index.add("a", "text", 1, [1.0, 0.0])
+    assert index.add("a", "text", 1, [0.0, 1.0], replace=True)
+    assert len(index) == 1
+    assert index.search([0.0, 1.0], top_k=1)[0]["similarity"] == pytest.approx(1.0)
+
+
+class ChunkTable:
+    """narrative_chunks rows behind the PostgREST calls LocalVectorStore makes."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.clock = 0
+
+    def stamp(self):
+        self.clock += 1
+        return f"2026-01-01T00:00:{self.clock:02d}+00:00"
+
+    def table(self, name):
+        return ChunkQuery(self.rows)
+
+
+class ChunkQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self.page = None
+
+    def select(self, columns):
+        return self
+
+    def _where(self, column, test):
+        self.filters.append(lambda row: row.get(column) is not None and test(row[column]))
+        return self
+
+    def eq(self, column, value):
+        return self._where(column, lambda v: v == value)
+
+    def gt(self, column, value):
+        return self._where(column, lambda v: v > value)
+
+    def gte(self, column, value):
+        return self._where(column, lambda v: v >= value)
+
+    def lte(self, column, value):
+        return self._where(column, lambda v: v <= value)
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, n):
+        self.page = n
+        return self
+
+    def execute(self):
+        rows = sorted(
+            (dict(r) for r in self.rows if all(f(r) for f in self.filters)),
+            key=lambda r: r["chunk_index"],
+        )
+        return SimpleNamespace(data=rows[: self.page])
+
+
+@given(
+    initial=st.lists(st.one_of(st.none(), vectors), min_size=1, max_size=12),
+    later=st.lists(st.tuples(st.integers(min_value=0, max_value=11), vectors), max_size=6),
+)
+@settings(max_examples=50, deadline=None)
+def test_refresh_picks_up_embeddings_filled_in_later(initial, later):
+    db = ChunkTable([])
+    for i, vec in enumerate(initial):
+        db.rows.append(
+            {"id": f"c{i}", "project_id": "p1", "content": f"chunk {i}", "chunk_index": i,
+             "embedding": vec, "updated_at": db.stamp()}
+        )
+    store = LocalVectorStore(max_projects=5, refresh_seconds=-1)
+    store.get_index("p1", db)
+
+    # e.g. a reindex job embedding chunks that were stored without a vector
+    for i, vec in later:
+        row = db.rows[i % len(initial)]
+        row.update(embedding=vec, updated_at=db.stamp())
+    refreshed = store.get_index("p1", db)
+
+    fresh = ProjectVectorIndex()
+    for row in db.rows:
+        fresh.add(row["id"], row["content"], row["chunk_index"], row["embedding"])
+    assert len(refreshed) == len(fresh)
+    for row in db.rows:
+        if row["embedding"] is not None:
+            top = refreshed.search(row["embedding"], top_k=len(initial), threshold=-2.0)
+            want = fresh.search(row["embedding"], top_k=len(initial), threshold=-2.0)
+            assert sorted(r["id"] for r in top) == sorted(r["id"] for r in want)
+            assert sorted(r["similarity"] for r in top) == pytest.approx(
+                sorted(r["similarity"] for r in want), abs=1e-5
+            )
+
+
+def fake_supabase(rows):
+    supabase = Mock()
+    chain = supabase.table.return_value.select.return_value.eq.return_value
+    chain.gt.return_value.order.return_value.limit.return_value.execute.return_value = (
+        SimpleNamespace(data=rows)
+    )
+    return supabase
+
+
+def test_rag_service_uses_local_index_without_rpc():
+    rows = [
+        {"id": "c1", "content": "Marguerite at the ball", "chunk_index": 1, "embedding": [1.0, 0.0]},
+        {"id": "c2", "content": "A storm at sea", "chunk_index": 2, "embedding": [0.0, 1.0]},
+    ]
+    supabase = fake_supabase(rows)
+    store = LocalVectorStore(max_projects=5, refresh_seconds=60)
+
+    with patch("services.rag.get_embedding", return_value=[0.9, 0.1]), patch(
+        "services.rag.get_vector_store", return_value=store
+    ):
+        service = RAGService(supabase_client=supabase, use_local_index=True)
+        results = service.retrieve_relevant_chunks("p1", "Marguerite", top_k=1, threshold=0.3)
+        service.retrieve_relevant_chunks("p1", "Marguerite", top_k=1, threshold=0.3)
+
+    assert [r["chunk_index"] for r in results] == [1]
+    supabase.rpc.assert_not_called()
+    # Loaded once, then served from memory
+    assert supabase.table.call_count == 1
+
+
+def test_retrieve_many_embeds_and_searches_once():
+    rows = [
+        {"id": "c1", "content": "Marguerite at the ball", "chunk_index": 1, "embedding": [1.0, 0.0]},
+        {"id": "c2", "content": "A storm at sea", "chunk_index": 2, "embedding": [0.0, 1.0]},
+    ]
+    supabase = fake_supabase(rows)
+    store = LocalVectorStore(max_projects=5, refresh_seconds=60)
+    embed = Mock(return_value=[[0.9, 0.1], [0.1, 0.9], [-1.0, 0.0]])
+
+    with patch("services.rag.get_embeddings", embed), patch(
+        "services.rag.get_vector_store", return_value=store
+    ):
+        service = RAGService(supabase_client=supabase, use_local_index=True)
+        results = service.retrieve_many(
+            "p1", ["Marguerite", "storm", "nothing"], top_k=1, fallback_to_recent=False
+        )
+
+    assert [[r["chunk_index"] for r in chunks] for chunks in results] == [[1], [2], []]
+    embed.assert_called_once()
+    supabase.rpc.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,288 @@
+"""
+Property-based tests for the project reindex/backfill command.
+
+Feature: project-reindex, Property: An Interrupted Reindex Resumes to the Same Result
+Validates: missing embeddings are backfilled, relationships are rebuilt, checkpoints resume
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+import itertools
+from types import SimpleNamespace
+from unittest.mock import patch
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.job_queue import JobQueue, JobStore, report_progress
+from services.reindex import ProjectReindexer, STAGE_DONE
+
+
+class FakeQuery:
+    """Minimal stand-in for the PostgREST builder calls used by the reindexer."""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.action = ("select", None)
+        self.order_by = None
+        self.row_limit = None
+
+    def select(self, *columns, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) > value)
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(lambda row: row.get(column) is None)
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by = column
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def update(self, values):
+        self.action = ("update", values)
+        return self
+
+    def insert(self, rows):
+        self.action = ("insert", rows if isinstance(rows, list) else [rows])
+        return self
+
+    def delete(self):
+        self.action = ("delete", None)
+        return self
+
+    def execute(self):
+        rows = self.db.tables.setdefault(self.table, [])
+        kind, values = self.action
+        if kind == "insert":
+            for row in values:
+                rows.append({"id": f"{self.table}-{next(self.db.ids)}", **row})
+            return SimpleNamespace(data=[dict(r) for r in rows[-len(values):]])
+        matched = [r for r in rows if all(f(r) for f in self.filters)]
+        if kind == "update":
+            for row in matched:
+                row.update(values)
+        elif kind == "delete":
+            self.db.tables[self.table] = [r for r in rows if r not in matched]
+        if self.order_by:
+            matched.sort(key=lambda r: r[self.order_by])
+        if self.row_limit is not None:
+            matched = matched[: self.row_limit]
+        return SimpleNamespace(data=[dict(r) for r in matched], count=len(matched))
+
+
+class FakeSupabase:
+    def __init__(self, chunks, stale_relationships=0):
+        self.ids = itertools.count()
+        self.tables = {
+            "narrative_chunks": [
+                {"id": f"c{i}", "project_id": "p1", "chunk_index": i, "content": content,
+                 "embedding": [1.0] if has_embedding else None}
+                for i, (content, has_embedding) in enumerate(chunks)
+            ],
+            "entities": [],
+            "relationships": [
+                {"id": f"stale-{i}", "project_id": "p1", "entity_a_id": "x", "entity_b_id": "y",
+                 "relation_type": "STALE"}
+                for i in range(stale_relationships)
+            ],
+        }
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def extract(texts):
+    """Chunk text "Ann KNOWS Bo" yields two characters and one triple."""
+    for text in texts:
+        subject, relation, obj = text.split()
+        yield SimpleNamespace(
+            entities=[{"text": subject, "type": "CHARACTER"}, {"text": obj, "type": "CHARACTER"}],
+            triples=[SimpleNamespace(subject=subject, relation=relation, object=obj, sentence=text)],
+        )
+
+
+def embed(texts):
+    return [[float(len(t))] for t in texts]
+
+
+def graph_state(db):
+    names = {e["id"]: e["name"] for e in db.tables["entities"]}
+    return (
+        sorted(names.values()),
+        sorted(
+            (names.get(r["entity_a_id"]), r["relation_type"], names.get(r["entity_b_id"]))
+            for r in db.tables["relationships"]
+        ),
+        [c["embedding"] is not None for c in db.tables["narrative_chunks"]],
+    )
+
+
+def make_reindexer(db, store, extractor=extract, page_size=3):
+    return ProjectReindexer(
+        "p1",
+        supabase_client=db,
+        checkpoints=store,
+        page_size=page_size,
+        embed_batch_size=2,
+        concurrency=2,
+        extractor=extractor,
+        embedder=embed,
+    )
+
+
+names = st.sampled_from(["Ann", "Bo", "Cy", "Di"])
+relations = st.sampled_from(["KNOWS", "HAS", "LOVES"])
+chunks = st.lists(
+    st.tuples(st.tuples(names, relations, names).map(" ".join), st.booleans()),
+    min_size=1,
+    max_size=12,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_cache_side_effects():
+    with patch("services.reindex.ProjectReindexer._invalidate_caches"):
+        yield
+
+
+@given(chunks=chunks, fail_after=st.integers(min_value=0, max_value=4), page_size=st.integers(1, 5))
+@settings(max_examples=60, deadline=None)
+def test_interrupted_reindex_resumes_to_same_result(chunks, fail_after, page_size):
+    expected_db = FakeSupabase(chunks, stale_relationships=2)
+    make_reindexer(expected_db, JobStore(":memory:"), page_size=page_size).run()
+
+    calls = itertools.count()
+
+    def flaky(texts):
+        if next(calls) == fail_after:
+            raise RuntimeError("worker died")
+        return extract(texts)
+
+    db = FakeSupabase(chunks, stale_relationships=2)
+    store = JobStore(":memory:")
+    try:
+        make_reindexer(db, store, extractor=flaky, page_size=page_size).run()
+    except RuntimeError:
+        assert store.load_checkpoint("reindex:p1")["stage"] != STAGE_DONE
+        make_reindexer(db, store, page_size=page_size).run()
+
+    assert graph_state(db) == graph_state(expected_db)
+    assert store.load_checkpoint("reindex:p1")["stage"] == STAGE_DONE
+
+
+@given(chunks=chunks)
+@settings(max_examples=60, deadline=None)
+def test_missing_embeddings_are_backfilled_and_graph_rebuilt(chunks):
+    db = FakeSupabase(chunks, stale_relationships=3)
+    original = [c["embedding"] for c in db.tables["narrative_chunks"]]
+    seen = []
+    reindexer = make_reindexer(db, JobStore(":memory:"))
+    reindexer.on_progress = seen.append
+
+    result = reindexer.run()
+
+    after = [c["embedding"] for c in db.tables["narrative_chunks"]]
+    for before, now, (content, _) in zip(original, after, chunks):
+        assert now == (before or [float(len(content))])
+    assert result["chunks_embedded"] == sum(1 for e in original if e is None)
+    assert result["chunks_extracted"] == len(chunks)
+    assert all(r["relation_type"] != "STALE" for r in db.tables["relationships"])
+    assert len({e["name"] for e in db.tables["entities"]}) == len(db.tables["entities"])
+    assert seen and seen[-1]["stage"] == STAGE_DONE
+
+
+def test_flags_skip_stages():
+    db = FakeSupabase([("Ann KNOWS Bo", False)], stale_relationships=1)
+    result = make_reindexer(db, None).run(embeddings=False, graph=False)
+
+    assert db.tables["narrative_chunks"][0]["embedding"] is None
+    assert [r["id"] for r in db.tables["relationships"]] == ["stale-0"]
+    assert sorted(e["name"] for e in db.tables["entities"]) == ["Ann", "Bo"]
+    assert result["relationships_created"] == 0
+
+
+def test_progress_is_recorded_on_the_running_job():
+    store = JobStore(":memory:")
+    job = store.enqueue("reindex", "maintenance", {"project_id": "p1"})
+    store.claim("maintenance", lease_seconds=1)
+
+    store.heartbeat(job["id"], lease_seconds=600, progress={"stage": "extract"})
+
+    stored = store.get(job["id"])
+    assert stored["progress"] == {"stage": "extract"}
+    assert stored["locked_until"] > stored["updated_at"] + 500
+
+
+
+def test_sync_handler_reports_progress_through_the_queue():
+    store = JobStore(":memory:")
+    queue = JobQueue(store)
+    queue.register("reindex", lambda payload: report_progress({"pages": 1}) or "ok", queue="maintenance")
+    job = queue.enqueue("reindex", {"project_id": "p1"})
+
+    assert asyncio.run(queue.run_once("maintenance"))
+
+    stored = store.get(job["id"])
+    assert stored["progress"] == {"pages": 1}
+    assert stored["result"] == "ok"
+    report_progress({"ignored": True})  # outside a job: no-op
+
+
+def test_restart_clears_the_checkpoint_once_at_enqueue():
+    from fastapi import HTTPException
+    from config import settings
+    from routes.admin import ReindexRequest, reindex_project
+    from services.reindex import run_reindex_job
+
+    store = JobStore(":memory:")
+    queue = JobQueue(store)
+    queue.register("reindex", run_reindex_job, queue="maintenance", max_attempts=3)
+    store.save_checkpoint("reindex:p1", {"project_id": "p1", "stage": "extract", "after_index": 4})
+
+    with patch.object(settings, "admin_token", "secret"), patch(
+        "routes.admin.get_job_queue", return_value=queue
+    ):
+        for token in (None, "wrong", "secre"):
+            with pytest.raises(HTTPException) as excinfo:
+                asyncio.run(reindex_project("p1", ReindexRequest(restart=True), x_admin_token=token))
+            assert excinfo.value.status_code == 401
+        assert store.load_checkpoint("reindex:p1") is not None
+
+        queued = asyncio.run(reindex_project("p1", ReindexRequest(restart=True), x_admin_token="secret"))
+
+    assert store.load_checkpoint("reindex:p1") is None
+    payload = store.get(queued["job_id"])["payload"]
+    assert "restart" not in payload
+
+    # A retry after the first attempt checkpointed resumes instead of restarting
+    store.save_checkpoint("reindex:p1", {"project_id": "p1", "stage": "extract", "after_index": 2})
+    with patch("services.job_queue.get_job_queue", return_value=queue), patch(
+        "services.reindex.ProjectReindexer.run", autospec=True,
+        side_effect=lambda self, **kwargs: self._load_checkpoint(),
+    ) as run:
+        resumed = run_reindex_job({**payload, "restart": True})
+
+    assert "restart" not in run.call_args.kwargs
+    assert resumed.after_index == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,112 @@
+"""
+Property-based tests for lazy style model loading.
+
+Feature: style-models-lazy, Property: Only Used Classifiers Are Loaded, Exactly Once
+Validates: per-classifier lazy loading, concurrent first use, and the warmup hook
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.style_analysis import StyleModels
+
+
+def make_models():
+    models = StyleModels(backend="torch", num_threads=0)
+    loads = []
+
+    def fake_load(name):
+        loads.append(name)
+        return MagicMock(name=name)
+
+    models._load = fake_load
+    return models, loads
+
+
+@given(used=st.lists(st.sampled_from(["nlp", "emotion_classifier", "genre_classifier"]), max_size=10))
+@settings(max_examples=100, deadline=None)
+def test_only_used_models_load_once(used):
+    models, loads = make_models()
+
+    for attr in used:
+        getattr(models, attr)
+
+    expected = {attr.replace("_classifier", "") for attr in used}
+    assert sorted(loads) == sorted(expected)
+    assert set(models.loaded()) == expected
+
+
+def test_concurrent_first_use_loads_once():
+    models, loads = make_models()
+    barrier = threading.Barrier(8)
+
+    def use():
+        barrier.wait()
+        return models.genre_classifier
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: use(), range(8)))
+
+    assert loads == ["genre"]
+    assert all(r is results[0] for r in results)
+
+
+def test_warmup_runs_one_inference_and_skips_failures():
+    models, loads = make_models()
+    original = models._load
+
+    def load(name):
+        if name == "nlp":
+            raise OSError("Can't find model 'en_core_web_sm'")
+        return original(name)
+
+    models._load = load
+
+    assert models.warmup(["all"]) == ["emotion", "genre"]
+    models.genre_classifier.assert_called_once()
+    models.emotion_classifier.assert_called_once()
+    assert models.warmup(["emotion", "nope"]) == ["emotion"]
+    assert loads == ["emotion", "genre"]
+
+
+def test_onnx_backend_falls_back_to_full_precision_without_optimum():
+    models = StyleModels(backend="onnx", num_threads=0)
+    fake_transformers = MagicMock()
+    with patch.dict(sys.modules, {"transformers": fake_transformers}), \
+         patch.object(models, "_load_onnx_model", side_effect=ImportError("optimum")), \
+         patch.object(models, "_load_quantized_model") as quantized:
+        models._build_pipeline("text-classification", "some/model")
+
+    quantized.assert_not_called()
+    assert fake_transformers.pipeline.call_args.kwargs["model"] == "some/model"
+
+
+def test_full_precision_is_the_default_and_quantization_is_opt_in():
+    assert StyleModels(num_threads=0).backend == "torch"
+
+    models = StyleModels(backend="quantized", num_threads=0)
+    fake_transformers = MagicMock()
+    with patch.dict(sys.modules, {"transformers": fake_transformers}), \
+         patch.object(models, "_load_quantized_model", return_value="int8-model") as quantized:
+        models._build_pipeline("text-classification", "some/model")
+
+    quantized.assert_called_once_with("some/model")
+    assert fake_transformers.pipeline.call_args.kwargs["model"] == "int8-model"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        StyleModels(backend="tpu")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,133 @@
+"""
+Property-based tests for streaming full-manuscript style analysis.
+
+Feature: style-streaming, Property: Statistics Do Not Depend on How the Book Is Chunked
+Validates: lossless segmentation, evenly spaced classifier windows, batched classification
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import re
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.style_analysis import (
+    EmptyManuscriptError,
+    StyleStats,
+    WindowSampler,
+    analyze_writer_style,
+    iter_text_segments,
+)
+
+
+class FakeDoc:
+    """Minimal stand-in for a spaCy Doc: one sentence per '.', regex tokens."""
+
+    def __init__(self, text):
+        self.sents = [SimpleNamespace(text=s) for s in re.findall(r"[^.]+\.?", text) if s.strip()]
+        self._tokens = [
+            SimpleNamespace(
+                is_alpha=t.isalpha(),
+                lower_=t.lower(),
+                lemma_=t,
+                pos_="ADJ" if t.isalpha() else "PUNCT",
+                is_stop=False,
+            )
+            for t in re.findall(r"\w+|[^\w\s]", text)
+        ]
+
+    def __iter__(self):
+        return iter(self._tokens)
+
+
+words = st.sampled_from(["rain", "harbour", "quiet", "Mara", "ran", "the", "letter", "lost"])
+sentences = st.lists(words, min_size=1, max_size=30).map(lambda ws: " ".join(ws) + ". ")
+pages = st.lists(st.lists(sentences, max_size=10).map("".join), max_size=12)
+
+
+@given(pages=pages, max_chars=st.integers(min_value=20, max_value=400))
+@settings(max_examples=100, deadline=None)
+def test_segments_are_lossless_and_bounded(pages, max_chars):
+    segments = list(iter_text_segments(pages, max_chars=max_chars))
+
+    text = "".join(pages)
+    if text.strip():
+        assert "".join(segments) == text
+    assert all(len(s) <= max_chars for s in segments)
+
+
+@given(
+    tokens=st.lists(st.sampled_from(["a", "b", "c", "d", "e", "f", ","]), max_size=300),
+    cuts=st.lists(st.integers(min_value=0, max_value=300), max_size=6),
+    window=st.integers(min_value=5, max_value=60),
+)
+@settings(max_examples=100, deadline=None)
+def test_richness_is_independent_of_chunking(tokens, cuts, window):
+    bounds = sorted({0, len(tokens), *[c for c in cuts if c <= len(tokens)]})
+    chunked = StyleStats(richness_window=window)
+    for lo, hi in zip(bounds, bounds[1:]):
+        chunked.add_doc(FakeDoc(" ".join(tokens[lo:hi])))
+    whole = StyleStats(richness_window=window)
+    whole.add_doc(FakeDoc(" ".join(tokens)))
+
+    assert chunked.richness == pytest.approx(whole.richness)
+    assert chunked.vocab == whole.vocab
+
+
+@given(
+    count=st.integers(min_value=0, max_value=500),
+    max_windows=st.integers(min_value=1, max_value=20),
+)
+@settings(max_examples=100, deadline=None)
+def test_window_sample_is_bounded_and_spans_the_book(count, max_windows):
+    sampler = WindowSampler(max_windows=max_windows, window_chars=10)
+    for i in range(count):
+        sampler.add(f"{i:09d} ")
+
+    indices = sampler.indices
+    assert len(indices) <= max_windows
+    assert 0 not in indices
+    assert all(i % sampler.stride == 0 for i in indices)
+    assert indices == list(range(sampler.stride, count, sampler.stride))
+    assert len(sampler.windows()) == (len(indices) or (1 if count else 0))
+
+
+def test_whole_manuscript_is_analyzed_with_batched_classifiers():
+    book = ["Mara ran through the quiet harbour in the endless rain that night. " * 40] * 30
+    models = MagicMock()
+    models.nlp.pipe.side_effect = lambda segments, **kwargs: (FakeDoc(s) for s in segments)
+    models.genre_classifier.side_effect = lambda texts, labels, **kw: [
+        {"labels": ["noir", "horror"], "scores": [0.7, 0.3]} for _ in texts
+    ]
+    models.emotion_classifier.side_effect = lambda texts, **kw: [
+        [{"label": "sadness", "score": 0.6}, {"label": "joy", "score": 0.4}] for _ in texts
+    ]
+
+    with patch("services.style_analysis.get_style_models", return_value=models):
+        blueprint = analyze_writer_style(iter(book))
+
+    assert models.genre_classifier.call_count == 1
+    assert models.emotion_classifier.call_count == 1
+    assert 1 < len(models.genre_classifier.call_args.args[0]) <= 16
+    assert blueprint["dominant_genre"] == "noir"
+    assert blueprint["dominant_emotion"] == "Sadness"
+    assert blueprint["avg_sentence_length"] == 12
+    assert len(blueprint["style_anchors"]) == 5
+
+
+def test_empty_manuscript_is_rejected():
+    models = MagicMock()
+    models.nlp.pipe.side_effect = lambda segments, **kwargs: (FakeDoc(s) for s in segments)
+    with patch("services.style_analysis.get_style_models", return_value=models):
+        with pytest.raises(EmptyManuscriptError):
+            analyze_writer_style(iter(["", "  \n"]))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,91 @@
+"""
+Property-based tests for retrieved-scene reuse in the suggestion service.
+
+Feature: suggest-scene-cache, Property: Stable Retrieval Window Within a Sentence
+Validates: keystrokes inside one sentence reuse scenes without a new embedding call
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from unittest.mock import Mock
+from hypothesis import given, strategies as st, settings
+import pytest
+
+from services.suggestion import SuggestionService, retrieval_window
+
+
+words = st.text(
+    alphabet=st.characters(whitelist_categories=("Ll", "Lu")), min_size=1, max_size=10
+)
+sentences = st.lists(words, min_size=1, max_size=12).map(lambda ws: " ".join(ws) + ".")
+whitespace = st.sampled_from([" ", "  ", "\n", "\t", " \n "])
+
+
+@given(
+    finished=st.lists(sentences, min_size=1, max_size=40),
+    typing=st.lists(words, min_size=0, max_size=8),
+    spacing=whitespace,
+)
+@settings(max_examples=100, deadline=None)
+def test_window_is_stable_while_typing_a_sentence(finished, typing, spacing):
+    base = spacing.join(finished)
+    window = retrieval_window(base)
+
+    partial = base
+    for word in typing:
+        partial += spacing + word
+        assert retrieval_window(partial) == window
+
+    assert len(window) <= 500
+    assert "  " not in window and "\n" not in window
+
+
+@given(finished=st.lists(sentences, min_size=1, max_size=60))
+@settings(max_examples=100, deadline=None)
+def test_window_starts_at_sentence_boundary(finished):
+    text = " ".join(finished)
+    window = retrieval_window(text)
+
+    collapsed = " ".join(text.split())
+    assert collapsed.endswith(window)
+    start = len(collapsed) - len(window)
+    assert start == 0 or collapsed[start - 2 : start] == ". " or len(window) == 500
+
+
+def make_service():
+    service = SuggestionService(api_key="test-key", supabase_client=Mock())
+    service.rag_service = Mock()
+    service.rag_service.retrieve_relevant_chunks.return_value = [
+        {"content": "Marguerite hid the letter.", "similarity": 0.8, "chunk_index": 4}
+    ]
+    return service
+
+
+def test_keystrokes_in_one_sentence_reuse_retrieval():
+    service = make_service()
+    text = "Marguerite opened the drawer. The letter was gone. She"
+
+    first = service._get_relevant_scenes("p1", text)
+    for suffix in [" t", " tu", " tur", " turned"]:
+        assert service._get_relevant_scenes("p1", text + suffix) == first
+    service._get_relevant_scenes("p1", text + " turned. Then")
+    service._get_relevant_scenes("p2", text)
+
+    assert service.rag_service.retrieve_relevant_chunks.call_count == 3
+
+
+def test_failed_retrieval_is_not_cached():
+    service = make_service()
+    service.rag_service.retrieve_relevant_chunks.side_effect = [RuntimeError("down"), []]
+
+    assert service._get_relevant_scenes("p1", "It rained.") == []
+    assert service._get_relevant_scenes("p1", "It rained.") == []
+    assert service.rag_service.retrieve_relevant_chunks.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
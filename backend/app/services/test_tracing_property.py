@@ -0,0 +1,179 @@
+"""
+Property-based tests for request tracing.
+
+Feature: tracing, Property: Work Started Inside a Span Joins Its Trace
+Validates: traceparent round-trip, parent links, executor propagation, job continuation, OTLP export
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncio
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from hypothesis import given, strategies as st, settings
+import pytest
+
+import lib.tracing as tracing
+from lib.metrics import timed
+from lib.tracing import (
+    SPAN_KIND_CONSUMER,
+    FileSpanExporter,
+    SpanContext,
+    Tracer,
+    current_traceparent,
+    parse_traceparent,
+    propagate,
+)
+from services.job_queue import JobQueue, JobStore
+
+
+class MemoryExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+@pytest.fixture
+def exported(monkeypatch):
+    """Spans finished on the global tracer during the test."""
+    exporter = MemoryExporter()
+    tracer = Tracer(exporter)
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+
+    def spans():
+        tracer.flush()
+        return {span.name: span for span in exporter.spans}
+
+    return spans
+
+
+@given(
+    trace_id=st.text(alphabet="0123456789abcdef", min_size=32, max_size=32),
+    span_id=st.text(alphabet="0123456789abcdef", min_size=16, max_size=16),
+)
+@settings(max_examples=100, deadline=None)
+def test_traceparent_round_trips(trace_id, span_id):
+    context = SpanContext(trace_id=trace_id, span_id=span_id)
+    valid = set(trace_id) != {"0"} and set(span_id) != {"0"}
+
+    assert parse_traceparent(context.traceparent) == (context if valid else None)
+    assert parse_traceparent(context.traceparent.upper()) == (context if valid else None)
+
+
+@pytest.mark.parametrize(
+    "header", [None, "", "garbage", "00-abc-def-01", "00-" + "g" * 32 + "-" + "1" * 16 + "-01"]
+)
+def test_invalid_traceparent_is_ignored(header):
+    assert parse_traceparent(header) is None
+
+
+def test_nested_spans_share_the_remote_trace(exported):
+    remote = SpanContext(trace_id="a" * 32, span_id="b" * 16)
+
+    with tracing.start_span("request", parent=remote):
+        with timed("analysis", "manual_analyze", project_id="p1"):
+            with pytest.raises(RuntimeError):
+                with timed("kg", "load"):
+                    raise RuntimeError("boom")
+
+    spans = exported()
+    request, analysis, kg = spans["request"], spans["analysis.manual_analyze"], spans["kg.load"]
+    assert {s.context.trace_id for s in spans.values()} == {remote.trace_id}
+    assert request.parent_span_id == remote.span_id
+    assert analysis.parent_span_id == request.context.span_id
+    assert kg.parent_span_id == analysis.context.span_id
+    assert analysis.attributes == {"project_id": "p1"}
+    assert kg.error == "RuntimeError: boom" and analysis.error is None
+    assert current_traceparent() is None
+
+
+def test_executor_threads_join_the_callers_trace(exported):
+    def work(n):
+        with tracing.start_span(f"work {n}"):
+            return current_traceparent()
+
+    with tracing.start_span("batch"):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            joined = list(pool.map(propagate(work), range(8)))
+            pool.submit(work, "detached").result()
+
+    spans = exported()
+    batch = spans["batch"]
+    for n, traceparent in enumerate(joined):
+        span = spans[f"work {n}"]
+        assert span.parent_span_id == batch.context.span_id
+        assert parse_traceparent(traceparent) == span.context
+    assert spans["work detached"].context.trace_id != batch.context.trace_id
+
+
+def test_background_job_continues_the_enqueuing_trace(exported):
+    queue = JobQueue(JobStore(":memory:"))
+    seen = []
+    queue.register("summaries", lambda payload: seen.append(current_traceparent()), queue="q")
+
+    with tracing.start_span("POST /editor/analyze") as request:
+        job = queue.enqueue("summaries", {"project_id": "p1"})
+    assert job["traceparent"] == request.context.traceparent
+
+    # The worker runs later, outside the request's context
+    asyncio.run(queue.run_once("q"))
+
+    job_span = exported()["job summaries"]
+    assert job_span.kind == SPAN_KIND_CONSUMER
+    assert job_span.parent_span_id == request.context.span_id
+    assert job_span.context.trace_id == request.context.trace_id
+    assert parse_traceparent(seen[0]) == job_span.context
+
+
+def test_file_exporter_writes_otlp_json_lines():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "traces" / "spans.jsonl"
+        tracer = Tracer(FileSpanExporter(path, service_name="engine-test"))
+        with tracer.start_span("outer", attributes={"n": 3, "ok": True}):
+            tracer.record_span("supabase.narrative_chunks.select", 10, 20, error="HTTP 500")
+        tracer.flush()
+
+        lines = path.read_text().splitlines()
+    spans = [
+        span
+        for line in lines
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+    resource = json.loads(lines[0])["resourceSpans"][0]["resource"]
+    assert resource["attributes"] == [{"key": "service.name", "value": {"stringValue": "engine-test"}}]
+
+    by_name = {span["name"]: span for span in spans}
+    outer, call = by_name["outer"], by_name["supabase.narrative_chunks.select"]
+    assert call["parentSpanId"] == outer["spanId"] and "parentSpanId" not in outer
+    assert call["traceId"] == outer["traceId"]
+    assert (call["startTimeUnixNano"], call["endTimeUnixNano"]) == ("10", "20")
+    assert call["status"] == {"code": 2, "message": "HTTP 500"}
+    assert outer["attributes"] == [
+        {"key": "n", "value": {"intValue": "3"}},
+        {"key": "ok", "value": {"boolValue": True}},
+    ]
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+
+    with tracer.start_span("request") as span:
+        tracer.record_span("call", 0, 1)
+        assert span is None
+        assert current_traceparent() is None
+    tracer.flush()
+
+    assert not tracer.enabled and tracer._queue.empty()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
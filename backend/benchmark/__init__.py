@@ -0,0 +1,14 @@
+"""
+Offline benchmark for the editor endpoints.
+
+Runs the app in-process against an in-memory PostgREST stand-in and a
+local OpenAI-compatible server with injected latency, using a synthetic
+corpus, so results are reproducible and cost nothing. From backend/:
+
+    python -m benchmark [--scenarios save,analyze,suggest,ws] [--requests N]
+        [--concurrency N] [--llm-latency-ms MS] [--db-latency-ms MS] [--json out.json]
+
+Reports p50/p95/p99 latency, throughput, and DB and LLM calls per request.
+App settings come from the environment as usual (e.g. RAG_LOCAL_INDEX=true),
+so configurations can be compared run against run.
+"""
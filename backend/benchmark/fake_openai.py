@@ -0,0 +1,205 @@
+"""
+Local stand-in for the OpenAI HTTP API with injected latency.
+
+Serves /v1/chat/completions and /v1/embeddings from a thread per request,
+so concurrent calls overlap as they would against the real API. The app's
+OpenAI clients are pointed here with OPENAI_BASE_URL; nothing in the app
+is patched, so the SDK's request building, retries and parsing are all
+part of what gets measured.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import math
+import random
+import struct
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+DEFAULT_REPLY = "The lantern guttered as the tide crept over the harbor steps."
+
+
+def embed_text(text: str, dimensions: int = 1536) -> list[float]:
+    """
+    Deterministic unit-length embedding from hashed words.
+
+    Texts that share words get a positive cosine similarity, which is
+    enough for match_narrative_chunks to return plausible neighbours.
+    """
+    vector = [0.0] * dimensions
+    for word in text.lower().split():
+        digest = hashlib.blake2b(word.strip('.,;:!?"\'').encode(), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimensions
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        vector[0], norm = 1.0, 1.0
+    return [v / norm for v in vector]
+
+
+class FakeOpenAIServer:
+    """
+    OpenAI-compatible HTTP server on localhost.
+
+    Args:
+        latency: Seconds added to every chat completion
+        embedding_latency: Seconds added to every embeddings call (default: latency / 4)
+        jitter: Up to this many extra seconds, uniformly at random
+        dimensions: Embedding size (1536 matches text-embedding-3-small)
+        reply: Content of every chat completion (JSON requests get "{}")
+        seed: Seed for the jitter
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        embedding_latency: float | None = None,
+        jitter: float = 0.0,
+        dimensions: int = 1536,
+        reply: str = DEFAULT_REPLY,
+        seed: int = 7,
+    ) -> None:
+        self.latency = latency
+        self.embedding_latency = latency / 4 if embedding_latency is None else embedding_latency
+        self.jitter = jitter
+        self.dimensions = dimensions
+        self.reply = reply
+        self.calls: Counter[str] = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("Server is not running")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        """Start serving on a free port; returns the base URL for OPENAI_BASE_URL."""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _handler_for(self))
+        server.daemon_threads = True
+        self._server = server
+        self._thread = threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> FakeOpenAIServer:
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def snapshot(self) -> Counter[str]:
+        """Calls served so far, by endpoint."""
+        with self._lock:
+            return Counter(self.calls)
+
+    def _delay(self, base: float) -> None:
+        with self._lock:
+            extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+        if base + extra > 0:
+            time.sleep(base + extra)
+
+    def _record(self, endpoint: str) -> None:
+        with self._lock:
+            self.calls[endpoint] += 1
+
+    def chat_completion(self, body: dict[str, Any]) -> dict[str, Any]:
+        self._record("chat.completions")
+        self._delay(self.latency)
+        wants_json = (body.get("response_format") or {}).get("type") == "json_object"
+        content = "{}" if wants_json else self.reply
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+        completion_tokens = len(content.split())
+        return {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def embeddings(self, body: dict[str, Any]) -> dict[str, Any]:
+        self._record("embeddings")
+        self._delay(self.embedding_latency)
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = int(body.get("dimensions") or self.dimensions)
+        data = []
+        for index, text in enumerate(inputs):
+            vector = embed_text(str(text), dimensions)
+            if body.get("encoding_format") == "base64":
+                # The SDK asks for base64 float32 unless told otherwise
+                encoded: Any = base64.b64encode(struct.pack(f"<{dimensions}f", *vector)).decode()
+            else:
+                encoded = vector
+            data.append({"object": "embedding", "index": index, "embedding": encoded})
+        tokens = sum(len(str(text).split()) for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+
+def _handler_for(fake: FakeOpenAIServer) -> type[BaseHTTPRequestHandler]:
+    routes = {
+        "/v1/chat/completions": fake.chat_completion,
+        "/v1/embeddings": fake.embeddings,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; without this, delayed ACKs add ~40 ms
+        disable_nagle_algorithm = True
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            route = routes.get(self.path.split("?")[0])
+            if route is None:
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            self._send(200, route(body))
+
+        def _send(self, status: int, payload: dict[str, Any]) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *_args: Any) -> None:
+            pass
+
+    return Handler
@@ -0,0 +1,478 @@
+"""
+In-memory stand-in for the Supabase client's PostgREST query builder.
+
+Covers the builder calls the app makes (select/insert/upsert/update/delete
+with eq, neq, gt(e), lt(e), in_, is_, or_, order, limit, range, single and
+exact counts) and the RPCs from migrations/ (append_narrative_chunk,
+match_narrative_chunks, match_narrative_chunks_multi, get_plot_board).
+Every execute() counts as one database round trip and can sleep for a
+configurable latency, so the benchmark sees how many calls a request makes
+and what they would cost over the network.
+"""
+
+from __future__ import annotations
+
+import json
+import operator
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+import numpy as np
+
+# Column defaults from db.sql (id is added for every table)
+TABLE_DEFAULTS: dict[str, dict[str, Callable[[], Any]]] = {
+    "projects": {"created_at": lambda: _now(), "updated_at": lambda: _now()},
+    "entities": {
+        "created_at": lambda: _now(),
+        "updated_at": lambda: _now(),
+        "metadata": dict,
+        "is_initial_setup": lambda: False,
+    },
+    "narrative_chunks": {"created_at": lambda: _now(), "updated_at": lambda: _now()},
+    "relationships": {"updated_at": lambda: _now()},
+    "consistency_logs": {"created_at": lambda: _now(), "status": lambda: "PENDING"},
+}
+DEFAULT_COLUMNS: dict[str, Callable[[], Any]] = {"created_at": lambda: _now()}
+# Tables whose updated_at is stamped on every update by a trigger
+UPDATED_AT_TABLES = {"entities", "narrative_chunks", "relationships"}
+
+ORDERINGS = {"gt": operator.gt, "gte": operator.ge, "lt": operator.lt, "lte": operator.le}
+
+Row = dict[str, Any]
+Predicate = Callable[[Row], bool]
+
+
+class FakeAPIError(Exception):
+    """Raised where PostgREST would answer with an error, with PostgREST's error code."""
+
+    def __init__(self, message: str, code: str | None = None) -> None:
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, data: Any, count: int | None = None) -> None:
+        self.data = data
+        self.count = count
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _split_top_level(text: str) -> list[str]:
+    """Split on commas outside parentheses ("a, b(c, d)" -> ["a", "b(c, d)"])."""
+    parts, depth, current = [], 0, []
+    for ch in text:
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += (ch == "(") - (ch == ")")
+        current.append(ch)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def _foreign_key(resource: str) -> str:
+    """Column referencing an embedded resource ("entities" -> "entity_id")."""
+    singular = resource[:-3] + "y" if resource.endswith("ies") else resource.rstrip("s")
+    return f"{singular}_id"
+
+
+def _compare(op: str, value: Any, target: Any) -> bool:
+    if op == "is":
+        return value is None if target in (None, "null") else value is target
+    if op == "in":
+        return str(value) in {str(t) for t in target}
+    if value is None:
+        return False
+    if op == "eq":
+        return str(value) == str(target) if isinstance(target, str) else value == target
+    if op == "neq":
+        return not _compare("eq", value, target)
+    if isinstance(value, (int, float)) and isinstance(target, str):
+        target = float(target)
+    return ORDERINGS[op](value, target)
+
+
+def _as_vector(embedding: Any) -> np.ndarray:
+    if isinstance(embedding, str):
+        embedding = json.loads(embedding)
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class FakeQuery:
+    """One PostgREST request being built (client.table(name)...)."""
+
+    def __init__(self, db: FakeSupabase, table: str) -> None:
+        self._db = db
+        self._table = table
+        self._operation = "select"
+        self._columns = "*"
+        self._count: str | None = None
+        self._head = False
+        self._payload: Any = None
+        self._on_conflict = "id"
+        self._filters: list[Predicate] = []
+        self._orders: list[tuple[str, bool]] = []
+        self._limit: int | None = None
+        self._offset = 0
+        self._single = False
+        self._maybe_single = False
+
+    # Operations
+
+    def select(self, *columns: str, count: str | None = None, head: bool = False) -> FakeQuery:
+        self._columns = ",".join(columns) or "*"
+        self._count, self._head = count, head
+        return self
+
+    def insert(self, rows: Row | list[Row], **_kwargs: Any) -> FakeQuery:
+        self._operation, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows: Row | list[Row], on_conflict: str = "id", **_kwargs: Any) -> FakeQuery:
+        self._operation, self._payload, self._on_conflict = "upsert", rows, on_conflict
+        return self
+
+    def update(self, values: Row, **_kwargs: Any) -> FakeQuery:
+        self._operation, self._payload = "update", values
+        return self
+
+    def delete(self, **_kwargs: Any) -> FakeQuery:
+        self._operation = "delete"
+        return self
+
+    # Filters
+
+    def _where(self, column: str, op: str, target: Any) -> FakeQuery:
+        self._filters.append(lambda row: _compare(op, row.get(column), target))
+        return self
+
+    def eq(self, column: str, value: Any) -> FakeQuery:
+        return self._where(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> FakeQuery:
+        return self._where(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> FakeQuery:
+        return self._where(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> FakeQuery:
+        return self._where(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> FakeQuery:
+        return self._where(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> FakeQuery:
+        return self._where(column, "lte", value)
+
+    def in_(self, column: str, values: list[Any]) -> FakeQuery:
+        return self._where(column, "in", list(values))
+
+    def is_(self, column: str, value: Any) -> FakeQuery:
+        return self._where(column, "is", value)
+
+    def match(self, query: Row) -> FakeQuery:
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def or_(self, filters: str, **_kwargs: Any) -> FakeQuery:
+        """PostgREST or syntax, e.g. "a.in.(1,2),b.eq.3"."""
+        clauses = []
+        for clause in _split_top_level(filters):
+            column, op, target = clause.split(".", 2)
+            if op == "in":
+                target = [t.strip() for t in target.strip("()").split(",") if t.strip()]
+            clauses.append((column, op, target))
+        self._filters.append(
+            lambda row: any(_compare(op, row.get(col), target) for col, op, target in clauses)
+        )
+        return self
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False, **_kwargs: Any) -> FakeQuery:
+        self._orders.append((column, desc))
+        return self
+
+    def limit(self, size: int, **_kwargs: Any) -> FakeQuery:
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **_kwargs: Any) -> FakeQuery:
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self) -> FakeQuery:
+        self._single = True
+        return self
+
+    def maybe_single(self) -> FakeQuery:
+        self._maybe_single = True
+        return self
+
+    def execute(self) -> FakeResponse:
+        return self._db._execute(f"{self._table}.{self._operation}", self._run)
+
+    def _run(self, tables: dict[str, list[Row]]) -> FakeResponse:
+        rows = tables[self._table]
+        if self._operation == "insert":
+            return FakeResponse([self._db._insert(self._table, row) for row in self._rows()])
+        if self._operation == "upsert":
+            return FakeResponse([self._upsert_one(rows, row) for row in self._rows()])
+
+        matched = [row for row in rows if all(f(row) for f in self._filters)]
+        if self._operation == "update":
+            for row in matched:
+                row.update(self._payload)
+                if self._table in UPDATED_AT_TABLES:
+                    row["updated_at"] = _now()
+                self._db._index_vector(self._table, row)
+            return FakeResponse([self._db._output(row) for row in matched])
+        if self._operation == "delete":
+            ids = {id(row) for row in matched}
+            rows[:] = [row for row in rows if id(row) not in ids]
+            return FakeResponse([self._db._output(row) for row in matched])
+
+        for column, desc in reversed(self._orders):
+            present = [row for row in matched if row.get(column) is not None]
+            missing = [row for row in matched if row.get(column) is None]
+            present.sort(key=lambda row: row[column], reverse=desc)
+            # Postgres puts NULLs last ascending and first descending
+            matched = missing + present if desc else present + missing
+        count = len(matched) if self._count else None
+        matched = matched[self._offset :]
+        if self._limit is not None:
+            matched = matched[: self._limit]
+        data = [] if self._head else [self._project(tables, row) for row in matched]
+
+        if self._single or self._maybe_single:
+            if len(data) > 1 or (self._single and not data):
+                raise FakeAPIError(f"JSON object requested, {len(data)} rows returned", code="PGRST116")
+            return FakeResponse(data[0] if data else None, count)
+        return FakeResponse(data, count)
+
+    def _rows(self) -> list[Row]:
+        return [self._payload] if isinstance(self._payload, dict) else list(self._payload)
+
+    def _upsert_one(self, rows: list[Row], row: Row) -> Row:
+        keys = [k.strip() for k in self._on_conflict.split(",")]
+        for existing in rows:
+            if all(existing.get(k) == row.get(k) for k in keys):
+                existing.update(row)
+                self._db._index_vector(self._table, existing)
+                return self._db._output(existing)
+        return self._db._insert(self._table, row)
+
+    def _project(self, tables: dict[str, list[Row]], row: Row) -> Row:
+        out: Row = {}
+        for column in _split_top_level(self._columns):
+            if column == "*":
+                out.update(self._db._output(row))
+            elif "(" in column:
+                resource, inner = column[:-1].split("(", 1)
+                ref = row.get(_foreign_key(resource.strip()))
+                target = next((r for r in tables[resource.strip()] if r.get("id") == ref), None)
+                out[resource.strip()] = (
+                    None
+                    if target is None
+                    else {c: target.get(c) for c in _split_top_level(inner)}
+                )
+            else:
+                value = row.get(column)
+                out[column] = json.dumps(value) if column == "embedding" and value else value
+        return out
+
+
+class FakeRPC:
+    def __init__(self, db: FakeSupabase, name: str, params: Row) -> None:
+        self._db, self._name, self._params = db, name, params
+
+    def execute(self) -> FakeResponse:
+        handler = getattr(self._db, f"_rpc_{self._name}", None)
+        if handler is None:
+            raise FakeAPIError(f"Could not find the function public.{self._name}", code="PGRST202")
+        return self._db._execute(f"rpc.{self._name}", lambda tables: FakeResponse(handler(**self._params)))
+
+
+class FakeSupabase:
+    """
+    Thread-safe in-memory database behind a Supabase-shaped client.
+
+    Args:
+        latency: Seconds each round trip sleeps (outside the lock), 0 for none
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.tables: dict[str, list[Row]] = defaultdict(list)
+        self.calls: Counter[str] = Counter()
+        self._vectors: dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Row | None = None, **_kwargs: Any) -> FakeRPC:
+        return FakeRPC(self, name, dict(params or {}))
+
+    def seed(self, table: str, rows: list[Row]) -> list[Row]:
+        """Insert rows directly, without counting calls."""
+        with self._lock:
+            return [self._insert(table, row) for row in rows]
+
+    def snapshot(self) -> Counter[str]:
+        """Round trips so far, by "<table>.<operation>" or "rpc.<name>"."""
+        with self._lock:
+            return Counter(self.calls)
+
+    def _execute(self, operation: str, run: Callable[[dict[str, list[Row]]], FakeResponse]) -> FakeResponse:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[operation] += 1
+            return run(self.tables)
+
+    def _insert(self, table: str, row: Row) -> Row:
+        stored = {"id": str(uuid.uuid4())}
+        for column, default in TABLE_DEFAULTS.get(table, DEFAULT_COLUMNS).items():
+            stored[column] = default()
+        stored.update(row)
+        self._index_vector(table, stored)
+        self.tables[table].append(stored)
+        return self._output(stored)
+
+    def _index_vector(self, table: str, row: Row) -> None:
+        """Keep a normalized copy of chunk embeddings for the match RPCs."""
+        if table == "narrative_chunks" and row.get("embedding") is not None:
+            self._vectors[row["id"]] = _as_vector(row["embedding"])
+
+    def _output(self, row: Row) -> Row:
+        out = dict(row)
+        if isinstance(out.get("embedding"), list):
+            # pgvector columns come back as text
+            out["embedding"] = json.dumps(out["embedding"])
+        return out
+
+    # RPCs (migrations/)
+
+    def _rpc_append_narrative_chunk(
+        self, p_project_id: str, p_content: str, p_content_hash: str, p_embedding: Any = None
+    ) -> list[Row]:
+        chunks = [c for c in self.tables["narrative_chunks"] if c.get("project_id") == p_project_id]
+        for chunk in chunks:
+            if chunk.get("content_hash") == p_content_hash:
+                return [{"id": chunk["id"], "chunk_index": chunk["chunk_index"], "inserted": False}]
+        next_index = max((c.get("chunk_index") or 0 for c in chunks), default=0) + 1
+        row = self._insert(
+            "narrative_chunks",
+            {
+                "project_id": p_project_id,
+                "content": p_content,
+                "chunk_index": next_index,
+                "content_hash": p_content_hash,
+                "embedding": p_embedding,
+            },
+        )
+        return [{"id": row["id"], "chunk_index": next_index, "inserted": True}]
+
+    def _match(self, query: Any, threshold: float, count: int, project_id: str) -> list[Row]:
+        vector = _as_vector(query)
+        scored = []
+        for chunk in self.tables["narrative_chunks"]:
+            stored = self._vectors.get(chunk["id"])
+            if chunk.get("project_id") != project_id or stored is None:
+                continue
+            similarity = float(stored @ vector)
+            if similarity > threshold:
+                scored.append((similarity, chunk))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [
+            {
+                "id": chunk["id"],
+                "content": chunk["content"],
+                "similarity": similarity,
+                "chunk_index": chunk.get("chunk_index"),
+            }
+            for similarity, chunk in scored[:count]
+        ]
+
+    def _rpc_match_narrative_chunks(
+        self, query_embedding: Any, match_threshold: float, match_count: int, p_project_id: str
+    ) -> list[Row]:
+        return self._match(query_embedding, match_threshold, match_count, p_project_id)
+
+    def _rpc_match_narrative_chunks_multi(
+        self, query_embeddings: list[Any], match_threshold: float, match_count: int, p_project_id: str
+    ) -> list[Row]:
+        return [
+            {"query_index": index, **row}
+            for index, query in enumerate(query_embeddings)
+            for row in self._match(query, match_threshold, match_count, p_project_id)
+        ]
+
+    def _rpc_bump_plot_data_version(self, p_project_id: str) -> None:
+        versions = self.tables["plot_data_versions"]
+        for row in versions:
+            if row.get("project_id") == p_project_id:
+                row["version"] = row.get("version", 0) + 1
+                row["updated_at"] = _now()
+                return None
+        self._insert("plot_data_versions", {"project_id": p_project_id, "version": 1})
+        return None
+
+    def _rpc_shift_plot_points(self, p_project_id: str, p_from_position: int, p_by: int) -> None:
+        for point in self.tables["plot_points"]:
+            if point.get("project_id") == p_project_id and (point.get("timeline_position") or 0) >= p_from_position:
+                point["timeline_position"] += p_by
+        return None
+
+    def _rpc_get_plot_board(self, p_project_id: str, p_known_version: int | None = None) -> Row:
+        version = next(
+            (r["version"] for r in self.tables["plot_data_versions"] if r.get("project_id") == p_project_id),
+            0,
+        )
+        if version == p_known_version:
+            return {"version": version, "unchanged": True}
+        threads = sorted(
+            (dict(t) for t in self.tables["plot_threads"] if t.get("project_id") == p_project_id),
+            key=lambda t: t.get("created_at") or "",
+        )
+        points = sorted(
+            (p for p in self.tables["plot_points"] if p.get("project_id") == p_project_id),
+            key=lambda p: p.get("timeline_position") or 0,
+        )
+        point_ids = {p["id"] for p in points}
+        entities = {e["id"]: e for e in self.tables["entities"]}
+        board_points = []
+        for point in points:
+            characters = []
+            for c in self.tables["plot_point_characters"]:
+                if c.get("plot_point_id") != point["id"]:
+                    continue
+                entity = entities.get(c.get("entity_id"))
+                characters.append(
+                    {**c, "entities": {"name": entity["name"], "id": entity["id"]} if entity else None}
+                )
+            board_points.append({**point, "characters": characters})
+        return {
+            "version": version,
+            "plot_threads": threads,
+            "plot_points": board_points,
+            "connections": [
+                dict(c) for c in self.tables["plot_point_connections"] if c.get("from_point_id") in point_ids
+            ],
+        }
@@ -0,0 +1,451 @@
+"""
+Drive the editor endpoints against the local stand-ins and report latency.
+
+Each scenario (save, analyze, suggest, ws) runs a fixed number of requests
+from a pool of client threads against one in-process app, so the numbers
+reflect a single uvicorn worker. Background jobs a scenario enqueues are
+allowed to finish before its call counts are taken, so DB and LLM calls
+per request include the work they cause, not only the request itself.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import itertools
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmark.corpus import Chapter, make_corpus
+from benchmark.fake_openai import FakeOpenAIServer, embed_text
+from benchmark.fake_supabase import FakeSupabase
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+SCENARIOS = ("save", "analyze", "suggest", "ws")
+
+Take = Callable[[], "int | None"]
+Record = Callable[[float, bool], None]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class ScenarioResult:
+    """Latencies and call counts for one scenario."""
+
+    name: str
+    concurrency: int
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    wall_seconds: float = 0.0
+    db_calls: Counter[str] = field(default_factory=Counter)
+    llm_calls: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.wall_seconds if self.wall_seconds else 0.0
+
+    def per_request(self, calls: Counter[str]) -> float:
+        return sum(calls.values()) / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "scenario": self.name,
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "p50_ms": percentile(self.latencies, 50) * 1000,
+            "p95_ms": percentile(self.latencies, 95) * 1000,
+            "p99_ms": percentile(self.latencies, 99) * 1000,
+            "throughput_rps": self.throughput,
+            "db_calls_per_request": self.per_request(self.db_calls),
+            "llm_calls_per_request": self.per_request(self.llm_calls),
+            "db_calls": dict(self.db_calls.most_common()),
+            "llm_calls": dict(self.llm_calls.most_common()),
+        }
+
+
+@dataclass
+class BenchmarkConfig:
+    scenarios: tuple[str, ...] = SCENARIOS
+    requests: int = 50
+    concurrency: int = 4
+    warmup: int = 2
+    projects: int = 4
+    chapters: int = 12
+    seed: int = 7
+    db_latency: float = 0.002
+    llm_latency: float = 0.3
+    embedding_latency: float = 0.08
+    llm_jitter: float = 0.05
+    drain_timeout: float = 30.0
+
+
+class Workload:
+    """
+    Request bodies drawn from the corpus.
+
+    The first half of the chapters is seeded as already-saved story; the
+    requests write and analyze the second half, so saves are new content
+    rather than duplicates.
+    """
+
+    def __init__(self, corpus: list[Chapter], checksum: Callable[[str], str]) -> None:
+        half = max(1, len(corpus) // 2)
+        self.seeded = corpus[:half]
+        self.live = corpus[half:] or corpus
+        self.checksum = checksum
+        self.project_ids: list[str] = []
+
+    def project(self, n: int) -> str:
+        return self.project_ids[n % len(self.project_ids)]
+
+    def paragraph(self, n: int) -> str:
+        chapter = self.live[n % len(self.live)]
+        return chapter.paragraphs[(n // len(self.live)) % len(chapter.paragraphs)]
+
+    def passage(self, n: int, paragraphs: int = 3) -> str:
+        return "\n\n".join(self.paragraph(n + i * len(self.live)) for i in range(paragraphs))
+
+    def typing_context(self, n: int) -> str:
+        """A passage cut off mid-sentence, as when ghost text is requested."""
+        text = self.passage(n, paragraphs=2)
+        return text[: len(text) - (n * 7) % 40]
+
+
+class DraftSession:
+    """
+    Client side of delta sync for one editor tab.
+
+    The first message carries the whole draft and later ones only the op
+    appending the next paragraph, as the editor sends them; after a resync
+    the full draft is sent again.
+    """
+
+    def __init__(self, workload: Workload, worker: int, stride: int) -> None:
+        self.workload = workload
+        self.project_id = workload.project(worker)
+        self.session_id = uuid.uuid4().hex
+        self.draft = ""
+        self.version: int | None = None
+        self._next = worker
+        self._stride = stride
+
+    def next_message(self) -> dict[str, Any]:
+        paragraph = self.workload.paragraph(self._next)
+        self._next += self._stride
+        previous = self.draft
+        self.draft = f"{previous}\n\n{paragraph}" if previous else paragraph
+        if self.version is None:
+            return self.full_message()
+        return {
+            "project_id": self.project_id,
+            "base_version": self.version,
+            "ops": [{"op": "insert", "pos": len(previous), "text": self.draft[len(previous):]}],
+            "checksum": self.workload.checksum(self.draft),
+        }
+
+    def full_message(self) -> dict[str, Any]:
+        return {"project_id": self.project_id, "content": self.draft}
+
+
+def _failed(payload: Any) -> bool:
+    return isinstance(payload, dict) and payload.get("status") == "error"
+
+
+class Benchmark:
+    """Runs scenarios against the app with the stand-ins wired in."""
+
+    def __init__(
+        self,
+        config: BenchmarkConfig,
+        client: Any,
+        db: FakeSupabase,
+        llm: FakeOpenAIServer,
+        workload: Workload,
+    ) -> None:
+        self.config = config
+        self.client = client
+        self.db = db
+        self.llm = llm
+        self.workload = workload
+
+    def run(self, name: str) -> ScenarioResult:
+        session = {
+            "save": self._save_session,
+            "analyze": self._analyze_session,
+            "suggest": self._suggest_session,
+            "ws": self._ws_session,
+        }[name]
+        self._run_sessions(session, self.config.warmup, None)
+        self._wait_for_jobs()
+
+        result = ScenarioResult(name=name, concurrency=self.config.concurrency)
+        db_before, llm_before = self.db.snapshot(), self.llm.snapshot()
+        start = time.perf_counter()
+        self._run_sessions(session, self.config.requests, result)
+        result.wall_seconds = time.perf_counter() - start
+        self._wait_for_jobs()
+        result.db_calls = self.db.snapshot() - db_before
+        result.llm_calls = self.llm.snapshot() - llm_before
+        return result
+
+    def _run_sessions(
+        self,
+        session: Callable[[int, Take, Record], None],
+        total: int,
+        result: ScenarioResult | None,
+    ) -> None:
+        """Run ``total`` requests spread over the client threads, one session each."""
+        if total <= 0:
+            return
+        tickets = itertools.count()
+        lock = threading.Lock()
+
+        def take() -> int | None:
+            with lock:
+                n = next(tickets)
+            return n if n < total else None
+
+        def record(latency: float, ok: bool) -> None:
+            if result is None:
+                return
+            with lock:
+                result.latencies.append(latency)
+                result.errors += not ok
+
+        workers = min(self.config.concurrency, total)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(session, worker, take, record) for worker in range(workers)]
+            for future in futures:
+                future.result()
+
+    def _post(self, path: str, body: dict[str, Any]) -> tuple[int, Any]:
+        response = self.client.post(path, json=body)
+        is_json = response.headers.get("content-type", "").startswith("application/json")
+        return response.status_code, response.json() if is_json else None
+
+    def _save_session(self, worker: int, take: Take, record: Record) -> None:
+        draft = DraftSession(self.workload, worker, self.config.concurrency)
+        while take() is not None:
+            start = time.perf_counter()
+            status, payload = self._post(
+                "/editor/save", {"session_id": draft.session_id, **draft.next_message()}
+            )
+            if status == 409:
+                # The editor resends the full draft; count both round trips
+                status, payload = self._post(
+                    "/editor/save", {"session_id": draft.session_id, **draft.full_message()}
+                )
+            record(time.perf_counter() - start, status < 400 and not _failed(payload))
+            draft.version = (payload or {}).get("version")
+
+    def _analyze_session(self, worker: int, take: Take, record: Record) -> None:
+        while (n := take()) is not None:
+            start = time.perf_counter()
+            status, payload = self._post(
+                "/editor/analyze",
+                {"project_id": self.workload.project(n), "content": self.workload.passage(n)},
+            )
+            record(time.perf_counter() - start, status < 400 and not _failed(payload))
+
+    def _suggest_session(self, worker: int, take: Take, record: Record) -> None:
+        while (n := take()) is not None:
+            start = time.perf_counter()
+            status, payload = self._post(
+                "/editor/suggest",
+                {"project_id": self.workload.project(n), "content": self.workload.typing_context(n)},
+            )
+            record(time.perf_counter() - start, status < 400 and not _failed(payload))
+
+    def _ws_session(self, worker: int, take: Take, record: Record) -> None:
+        draft = DraftSession(self.workload, worker, self.config.concurrency)
+        with self.client.websocket_connect("/ws/editor") as ws:
+            while take() is not None:
+                start = time.perf_counter()
+                ws.send_json({"type": "analyze", **draft.next_message()})
+                reply = ws.receive_json()
+                if reply.get("type") == "resync":
+                    ws.send_json({"type": "analyze", **draft.full_message()})
+                    reply = ws.receive_json()
+                ok = reply.get("type") in ("analysis", "ack") and not _failed(reply.get("payload"))
+                record(time.perf_counter() - start, ok)
+                draft.version = reply.get("version")
+
+    def _wait_for_jobs(self) -> None:
+        """Let queued background jobs (character summaries) finish."""
+        from services.job_queue import PENDING, RUNNING, get_job_queue
+
+        deadline = time.monotonic() + self.config.drain_timeout
+        while time.monotonic() < deadline:
+            stats = get_job_queue().stats()
+            if not any(counts.get(PENDING) or counts.get(RUNNING) for counts in stats.values()):
+                return
+            time.sleep(0.05)
+        print(f"Background jobs still queued after {self.config.drain_timeout}s", file=sys.stderr)
+
+
+def _load_app(db: FakeSupabase, llm_base_url: str, job_dir: str) -> Any:
+    """Import the app with its Supabase client replaced and OpenAI pointed at the stand-in."""
+    os.environ["OPENAI_BASE_URL"] = llm_base_url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    os.environ.setdefault("SUPABASE_PUBLISHABLE_KEY", "benchmark")
+    os.environ["JOB_DB_PATH"] = str(Path(job_dir) / "jobs.db")
+    sys.path.insert(0, str(APP_DIR))
+
+    # Modules bind `from lib.supabase import supabase_client` at import time,
+    # so the fake must be in place before anything else from the app loads
+    supabase_module = importlib.import_module("lib.supabase")
+    supabase_module.supabase_client = supabase_module.supabase = db
+    return importlib.import_module("app").app
+
+
+def _seed(db: FakeSupabase, workload: Workload, projects: int) -> None:
+    """Projects with the seeded chapters already saved, embeddings included."""
+    paragraphs = [p for chapter in workload.seeded for p in chapter.paragraphs]
+    # Suggestions need a blueprint; this is the shape style analysis stores
+    blueprint = {
+        "dominant_genre": "Mystery",
+        "dominant_emotion": "Tense",
+        "description": "Short declarative sentences with concrete nouns.",
+        "style_anchors": [p.split(". ")[0] + "." for p in paragraphs[:3]],
+        "top_vocabulary": ["harbor", "lantern", "tide", "ledger", "salt"],
+    }
+    for n in range(projects):
+        (project,) = db.seed(
+            "projects",
+            [
+                {
+                    "user_id": "benchmark",
+                    "title": f"Benchmark {n + 1}",
+                    "style_blueprint": blueprint,
+                    "target_pov": "Third Person",
+                }
+            ],
+        )
+        db.seed(
+            "narrative_chunks",
+            [
+                {
+                    "project_id": project["id"],
+                    "content": text,
+                    "chunk_index": index + 1,
+                    "content_hash": workload.checksum(text),
+                    "embedding": embed_text(text),
+                }
+                for index, text in enumerate(paragraphs)
+            ],
+        )
+        workload.project_ids.append(project["id"])
+
+
+def run_benchmark(config: BenchmarkConfig) -> list[ScenarioResult]:
+    """Start the stand-ins, load the app against them and run each scenario in turn."""
+    db = FakeSupabase(latency=config.db_latency)
+    with FakeOpenAIServer(
+        latency=config.llm_latency,
+        embedding_latency=config.embedding_latency,
+        jitter=config.llm_jitter,
+        seed=config.seed,
+    ) as llm, tempfile.TemporaryDirectory() as job_dir:
+        app = _load_app(db, llm.base_url, job_dir)
+        from fastapi.testclient import TestClient
+        from lib.content_hashes import compute_content_hash
+
+        workload = Workload(make_corpus(chapters=config.chapters, seed=config.seed), compute_content_hash)
+        _seed(db, workload, config.projects)
+        with TestClient(app, raise_server_exceptions=False) as client:
+            benchmark = Benchmark(config, client, db, llm, workload)
+            return [benchmark.run(name) for name in config.scenarios]
+
+
+def format_report(results: list[ScenarioResult]) -> str:
+    """A fixed-width table, then the DB and LLM calls per request by operation."""
+    header = (
+        f"{'scenario':<10}{'reqs':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'req/s':>9}{'db/req':>8}{'llm/req':>9}"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        row = result.to_dict()
+        lines.append(
+            f"{result.name:<10}{result.requests:>6}{result.errors:>8}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+            f"{result.throughput:>9.2f}{row['db_calls_per_request']:>8.2f}"
+            f"{row['llm_calls_per_request']:>9.2f}"
+        )
+    for result in results:
+        calls = (result.db_calls + result.llm_calls).most_common()
+        if calls and result.requests:
+            detail = ", ".join(f"{op} {n / result.requests:.2f}" for op, n in calls)
+            lines.append(f"  {result.name}: {detail}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the editor endpoints against local Supabase and OpenAI stand-ins."
+    )
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of: save, analyze, suggest, ws")
+    parser.add_argument("--requests", type=int, default=50, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="client threads")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests per scenario first")
+    parser.add_argument("--projects", type=int, default=4, help="seeded projects the requests are spread over")
+    parser.add_argument("--chapters", type=int, default=12, help="synthetic chapters (half are pre-seeded)")
+    parser.add_argument("--seed", type=int, default=7, help="corpus and jitter seed")
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="per PostgREST round trip")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="per chat completion")
+    parser.add_argument("--embedding-latency-ms", type=float, default=80.0, help="per embeddings call")
+    parser.add_argument("--llm-jitter-ms", type=float, default=50.0, help="uniform extra LLM latency")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="seconds to wait for background jobs")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    scenarios = tuple(s.strip() for s in args.scenarios.split(",") if s.strip())
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = run_benchmark(
+        BenchmarkConfig(
+            scenarios=scenarios,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            projects=args.projects,
+            chapters=args.chapters,
+            seed=args.seed,
+            db_latency=args.db_latency_ms / 1000,
+            llm_latency=args.llm_latency_ms / 1000,
+            embedding_latency=args.embedding_latency_ms / 1000,
+            llm_jitter=args.llm_jitter_ms / 1000,
+            drain_timeout=args.drain_timeout,
+        )
+    )
+    print(format_report(results))
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps([r.to_dict() for r in results], indent=2))
+    return 1 if any(r.errors for r in results) else 0
@@ -0,0 +1,42 @@
+-- Migration: Add match_narrative_chunks_multi for batched similarity search
+-- Purpose: Score several query embeddings against a project's chunks in one round trip
+-- Date: 2026-10-19
+
+-- query_embeddings is a JSON array of embedding arrays; each element's text
+-- form ("[0.1, 0.2, ...]") casts directly to VECTOR.
+CREATE OR REPLACE FUNCTION match_narrative_chunks_multi (
+  query_embeddings JSONB,
+  match_threshold FLOAT,
+  match_count INT,
+  p_project_id UUID
+)
+RETURNS TABLE (
+  query_index INT,
+  id UUID,
+  content TEXT,
+  similarity FLOAT,
+  chunk_index INT
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT
+    (q.ord - 1)::INT AS query_index,
+    m.id,
+    m.content,
+    m.similarity,
+    m.chunk_index
+  FROM jsonb_array_elements_text(query_embeddings) WITH ORDINALITY AS q(embedding, ord)
+  CROSS JOIN LATERAL (
+    SELECT
+      narrative_chunks.id,
+      narrative_chunks.content,
+      1 - (narrative_chunks.embedding <=> q.embedding::VECTOR(1536)) AS similarity,
+      narrative_chunks.chunk_index
+    FROM narrative_chunks
+    WHERE narrative_chunks.project_id = p_project_id
+      AND 1 - (narrative_chunks.embedding <=> q.embedding::VECTOR(1536)) > match_threshold
+    ORDER BY similarity DESC
+    LIMIT match_count
+  ) m
+  ORDER BY query_index, m.similarity DESC;
+$$;
@@ -0,0 +1,17 @@
+-- Migration: Add plot_extraction_watermarks table
+-- Purpose: Record which narrative chunks (and which version of their content)
+--          have had plot points extracted, so extraction only processes new
+--          or changed chunks
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS plot_extraction_watermarks (
+    project_id UUID REFERENCES projects(id) ON DELETE CASCADE,
+    narrative_chunk_id UUID REFERENCES narrative_chunks(id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    content_hash TEXT,
+    extracted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (project_id, narrative_chunk_id)
+);
+
+COMMENT ON TABLE plot_extraction_watermarks IS
+'One row per narrative chunk whose plot points have been extracted, with the content_hash it had at the time';
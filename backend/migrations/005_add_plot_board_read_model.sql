@@ -0,0 +1,125 @@
+-- Migration: Plot board read model
+-- Purpose: Serve GET /plot-thread/{project_id} from one aggregated query and
+--          let the API cache it per project, keyed by a plot-data version
+-- Date: 2026-10-19
+
+-- 1. Per-project plot data version, bumped by triggers on every plot table
+CREATE TABLE IF NOT EXISTS plot_data_versions (
+    project_id UUID PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION bump_plot_data_version(p_project_id UUID)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+  INSERT INTO plot_data_versions (project_id, version)
+  VALUES (p_project_id, 1)
+  ON CONFLICT (project_id)
+  DO UPDATE SET version = plot_data_versions.version + 1, updated_at = NOW();
+$$;
+
+CREATE OR REPLACE FUNCTION plot_data_changed()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  changed RECORD;
+  pid UUID;
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    changed := OLD;
+  ELSE
+    changed := NEW;
+  END IF;
+
+  IF TG_TABLE_NAME IN ('plot_threads', 'plot_points') THEN
+    pid := changed.project_id;
+  ELSIF TG_TABLE_NAME = 'plot_point_characters' THEN
+    SELECT project_id INTO pid FROM plot_points WHERE id = changed.plot_point_id;
+  ELSE
+    SELECT project_id INTO pid FROM plot_points WHERE id = changed.from_point_id;
+  END IF;
+
+  -- Rows removed by a cascading delete no longer resolve a project; the
+  -- parent row's own trigger has already bumped the version.
+  IF pid IS NOT NULL THEN
+    PERFORM bump_plot_data_version(pid);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS plot_threads_version ON plot_threads;
+CREATE TRIGGER plot_threads_version
+AFTER INSERT OR UPDATE OR DELETE ON plot_threads
+FOR EACH ROW EXECUTE FUNCTION plot_data_changed();
+
+DROP TRIGGER IF EXISTS plot_points_version ON plot_points;
+CREATE TRIGGER plot_points_version
+AFTER INSERT OR UPDATE OR DELETE ON plot_points
+FOR EACH ROW EXECUTE FUNCTION plot_data_changed();
+
+DROP TRIGGER IF EXISTS plot_point_characters_version ON plot_point_characters;
+CREATE TRIGGER plot_point_characters_version
+AFTER INSERT OR UPDATE OR DELETE ON plot_point_characters
+FOR EACH ROW EXECUTE FUNCTION plot_data_changed();
+
+DROP TRIGGER IF EXISTS plot_point_connections_version ON plot_point_connections;
+CREATE TRIGGER plot_point_connections_version
+AFTER INSERT OR UPDATE OR DELETE ON plot_point_connections
+FOR EACH ROW EXECUTE FUNCTION plot_data_changed();
+
+-- 2. Indexes for the aggregation joins
+CREATE INDEX IF NOT EXISTS idx_plot_points_project
+ON plot_points(project_id, timeline_position);
+
+CREATE INDEX IF NOT EXISTS idx_plot_point_characters_point
+ON plot_point_characters(plot_point_id);
+
+CREATE INDEX IF NOT EXISTS idx_plot_point_connections_from
+ON plot_point_connections(from_point_id);
+
+-- 3. The whole board as one JSON document, in the shape the API returns
+CREATE OR REPLACE FUNCTION get_plot_board(p_project_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT jsonb_build_object(
+    'version', COALESCE(
+      (SELECT version FROM plot_data_versions WHERE project_id = p_project_id), 0
+    ),
+    'plot_threads', COALESCE((
+      SELECT jsonb_agg(to_jsonb(t) ORDER BY t.created_at)
+      FROM plot_threads t
+      WHERE t.project_id = p_project_id
+    ), '[]'::jsonb),
+    'plot_points', COALESCE((
+      SELECT jsonb_agg(
+        to_jsonb(p) || jsonb_build_object('characters', COALESCE((
+          SELECT jsonb_agg(
+            to_jsonb(c) || jsonb_build_object(
+              'entities',
+              CASE WHEN e.id IS NULL THEN 'null'::jsonb
+                   ELSE jsonb_build_object('name', e.name, 'id', e.id) END
+            )
+          )
+          FROM plot_point_characters c
+          LEFT JOIN entities e ON e.id = c.entity_id
+          WHERE c.plot_point_id = p.id
+        ), '[]'::jsonb))
+        ORDER BY p.timeline_position
+      )
+      FROM plot_points p
+      WHERE p.project_id = p_project_id
+    ), '[]'::jsonb),
+    'connections', COALESCE((
+      SELECT jsonb_agg(to_jsonb(pc))
+      FROM plot_point_connections pc
+      JOIN plot_points p ON p.id = pc.from_point_id
+      WHERE p.project_id = p_project_id
+    ), '[]'::jsonb)
+  );
+$$;
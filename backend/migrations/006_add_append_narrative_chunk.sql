@@ -0,0 +1,74 @@
+-- Migration: Add append_narrative_chunk for atomic chunk saves
+-- Purpose: Assign the next chunk_index and dedupe on content_hash server-side, in one round trip
+-- Date: 2026-10-19
+
+-- Supports MAX(chunk_index) per project
+CREATE INDEX IF NOT EXISTS idx_narrative_chunks_project_chunk_index
+ON narrative_chunks(project_id, chunk_index);
+
+-- Enforce one chunk per (project_id, content_hash) where existing data allows it.
+-- Projects saved before this migration may already hold duplicates; they keep
+-- the plain index from 001 until cleaned up, and the function below still
+-- prevents new duplicates.
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1
+    FROM narrative_chunks
+    WHERE content_hash IS NOT NULL
+    GROUP BY project_id, content_hash
+    HAVING COUNT(*) > 1
+  ) THEN
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_narrative_chunks_project_content_hash
+    ON narrative_chunks(project_id, content_hash)
+    WHERE content_hash IS NOT NULL;
+  ELSE
+    RAISE NOTICE 'Duplicate (project_id, content_hash) rows exist; unique index not created';
+  END IF;
+END;
+$$;
+
+-- Appends a chunk at the end of the project's story, or returns the existing
+-- chunk with the same content_hash (inserted = FALSE). A per-project advisory
+-- lock makes the duplicate check and index assignment atomic, so concurrent
+-- saves can neither collide on chunk_index nor both insert the same content.
+CREATE OR REPLACE FUNCTION append_narrative_chunk (
+  p_project_id UUID,
+  p_content TEXT,
+  p_content_hash TEXT,
+  p_embedding VECTOR(1536) DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  chunk_index INT,
+  inserted BOOLEAN
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_next_index INT;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtextextended(p_project_id::TEXT, 0));
+
+  RETURN QUERY
+    SELECT c.id, c.chunk_index, FALSE
+    FROM narrative_chunks c
+    WHERE c.project_id = p_project_id
+      AND c.content_hash = p_content_hash
+    LIMIT 1;
+  IF FOUND THEN
+    RETURN;
+  END IF;
+
+  SELECT COALESCE(MAX(c.chunk_index), 0) + 1
+  INTO v_next_index
+  FROM narrative_chunks c
+  WHERE c.project_id = p_project_id;
+
+  RETURN QUERY
+    INSERT INTO narrative_chunks AS c (project_id, content, chunk_index, content_hash, embedding)
+    VALUES (p_project_id, p_content, v_next_index, p_content_hash, p_embedding)
+    RETURNING c.id, c.chunk_index, TRUE;
+END;
+$$;
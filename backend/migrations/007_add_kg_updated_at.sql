@@ -0,0 +1,37 @@
+-- Migration: Track updates to entities and relationships
+-- Purpose: Let the knowledge graph sync pick up edited rows, not just new
+--          ones, by filtering both tables on an updated_at maintained by
+--          the database
+-- Date: 2026-10-19
+
+-- 1. entities had only created_at; backfill updated_at from it
+ALTER TABLE entities ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+UPDATE entities SET updated_at = created_at WHERE created_at IS NOT NULL;
+
+-- 2. Stamp every update (relationships.updated_at was only set on insert)
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := NOW();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS entities_set_updated_at ON entities;
+CREATE TRIGGER entities_set_updated_at
+BEFORE UPDATE ON entities
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS relationships_set_updated_at ON relationships;
+CREATE TRIGGER relationships_set_updated_at
+BEFORE UPDATE ON relationships
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- 3. Indexes for the delta queries
+CREATE INDEX IF NOT EXISTS idx_entities_project_updated
+ON entities(project_id, updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_relationships_project_updated
+ON relationships(project_id, updated_at);
@@ -0,0 +1,16 @@
+-- Migration: Track updates to narrative chunks
+-- Purpose: Let in-process vector indexes pick up embeddings filled in after
+--          a chunk was first loaded (e.g. by a reindex job)
+-- Date: 2026-10-19
+
+ALTER TABLE narrative_chunks ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+UPDATE narrative_chunks SET updated_at = created_at WHERE created_at IS NOT NULL;
+
+-- set_updated_at() is defined in 007_add_kg_updated_at.sql
+DROP TRIGGER IF EXISTS narrative_chunks_set_updated_at ON narrative_chunks;
+CREATE TRIGGER narrative_chunks_set_updated_at
+BEFORE UPDATE ON narrative_chunks
+FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_narrative_chunks_project_updated
+ON narrative_chunks(project_id, updated_at);
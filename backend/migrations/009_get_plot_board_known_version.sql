@@ -0,0 +1,58 @@
+-- Migration: Plot board version from the board query itself
+-- Purpose: Read the plot-data version in the same statement as the board, so
+--          the ETag always matches the data served, and let callers holding
+--          the current version skip the aggregation entirely
+-- Date: 2026-10-19
+
+DROP FUNCTION IF EXISTS get_plot_board(UUID);
+
+-- Returns {"version": n, "unchanged": true} when p_known_version is current,
+-- otherwise the whole board with its version
+CREATE OR REPLACE FUNCTION get_plot_board(p_project_id UUID, p_known_version BIGINT DEFAULT NULL)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT CASE
+    WHEN v.version = p_known_version THEN
+      jsonb_build_object('version', v.version, 'unchanged', true)
+    ELSE jsonb_build_object(
+      'version', v.version,
+      'plot_threads', COALESCE((
+        SELECT jsonb_agg(to_jsonb(t) ORDER BY t.created_at)
+        FROM plot_threads t
+        WHERE t.project_id = p_project_id
+      ), '[]'::jsonb),
+      'plot_points', COALESCE((
+        SELECT jsonb_agg(
+          to_jsonb(p) || jsonb_build_object('characters', COALESCE((
+            SELECT jsonb_agg(
+              to_jsonb(c) || jsonb_build_object(
+                'entities',
+                CASE WHEN e.id IS NULL THEN 'null'::jsonb
+                     ELSE jsonb_build_object('name', e.name, 'id', e.id) END
+              )
+            )
+            FROM plot_point_characters c
+            LEFT JOIN entities e ON e.id = c.entity_id
+            WHERE c.plot_point_id = p.id
+          ), '[]'::jsonb))
+          ORDER BY p.timeline_position
+        )
+        FROM plot_points p
+        WHERE p.project_id = p_project_id
+      ), '[]'::jsonb),
+      'connections', COALESCE((
+        SELECT jsonb_agg(to_jsonb(pc))
+        FROM plot_point_connections pc
+        JOIN plot_points p ON p.id = pc.from_point_id
+        WHERE p.project_id = p_project_id
+      ), '[]'::jsonb)
+    )
+  END
+  FROM (
+    SELECT COALESCE(
+      (SELECT version FROM plot_data_versions WHERE project_id = p_project_id), 0
+    ) AS version
+  ) v;
+$$;
@@ -0,0 +1,30 @@
+-- Migration: Backfill plot_extraction_watermarks and add shift_plot_points
+-- Purpose: Mark chunks whose plot points were extracted before 004 as extracted,
+--          so incremental extraction does not add a second copy of every
+--          existing board; let replacement points be inserted mid-timeline
+-- Date: 2026-10-19
+
+-- 1. Every chunk that already has plot points counts as extracted at its
+--    current content_hash. Chunks without points are left for extraction.
+INSERT INTO plot_extraction_watermarks (project_id, narrative_chunk_id, chunk_index, content_hash)
+SELECT DISTINCT c.project_id, c.id, c.chunk_index, c.content_hash
+FROM narrative_chunks c
+JOIN plot_points p ON p.narrative_chunk_id = c.id
+ON CONFLICT (project_id, narrative_chunk_id) DO NOTHING;
+
+-- 2. Opens a gap of p_by positions at p_from_position in a project's
+--    timeline, so points re-extracted from an edited chunk go back where the
+--    chunk's old points were instead of after the last point.
+CREATE OR REPLACE FUNCTION shift_plot_points (
+  p_project_id UUID,
+  p_from_position INT,
+  p_by INT
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+  UPDATE plot_points
+  SET timeline_position = timeline_position + p_by
+  WHERE project_id = p_project_id
+    AND timeline_position >= p_from_position;
+$$;
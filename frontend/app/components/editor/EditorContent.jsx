@@ -20,6 +20,7 @@ import { EditorContainer } from "@/features/editor";
 import { ComparisonView } from "./ComparisonView";
 import { cn } from "@/lib/utils";
 import { analyzeWriting, saveWriting, generateSuggestions } from "@/lib/api";
+import { createDraftSync } from "@/lib/draftSync";
 
 function EditorContent({
   projectId,
@@ -33,6 +34,7 @@ function EditorContent({
 }) {
   const debounceRef = useRef(null);
   const lastContentRef = useRef("");
+  const draftSync = useMemo(() => createDraftSync(), [projectId]);
   const [editorText, setEditorText] = useState("");
   const [syncStatus, setSyncStatus] = useState("Idle");
   const [chapter, setChapter] = useState("Chapter Five:");
@@ -73,6 +75,7 @@ function EditorContent({
           await saveWriting({
             projectId,
             content: lastContentRef.current,
+            sync: draftSync,
           });
           onStoryBrainRefresh?.();
           setSyncStatus("Synced");
@@ -82,7 +85,7 @@ function EditorContent({
         }
       }, 900); // 2 second debounce for auto-save
     },
-    [projectId, onAnalysis, onStoryBrainRefresh, onEditorContentChange],
+    [projectId, draftSync, onAnalysis, onStoryBrainRefresh, onEditorContentChange],
   );
 
   const handleManualAnalyze = async () => {
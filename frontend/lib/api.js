@@ -64,14 +64,35 @@ export async function analyzeWriting({ projectId, content }) {
 
 /**
  * Save writing content for a project (persistence only, no analysis).
- * @param {{ projectId: string, content: string }}
- * @returns {Promise<{ status: string, project_id: string }>}
+ * With a draft sync (see ./draftSync.js) only the edit since the last
+ * acknowledged save is sent; a 409 from the server triggers one full resend.
+ * @param {{ projectId: string, content: string, sync?: ReturnType<typeof import("./draftSync").createDraftSync> }}
+ * @returns {Promise<{ status: string, project_id: string, version?: number, checksum?: string }>}
  */
-export async function saveWriting({ projectId, content }) {
-  const { data } = await api.post("/editor/save", {
-    project_id: projectId,
-    content,
-  });
+export async function saveWriting({ projectId, content, sync }) {
+  if (!sync) {
+    const { data } = await api.post("/editor/save", {
+      project_id: projectId,
+      content,
+    });
+    return data;
+  }
+
+  let data;
+  try {
+    ({ data } = await api.post("/editor/save", {
+      project_id: projectId,
+      ...(await sync.encode(content)),
+    }));
+  } catch (err) {
+    if (err.response?.status !== 409) throw err;
+    sync.reset();
+    ({ data } = await api.post("/editor/save", {
+      project_id: projectId,
+      ...(await sync.encode(content)),
+    }));
+  }
+  sync.ack(data.version, data.checksum);
   return data;
 }
 
@@ -196,14 +217,52 @@ export async function fetchPlotThread(projectId) {
   return data;
 }
 
+/**
+ * Fetch the status of a background job.
+ * @param {string} jobId
+ * @returns {Promise<{ status: string, job: { id: string, state: string, result: any, error: string | null } }>}
+ */
+export async function fetchJob(jobId) {
+  const { data } = await api.get(`/jobs/${jobId}`);
+  return data;
+}
+
 /**
  * Trigger AI extraction of plot points from narrative chunks.
+ * Extraction runs as a background job; this polls until it finishes.
+ * A job folded into a newer one ("superseded") is followed to that job.
+ * Gives up with an error after maxWaitMs; the job itself keeps running.
  * @param {string} projectId
+ * @param {{ pollIntervalMs?: number, maxWaitMs?: number }} [options]
  * @returns {Promise<{ status: string, plot_points_created: number, thread_id: string }>}
  */
-export async function extractPlotPoints(projectId) {
+export async function extractPlotPoints(
+  projectId,
+  { pollIntervalMs = 1500, maxWaitMs = 10 * 60 * 1000 } = {},
+) {
   const { data } = await api.post(`/plot-thread/${projectId}/extract`);
-  return data;
+  if (data.status !== "queued") return data;
+
+  let jobId = data.job_id;
+  const deadline = Date.now() + maxWaitMs;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+    const { job } = await fetchJob(jobId);
+    if (job.state === "pending" || job.state === "running") continue;
+    if (job.state === "superseded" && job.result?.superseded_by) {
+      jobId = job.result.superseded_by;
+      continue;
+    }
+    if (job.state === "succeeded") return job.result;
+    return {
+      status: "error",
+      message: job.error || `Plot extraction ${job.state}`,
+    };
+  }
+  return {
+    status: "error",
+    message: "Plot extraction is taking longer than expected. Check back later.",
+  };
 }
 
 /**
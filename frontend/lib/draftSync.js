@@ -0,0 +1,108 @@
+/**
+ * Client side of the delta autosave protocol (backend/app/lib/draft_sync.py).
+ *
+ * After the server acknowledges a draft version, later saves send only the
+ * edit since then: one delete + insert over the differing middle of the text,
+ * positions in Unicode code points, plus a checksum of the full result.
+ * Saves are not serialized: a delta sent while an earlier save is in flight
+ * is still based on the last acknowledged version, which the server keeps
+ * for a few versions after it has moved on.
+ */
+
+/**
+ * First 16 hex chars of the SHA-256 of the UTF-8 text (same as the server's content_hash).
+ * @param {string} text
+ * @returns {Promise<string | null>} null where Web Crypto is unavailable (insecure context)
+ */
+export async function contentChecksum(text) {
+  if (typeof crypto === "undefined" || !crypto.subtle) return null;
+  const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("")
+    .slice(0, 16);
+}
+
+/**
+ * Ops turning `base` into `next`: delete the differing middle, insert the new one.
+ * @param {string} base
+ * @param {string} next
+ * @returns {Array<{ op: "insert", pos: number, text: string } | { op: "delete", pos: number, len: number }>}
+ */
+export function diffOps(base, next) {
+  const a = Array.from(base);
+  const b = Array.from(next);
+  let prefix = 0;
+  while (prefix < a.length && prefix < b.length && a[prefix] === b[prefix]) prefix++;
+  let suffix = 0;
+  while (
+    suffix < a.length - prefix &&
+    suffix < b.length - prefix &&
+    a[a.length - 1 - suffix] === b[b.length - 1 - suffix]
+  ) {
+    suffix++;
+  }
+
+  const ops = [];
+  const removed = a.length - prefix - suffix;
+  if (removed > 0) ops.push({ op: "delete", pos: prefix, len: removed });
+  const inserted = b.slice(prefix, b.length - suffix).join("");
+  if (inserted) ops.push({ op: "insert", pos: prefix, text: inserted });
+  return ops;
+}
+
+/**
+ * Track the last acknowledged draft for one editor session.
+ * @returns {{ sessionId: string, encode: (content: string) => Promise<object>, ack: (version: number, checksum: string) => void, reset: () => void }}
+ */
+export function createDraftSync() {
+  const sessionId =
+    typeof crypto !== "undefined" && crypto.randomUUID
+      ? crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+  let base = null; // { version, content }
+  const pending = new Map(); // checksum -> content sent but not yet acknowledged
+
+  return {
+    sessionId,
+
+    /**
+     * Message fields for a save: ops against the acknowledged draft, or the full content.
+     */
+    async encode(content) {
+      const checksum = await contentChecksum(content);
+      if (!checksum) return { content };
+      // Re-insert so the map stays in send order
+      pending.delete(checksum);
+      pending.set(checksum, content);
+      if (!base) return { session_id: sessionId, content };
+      return {
+        session_id: sessionId,
+        base_version: base.version,
+        ops: diffOps(base.content, content),
+        checksum,
+      };
+    },
+
+    /**
+     * Record the server's acknowledgement of a sent draft. Drafts sent after
+     * it stay pending; acks older than the current base are ignored.
+     */
+    ack(version, checksum) {
+      const content = pending.get(checksum);
+      if (content === undefined || version == null) return;
+      if (base && version <= base.version) return;
+      for (const sent of pending.keys()) {
+        pending.delete(sent);
+        if (sent === checksum) break;
+      }
+      base = { version, content };
+    },
+
+    /** Forget the acknowledged draft; the next save sends the full content. */
+    reset() {
+      base = null;
+      pending.clear();
+    },
+  };
+}
@@ -1,3 +1,5 @@
+import { createDraftSync } from "./draftSync"
+
 /**
  * Create a WebSocket connection for real-time editor analysis.
  * @param {string} projectId
@@ -11,6 +13,15 @@ export function createEditorSocket(projectId) {
 
   let ws = null
   let analysisCallback = null
+  let lastContent = null
+  const sync = createDraftSync()
+
+  const send = async (content) => {
+    const fields = await sync.encode(content)
+    if (ws && ws.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify({ type: 'analyze', project_id: projectId, ...fields }))
+    }
+  }
 
   try {
     ws = new WebSocket(wsUrl)
@@ -30,6 +41,14 @@ export function createEditorSocket(projectId) {
   ws.onmessage = (event) => {
     try {
       const msg = JSON.parse(event.data)
+      if (msg.type === 'analysis' || msg.type === 'ack') {
+        sync.ack(msg.version, msg.checksum)
+      }
+      if (msg.type === 'resync' && lastContent !== null) {
+        // The server could not apply our edit: send the whole draft once
+        sync.reset()
+        send(lastContent)
+      }
       if (msg.type === 'analysis' && msg.payload && analysisCallback) {
         analysisCallback(msg.payload)
       }
@@ -48,15 +67,9 @@ export function createEditorSocket(projectId) {
 
   return {
     sendAnalyze(content) {
-      if (ws && ws.readyState === WebSocket.OPEN) {
-        ws.send(
-          JSON.stringify({
-            type: 'analyze',
-            project_id: projectId,
-            content,
-          })
-        )
-      }
+      // After the first acknowledged draft, only the edit since then is sent
+      lastContent = content
+      send(content)
     },
     onAnalysis(callback) {
       analysisCallback = callback